@@ -3,16 +3,19 @@ AI Judgment Criteria Management API Routes
 AI 판정 기준 관리 API
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy import select
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 
-from app.database.connection import get_db
+from app.database.connection import get_db, get_async_db
 from app.database.schema import (
     CustomerSpec, DefectType, DefectCondition,
     MeasurementCondition, Specification, Expression
 )
+from app.services.stats_service import stats_service
 
 router = APIRouter(prefix="/api/ai-judgment", tags=["AI Judgment Criteria"])
 
@@ -105,17 +108,17 @@ class DefectConditionData(BaseModel):
 
 @router.get("/customer-specs")
 async def get_customer_specs(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all customer specs for the left panel
     왼쪽 패널용 고객사 Spec 목록 조회
     """
-    specs = db.query(CustomerSpec).order_by(
+    specs = (await db.execute(select(CustomerSpec).order_by(
         CustomerSpec.customer,
         CustomerSpec.category3,
         CustomerSpec.rms_rev.desc()
-    ).all()
+    ))).scalars().all()
 
     return {
         "status": "success",
@@ -127,20 +130,22 @@ async def get_customer_specs(
 @router.get("/defect-types/{spec_id}")
 async def get_defect_types_by_spec(
     spec_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all defect types for a specific customer spec
     특정 고객사 Spec의 불량 유형 목록 조회 (중앙 패널)
     """
     # Verify spec exists
-    spec = db.query(CustomerSpec).filter(CustomerSpec.id == spec_id).first()
+    spec = await db.get(CustomerSpec, spec_id)
     if not spec:
         raise HTTPException(status_code=404, detail=f"Spec with id {spec_id} not found")
 
-    defect_types = db.query(DefectType).filter(
-        DefectType.spec_id == spec_id
-    ).order_by(DefectType.ai_code).all()
+    defect_types = (await db.execute(
+        select(DefectType).where(
+            DefectType.spec_id == spec_id
+        ).order_by(DefectType.ai_code)
+    )).scalars().all()
 
     return {
         "status": "success",
@@ -151,13 +156,14 @@ async def get_defect_types_by_spec(
 
 
 @router.get("/specifications/{defect_type_id}")
-async def get_specifications_by_defect_type(
+def get_specifications_by_defect_type(
     defect_type_id: int,
     db: Session = Depends(get_db)
 ):
     """
     Get all specifications hierarchy for a specific defect type
     특정 불량 유형의 판정 기준 계층 구조 조회 (오른쪽 패널)
+    (동기 세션 사용 → threadpool에서 실행)
 
     Returns:
         defect_conditions -> measurement_conditions -> specifications -> expressions
@@ -277,23 +283,20 @@ def get_child_specifications(parent_id: int, db: Session) -> List[SpecificationD
 
 
 @router.get("/stats")
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics():
     """
     Get statistics for the dashboard
-    대시보드용 통계 조회
+    대시보드용 통계 조회 (stats_service DB 누적 집계)
     """
-    total_specs = db.query(func.count(CustomerSpec.id)).scalar()
-    total_defect_types = db.query(func.count(DefectType.id)).scalar()
-    total_customers = db.query(func.count(func.distinct(CustomerSpec.customer))).scalar()
-    total_categories = db.query(func.count(func.distinct(CustomerSpec.category3))).scalar()
+    stats = await run_in_threadpool(stats_service.get_spec_stats)
 
     return {
         "status": "success",
         "statistics": {
-            "total_specs": total_specs,
-            "total_defect_types": total_defect_types,
-            "total_customers": total_customers,
-            "total_categories": total_categories
+            "total_specs": stats["total_specs"],
+            "total_defect_types": stats["total_defect_types"],
+            "total_customers": stats["total_customers"],
+            "total_categories": stats["total_categories"]
         }
     }
 
@@ -7,16 +7,13 @@ from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-import pg8000
+
+from app.database.connection import engine
 
 router = APIRouter(prefix="/measurement-params", tags=["Measurement Parameters"])
 
-# Database connection settings (connection.py와 동일)
-DB_HOST = "localhost"
-DB_PORT = 5432
-DB_NAME = "pcb_inspection_db"
-DB_USER = "postgres"
-DB_PASSWORD = "0"
+# ensure_table_exists()는 프로세스당 한 번만 DDL을 실행
+_table_ready = False
 
 
 # ========== Pydantic Models ==========
@@ -72,18 +69,21 @@ class DistinctParameterResponse(BaseModel):
 # ========== Database Helper ==========
 
 def get_db_connection():
-    """PostgreSQL 연결 (pg8000 사용)"""
-    return pg8000.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD
-    )
+    """
+    PostgreSQL 연결 (connection.py의 SQLAlchemy 엔진 풀 공유)
+
+    pg8000 DBAPI 연결을 그대로 반환하므로 cursor/%s 파라미터 사용법은 동일하며,
+    close() 시 연결이 끊기지 않고 풀로 반환됩니다.
+    """
+    return engine.raw_connection()
 
 
 def ensure_table_exists():
     """ai_spec_v2.measurement_params 테이블이 없으면 생성"""
+    global _table_ready
+    if _table_ready:
+        return
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -102,15 +102,18 @@ def ensure_table_exists():
             )
         """)
         conn.commit()
+        _table_ready = True
     finally:
         cursor.close()
         conn.close()
 
 
 # ========== API Endpoints ==========
+# 엔드포인트는 blocking DB 호출을 하므로 async가 아닌 def로 선언하여
+# FastAPI threadpool에서 실행되도록 함 (이벤트 루프 blocking 방지)
 
 @router.get("/distinct-from-specs", response_model=DistinctParameterResponse)
-async def get_distinct_parameters_from_specs():
+def get_distinct_parameters_from_specs():
     """
     기존 ai_spec_v2.specifications 테이블에서
     DISTINCT한 measurement_name, unit 조합 조회
@@ -151,7 +154,7 @@ async def get_distinct_parameters_from_specs():
 
 
 @router.get("", response_model=MeasurementParameterListResponse)
-async def list_measurement_parameters(
+def list_measurement_parameters(
     search: Optional[str] = Query(None, description="검색어 (name, unit, description)"),
     isActive: Optional[bool] = Query(None, description="활성 상태 필터"),
     skip: int = Query(0, ge=0),
@@ -165,50 +168,43 @@ async def list_measurement_parameters(
     cursor = conn.cursor()
 
     try:
-        # 기본 쿼리
-        query = """
-            SELECT id, name, unit, description, is_active,
-                   created_by, created_at, updated_by, updated_at
-            FROM ai_spec_v2.measurement_params
-            WHERE 1=1
-        """
+        # 기본 쿼리 (전체 카운트는 window function으로 함께 조회)
+        where = " WHERE 1=1"
         params = []
 
         # 검색 조건
         if search:
-            query += " AND (name ILIKE %s OR unit ILIKE %s OR description ILIKE %s)"
+            where += " AND (name ILIKE %s OR unit ILIKE %s OR description ILIKE %s)"
             search_pattern = f"%{search}%"
             params.extend([search_pattern, search_pattern, search_pattern])
 
         # 활성 상태 필터
         if isActive is not None:
-            query += " AND is_active = %s"
+            where += " AND is_active = %s"
             params.append(isActive)
 
+        query = """
+            SELECT id, name, unit, description, is_active,
+                   created_by, created_at, updated_by, updated_at,
+                   COUNT(*) OVER() AS total_count
+            FROM ai_spec_v2.measurement_params
+        """ + where
+
         # 정렬 및 페이징
         query += " ORDER BY name ASC LIMIT %s OFFSET %s"
-        params.extend([limit, skip])
 
-        cursor.execute(query, params)
+        cursor.execute(query, params + [limit, skip])
         rows = cursor.fetchall()
 
         # 전체 카운트
-        count_query = "SELECT COUNT(*) FROM ai_spec_v2.measurement_params WHERE 1=1"
-        count_params = []
-
-        if search:
-            count_query += " AND (name ILIKE %s OR unit ILIKE %s OR description ILIKE %s)"
-            count_params.extend([search_pattern, search_pattern, search_pattern])
-
-        if isActive is not None:
-            count_query += " AND is_active = %s"
-            count_params.append(isActive)
-
-        if count_params:
-            cursor.execute(count_query, count_params)
+        if rows:
+            total = rows[0][9]
+        elif skip > 0:
+            # 범위를 벗어난 페이지는 window 결과가 없으므로 별도 카운트
+            cursor.execute("SELECT COUNT(*) FROM ai_spec_v2.measurement_params" + where, params)
+            total = cursor.fetchone()[0]
         else:
-            cursor.execute(count_query)
-        total = cursor.fetchone()[0]
+            total = 0
 
         # 응답 데이터 변환
         data = []
@@ -239,7 +235,7 @@ async def list_measurement_parameters(
 
 
 @router.get("/{param_id}", response_model=MeasurementParameterResponse)
-async def get_measurement_parameter(param_id: str):
+def get_measurement_parameter(param_id: str):
     """
     Measurement Parameter 상세 조회
     """
@@ -282,7 +278,7 @@ async def get_measurement_parameter(param_id: str):
 
 
 @router.post("", response_model=MeasurementParameterResponse)
-async def create_measurement_parameter(data: MeasurementParameterCreate):
+def create_measurement_parameter(data: MeasurementParameterCreate):
     """
     Measurement Parameter 신규 등록
     """
@@ -333,7 +329,7 @@ async def create_measurement_parameter(data: MeasurementParameterCreate):
 
 
 @router.post("/bulk-import")
-async def bulk_import_from_specs(createdBy: Optional[str] = None):
+def bulk_import_from_specs(createdBy: Optional[str] = None):
     """
     기존 specifications 테이블에서 DISTINCT한 파라미터를
     measurement_parameters 테이블로 일괄 등록
@@ -397,7 +393,7 @@ async def bulk_import_from_specs(createdBy: Optional[str] = None):
 
 
 @router.put("/{param_id}", response_model=MeasurementParameterResponse)
-async def update_measurement_parameter(param_id: str, data: MeasurementParameterUpdate):
+def update_measurement_parameter(param_id: str, data: MeasurementParameterUpdate):
     """
     Measurement Parameter 수정
     """
@@ -498,7 +494,7 @@ async def update_measurement_parameter(param_id: str, data: MeasurementParameter
 
 
 @router.delete("/{param_id}")
-async def delete_measurement_parameter(param_id: str):
+def delete_measurement_parameter(param_id: str):
     """
     Measurement Parameter 삭제 (비활성화)
     """
@@ -534,7 +530,7 @@ async def delete_measurement_parameter(param_id: str):
 
 
 @router.delete("/{param_id}/permanent")
-async def permanently_delete_measurement_parameter(param_id: str):
+def permanently_delete_measurement_parameter(param_id: str):
     """
     Measurement Parameter 영구 삭제
     """
@@ -3,8 +3,8 @@ Customer Spec Management CRUD API Routes
 고객 Spec 생성, 수정, 삭제, 복사 기능
 """
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
@@ -15,6 +15,7 @@ from app.database.schema import (
     CustomerSpec, DefectType, DefectCondition,
     MeasurementCondition, Specification, Expression
 )
+from app.services.stats_service import stats_service
 
 router = APIRouter()
 
@@ -104,7 +105,7 @@ class CustomerSpecUpdate(BaseModel):
 # ============================================================
 
 @router.post("/spec")
-async def create_spec(
+def create_spec(
     spec_data: CustomerSpecCreate,
     db: Session = Depends(get_db)
 ):
@@ -245,7 +246,7 @@ def create_specification_tree(
 # ============================================================
 
 @router.patch("/spec/{spec_id}")
-async def update_spec(
+def update_spec(
     spec_id: int,
     spec_update: CustomerSpecUpdate,
     db: Session = Depends(get_db)
@@ -287,7 +288,7 @@ async def update_spec(
 # ============================================================
 
 @router.delete("/spec/{spec_id}")
-async def delete_spec(
+def delete_spec(
     spec_id: int,
     db: Session = Depends(get_db)
 ):
@@ -323,11 +324,137 @@ async def delete_spec(
 # COPY: Spec 복사 (새 버전 생성)
 # ============================================================
 
+def _copy_columns(model, *exclude: str) -> List[str]:
+    """복사 대상 컬럼 목록 (PK/FK 제외)"""
+    return [c.name for c in model.__table__.columns if c.name not in ("id", *exclude)]
+
+
+# 계층별 복사 정의: (테이블, 부모 FK 컬럼, 부모 매핑 테이블, 자기 매핑 테이블, 복사 컬럼)
+# 부모 매핑 테이블이 None이면 최상위(DefectType)로, 부모 FK에 새 spec_id를 바인딩
+_COPY_LEVELS = [
+    (DefectType.__table__, "spec_id", None, "_copy_map_dt",
+     _copy_columns(DefectType, "spec_id")),
+    (DefectCondition.__table__, "defect_type_id", "_copy_map_dt", "_copy_map_dc",
+     _copy_columns(DefectCondition, "defect_type_id")),
+    (MeasurementCondition.__table__, "defect_condition_id", "_copy_map_dc", "_copy_map_mc",
+     _copy_columns(MeasurementCondition, "defect_condition_id")),
+    (Specification.__table__, "measurement_condition_id", "_copy_map_mc", "_copy_map_sp",
+     _copy_columns(Specification, "measurement_condition_id", "parent_spec_id")),
+    (Expression.__table__, "specification_id", "_copy_map_sp", None,
+     _copy_columns(Expression, "specification_id")),
+]
+
+# dry-run 시 diff로 보여줄 CustomerSpec 헤더 필드
+_COPY_HEADER_FIELDS = [
+    "customer", "category3", "customized", "rms_rev", "threshold",
+    "rms_rev_datetime", "is_changed", "max_rev", "original_filename",
+]
+
+
+def count_spec_tree(db: Session, spec_id: int) -> Dict[str, int]:
+    """Spec 하위 계층별 행 수를 한 번의 쿼리로 조회"""
+    row = db.execute(text("""
+        SELECT
+            (SELECT COUNT(*) FROM ai_spec_v2.defect_types dt
+              WHERE dt.spec_id = :spec_id),
+            (SELECT COUNT(*) FROM ai_spec_v2.defect_conditions dc
+               JOIN ai_spec_v2.defect_types dt ON dt.id = dc.defect_type_id
+              WHERE dt.spec_id = :spec_id),
+            (SELECT COUNT(*) FROM ai_spec_v2.measurement_conditions mc
+               JOIN ai_spec_v2.defect_conditions dc ON dc.id = mc.defect_condition_id
+               JOIN ai_spec_v2.defect_types dt ON dt.id = dc.defect_type_id
+              WHERE dt.spec_id = :spec_id),
+            (SELECT COUNT(*) FROM ai_spec_v2.specifications sp
+               JOIN ai_spec_v2.measurement_conditions mc ON mc.id = sp.measurement_condition_id
+               JOIN ai_spec_v2.defect_conditions dc ON dc.id = mc.defect_condition_id
+               JOIN ai_spec_v2.defect_types dt ON dt.id = dc.defect_type_id
+              WHERE dt.spec_id = :spec_id),
+            (SELECT COUNT(*) FROM ai_spec_v2.expressions ex
+               JOIN ai_spec_v2.specifications sp ON sp.id = ex.specification_id
+               JOIN ai_spec_v2.measurement_conditions mc ON mc.id = sp.measurement_condition_id
+               JOIN ai_spec_v2.defect_conditions dc ON dc.id = mc.defect_condition_id
+               JOIN ai_spec_v2.defect_types dt ON dt.id = dc.defect_type_id
+              WHERE dt.spec_id = :spec_id)
+    """), {"spec_id": spec_id}).one()
+
+    return {level[0].name: count for level, count in zip(_COPY_LEVELS, row)}
+
+
+def copy_spec_tree(db: Session, src_spec_id: int, new_spec_id: int) -> Dict[str, int]:
+    """
+    Spec 하위 계층 전체를 set-based로 복사 (INSERT ... SELECT)
+
+    계층마다 (old_id → new_id) 매핑 임시 테이블을 만들고, 새 ID는 시퀀스에서
+    미리 할당합니다. 다음 계층은 부모 매핑 테이블과 JOIN하여 FK를 재매핑하므로
+    행 수와 무관하게 계층당 2개의 statement로 복사가 끝납니다.
+    Specification의 parent_spec_id(자기 참조)도 같은 매핑 테이블로 재매핑합니다.
+
+    매핑 테이블은 ON COMMIT DROP 이므로 호출자가 commit/rollback 하면 정리됩니다.
+
+    Returns:
+        테이블별 복사된 행 수
+    """
+    copied = {}
+
+    for table, parent_fk, parent_map, own_map, columns in _COPY_LEVELS:
+        table_name = f"{table.schema}.{table.name}"
+        col_list = ", ".join(columns)
+        src_cols = ", ".join(f"t.{c}" for c in columns)
+
+        if parent_map is None:
+            source = f"FROM {table_name} t WHERE t.{parent_fk} = :src_spec_id"
+            parent_select = ":new_spec_id"
+        else:
+            source = f"FROM {table_name} t JOIN {parent_map} pm ON pm.old_id = t.{parent_fk}"
+            parent_select = "pm.new_id"
+
+        if own_map is None:
+            # 최하위 계층(Expression)은 매핑이 필요 없으므로 바로 복사
+            result = db.execute(text(f"""
+                INSERT INTO {table_name} ({parent_fk}, {col_list})
+                SELECT {parent_select}, {src_cols}
+                {source}
+            """), {"src_spec_id": src_spec_id, "new_spec_id": new_spec_id})
+            copied[table.name] = result.rowcount
+            continue
+
+        db.execute(text(f"""
+            CREATE TEMP TABLE {own_map} ON COMMIT DROP AS
+            SELECT t.id AS old_id,
+                   nextval(pg_get_serial_sequence('{table_name}', 'id')) AS new_id,
+                   {parent_select} AS new_parent_id
+            {source}
+        """), {"src_spec_id": src_spec_id, "new_spec_id": new_spec_id})
+
+        if table is Specification.__table__:
+            # SubSpecification: 부모 Specification도 같은 매핑으로 재매핑
+            insert_sql = f"""
+                INSERT INTO {table_name} (id, {parent_fk}, parent_spec_id, {col_list})
+                SELECT m.new_id, m.new_parent_id, pm2.new_id, {src_cols}
+                FROM {table_name} t
+                JOIN {own_map} m ON m.old_id = t.id
+                LEFT JOIN {own_map} pm2 ON pm2.old_id = t.parent_spec_id
+            """
+        else:
+            insert_sql = f"""
+                INSERT INTO {table_name} (id, {parent_fk}, {col_list})
+                SELECT m.new_id, m.new_parent_id, {src_cols}
+                FROM {table_name} t
+                JOIN {own_map} m ON m.old_id = t.id
+            """
+
+        result = db.execute(text(insert_sql))
+        copied[table.name] = result.rowcount
+
+    return copied
+
+
 @router.post("/spec/{spec_id}/copy")
-async def copy_spec(
+def copy_spec(
     spec_id: int,
     new_rev: Optional[int] = None,
     new_customized: Optional[str] = None,
+    dry_run: bool = False,
     db: Session = Depends(get_db)
 ):
     """
@@ -337,13 +464,11 @@ async def copy_spec(
         spec_id: 복사할 원본 Spec ID
         new_rev: 새 Rev 번호 (지정하지 않으면 자동으로 +1)
         new_customized: 새 Customized 값 (지정하지 않으면 원본 유지)
+        dry_run: True이면 DB를 변경하지 않고 변경될 헤더 필드와 복사될 행 수만 반환
 
-    전체 계층 구조가 복사됩니다.
+    전체 계층 구조가 set-based(INSERT ... SELECT)로 복사됩니다.
     """
-    # 원본 Spec 조회 (모든 관계 포함)
-    original_spec = db.query(CustomerSpec).options(
-        joinedload(CustomerSpec.defect_types)
-    ).filter(CustomerSpec.id == spec_id).first()
+    original_spec = db.query(CustomerSpec).filter(CustomerSpec.id == spec_id).first()
 
     if not original_spec:
         raise HTTPException(status_code=404, detail="Original spec not found")
@@ -359,128 +484,57 @@ async def copy_spec(
             ).scalar() or 0
             new_rev = max_rev + 1
 
+        new_values = {
+            "customer": original_spec.customer,
+            "category3": original_spec.category3,
+            "customized": new_customized or original_spec.customized,
+            "rms_rev": new_rev,
+            "threshold": original_spec.threshold,
+            "rms_rev_datetime": datetime.now().strftime("%Y%m%d%H%M%S"),
+            "is_changed": False,
+            "max_rev": new_rev,
+            "original_filename": f"COPIED_FROM_{original_spec.id}_{original_spec.original_filename or 'unknown'}"
+        }
+
+        if dry_run:
+            changes = {
+                field: {"from": getattr(original_spec, field), "to": new_values[field]}
+                for field in _COPY_HEADER_FIELDS
+                if getattr(original_spec, field) != new_values[field]
+            }
+            return {
+                "status": "success",
+                "dry_run": True,
+                "original_spec_id": spec_id,
+                "new_rev": new_rev,
+                "changes": changes,
+                "rows_to_copy": count_spec_tree(db, spec_id)
+            }
+
         # 새 Spec 생성
-        new_spec = CustomerSpec(
-            customer=original_spec.customer,
-            category3=original_spec.category3,
-            customized=new_customized or original_spec.customized,
-            rms_rev=new_rev,
-            threshold=original_spec.threshold,
-            rms_rev_datetime=datetime.now().strftime("%Y%m%d%H%M%S"),
-            is_changed=False,
-            max_rev=new_rev,
-            original_filename=f"COPIED_FROM_{original_spec.id}_{original_spec.original_filename or 'unknown'}"
-        )
+        new_spec = CustomerSpec(**new_values)
         db.add(new_spec)
         db.flush()
 
-        # DefectTypes 복사
-        for original_dt in original_spec.defect_types:
-            copy_defect_type(db, new_spec.id, original_dt)
+        # 하위 계층 set-based 복사
+        copied = copy_spec_tree(db, spec_id, new_spec.id)
+        # 하위 계층은 ORM 이벤트 없이 복사되었으므로 통계 증분을 같은 트랜잭션에서 기록
+        stats_service.record(db, [
+            ("defect_type", copied.get(DefectType.__tablename__, 0)),
+            ("defect_condition", copied.get(DefectCondition.__tablename__, 0)),
+        ])
 
         db.commit()
-        db.refresh(new_spec)
 
         return {
             "status": "success",
             "message": f"Spec copied successfully from ID {spec_id}",
             "original_spec_id": spec_id,
             "new_spec_id": new_spec.id,
-            "new_rev": new_rev
+            "new_rev": new_rev,
+            "copied": copied
         }
 
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to copy spec: {str(e)}")
-
-
-def copy_defect_type(db: Session, new_spec_id: int, original_dt: DefectType):
-    """DefectType과 하위 구조 전체 복사"""
-    # DefectType 복사
-    new_dt = DefectType(
-        spec_id=new_spec_id,
-        ai_code=original_dt.ai_code,
-        side=original_dt.side,
-        unit_dummy=original_dt.unit_dummy,
-        area=original_dt.area,
-        defect_name=original_dt.defect_name,
-        multiple=original_dt.multiple,
-        threshold_ok=original_dt.threshold_ok,
-        threshold_ng=original_dt.threshold_ng,
-        remark=original_dt.remark
-    )
-    db.add(new_dt)
-    db.flush()
-
-    # DefectConditions 복사
-    for original_dc in original_dt.defect_conditions:
-        copy_defect_condition(db, new_dt.id, original_dc)
-
-
-def copy_defect_condition(db: Session, new_dt_id: int, original_dc: DefectCondition):
-    """DefectCondition과 하위 구조 전체 복사"""
-    new_dc = DefectCondition(
-        defect_type_id=new_dt_id,
-        idx=original_dc.idx,
-        machine_type=original_dc.machine_type,
-        metal_value_percent=original_dc.metal_value_percent,
-        no_measurement_default_result=original_dc.no_measurement_default_result
-    )
-    db.add(new_dc)
-    db.flush()
-
-    # MeasurementConditions 복사
-    for original_mc in original_dc.measurement_conditions:
-        copy_measurement_condition(db, new_dc.id, original_mc)
-
-
-def copy_measurement_condition(db: Session, new_dc_id: int, original_mc: MeasurementCondition):
-    """MeasurementCondition과 하위 구조 전체 복사"""
-    new_mc = MeasurementCondition(
-        defect_condition_id=new_dc_id,
-        idx=original_mc.idx,
-        measurement_name=original_mc.measurement_name,
-        default_result_value=original_mc.default_result_value,
-        root_logical_operator=original_mc.root_logical_operator,
-        measurement_condition_value=original_mc.measurement_condition_value,
-        measurement_condition_unit=original_mc.measurement_condition_unit,
-        measurement_condition_inequality_sign=original_mc.measurement_condition_inequality_sign
-    )
-    db.add(new_mc)
-    db.flush()
-
-    # Specifications 복사 (루트만)
-    for original_spec in original_mc.specifications:
-        if original_spec.parent_spec_id is None:  # 루트만
-            copy_specification_tree(db, new_mc.id, None, original_spec)
-
-
-def copy_specification_tree(
-    db: Session,
-    new_mc_id: int,
-    new_parent_id: Optional[int],
-    original_spec: Specification
-):
-    """Specification 트리 재귀적 복사"""
-    new_spec = Specification(
-        measurement_condition_id=new_mc_id,
-        parent_spec_id=new_parent_id,
-        measurement_name=original_spec.measurement_name,
-        unit=original_spec.unit,
-        sub_logical_operator=original_spec.sub_logical_operator
-    )
-    db.add(new_spec)
-    db.flush()
-
-    # Expressions 복사
-    for original_expr in original_spec.expressions:
-        new_expr = Expression(
-            specification_id=new_spec.id,
-            value=original_expr.value,
-            inequality_sign=original_expr.inequality_sign
-        )
-        db.add(new_expr)
-
-    # SubSpecifications 재귀 복사
-    for original_sub in original_spec.sub_specifications:
-        copy_specification_tree(db, new_mc_id, new_spec.id, original_sub)
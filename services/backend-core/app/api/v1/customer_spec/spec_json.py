@@ -2,16 +2,18 @@
 Customer Spec JSON Import/Export API Routes
 JSON 파일 업로드 및 다운로드 기능
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import JSONResponse, FileResponse
-from sqlalchemy.orm import Session, joinedload
-from typing import Dict, Any, Optional, List
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, Any, Optional, List, Iterator, Literal
+import io
 import json
 import tempfile
 import os
+import zipfile
 from datetime import datetime
 
-from app.database.connection import get_db
+from app.database.connection import get_db, SessionLocal
 from app.database.schema import (
     CustomerSpec, DefectType, DefectCondition,
     MeasurementCondition, Specification, Expression
@@ -197,7 +199,7 @@ def import_specification_tree(
 # ============================================================
 
 @router.get("/spec/{spec_id}/export-json")
-async def export_json(
+def export_json(
     spec_id: int,
     db: Session = Depends(get_db)
 ):
@@ -216,24 +218,10 @@ async def export_json(
 
     try:
         # JSON 구조 생성
-        json_data = {
-            "customer": spec.customer,
-            "category3": spec.category3,
-            "customized": spec.customized,
-            "rms_rev": spec.rms_rev,
-            "threshold": spec.threshold,
-            "rms_rev_datetime": spec.rms_rev_datetime,
-            "is_changed": spec.is_changed,
-            "max_rev": spec.max_rev,
-            "DefectTypes": []
-        }
-
-        # DefectTypes 추가
-        for dt in spec.defect_types:
-            json_data["DefectTypes"].append(export_defect_type(db, dt))
+        json_data = build_spec_export(spec)
 
         # 파일명 생성
-        filename = f"{spec.customer}_{spec.category3}_{spec.customized}_Rev_{spec.rms_rev}_{spec.rms_rev_datetime}.json"
+        filename = export_filename(spec)
 
         # 임시 파일 생성
         with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json', encoding='utf-8') as tmp_file:
@@ -252,6 +240,26 @@ async def export_json(
         raise HTTPException(status_code=500, detail=f"Failed to export JSON: {str(e)}")
 
 
+def export_filename(spec: CustomerSpec) -> str:
+    """Export JSON 파일명"""
+    return f"{spec.customer}_{spec.category3}_{spec.customized}_Rev_{spec.rms_rev}_{spec.rms_rev_datetime}.json"
+
+
+def build_spec_export(spec: CustomerSpec, db: Optional[Session] = None) -> Dict[str, Any]:
+    """CustomerSpec 전체 계층을 JSON 구조로 변환"""
+    return {
+        "customer": spec.customer,
+        "category3": spec.category3,
+        "customized": spec.customized,
+        "rms_rev": spec.rms_rev,
+        "threshold": spec.threshold,
+        "rms_rev_datetime": spec.rms_rev_datetime,
+        "is_changed": spec.is_changed,
+        "max_rev": spec.max_rev,
+        "DefectTypes": [export_defect_type(db, dt) for dt in spec.defect_types]
+    }
+
+
 def export_defect_type(db: Session, dt: DefectType) -> Dict[str, Any]:
     """DefectType을 JSON 구조로 변환"""
     return {
@@ -281,6 +289,12 @@ def export_defect_condition(db: Session, dc: DefectCondition) -> Dict[str, Any]:
 
 def export_measurement_condition(db: Session, mc: MeasurementCondition) -> Dict[str, Any]:
     """MeasurementCondition을 JSON 구조로 변환"""
+    # mc.specifications에는 SubSpecification까지 모두 포함되어 있으므로
+    # parent_spec_id로 묶어 트리를 구성 (sub_specifications lazy load 방지)
+    children: Dict[Optional[int], List[Specification]] = {}
+    for spec in mc.specifications:
+        children.setdefault(spec.parent_spec_id, []).append(spec)
+
     return {
         "idx": mc.idx,
         "measurement_name": mc.measurement_name,
@@ -290,15 +304,18 @@ def export_measurement_condition(db: Session, mc: MeasurementCondition) -> Dict[
         "measurement_condition_unit": mc.measurement_condition_unit,
         "measurement_condition_inequality_sign": mc.measurement_condition_inequality_sign,
         "Specifications": [
-            export_specification_tree(spec)
-            for spec in mc.specifications
-            if spec.parent_spec_id is None  # 루트만
+            export_specification_tree(spec, children)
+            for spec in children.get(None, [])  # 루트만
         ]
     }
 
 
-def export_specification_tree(spec: Specification) -> Dict[str, Any]:
+def export_specification_tree(
+    spec: Specification,
+    children: Optional[Dict[Optional[int], List[Specification]]] = None
+) -> Dict[str, Any]:
     """Specification 트리를 재귀적으로 JSON 구조로 변환"""
+    sub_specs = children.get(spec.id, []) if children is not None else spec.sub_specifications
     return {
         "measurement_name": spec.measurement_name,
         "unit": spec.unit,
@@ -311,12 +328,139 @@ def export_specification_tree(spec: Specification) -> Dict[str, Any]:
             for expr in spec.expressions
         ],
         "SubSpecifications": [
-            export_specification_tree(sub_spec)
-            for sub_spec in spec.sub_specifications
-        ] if spec.sub_specifications else []
+            export_specification_tree(sub_spec, children)
+            for sub_spec in sub_specs
+        ] if sub_specs else []
     }
 
 
+# ============================================================
+# Bulk JSON 다운로드 (Streaming Export)
+# ============================================================
+
+# 한 번에 eager loading 할 Spec 수 (메모리 상한)
+EXPORT_BATCH_SIZE = 20
+
+
+class _ChunkWriter(io.RawIOBase):
+    """ZipFile 출력을 받아 청크 단위로 꺼낼 수 있는 write-only 스트림"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _export_options():
+    """Spec 전체 계층을 계층당 1회의 IN 쿼리로 로드하는 옵션"""
+    mc_loader = selectinload(CustomerSpec.defect_types) \
+        .selectinload(DefectType.defect_conditions) \
+        .selectinload(DefectCondition.measurement_conditions)
+    return (
+        mc_loader.selectinload(MeasurementCondition.specifications)
+                 .selectinload(Specification.expressions),
+    )
+
+
+def iter_spec_exports(
+    customer: Optional[str] = None,
+    category3: Optional[str] = None
+) -> Iterator[tuple]:
+    """
+    필터 조건에 맞는 Spec을 EXPORT_BATCH_SIZE 단위로 로드하여
+    (spec, export dict)를 순서대로 yield
+
+    배치마다 세션을 비우므로 전체 Spec 수와 무관하게 메모리 사용량이 일정합니다.
+    StreamingResponse가 응답을 모두 보낼 때까지 세션이 필요하므로
+    요청 스코프 세션 대신 자체 세션을 사용합니다.
+    """
+    db = SessionLocal()
+    try:
+        id_query = db.query(CustomerSpec.id)
+        if customer:
+            id_query = id_query.filter(CustomerSpec.customer == customer)
+        if category3:
+            id_query = id_query.filter(CustomerSpec.category3 == category3)
+        spec_ids = [row[0] for row in id_query.order_by(CustomerSpec.id).all()]
+
+        for start in range(0, len(spec_ids), EXPORT_BATCH_SIZE):
+            batch_ids = spec_ids[start:start + EXPORT_BATCH_SIZE]
+            specs = db.query(CustomerSpec).options(*_export_options()) \
+                .filter(CustomerSpec.id.in_(batch_ids)) \
+                .order_by(CustomerSpec.id).all()
+
+            for spec in specs:
+                yield spec, build_spec_export(spec, db)
+
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+def _stream_ndjson(customer: Optional[str], category3: Optional[str]) -> Iterator[bytes]:
+    """Spec 하나당 한 줄의 NDJSON 스트림"""
+    for spec, json_data in iter_spec_exports(customer, category3):
+        line = {"spec_id": spec.id, "filename": export_filename(spec), **json_data}
+        yield (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _stream_zip(customer: Optional[str], category3: Optional[str]) -> Iterator[bytes]:
+    """Spec 하나당 JSON 파일 하나를 담은 zip 스트림"""
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for spec, json_data in iter_spec_exports(customer, category3):
+            with zf.open(f"{spec.id}_{export_filename(spec)}", mode="w") as entry:
+                entry.write(json.dumps(json_data, ensure_ascii=False, indent=2).encode("utf-8"))
+            chunk = writer.drain()
+            if chunk:
+                yield chunk
+    # central directory
+    yield writer.drain()
+
+
+@router.get("/export-json/bulk")
+def export_json_bulk(
+    customer: Optional[str] = Query(None),
+    category3: Optional[str] = Query(None),
+    format: Literal["zip", "ndjson"] = Query("zip")
+):
+    """
+    여러 Spec을 한 번에 Streaming Export (야간 전체 export용)
+
+    Query Parameters:
+        customer: Customer 필터 (정확히 일치)
+        category3: Category 필터 (정확히 일치)
+        format: "zip" (Spec별 JSON 파일) 또는 "ndjson" (Spec별 한 줄)
+
+    Spec 트리는 배치 단위 selectin eager loading으로 로드되며
+    응답은 Spec 단위로 점진적으로 전송됩니다.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_ndjson(customer, category3),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f"attachment; filename=customer_specs_{timestamp}.ndjson"}
+        )
+
+    return StreamingResponse(
+        _stream_zip(customer, category3),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=customer_specs_{timestamp}.zip"}
+    )
+
+
 # ============================================================
 # Bulk JSON 업로드 (여러 파일)
 # ============================================================
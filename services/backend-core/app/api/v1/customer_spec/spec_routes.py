@@ -2,12 +2,16 @@
 Customer Spec Management API Routes
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List, Optional
 from pydantic import BaseModel
 
-from app.database.connection import get_db
+from app.database.connection import get_db, get_async_db
 from app.database.schema import CustomerSpec, DefectType, DefectCondition
+from app.services.stats_service import stats_service
 
 router = APIRouter()
 
@@ -46,7 +50,7 @@ async def search_specs(
     customer: Optional[str] = Query(None),
     category3: Optional[str] = Query(None),
     customized: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search customer specs with filters
@@ -56,29 +60,32 @@ async def search_specs(
         category3: Category (e.g., BOC, MCP)
         customized: Customized type (e.g., None, Waiver)
     """
-    query = db.query(CustomerSpec)
+    # Defect type count per spec (single grouped subquery instead of one COUNT per spec)
+    dt_counts = select(
+        DefectType.spec_id,
+        func.count(DefectType.id).label("defect_type_count")
+    ).group_by(DefectType.spec_id).subquery()
+
+    query = select(
+        CustomerSpec,
+        func.coalesce(dt_counts.c.defect_type_count, 0)
+    ).outerjoin(dt_counts, dt_counts.c.spec_id == CustomerSpec.id)
 
     if customer:
-        query = query.filter(CustomerSpec.customer.like(f"%{customer}%"))
+        query = query.where(CustomerSpec.customer.like(f"%{customer}%"))
     if category3:
-        query = query.filter(CustomerSpec.category3.like(f"%{category3}%"))
+        query = query.where(CustomerSpec.category3.like(f"%{category3}%"))
     if customized:
-        query = query.filter(CustomerSpec.customized.like(f"%{customized}%"))
+        query = query.where(CustomerSpec.customized.like(f"%{customized}%"))
 
-    specs = query.order_by(
+    rows = (await db.execute(query.order_by(
         CustomerSpec.customer,
         CustomerSpec.category3,
         CustomerSpec.rms_rev.desc()
-    ).all()
+    ))).all()
 
-    # Count defect types for each spec
-    results = []
-    for spec in specs:
-        defect_type_count = db.query(DefectType).filter(
-            DefectType.spec_id == spec.id
-        ).count()
-
-        results.append(CustomerSpecSummary(
+    results = [
+        CustomerSpecSummary(
             id=spec.id,
             customer=spec.customer,
             category3=spec.category3,
@@ -87,7 +94,9 @@ async def search_specs(
             rms_rev_datetime=spec.rms_rev_datetime,
             defect_type_count=defect_type_count,
             original_filename=spec.original_filename
-        ))
+        )
+        for spec, defect_type_count in rows
+    ]
 
     return {
         "status": "success",
@@ -99,12 +108,14 @@ async def search_specs(
 @router.get("/spec/{spec_id}")
 async def get_spec_detail(
     spec_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detailed information for a specific customer spec"""
-    spec = db.query(CustomerSpec).options(
-        joinedload(CustomerSpec.defect_types)
-    ).filter(CustomerSpec.id == spec_id).first()
+    spec = (await db.execute(
+        select(CustomerSpec)
+        .options(selectinload(CustomerSpec.defect_types))
+        .where(CustomerSpec.id == spec_id)
+    )).scalar_one_or_none()
 
     if not spec:
         raise HTTPException(status_code=404, detail="Spec not found")
@@ -141,11 +152,16 @@ async def get_spec_detail(
 
 
 @router.get("/defect-type/{defect_type_id}")
-async def get_defect_type_detail(
+def get_defect_type_detail(
     defect_type_id: int,
     db: Session = Depends(get_db)
 ):
-    """Get detailed information for a specific defect type including all conditions"""
+    """
+    Get detailed information for a specific defect type including all conditions
+
+    Walks the nested tree with lazy loads, so this stays a sync handler
+    (runs in the threadpool instead of blocking the event loop)
+    """
     defect_type = db.query(DefectType).options(
         joinedload(DefectType.defect_conditions)
     ).filter(DefectType.id == defect_type_id).first()
@@ -228,22 +244,26 @@ def build_specification_tree(spec):
 
 
 @router.get("/customers")
-async def get_customers(db: Session = Depends(get_db)):
+async def get_customers(db: AsyncSession = Depends(get_async_db)):
     """Get list of unique customers"""
-    customers = db.query(CustomerSpec.customer).distinct().order_by(CustomerSpec.customer).all()
+    customers = (await db.execute(
+        select(CustomerSpec.customer).distinct().order_by(CustomerSpec.customer)
+    )).scalars().all()
     return {
         "status": "success",
-        "customers": [c[0] for c in customers]
+        "customers": list(customers)
     }
 
 
 @router.get("/categories")
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: AsyncSession = Depends(get_async_db)):
     """Get list of unique categories"""
-    categories = db.query(CustomerSpec.category3).distinct().order_by(CustomerSpec.category3).all()
+    categories = (await db.execute(
+        select(CustomerSpec.category3).distinct().order_by(CustomerSpec.category3)
+    )).scalars().all()
     return {
         "status": "success",
-        "categories": [c[0] for c in categories]
+        "categories": list(categories)
     }
 
 
@@ -251,19 +271,19 @@ async def get_categories(db: Session = Depends(get_db)):
 async def get_defect_codes(
     customer: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of AI defect codes with filters"""
-    query = db.query(DefectType.ai_code, DefectType.defect_name).distinct()
+    query = select(DefectType.ai_code, DefectType.defect_name).distinct()
 
     if customer or category:
         query = query.join(CustomerSpec)
         if customer:
-            query = query.filter(CustomerSpec.customer == customer)
+            query = query.where(CustomerSpec.customer == customer)
         if category:
-            query = query.filter(CustomerSpec.category3 == category)
+            query = query.where(CustomerSpec.category3 == category)
 
-    codes = query.order_by(DefectType.ai_code).all()
+    codes = (await db.execute(query.order_by(DefectType.ai_code))).all()
 
     return {
         "status": "success",
@@ -272,29 +292,22 @@ async def get_defect_codes(
 
 
 @router.get("/stats")
-async def get_stats(db: Session = Depends(get_db)):
-    """Get database statistics"""
-    spec_count = db.query(CustomerSpec).count()
-    defect_type_count = db.query(DefectType).count()
-    defect_condition_count = db.query(DefectCondition).count()
-
-    customer_counts = db.query(
-        CustomerSpec.customer,
-        db.func.count(CustomerSpec.id)
-    ).group_by(CustomerSpec.customer).order_by(CustomerSpec.customer).all()
+async def get_stats():
+    """
+    Get database statistics
 
-    category_counts = db.query(
-        CustomerSpec.category3,
-        db.func.count(CustomerSpec.id)
-    ).group_by(CustomerSpec.category3).order_by(CustomerSpec.category3).all()
+    Served from the DB aggregate tables in stats_service
+    (updated in the same transaction as each write)
+    """
+    stats = await run_in_threadpool(stats_service.get_spec_stats)
 
     return {
         "status": "success",
         "stats": {
-            "total_specs": spec_count,
-            "total_defect_types": defect_type_count,
-            "total_defect_conditions": defect_condition_count,
-            "by_customer": [{"customer": c[0], "count": c[1]} for c in customer_counts],
-            "by_category": [{"category": c[0], "count": c[1]} for c in category_counts]
+            "total_specs": stats["total_specs"],
+            "total_defect_types": stats["total_defect_types"],
+            "total_defect_conditions": stats["total_defect_conditions"],
+            "by_customer": stats["by_customer"],
+            "by_category": stats["by_category"]
         }
     }
@@ -15,8 +15,6 @@ import io
 import os
 import time
 from PIL import Image
-import tkinter as tk
-from tkinter import filedialog
 
 from app.extractors import (
     YOLOExtractor,
@@ -164,6 +162,10 @@ async def select_image_file():
     global _current_session
 
     try:
+        # tkinter는 로컬 실행(다이얼로그) 시에만 필요 — 서버 시작 시 import하지 않음
+        import tkinter as tk
+        from tkinter import filedialog
+
         root = tk.Tk()
         root.withdraw()
         root.attributes('-topmost', True)
@@ -288,6 +290,10 @@ async def select_yolo_model():
     파일 다이얼로그로 YOLO 모델 선택
     """
     try:
+        # tkinter는 로컬 실행(다이얼로그) 시에만 필요 — 서버 시작 시 import하지 않음
+        import tkinter as tk
+        from tkinter import filedialog
+
         root = tk.Tk()
         root.withdraw()
         root.attributes('-topmost', True)
@@ -930,6 +936,10 @@ async def select_output_folder():
     출력 폴더 선택 다이얼로그
     """
     try:
+        # tkinter는 로컬 실행(다이얼로그) 시에만 필요 — 서버 시작 시 import하지 않음
+        import tkinter as tk
+        from tkinter import filedialog
+
         root = tk.Tk()
         root.withdraw()
         root.attributes('-topmost', True)
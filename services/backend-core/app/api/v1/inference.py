@@ -1,15 +1,38 @@
 """
 AI Inference API
 실제 AI 추론 실행 (GPU 작업)
+
+요청은 추론 작업 queue(app.services.inference_jobs)에 등록되고,
+워커가 여러 요청의 이미지를 묶어 batch로 추론한 뒤 이미지별 결과를 DB에 저장합니다.
+진행 상황 / 결과는 /inference/jobs/{job_id} 로 조회합니다.
+추론 모델은 (고객, 제품)별 라우트(/inference/routes)로 결정됩니다.
 """
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from sqlalchemy import select
 from typing import Optional, List
-import torch
+
+from app.core.config import settings
+from app.database.connection import SessionLocal
+from app.database.schema import InferenceModelRoute
+from app.services import inference_batcher
+from app.services.image_store import ImageAddressError, describe_load_error, image_loader
+from app.services.inference_jobs import inference_jobs, inference_workers
+from app.services.inference_results import inference_results
+from app.services.lot_summary import lot_summaries
+from app.services.inference_model import BACKENDS
+from app.services.model_registry import WILDCARD, model_registry
+from app.services.spec_judgment import JUDGMENTS, spec_judge
 
 router = APIRouter(prefix="/inference", tags=["AI Inference"])
 
+ITEM_STATUSES = ("queued", "running", "done", "failed")
+
 
 class InferenceRequest(BaseModel):
     """추론 요청 모델"""
@@ -17,6 +40,7 @@ class InferenceRequest(BaseModel):
     lotId: str
     bundleId: str
     customerId: str
+    productId: Optional[str] = None
     imageUrl: Optional[str] = None
 
 
@@ -28,111 +52,344 @@ class BatchInferenceRequest(BaseModel):
     productId: str
 
 
+def _check_image_urls(urls: List[str]):
+    """허용되지 않은 이미지 주소는 queue에 넣기 전에 거부"""
+    for index, url in enumerate(urls):
+        try:
+            image_loader.resolve(url)
+        except ImageAddressError as e:
+            raise HTTPException(status_code=400, detail=f"images[{index}]: {e}")
+
+
 @router.post("")
-async def create_inference(
-    request: InferenceRequest,
-    background_tasks: BackgroundTasks
-):
+def create_inference(request: InferenceRequest):
     """
-    AI 추론 요청 접수 및 실행
+    AI 추론 요청 접수
 
-    - GPU를 사용하여 실제 AI 모델 추론 수행
-    - 백그라운드로 비동기 처리
+    - 추론 작업 queue에 등록 (워커가 다른 요청과 묶어 GPU batch 추론)
+    - 진행 상황: GET /inference/jobs/{inferenceId}
     """
+    if not request.imageUrl:
+        raise HTTPException(status_code=400, detail="imageUrl이 필요합니다")
+    _check_image_urls([request.imageUrl])
 
-    # 백그라운드로 실제 추론 실행
-    background_tasks.add_task(
-        run_inference_task,
-        request.inferenceId,
-        request.lotId,
-        request.bundleId,
-        request.customerId,
-        request.imageUrl
+    spec = model_registry.resolve(request.customerId, request.productId)
+    job = inference_jobs.create_job(
+        request.inferenceId, "single", [request.imageUrl],
+        customer_id=request.customerId, product_id=request.productId,
+        lot_id=request.lotId, bundle_id=request.bundleId, model_key=spec.key,
     )
+    if job is None:
+        raise HTTPException(status_code=409, detail=f"이미 등록된 inferenceId입니다: {request.inferenceId}")
+    inference_workers.wake()
 
     return {
         "message": "AI inference started",
         "inferenceId": request.inferenceId,
-        "status": "processing"
+        "status": job["status"],
+        "model": spec.key
+    }
+
+
+class PredictRequest(BaseModel):
+    """즉시 추론 요청 모델 (결과를 저장하지 않고 바로 반환)"""
+    imageUrl: str
+    customerId: Optional[str] = None
+    productId: Optional[str] = None
+
+
+@router.post("/predict")
+async def predict(request: PredictRequest):
+    """
+    이미지 1장 즉시 추론 (동기 응답)
+
+    - 동시에 들어온 요청 / 워커 batch와 함께 micro-batch로 묶여 forward pass 1회로 처리
+    - 결과는 저장하지 않음 (이력이 필요하면 POST /inference 사용)
+    """
+    started = time.perf_counter()
+    try:
+        image = await run_in_threadpool(image_loader.load, request.imageUrl)
+    except Exception as e:
+        print(f"Image load error ({request.imageUrl}): {e}")
+        raise HTTPException(status_code=400, detail=describe_load_error(e))
+
+    spec = model_registry.resolve(request.customerId, request.productId)
+    try:
+        # 모델 로드는 threadpool에서, 추론이 끝날 때까지 LRU 언로드 대상에서 제외
+        model = await run_in_threadpool(model_registry.acquire, spec)
+    except Exception as e:
+        print(f"Model load error: {e}")
+        raise HTTPException(status_code=503, detail=f"모델을 불러올 수 없습니다 ({spec.key}): {e}")
+    try:
+        if settings.INFERENCE_MICROBATCH_ENABLED:
+            detections = await inference_batcher.get_batcher(model).predict_async(image)
+        else:
+            detections = await run_in_threadpool(lambda: model.predict_batch([image])[0])
+    except Exception as e:
+        print(f"Inference error: {e}")
+        raise HTTPException(status_code=500, detail=f"추론 실패: {e}")
+    finally:
+        model_registry.release(spec)
+
+    judgment = await run_in_threadpool(spec_judge.judge, request.customerId, request.productId, detections)
+    return {
+        "detections": detections,
+        "count": len(detections),
+        **judgment,
+        "imageSize": [int(image.shape[1]), int(image.shape[0])],
+        "model": model.key,
+        "latencyMs": round((time.perf_counter() - started) * 1000, 2)
     }
 
 
 @router.post("/batch")
-async def batch_inference(
-    request: BatchInferenceRequest,
-    background_tasks: BackgroundTasks
-):
+def batch_inference(request: BatchInferenceRequest):
     """
-    배치 추론 실행
+    배치 추론 요청 접수
 
-    - 여러 이미지를 한번에 처리
-    - GPU 메모리 효율적 활용
+    - 이미지별 작업으로 queue에 등록, 워커가 batch 크기 단위로 처리
+    - 진행 상황: GET /inference/jobs/{batchId}
     """
+    if not request.images:
+        raise HTTPException(status_code=400, detail="images가 비어 있습니다")
+    if len(request.images) > settings.INFERENCE_BATCH_MAX_IMAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"배치당 최대 {settings.INFERENCE_BATCH_MAX_IMAGES}장까지 요청할 수 있습니다"
+        )
+    _check_image_urls(request.images)
 
-    background_tasks.add_task(
-        run_batch_inference_task,
-        request.batchId,
-        request.images,
-        request.customerId,
-        request.productId
+    spec = model_registry.resolve(request.customerId, request.productId)
+    job = inference_jobs.create_job(
+        request.batchId, "batch", request.images,
+        customer_id=request.customerId, product_id=request.productId, model_key=spec.key,
     )
+    if job is None:
+        raise HTTPException(status_code=409, detail=f"이미 등록된 batchId입니다: {request.batchId}")
+    inference_workers.wake()
 
     return {
         "message": "Batch inference started",
         "batchId": request.batchId,
-        "totalImages": len(request.images)
+        "totalImages": len(request.images),
+        "status": job["status"],
+        "model": spec.key
     }
 
 
-async def run_inference_task(
-    inference_id: str,
-    lot_id: str,
-    bundle_id: str,
-    customer_id: str,
-    image_url: Optional[str]
+@router.get("/jobs/{job_id}")
+def get_inference_job(job_id: str):
+    """추론 작업 상태 / 진행률 (inferenceId 또는 batchId)"""
+    job = inference_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="추론 작업을 찾을 수 없습니다")
+    return job
+
+
+@router.get("/jobs/{job_id}/results")
+def get_inference_results(
+    job_id: str,
+    status: Optional[str] = Query(None, description="queued / running / done / failed"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """이미지별 추론 결과 (요청 순서)"""
+    if status and status not in ITEM_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status는 {', '.join(ITEM_STATUSES)} 중 하나여야 합니다")
+    job = inference_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="추론 작업을 찾을 수 없습니다")
+    return {
+        "job": job,
+        "offset": offset,
+        "limit": limit,
+        "results": inference_jobs.get_results(job_id, offset, limit, status) or []
+    }
+
+
+@router.get("/results")
+def get_lot_results(
+    lotId: Optional[str] = None,
+    bundleId: Optional[str] = None,
+    judgment: Optional[str] = Query(None, description="OK / NG / UNKNOWN"),
+    after: Optional[int] = Query(None, description="이전 페이지의 nextCursor"),
+    limit: int = Query(100, ge=1, le=1000),
+    detections: bool = Query(False, description="detection 포함 여부")
 ):
+    """lot / bundle별 이미지 추론 결과 + Spec 판정 (lotId 또는 bundleId 필수)"""
+    if lotId is None and bundleId is None:
+        raise HTTPException(status_code=400, detail="lotId 또는 bundleId가 필요합니다")
+    if judgment and judgment not in JUDGMENTS:
+        raise HTTPException(status_code=400, detail=f"judgment는 {', '.join(JUDGMENTS)} 중 하나여야 합니다")
+    return {
+        "lotId": lotId,
+        "bundleId": bundleId,
+        "limit": limit,
+        **inference_results.query(lotId, bundleId, judgment, after, limit, detections)
+    }
+
+
+@router.get("/lots/{lot_id}/summary")
+def get_lot_summary(lot_id: str, top: int = Query(5, ge=1, le=50)):
     """
-    실제 AI 추론 실행 (백그라운드)
+    lot 집계: 이미지 OK/NG 수, NG rate, 불량 유형별 건수, 상위 불량, 작업 진행률
 
-    작업:
-    1. MinIO에서 이미지 로드
-    2. 전처리
-    3. AI 모델 추론 (GPU)
-    4. 결과 DB 저장
+    결과 저장 시 증분 갱신되는 집계 테이블에서 조회 (detection 전체를 다시 읽지 않음)
     """
+    summary = lot_summaries.get_summary("lot", lot_id, top)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="lot 추론 결과를 찾을 수 없습니다")
+    return summary
 
-    try:
-        # TODO: 실제 AI 추론 로직 구현
-        # - 이미지 로드 from MinIO
-        # - 전처리
-        # - GPU 모델 추론
-        # - 결과 저장
 
-        print(f"Running inference for {inference_id}")
+@router.get("/lots/{lot_id}/bundles")
+def get_lot_bundles(lot_id: str):
+    """lot 안의 bundle별 집계"""
+    return {"lotId": lot_id, "bundles": lot_summaries.list_bundles(lot_id)}
 
-        # GPU 작업 예시
-        if torch.cuda.is_available():
-            device = torch.device("cuda")
-            # model.to(device)
-            # results = model(image)
-            pass
 
-    except Exception as e:
-        print(f"Inference error: {str(e)}")
-        # DB에 에러 상태 저장
+@router.post("/lots/{lot_id}/summary/rebuild")
+def rebuild_lot_summary(lot_id: str):
+    """결과 테이블에서 lot / bundle 집계 재계산 (lot 처리 완료 후 사용)"""
+    summary = lot_summaries.rebuild_lot(lot_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="lot 추론 결과를 찾을 수 없습니다")
+    return summary
 
 
-async def run_batch_inference_task(
-    batch_id: str,
-    images: List[str],
-    customer_id: str,
-    product_id: str
-):
-    """배치 추론 실행"""
+@router.get("/lots/{lot_id}/bundles/{bundle_id}/summary")
+def get_bundle_summary(lot_id: str, bundle_id: str, top: int = Query(5, ge=1, le=50)):
+    """bundle 집계 (lot 집계와 같은 형식, bundle id는 lot마다 다시 쓰일 수 있으므로 lot 안에서 조회)"""
+    summary = lot_summaries.get_summary("bundle", bundle_id, top, lot_id=lot_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="bundle 추론 결과를 찾을 수 없습니다")
+    return summary
 
-    try:
-        print(f"Running batch inference for {batch_id}")
-        # TODO: 배치 추론 로직 구현
 
-    except Exception as e:
-        print(f"Batch inference error: {str(e)}")
+@router.get("/queue")
+def get_inference_queue():
+    """queue 대기 / 처리 중 이미지 수 + 이 프로세스의 워커 수"""
+    return {
+        **inference_jobs.queue_depth(),
+        "workers": inference_workers.running,
+        "microbatch": inference_batcher.stats(),
+        "images": image_loader.stats(),
+        "models": model_registry.stats()
+    }
+
+
+# ========== 모델 라우팅 ==========
+
+class ModelRouteRequest(BaseModel):
+    """(고객, 제품) → 모델 라우트 ("*"는 전체)"""
+    customerId: str = WILDCARD
+    productId: str = WILDCARD
+    modelName: str
+    modelVersion: str = ""
+    backend: str = "auto"  # auto (INFERENCE_MODEL_BACKEND) / yolo / contour
+    pinned: bool = False
+    enabled: bool = True
+
+
+def _route_dict(route: InferenceModelRoute) -> dict:
+    return {
+        "id": route.id,
+        "customerId": route.customer_id,
+        "productId": route.product_id,
+        "modelName": route.model_name,
+        "modelVersion": route.model_version,
+        "modelKey": f"{route.model_name}:{route.model_version}" if route.model_version else route.model_name,
+        "backend": route.backend,
+        "pinned": route.pinned,
+        "enabled": route.enabled,
+        "updatedAt": route.updated_at.isoformat() if route.updated_at else None,
+    }
+
+
+@router.get("/routes")
+def list_model_routes():
+    """모델 라우트 목록"""
+    with SessionLocal() as db:
+        routes = db.execute(
+            select(InferenceModelRoute).order_by(InferenceModelRoute.customer_id, InferenceModelRoute.product_id)
+        ).scalars().all()
+        return {"routes": [_route_dict(route) for route in routes]}
+
+
+@router.get("/routes/resolve")
+def resolve_model_route(customerId: Optional[str] = None, productId: Optional[str] = None):
+    """(고객, 제품)에 적용될 모델 (고객+제품 → 고객 → 제품 → 기본 라우트 → DEFAULT_MODEL_NAME)"""
+    spec = model_registry.resolve(customerId, productId)
+    return {"modelKey": spec.key, "modelName": spec.name, "modelVersion": spec.version,
+            "backend": spec.backend, "pinned": spec.pinned}
+
+
+@router.put("/routes")
+def upsert_model_route(request: ModelRouteRequest):
+    """
+    모델 라우트 등록 / 변경 (같은 고객+제품이 있으면 덮어씀)
+
+    이미 queue에 들어간 작업은 등록 시점의 모델로 처리됩니다.
+    """
+    if request.backend not in BACKENDS:
+        raise HTTPException(status_code=400, detail=f"backend는 {', '.join(BACKENDS)} 중 하나여야 합니다")
+    now = datetime.now()
+    with SessionLocal() as db:
+        route = db.execute(
+            select(InferenceModelRoute).where(
+                InferenceModelRoute.customer_id == request.customerId,
+                InferenceModelRoute.product_id == request.productId,
+            )
+        ).scalar_one_or_none()
+        if route is None:
+            route = InferenceModelRoute(customer_id=request.customerId, product_id=request.productId,
+                                        created_at=now)
+            db.add(route)
+        route.model_name = request.modelName
+        route.model_version = request.modelVersion
+        route.backend = request.backend
+        route.pinned = request.pinned
+        route.enabled = request.enabled
+        route.updated_at = now
+        db.commit()
+        db.refresh(route)
+        result = _route_dict(route)
+    model_registry.invalidate_routes()
+    return result
+
+
+@router.delete("/routes/{route_id}")
+def delete_model_route(route_id: int):
+    with SessionLocal() as db:
+        route = db.get(InferenceModelRoute, route_id)
+        if route is None:
+            raise HTTPException(status_code=404, detail="모델 라우트를 찾을 수 없습니다")
+        db.delete(route)
+        db.commit()
+    model_registry.invalidate_routes()
+    return {"message": "Model route deleted", "id": route_id}
+
+
+# ========== 상주 모델 ==========
+
+@router.get("/models")
+def list_resident_models():
+    """이 프로세스에 로드된 모델 (메모리 / 사용 횟수 / pinned)"""
+    return model_registry.stats()
+
+
+@router.post("/models/{model_key}/pin")
+def pin_model(model_key: str, pinned: bool = Query(True)):
+    """모델 고정 / 해제 (고정된 모델은 LRU 언로드 대상에서 제외)"""
+    resident = model_registry.set_pinned(model_key, pinned)
+    return {"modelKey": model_key, "pinned": pinned, "resident": resident}
+
+
+@router.delete("/models/{model_key}")
+def unload_model(model_key: str):
+    """상주 모델 즉시 언로드 (추론 중이면 409)"""
+    if model_key not in model_registry.resident_keys():
+        raise HTTPException(status_code=404, detail="로드된 모델이 아닙니다")
+    if not model_registry.unload(model_key):
+        raise HTTPException(status_code=409, detail="추론 중인 모델은 언로드할 수 없습니다")
+    return {"message": "Model unloaded", "modelKey": model_key}
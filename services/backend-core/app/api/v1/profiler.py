@@ -0,0 +1,68 @@
+"""
+Profiler Admin API
+느린 요청 목록 및 프로파일 다운로드 (PROFILER_ENABLED=true 일 때만 등록)
+"""
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiler import profile_store, recent_requests, to_collapsed, to_speedscope
+
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """PROFILER_ADMIN_TOKEN이 설정된 경우 X-Admin-Token 헤더 검증"""
+    if settings.PROFILER_ADMIN_TOKEN and x_admin_token != settings.PROFILER_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(verify_admin_token)])
+
+
+@router.get("/slow-requests")
+async def get_slow_requests(
+    limit: int = Query(20, ge=1, le=200),
+    route: Optional[str] = Query(None, description="전체 라우트 템플릿 필터 (예: /api/v1/slicer/process)")
+):
+    """
+    최근 요청 중 소요 시간이 긴 순서로 조회
+
+    - stages: stage_timer로 기록된 단계별 호출 횟수 / 누적 시간
+    - profile_id: 프로파일이 캡처된 요청이면 다운로드 ID
+    """
+    return {"requests": recent_requests.slowest(limit=limit, route=route)}
+
+
+@router.get("/profiles")
+def list_profiles():
+    """저장된 프로파일 목록"""
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: Literal["speedscope", "collapsed"] = Query("speedscope"),
+    mode: Literal["wall", "cpu"] = Query("wall", description="collapsed 형식일 때 weight 기준")
+):
+    """
+    프로파일 다운로드
+
+    - speedscope: https://www.speedscope.app 에서 열기 (wall / cpu 두 프로파일 포함)
+    - collapsed: flamegraph.pl / speedscope 호환 collapsed stack
+    """
+    profile = profile_store.load(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "collapsed":
+        return PlainTextResponse(
+            to_collapsed(profile, mode=mode),
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.{mode}.collapsed.txt"'}
+        )
+    return JSONResponse(
+        to_speedscope(profile),
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'}
+    )
@@ -3,13 +3,53 @@ RCA (Root Cause Analysis) API Router
 PCB 불량 이미지 분석 API
 """
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+import json
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
-from app.services.rca_service import rca_service
+from sqlalchemy.orm import Session
+from typing import Optional, List, Literal
+from app.core.config import settings
+from app.database.connection import get_db
+from app.services.rca_image import DETAILS, IMAGE_FORMATS, ImageOptions, parse_roi
+from app.services.rca_cache import perceptual_hash
+from app.services.rca_search import rca_search
+from app.services.rca_service import default_image_options, rca_service
 
 router = APIRouter()
 
+# 업로드 허용 형식 / 최대 크기 (10MB)
+ALLOWED_TYPES = ["image/jpeg", "image/png", "image/bmp", "image/jpg"]
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+
+def _image_options(detail: str, image_format: str, max_side: int, roi: str = "") -> ImageOptions:
+    """요청 폼 값 → 전처리 옵션 (빈 값은 설정 기본값 사용)"""
+    options = default_image_options()
+    if detail:
+        if detail not in DETAILS:
+            raise HTTPException(status_code=400, detail=f"detail은 {', '.join(DETAILS)} 중 하나여야 합니다.")
+        options.detail = detail
+    if image_format:
+        if image_format not in IMAGE_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"image_format은 {', '.join(IMAGE_FORMATS)} 중 하나여야 합니다."
+            )
+        options.image_format = image_format
+    if max_side:
+        if max_side < 64:
+            raise HTTPException(status_code=400, detail="max_side는 64 이상이어야 합니다.")
+        options.max_side = max_side
+    try:
+        options.roi = parse_roi(roi)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"잘못된 roi 값입니다: {e}")
+    return options
+
 
 # 저장 요청 모델
 class ProcessCheck(BaseModel):
@@ -48,7 +88,12 @@ class SaveAnalysisRequest(BaseModel):
 async def analyze_image(
     file: UploadFile = File(...),
     additional_context: Optional[str] = Form(default=""),
-    save_to_history: Optional[str] = Form(default="true")
+    save_to_history: Optional[str] = Form(default="true"),
+    use_cache: Optional[str] = Form(default="true"),
+    roi: Optional[str] = Form(default=""),
+    detail: Optional[str] = Form(default=""),
+    image_format: Optional[str] = Form(default=""),
+    max_side: Optional[int] = Form(default=0)
 ):
     """
     PCB 이미지 분석 API
@@ -56,9 +101,18 @@ async def analyze_image(
     - file: 분석할 PCB 이미지 파일 (JPG, PNG, BMP 지원)
     - additional_context: 추가 컨텍스트 정보 (선택사항)
     - save_to_history: 분석 결과를 이력에 저장할지 여부 (기본값: true)
+    - use_cache: 동일 이미지 / 컨텍스트의 이전 분석 결과 재사용 여부 (기본값: true, false면 재분석 후 캐시 갱신)
+    - roi: 불량 영역 "x,y,w,h" (원본 픽셀 좌표, 지정 시 여백 포함 crop 후 전송)
+    - detail: high / low (기본값: RCA_IMAGE_DETAIL)
+    - image_format: auto / jpeg / png / original (기본값: RCA_IMAGE_FORMAT)
+    - max_side: 전송 이미지 긴 변 상한 (기본값: 모델 유효 해상도)
+
+    응답의 preprocess 항목에 전송 크기 / 절감 bytes / 예상 이미지 토큰이 포함됩니다.
     """
     # save_to_history 문자열을 boolean으로 변환
     should_save = save_to_history.lower() in ('true', '1', 'yes')
+    should_use_cache = use_cache.lower() in ('true', '1', 'yes')
+    image_options = _image_options(detail, image_format, max_side, roi)
     # 서비스 가용성 확인
     if not rca_service.is_available():
         raise HTTPException(
@@ -67,18 +121,17 @@ async def analyze_image(
         )
 
     # 파일 유형 검증
-    allowed_types = ["image/jpeg", "image/png", "image/bmp", "image/jpg"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"지원하지 않는 파일 형식입니다. 지원 형식: {', '.join(allowed_types)}"
+            detail=f"지원하지 않는 파일 형식입니다. 지원 형식: {', '.join(ALLOWED_TYPES)}"
         )
 
     # 파일 읽기
     image_data = await file.read()
 
     # 파일 크기 제한 (10MB)
-    if len(image_data) > 10 * 1024 * 1024:
+    if len(image_data) > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=400,
             detail="파일 크기는 10MB를 초과할 수 없습니다."
@@ -90,20 +143,93 @@ async def analyze_image(
         content_type=file.content_type,
         filename=file.filename,
         additional_context=additional_context or "",
-        save_to_history=should_save
+        save_to_history=should_save,
+        use_cache=should_use_cache,
+        image_options=image_options
     )
 
     if not result.get("success"):
         raise HTTPException(
-            status_code=500,
+            status_code=400 if result.get("invalid_input") else 500,
             detail=result.get("error", "분석 중 오류가 발생했습니다.")
         )
 
     return result
 
 
+@router.post("/analyze/batch")
+async def analyze_batch(
+    files: List[UploadFile] = File(...),
+    additional_context: Optional[str] = Form(default=""),
+    save_to_history: Optional[str] = Form(default="true"),
+    use_cache: Optional[str] = Form(default="true"),
+    detail: Optional[str] = Form(default=""),
+    image_format: Optional[str] = Form(default=""),
+    max_side: Optional[int] = Form(default=0)
+):
+    """
+    여러 PCB 이미지 동시 분석 (NDJSON 스트리밍)
+
+    - files: 분석할 이미지 파일 목록 (최대 RCA_BATCH_MAX_FILES개)
+    - 동시 호출 수 / 분당 요청·토큰 수는 RCA_MAX_CONCURRENCY / RCA_RPM_LIMIT / RCA_TPM_LIMIT로 제한
+    - 응답: 이미지별 결과를 완료 순서대로 한 줄씩 ({"index", "filename", "success", ...}),
+      마지막 줄은 {"type": "summary", ...}
+    - 형식 / 크기 오류 파일은 전체 요청을 실패시키지 않고 해당 줄에 error로 반환
+    - detail / image_format / max_side: 전처리 옵션 (모든 파일에 동일 적용, /analyze 참고)
+    """
+    should_save = save_to_history.lower() in ('true', '1', 'yes')
+    should_use_cache = use_cache.lower() in ('true', '1', 'yes')
+    image_options = _image_options(detail, image_format, max_side)
+    if not rca_service.is_available():
+        raise HTTPException(
+            status_code=503,
+            detail="RCA 서비스를 사용할 수 없습니다. OpenAI API 키를 설정해주세요."
+        )
+    if len(files) > settings.RCA_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {settings.RCA_BATCH_MAX_FILES}개 파일까지 분석할 수 있습니다."
+        )
+
+    # 스트리밍 시작 전에 업로드 파일을 모두 읽어 둠
+    items, rejected = [], []
+    for index, file in enumerate(files):
+        if file.content_type not in ALLOWED_TYPES:
+            rejected.append({"index": index, "filename": file.filename, "success": False,
+                             "error": f"지원하지 않는 파일 형식입니다: {file.content_type}"})
+            continue
+        data = await file.read()
+        if len(data) > MAX_FILE_SIZE:
+            rejected.append({"index": index, "filename": file.filename, "success": False,
+                             "error": "파일 크기는 10MB를 초과할 수 없습니다."})
+            continue
+        items.append({"index": index, "filename": file.filename, "content_type": file.content_type, "data": data})
+
+    async def stream():
+        start = time.perf_counter()
+        succeeded = cached = 0
+        for result in rejected:
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+        async for result in rca_service.analyze_batch(
+            items, additional_context or "", should_save, should_use_cache, image_options
+        ):
+            succeeded += 1 if result.get("success") else 0
+            cached += 1 if result.get("cached") else 0
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+        yield json.dumps({
+            "type": "summary",
+            "total": len(files),
+            "succeeded": succeeded,
+            "failed": len(files) - succeeded,
+            "cached": cached,
+            "elapsed_seconds": round(time.perf_counter() - start, 3)
+        }, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.post("/save")
-async def save_analysis(request: SaveAnalysisRequest):
+def save_analysis(request: SaveAnalysisRequest):
     """
     분석 결과를 이력에 저장하는 API
 
@@ -151,26 +277,51 @@ async def save_analysis(request: SaveAnalysisRequest):
 
 
 @router.get("/history")
-async def get_history(limit: int = 50, offset: int = 0):
+def get_history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    view: Literal["full", "summary"] = Query("full"),
+    severity: Optional[str] = Query(None),
+    defect_type: Optional[str] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db)
+):
     """
-    분석 이력 조회 API
-
-    - limit: 조회할 최대 개수 (기본값: 50)
-    - offset: 시작 위치 (기본값: 0)
+    분석 이력 조회 API (최신순)
+
+    - limit: 조회할 최대 개수 (기본값: 50, 최대 500)
+    - cursor: 다음 페이지 조회용 (응답 헤더 X-Next-Cursor 값, 마지막 페이지면 헤더 없음)
+      offset과 달리 깊은 페이지도 일정한 속도로 조회됩니다.
+    - offset: 시작 위치 (하위 호환용, cursor와 함께 사용 불가)
+    - view: full (전체 분석 내용) / summary (목록용: id, 파일명, 시각, 불량 유형, 심각도, 신뢰도, 토큰)
+    - severity / defect_type / date_from / date_to: 필터
     """
-    history = rca_service.get_history(limit=limit, offset=offset)
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="cursor와 offset은 함께 사용할 수 없습니다.")
+    try:
+        history, next_cursor = rca_service.get_history(
+            limit=limit, offset=offset, cursor=cursor, view=view, severity=severity,
+            defect_type=defect_type, date_from=date_from, date_to=date_to, db=db
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     # 프론트엔드가 배열을 직접 기대하므로 배열 반환
     return history
 
 
 @router.get("/history/{analysis_id}")
-async def get_history_item(analysis_id: str):
+def get_history_item(analysis_id: str, db: Session = Depends(get_db)):
     """
     특정 분석 이력 조회 API
 
     - analysis_id: 분석 ID (예: RCA-20241204-ABCD1234)
     """
-    item = rca_service.get_history_item(analysis_id)
+    item = rca_service.get_history_item(analysis_id, db=db)
     if not item:
         raise HTTPException(
             status_code=404,
@@ -183,13 +334,13 @@ async def get_history_item(analysis_id: str):
 
 
 @router.delete("/history/{analysis_id}")
-async def delete_history_item(analysis_id: str):
+def delete_history_item(analysis_id: str, db: Session = Depends(get_db)):
     """
     분석 이력 삭제 API
 
     - analysis_id: 삭제할 분석 ID
     """
-    success = rca_service.delete_history_item(analysis_id)
+    success = rca_service.delete_history_item(analysis_id, db=db)
     if not success:
         raise HTTPException(
             status_code=404,
@@ -201,8 +352,105 @@ async def delete_history_item(analysis_id: str):
     }
 
 
+@router.get("/history/{analysis_id}/similar")
+def get_similar_history(
+    analysis_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    max_distance: int = Query(16, ge=0, le=64),
+    db: Session = Depends(get_db)
+):
+    """
+    이력 이미지와 유사한 과거 분석 조회 API
+
+    - max_distance: perceptual hash Hamming 거리 상한 (0~64, 작을수록 엄격)
+    - 이미지 signature는 이 기능 추가 이후 분석된 이력에만 있습니다.
+    """
+    phash = rca_search.get_signature(db, analysis_id)
+    if phash is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"분석 ID '{analysis_id}'의 이미지 정보가 없습니다."
+        )
+    start = time.perf_counter()
+    results = rca_search.search_similar(db, phash, limit=limit, max_distance=max_distance, exclude=analysis_id)
+    return {
+        "success": True,
+        "count": len(results),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        "results": results
+    }
+
+
+@router.get("/search")
+def search_history(
+    q: str = Query(..., min_length=1, description="증상 / 원인 / 해결방안 검색어"),
+    limit: int = Query(20, ge=1, le=100),
+    match: Literal["all", "any"] = Query("all"),
+    severity: Optional[str] = Query(None),
+    defect_type: Optional[str] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    분석 이력 전문 검색 API
+
+    - q: 검색어 (공백으로 구분, 각 단어는 앞부분 일치 — "도금" → "도금이", "도금층")
+    - match: all (모든 단어 포함) / any (하나 이상 포함)
+    - 결과는 관련도(rank) 순 — 불량 유형 > 위치 / 분석 / 원인 > 해결방안 순으로 가중치
+    """
+    start = time.perf_counter()
+    results = rca_search.search_text(
+        db, q, limit=limit, match_all=(match == "all"), severity=severity,
+        defect_type=defect_type, date_from=date_from, date_to=date_to
+    )
+    return {
+        "success": True,
+        "query": q,
+        "count": len(results),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        "results": results
+    }
+
+
+@router.post("/search/similar")
+def search_similar_image(
+    file: UploadFile = File(...),
+    limit: int = Form(default=10),
+    max_distance: int = Form(default=16),
+    db: Session = Depends(get_db)
+):
+    """
+    유사 이미지 이력 검색 API
+
+    - file: 기준 이미지 (분석 없이 검색만 수행, 토큰 사용 없음)
+    - max_distance: perceptual hash Hamming 거리 상한 (0~64, 기본값 16)
+    """
+    if file.content_type not in ALLOWED_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 파일 형식입니다. 지원 형식: {', '.join(ALLOWED_TYPES)}"
+        )
+    image_data = file.file.read()
+    if len(image_data) > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="파일 크기는 10MB를 초과할 수 없습니다.")
+    phash = perceptual_hash(image_data)
+    if phash is None:
+        raise HTTPException(status_code=400, detail="이미지를 읽을 수 없습니다.")
+    start = time.perf_counter()
+    results = rca_search.search_similar(
+        db, phash, limit=max(1, min(limit, 100)), max_distance=max(0, min(max_distance, 64))
+    )
+    return {
+        "success": True,
+        "count": len(results),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        "results": results
+    }
+
+
 @router.get("/statistics")
-async def get_statistics():
+def get_statistics():
     """
     분석 통계 조회 API
     """
@@ -211,6 +459,53 @@ async def get_statistics():
     return stats
 
 
+@router.get("/statistics/timeseries")
+def get_statistics_timeseries(
+    bucket: Literal["hour", "day"] = Query("hour"),
+    days: int = Query(7, ge=1, le=30)
+):
+    """
+    시간 버킷별 분석 통계 API
+
+    - bucket: 집계 단위 (hour / day)
+    - days: 최근 N일
+    """
+    return {
+        "success": True,
+        "bucket": bucket,
+        "series": rca_service.get_statistics_timeseries(bucket=bucket, days=days)
+    }
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """
+    결과 캐시 통계 API
+
+    - exact_hits / near_hits / inflight_hits / misses: 이 프로세스 기동 이후 조회 결과
+    - tokens_saved: 캐시 재사용으로 절약한 토큰 수 (원본 분석 기준)
+    - entries: 저장된 캐시 항목 수
+    """
+    return {
+        "success": True,
+        "data": rca_service.get_cache_stats()
+    }
+
+
+@router.delete("/cache")
+def clear_cache(expired_only: bool = Query(True, description="false면 전체 삭제")):
+    """
+    결과 캐시 정리 API
+
+    - expired_only: 만료된 항목만 삭제 (기본값: true)
+    """
+    deleted = rca_service.clear_cache(expired_only=expired_only)
+    return {
+        "success": True,
+        "deleted": deleted
+    }
+
+
 @router.get("/status")
 async def get_service_status():
     """
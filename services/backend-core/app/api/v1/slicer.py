@@ -5,15 +5,13 @@
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from tkinter import Tk, filedialog
 import os
 from PIL import Image
-import math
-from concurrent.futures import ThreadPoolExecutor
 import time
 from typing import Optional
-import base64
-from io import BytesIO
+
+from app.core.metrics import stage_timer
+from app.services.image_slicer import plan_slices, slice_image, encode_thumbnail, make_thumbnails
 
 # Router 생성
 router = APIRouter()
@@ -66,7 +64,9 @@ class SlicingResponse(BaseModel):
 async def select_image():
     """이미지 파일 선택 다이얼로그를 열고 선택된 파일 경로 반환"""
     try:
-        # Tkinter 루트 윈도우 생성 (숨김)
+        # Tkinter 루트 윈도우 생성 (숨김) — 다이얼로그 사용 시에만 import
+        from tkinter import Tk, filedialog
+
         root = Tk()
         root.withdraw()
         root.attributes('-topmost', True)
@@ -100,16 +100,13 @@ async def select_image():
                 img_format = img.format or 'Unknown'
 
                 # 썸네일 생성 (max 300px)
-                img.thumbnail((300, 300))
-                buffered = BytesIO()
-                img.save(buffered, format="JPEG")
-                img_base64 = base64.b64encode(buffered.getvalue()).decode()
+                img_preview = encode_thumbnail(img, (300, 300))
 
             return ImageSelectResponse(
                 success=True,
                 imagePath=file_path,
                 imageSize={'width': width, 'height': height, 'format': img_format},
-                imagePreview=f"data:image/jpeg;base64,{img_base64}"
+                imagePreview=img_preview
             )
 
         except Exception as e:
@@ -132,7 +129,9 @@ async def select_image():
 async def select_folder():
     """출력 폴더 선택 다이얼로그를 열고 선택된 폴더 경로 반환"""
     try:
-        # Tkinter 루트 윈도우 생성 (숨김)
+        # Tkinter 루트 윈도우 생성 (숨김) — 다이얼로그 사용 시에만 import
+        from tkinter import Tk, filedialog
+
         root = Tk()
         root.withdraw()
         root.attributes('-topmost', True)
@@ -189,18 +188,6 @@ async def process_image_slicing(request: SlicingRequest):
                 error='출력 폴더를 지정해주세요.'
             )
 
-        # Overlap 픽셀 계산
-        if overlap_ratio < 0:
-            overlap_ratio = 0
-        if overlap_ratio >= 100:
-            overlap_ratio = 99
-
-        overlap_x_px = int(slice_width * (overlap_ratio / 100))
-        overlap_y_px = int(slice_height * (overlap_ratio / 100))
-
-        step_x = max(1, slice_width - overlap_x_px)
-        step_y = max(1, slice_height - overlap_y_px)
-
         # 출력 폴더 생성
         os.makedirs(output_folder, exist_ok=True)
 
@@ -208,86 +195,24 @@ async def process_image_slicing(request: SlicingRequest):
         start_time = time.time()
 
         # 이미지 열기
-        img = Image.open(image_path).convert("RGB")
+        with stage_timer("slicer", "decode"):
+            img = Image.open(image_path).convert("RGB")
         img_width, img_height = img.size
 
-        # 행/열 계산
-        cols = math.ceil((img_width - slice_width) / step_x) + 1
-        rows = math.ceil((img_height - slice_height) / step_y) + 1
-
-        # 슬라이스 작업 목록 생성
-        tasks = []
-        for r in range(rows):
-            for c in range(cols):
-                left = c * step_x
-                upper = r * step_y
-                right = left + slice_width
-                lower = upper + slice_height
-
-                crop_box = (
-                    max(left, 0),
-                    max(upper, 0),
-                    min(right, img_width),
-                    min(lower, img_height)
-                )
-
-                paste_x = 0 if left >= 0 else abs(left)
-                paste_y = 0 if upper >= 0 else abs(upper)
-
-                # 파일명 생성
-                filename = naming_pattern.replace('{row}', str(r))
-                filename = filename.replace('{col}', str(c))
-                filename = filename.replace('{index}', str(r * cols + c))
-                filename = f"{filename}.{file_format}"
-
-                tasks.append((crop_box, paste_x, paste_y, filename))
-
-        # 슬라이스 처리 함수
-        def process_slice(task):
-            crop_box, paste_x, paste_y, filename = task
-            cropped_img = img.crop(crop_box)
-            padded_img = Image.new("RGB", (slice_width, slice_height), (0, 0, 0))
-            padded_img.paste(cropped_img, (paste_x, paste_y))
-
-            output_path = os.path.join(output_folder, filename)
-
-            # 파일 형식에 따라 저장
-            if file_format.lower() in ['jpg', 'jpeg']:
-                padded_img.save(output_path, 'JPEG', quality=95)
-            elif file_format.lower() == 'png':
-                padded_img.save(output_path, 'PNG')
-            elif file_format.lower() == 'bmp':
-                padded_img.save(output_path, 'BMP')
-            else:
-                padded_img.save(output_path)
-
-        # 병렬 처리
-        max_workers = min(os.cpu_count() or 4, 8)
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            executor.map(process_slice, tasks)
+        # 슬라이스 작업 목록 생성 + 병렬 처리
+        tasks, rows, cols = plan_slices(
+            img_width, img_height, slice_width, slice_height,
+            overlap_ratio, naming_pattern, file_format
+        )
+        slice_image(img, output_folder, tasks, slice_width, slice_height, file_format)
 
         # 완료 시간
         end_time = time.time()
         elapsed_time = end_time - start_time
 
         # 결과 썸네일 생성 (최대 20개)
-        thumbnails = []
-        thumbnail_count = min(20, len(tasks))
-        for i in range(thumbnail_count):
-            _, _, _, filename = tasks[i]
-            result_path = os.path.join(output_folder, filename)
-            try:
-                with Image.open(result_path) as result_img:
-                    result_img.thumbnail((150, 150))
-                    buffered = BytesIO()
-                    result_img.save(buffered, format="JPEG")
-                    thumb_base64 = base64.b64encode(buffered.getvalue()).decode()
-                    thumbnails.append({
-                        'filename': filename,
-                        'data': f"data:image/jpeg;base64,{thumb_base64}"
-                    })
-            except:
-                pass
+        with stage_timer("slicer", "thumbnails"):
+            thumbnails = make_thumbnails(output_folder, [task[3] for task in tasks[:20]])
 
         return SlicingResponse(
             success=True,
@@ -1,5 +1,7 @@
+import json
 import sqlite3
 import os
+import threading
 from pathlib import Path
 
 # 환경변수로 DB 경로 오버라이드 가능 (단독 TAS 시스템과 DB 공유 시 사용)
@@ -10,6 +12,18 @@ DB_PATH = Path(os.environ.get("TAS_DB_PATH", str(_default_db)))
 # Valid system groups
 GROUPS = ("NEW", "LEGACY")
 
+# Writable record columns (bulk insert column order)
+RECORD_COLUMNS = (
+    "system_group", "serial_no", "site", "manager",
+    "issue_date", "check_date", "action_date",
+    "core_version", "non_core_version", "hw_status",
+    "symptom", "cause", "action", "next_plan",
+    "author", "author_date", "reviewer", "approver",
+)
+
+# IN (...) 한 번에 바인딩할 최대 파라미터 수 (구버전 SQLite 제한 999)
+_IN_CHUNK = 500
+
 # Target schema DDL
 _TARGET_DDL = """
 CREATE TABLE IF NOT EXISTS tas_records (
@@ -39,13 +53,59 @@ CREATE TABLE IF NOT EXISTS tas_records (
 """
 
 
-def get_db():
+# Full-text search columns (tas_records_fts, trigram → LIKE '%...%'와 같은 부분 문자열 매칭)
+SEARCH_COLUMNS = ("serial_no", "symptom", "cause", "action", "manager")
+
+# trigram tokenizer는 3글자 이상 검색어만 인덱스로 매칭 — 그보다 짧으면 LIKE
+_FTS_MIN_CHARS = 3
+
+# Per-connection tuning (WAL + NORMAL sync: commit마다 fsync 하지 않음, 장애 시에도 DB는 일관성 유지)
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",      # 16MB page cache
+    "PRAGMA mmap_size=268435456",    # 256MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+)
+
+_local = threading.local()
+# init_db()에서 FTS5(trigram) 사용 가능 여부 확인 후 설정
+_fts_enabled = False
+
+
+def _connect() -> sqlite3.Connection:
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
+def get_db() -> sqlite3.Connection:
+    """
+    Thread-local connection (요청마다 connect / PRAGMA / close 하지 않고 스레드별로 재사용)
+
+    FastAPI 동기 라우트는 threadpool 워커 스레드에서 실행되므로 워커 수만큼만 연결이 열립니다.
+    호출 측은 연결을 닫지 않고, 쓰기는 ``with conn:`` 트랜잭션으로 commit / rollback 합니다.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = _connect()
+        _local.conn, _local.path = conn, DB_PATH
+    return conn
+
+
+def close_db():
+    """현재 스레드의 연결 닫기"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
 def _table_has_old_unique(conn) -> bool:
     """True if the table exists with a single-column UNIQUE on serial_no (old schema)."""
     row = conn.execute(
@@ -56,11 +116,54 @@ def _table_has_old_unique(conn) -> bool:
     return "serial_no" in row[0] and "UNIQUE(system_group" not in row[0]
 
 
+def _fts_available(conn) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._fts_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _init_fts(conn, rebuild: bool = False):
+    """
+    External-content FTS5 table + sync triggers
+
+    본문은 tas_records에만 저장하고 FTS에는 인덱스만 유지합니다.
+    테이블이 새로 생성되었거나 (기존 DB) tas_records가 재생성된 경우 전체 재색인합니다.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='tas_records_fts'"
+    ).fetchone() is not None
+    cols = ", ".join(SEARCH_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old_cols = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    conn.executescript(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS tas_records_fts USING fts5(
+            {cols}, content='tas_records', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS tas_records_fts_ai AFTER INSERT ON tas_records BEGIN
+            INSERT INTO tas_records_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+        END;
+        CREATE TRIGGER IF NOT EXISTS tas_records_fts_ad AFTER DELETE ON tas_records BEGIN
+            INSERT INTO tas_records_fts(tas_records_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END;
+        CREATE TRIGGER IF NOT EXISTS tas_records_fts_au AFTER UPDATE OF {cols} ON tas_records BEGIN
+            INSERT INTO tas_records_fts(tas_records_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO tas_records_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+        END;
+    """)
+    if rebuild or not exists:
+        conn.execute("INSERT INTO tas_records_fts(tas_records_fts) VALUES ('rebuild')")
+
+
 def init_db():
+    global _fts_enabled
     DB_PATH.parent.mkdir(exist_ok=True)
     conn = get_db()
 
-    if _table_has_old_unique(conn):
+    rebuilt = _table_has_old_unique(conn)
+    if rebuilt:
         # ── Rebuild: replace UNIQUE(serial_no) with UNIQUE(system_group, serial_no) ──
         old_cols = [r[1] for r in conn.execute("PRAGMA table_info(tas_records)").fetchall()]
         if "system_group" not in old_cols:
@@ -125,46 +228,79 @@ def init_db():
     conn.executescript("""
         CREATE INDEX IF NOT EXISTS idx_group_serial ON tas_records(system_group, serial_no);
         CREATE INDEX IF NOT EXISTS idx_site          ON tas_records(site);
+        CREATE INDEX IF NOT EXISTS idx_serial_id     ON tas_records(serial_no, id);
+    """)
+
+    # PDF 이관 페이지 단위 파싱 캐시 (record NULL = TAS 페이지 아님)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS tas_pdf_page_cache (
+            page_hash      TEXT NOT NULL,
+            parser_version TEXT NOT NULL,
+            record         TEXT,
+            created_at     TEXT DEFAULT (datetime('now','localtime')),
+            PRIMARY KEY (page_hash, parser_version)
+        ) WITHOUT ROWID;
     """)
 
+    _fts_enabled = _fts_available(conn)
+    if _fts_enabled:
+        _init_fts(conn, rebuild=rebuilt)
+    else:
+        print("TAS DB: FTS5 trigram tokenizer unavailable (SQLite < 3.34), search falls back to LIKE")
+
     conn.commit()
-    conn.close()
 
 
-def list_records(search: str = "", site: str = "", system_group: str = "") -> list:
-    conn = get_db()
-    sql = "SELECT * FROM tas_records WHERE 1=1"
+def _where(search: str, site: str, system_group: str) -> tuple[str, list]:
+    sql = " WHERE 1=1"
     params = []
     if system_group:
         sql += " AND system_group = ?"
         params.append(system_group)
+    search = search.strip()
     if search:
-        sql += " AND (serial_no LIKE ? OR symptom LIKE ? OR cause LIKE ? OR action LIKE ? OR manager LIKE ?)"
-        like = f"%{search}%"
-        params.extend([like, like, like, like, like])
+        if _fts_enabled and len(search) >= _FTS_MIN_CHARS:
+            # phrase query = 대소문자 무시 부분 문자열 매칭 (기존 LIKE와 같은 결과)
+            sql += " AND id IN (SELECT rowid FROM tas_records_fts WHERE tas_records_fts MATCH ?)"
+            params.append('"' + search.replace('"', '""') + '"')
+        else:
+            sql += " AND (" + " OR ".join(f"{c} LIKE ?" for c in SEARCH_COLUMNS) + ")"
+            params.extend([f"%{search}%"] * len(SEARCH_COLUMNS))
     if site:
         sql += " AND site = ?"
         params.append(site)
-    sql += " ORDER BY serial_no DESC"
-    rows = conn.execute(sql, params).fetchall()
-    conn.close()
+    return sql, params
+
+
+def list_records(search: str = "", site: str = "", system_group: str = "",
+                 limit: int | None = None, offset: int = 0) -> list:
+    """
+    Records ordered by serial_no DESC (limit 없으면 전체)
+    """
+    where, params = _where(search, site, system_group)
+    sql = "SELECT * FROM tas_records" + where + " ORDER BY serial_no DESC, id DESC"
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+    rows = get_db().execute(sql, params).fetchall()
     return [dict(r) for r in rows]
 
 
+def count_records(search: str = "", site: str = "", system_group: str = "") -> int:
+    where, params = _where(search, site, system_group)
+    return get_db().execute("SELECT COUNT(*) FROM tas_records" + where, params).fetchone()[0]
+
+
 def get_record(record_id: int) -> dict | None:
-    conn = get_db()
-    row = conn.execute("SELECT * FROM tas_records WHERE id=?", (record_id,)).fetchone()
-    conn.close()
+    row = get_db().execute("SELECT * FROM tas_records WHERE id=?", (record_id,)).fetchone()
     return dict(row) if row else None
 
 
 def get_record_by_serial(serial_no: str, system_group: str = "NEW") -> dict | None:
-    conn = get_db()
-    row = conn.execute(
+    row = get_db().execute(
         "SELECT * FROM tas_records WHERE system_group=? AND serial_no=?",
         (system_group, serial_no)
     ).fetchone()
-    conn.close()
     return dict(row) if row else None
 
 
@@ -174,11 +310,81 @@ def create_record(data: dict) -> int:
         data = {**data, "system_group": "NEW"}
     cols = [c for c in data if c not in ("id", "created_at", "updated_at")]
     sql = f"INSERT INTO tas_records ({','.join(cols)}) VALUES ({','.join('?' * len(cols))})"
-    cur = conn.execute(sql, [data[c] for c in cols])
-    conn.commit()
-    new_id = cur.lastrowid
-    conn.close()
-    return new_id
+    with conn:
+        cur = conn.execute(sql, [data[c] for c in cols])
+    return cur.lastrowid
+
+
+def existing_serials(serials, system_group: str = "NEW") -> set[str]:
+    """serials 중 이미 DB에 있는 serial_no 집합 (set 기반 조회, 건별 SELECT 없음)"""
+    serials = list(dict.fromkeys(serials))
+    conn = get_db()
+    found = set()
+    for i in range(0, len(serials), _IN_CHUNK):
+        chunk = serials[i:i + _IN_CHUNK]
+        rows = conn.execute(
+            f"SELECT serial_no FROM tas_records WHERE system_group=? AND serial_no IN ({','.join('?' * len(chunk))})",
+            [system_group, *chunk]
+        ).fetchall()
+        found.update(r[0] for r in rows)
+    return found
+
+
+def bulk_insert_records(records: list[dict]) -> int:
+    """
+    단일 트랜잭션 executemany INSERT OR IGNORE
+
+    (system_group, serial_no) 중복은 무시하며, 실제로 추가된 건수를 반환합니다.
+    """
+    if not records:
+        return 0
+    conn = get_db()
+    sql = (f"INSERT OR IGNORE INTO tas_records ({','.join(RECORD_COLUMNS)}) "
+           f"VALUES ({','.join('?' * len(RECORD_COLUMNS))})")
+    rows = [
+        [rec.get("system_group") or "NEW", *(rec.get(c) for c in RECORD_COLUMNS[1:])]
+        for rec in records
+    ]
+    with conn:
+        # rowcount = 실제 INSERT 건수 합 (무시된 행 / FTS trigger 변경 제외)
+        cur = conn.executemany(sql, rows)
+    return cur.rowcount
+
+
+def get_cached_pages(page_hashes, parser_version: str) -> dict[str, dict | None]:
+    """page_hash → 캐시된 파싱 결과 (TAS 페이지가 아니면 None), 캐시에 없는 hash는 제외"""
+    page_hashes = list(dict.fromkeys(page_hashes))
+    conn = get_db()
+    found = {}
+    for i in range(0, len(page_hashes), _IN_CHUNK):
+        chunk = page_hashes[i:i + _IN_CHUNK]
+        rows = conn.execute(
+            f"SELECT page_hash, record FROM tas_pdf_page_cache "
+            f"WHERE parser_version=? AND page_hash IN ({','.join('?' * len(chunk))})",
+            [parser_version, *chunk]
+        ).fetchall()
+        found.update((r[0], json.loads(r[1]) if r[1] else None) for r in rows)
+    return found
+
+
+def store_cached_pages(entries: list[tuple[str, dict | None]], parser_version: str):
+    conn = get_db()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO tas_pdf_page_cache (page_hash, parser_version, record) VALUES (?, ?, ?)",
+            [(h, parser_version, json.dumps(rec, ensure_ascii=False) if rec else None) for h, rec in entries]
+        )
+
+
+def clear_page_cache(keep_version: str | None = None) -> int:
+    """페이지 캐시 삭제 (keep_version 지정 시 다른 파서 버전 항목만), 삭제 건수 반환"""
+    conn = get_db()
+    with conn:
+        if keep_version:
+            cur = conn.execute("DELETE FROM tas_pdf_page_cache WHERE parser_version != ?", (keep_version,))
+        else:
+            cur = conn.execute("DELETE FROM tas_pdf_page_cache")
+    return cur.rowcount
 
 
 def update_record(record_id: int, data: dict):
@@ -186,16 +392,14 @@ def update_record(record_id: int, data: dict):
     cols = [c for c in data if c not in ("id", "serial_no", "system_group", "created_at", "updated_at")]
     set_clause = ", ".join(f"{c}=?" for c in cols)
     sql = f"UPDATE tas_records SET {set_clause}, updated_at=datetime('now','localtime') WHERE id=?"
-    conn.execute(sql, [data[c] for c in cols] + [record_id])
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute(sql, [data[c] for c in cols] + [record_id])
 
 
 def delete_record(record_id: int):
     conn = get_db()
-    conn.execute("DELETE FROM tas_records WHERE id=?", (record_id,))
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute("DELETE FROM tas_records WHERE id=?", (record_id,))
 
 
 def list_sites(system_group: str = "") -> list[str]:
@@ -209,5 +413,4 @@ def list_sites(system_group: str = "") -> list[str]:
         rows = conn.execute(
             "SELECT DISTINCT site FROM tas_records WHERE site IS NOT NULL AND site != '' ORDER BY site"
         ).fetchall()
-    conn.close()
     return [r[0] for r in rows]
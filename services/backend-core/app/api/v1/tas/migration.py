@@ -0,0 +1,264 @@
+"""
+TAS Migration Engine
+PPTX / PDF (또는 이들을 담은 zip) → tas_records 일괄 이관
+
+- 파일을 PDF 페이지 / 슬라이드 구간 단위 작업으로 나눠 process pool에서 병렬 파싱
+  (pdfplumber 표 추출은 CPU 작업이라 스레드로는 GIL 때문에 빨라지지 않음)
+- 기존 serial 중복 확인은 set 기반 1회 조회, 삽입은 단일 트랜잭션 executemany INSERT OR IGNORE
+- 진행 상황을 이벤트(dict)로 yield → 라우트에서 NDJSON 스트리밍
+
+파서(pdfplumber / python-pptx)는 worker 안에서만 import하므로 이 모듈 import는 가볍습니다.
+"""
+
+import multiprocessing
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Iterator
+
+from app.api.v1.tas import database as db
+from app.core.config import settings
+
+
+SUPPORTED_EXTS = (".pptx", ".pdf")
+ARCHIVE_EXTS = (".zip",)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # fork는 uvicorn / torch 스레드 상태까지 복제하므로 spawn 사용
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.TAS_MIGRATION_WORKERS or None,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    """앱 종료 시 worker 프로세스 정리"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# ---------------------------------------------------------------------------
+# Worker tasks (top-level — spawn된 프로세스에서 pickle로 호출)
+# ---------------------------------------------------------------------------
+
+def _count_units(path: str) -> int:
+    if path.lower().endswith(".pdf"):
+        from app.api.v1.tas.pdf_parser import count_pages
+        return count_pages(path)
+    from app.api.v1.tas.ppt_parser import count_slides
+    return count_slides(path)
+
+
+def _parse_range(path: str, start: int, stop: int, use_cache: bool = True) -> tuple[list[tuple[int, dict]], dict]:
+    """Returns ([(page_index, record)], page stats — PDF only: cached / skipped / parsed)"""
+    if path.lower().endswith(".pdf"):
+        from app.api.v1.tas.pdf_parser import parse_pdf_pages
+        stats = {}
+        return parse_pdf_pages(path, start, stop, use_cache=use_cache, stats=stats), stats
+    from app.api.v1.tas.ppt_parser import parse_pptx_slides
+    return parse_pptx_slides(path, start, stop), {"parsed": stop - start}
+
+
+# ---------------------------------------------------------------------------
+# Input expansion
+# ---------------------------------------------------------------------------
+
+def expand_archives(files: list[tuple[str, str]], work_dir: str | Path) -> tuple[list[tuple[str, str]], list[str]]:
+    """
+    zip 안의 .pptx / .pdf를 work_dir에 풀어 (표시 이름, 경로) 목록으로 펼침
+
+    항목 수가 TAS_MIGRATION_MAX_ARCHIVE_MEMBERS를 넘는 archive는 건너뛰고, 압축 해제 크기 합계가
+    TAS_MIGRATION_MAX_UNCOMPRESSED_MB를 넘으면 그 archive의 나머지 항목은 풀지 않습니다 (zip bomb 방지).
+
+    Args:
+        files: [(filename, path)] — 업로드 순서
+    Returns:
+        (migratable files, errors)
+    """
+    work_dir = Path(work_dir)
+    expanded, errors = [], []
+    # zip bomb 방지: 요청 전체의 압축 해제 크기 / archive당 항목 수 제한
+    max_members = settings.TAS_MIGRATION_MAX_ARCHIVE_MEMBERS
+    budget = settings.TAS_MIGRATION_MAX_UNCOMPRESSED_MB * 1024 * 1024
+    for filename, path in files:
+        ext = Path(filename).suffix.lower()
+        if ext in SUPPORTED_EXTS:
+            expanded.append((filename, path))
+            continue
+        if ext not in ARCHIVE_EXTS:
+            errors.append(f"{filename}: PPTX / PDF / ZIP 파일만 이관할 수 있습니다")
+            continue
+        try:
+            with zipfile.ZipFile(path) as zf:
+                infos = zf.infolist()
+                if len(infos) > max_members:
+                    errors.append(f"{filename}: 압축 파일 항목이 너무 많습니다 ({len(infos)} > {max_members})")
+                    continue
+                for info in sorted(infos, key=lambda i: i.filename):
+                    member_ext = Path(info.filename).suffix.lower()
+                    if info.is_dir() or member_ext not in SUPPORTED_EXTS \
+                            or Path(info.filename).name.startswith(("~$", "._")):
+                        continue
+                    if info.file_size > budget:
+                        errors.append(f"{filename}: 압축 해제 크기 제한 초과 "
+                                      f"({settings.TAS_MIGRATION_MAX_UNCOMPRESSED_MB}MB) — {info.filename} 이후 생략")
+                        break
+                    # 압축 내 경로는 쓰지 않음 (zip slip 방지)
+                    target = work_dir / f"{len(expanded)}_{Path(path).stem}{member_ext}"
+                    written = 0
+                    with zf.open(info) as src, open(target, "wb") as dst:
+                        # 헤더의 file_size를 넘는 데이터는 zipfile이 읽지 않지만 실제 쓴 크기로도 확인
+                        while written <= info.file_size and (chunk := src.read(1024 * 1024)):
+                            written += len(chunk)
+                            dst.write(chunk)
+                    if written > info.file_size:
+                        target.unlink(missing_ok=True)
+                        errors.append(f"{filename}: {info.filename} 크기가 헤더와 다릅니다")
+                        break
+                    budget -= written
+                    expanded.append((f"{filename}/{info.filename}", str(target)))
+        except zipfile.BadZipFile as e:
+            errors.append(f"{filename}: {e}")
+    return expanded, errors
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+def _ranges(total: int, path: str) -> list[tuple[int, int]]:
+    size = settings.TAS_MIGRATION_CHUNK_PAGES if path.lower().endswith(".pdf") \
+        else settings.TAS_MIGRATION_CHUNK_SLIDES
+    size = max(1, size)
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def run_migration(files: list[tuple[str, str]], system_group: str, use_cache: bool = True) -> Iterator[dict]:
+    """
+    파일 목록 이관 (진행 이벤트 generator)
+
+    Events:
+        {"type": "file", "filename", "pages"}                   — 파일별 페이지 / 슬라이드 수
+        {"type": "progress", "filename", "page_range", "records", "parsed_pages", "total_pages"}
+        {"type": "error", "filename", "error"}
+        {"type": "summary", "files", "total", "inserted", "skipped", "errors",
+         "pages": {"cached", "skipped", "parsed"}, "elapsed_seconds"}
+
+    total은 파일별 serial 중복 제거 후 레코드 수 (기존 /migrate 응답과 같은 의미),
+    skipped는 DB에 이미 있거나 앞선 파일과 serial이 겹쳐 추가되지 않은 건수입니다.
+    use_cache=False면 PDF 페이지 캐시를 무시하고 전부 다시 파싱합니다 (결과는 캐시에 갱신).
+    """
+    started = time.perf_counter()
+    errors: list[str] = []
+
+    # 1) 페이지 수 → 작업 분할
+    tasks = []  # (file_index, start, stop)
+    pages_by_file: dict[int, int] = {}
+    for index, (filename, path) in enumerate(files):
+        try:
+            pages = _count_units(path)
+        except Exception as e:
+            errors.append(f"{filename}: {e}")
+            yield {"type": "error", "filename": filename, "error": str(e)}
+            continue
+        pages_by_file[index] = pages
+        tasks.extend((index, start, stop) for start, stop in _ranges(pages, path))
+        yield {"type": "file", "filename": filename, "pages": pages}
+    total_pages = sum(pages_by_file.values())
+
+    # 2) 병렬 파싱 (작업이 1개면 프로세스 기동 비용 없이 현재 스레드에서)
+    parsed: dict[int, list[tuple[int, dict]]] = {index: [] for index in pages_by_file}
+    parsed_pages = 0
+    page_stats = {"cached": 0, "skipped": 0, "parsed": 0}
+
+    def done(task, result: tuple | None, error: Exception | None):
+        nonlocal parsed_pages
+        index, start, stop = task
+        filename = files[index][0]
+        parsed_pages += stop - start
+        if error is not None:
+            message = f"{filename} (pages {start + 1}-{stop}): {error}"
+            errors.append(message)
+            return {"type": "error", "filename": filename, "error": message}
+        records, stats = result
+        parsed[index].extend(records)
+        for key, value in stats.items():
+            page_stats[key] += value
+        return {"type": "progress", "filename": filename, "page_range": [start + 1, stop],
+                "records": len(records), "parsed_pages": parsed_pages, "total_pages": total_pages}
+
+    if len(tasks) == 1:
+        task = tasks[0]
+        try:
+            result, error = _parse_range(files[task[0]][1], task[1], task[2], use_cache), None
+        except Exception as e:
+            result, error = None, e
+        yield done(task, result, error)
+    elif tasks:
+        pool = _get_pool()
+        futures: dict[Future, tuple] = {
+            pool.submit(_parse_range, files[task[0]][1], task[1], task[2], use_cache): task for task in tasks
+        }
+        try:
+            for future in as_completed(futures):
+                error = future.exception()
+                if isinstance(error, BrokenProcessPool):
+                    # worker 비정상 종료 (OOM 등) — 다음 요청에서 pool 재생성
+                    shutdown_pool()
+                yield done(futures[future], None if error else future.result(), error)
+        finally:
+            # 클라이언트 연결이 끊겨 generator가 닫히면 남은 작업 취소
+            for future in futures:
+                future.cancel()
+
+    # 3) 파일 / 페이지 순서대로 정렬, 파일 내 serial 중복 제거 (첫 페이지 우선)
+    records = []
+    for index in sorted(parsed):
+        seen = set()
+        for _, rec in sorted(parsed[index], key=lambda item: item[0]):
+            if rec["serial_no"] in seen:
+                continue
+            seen.add(rec["serial_no"])
+            records.append({**rec, "system_group": system_group})
+
+    # 4) set 기반 중복 확인 + 단일 트랜잭션 삽입 (파일 간 중복은 INSERT OR IGNORE가 처리)
+    existing = db.existing_serials((rec["serial_no"] for rec in records), system_group)
+    new_records = [rec for rec in records if rec["serial_no"] not in existing]
+    try:
+        inserted = db.bulk_insert_records(new_records)
+    except Exception as e:
+        errors.append(f"insert: {e}")
+        inserted = 0
+
+    yield {
+        "type": "summary",
+        "files": len(files),
+        "total": len(records),
+        "inserted": inserted,
+        "skipped": len(records) - inserted,
+        "errors": errors,
+        "pages": page_stats,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def migrate_files(files: list[tuple[str, str]], system_group: str, use_cache: bool = True) -> dict:
+    """run_migration을 끝까지 실행하고 summary만 반환"""
+    summary = {}
+    for event in run_migration(files, system_group, use_cache):
+        summary = event
+    return {k: v for k, v in summary.items() if k != "type"}
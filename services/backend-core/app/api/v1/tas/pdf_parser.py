@@ -5,10 +5,28 @@ Structure per TAS record page:
   Table 0: title (ignored)
   Table 1: 7 rows x 4 cols — main data
   Table 2: 4 rows x 4 cols — signature info
+
+Parsed pages are cached in the TAS DB keyed by (page content digest, parser version),
+so re-migrating a corrected file only runs table extraction on changed pages.
+Pages without the TAS signature ("Serial No" text + enough ruling lines for a
+7x4 table) skip the table finder entirely.
 """
+import hashlib
 import re
 from pathlib import Path
 import pdfplumber
+from pdfminer.pdftypes import PDFStream, resolve1
+
+from app.api.v1.tas import database as db
+
+# 파싱 로직 / pdfplumber 버전이 바뀌면 캐시 무효화
+PARSER_VERSION = hashlib.sha256(
+    Path(__file__).read_bytes() + pdfplumber.__version__.encode()
+).hexdigest()[:12]
+
+# main table (7 rows x 4 cols, lines strategy) 최소 ruling 수
+_MIN_H_EDGES = 8
+_MIN_V_EDGES = 5
 
 
 def _strip(text: str) -> str:
@@ -101,16 +119,116 @@ def _parse_page(page) -> dict | None:
     return data
 
 
+def _stream_data(obj) -> bytes:
+    obj = resolve1(obj)
+    return obj.get_data() if isinstance(obj, PDFStream) else b""
+
+
+def page_digest(page) -> str | None:
+    """
+    Digest of what the parser sees on a page: content streams, form XObjects,
+    font ToUnicode maps and page geometry. None if the page can't be hashed
+    (such pages are always parsed).
+    """
+    try:
+        page_obj = page.page_obj
+        h = hashlib.sha256(repr((page.width, page.height, page.rotation)).encode())
+        contents = page_obj.contents if isinstance(page_obj.contents, list) else [page_obj.contents]
+        for ref in contents:
+            h.update(_stream_data(ref))
+        resources = resolve1(page_obj.resources) or {}
+        for name, ref in sorted((resolve1(resources.get("XObject")) or {}).items()):
+            xobj = resolve1(ref)
+            if isinstance(xobj, PDFStream) and getattr(xobj.get("Subtype"), "name", None) in ("Form", b"Form"):
+                h.update(name.encode() + xobj.get_data())
+        for name, ref in sorted((resolve1(resources.get("Font")) or {}).items()):
+            font = resolve1(ref) or {}
+            h.update(name.encode() + repr(resolve1(font.get("BaseFont"))).encode())
+            h.update(_stream_data(font.get("ToUnicode")))
+        return h.hexdigest()
+    except Exception:
+        return None
+
+
+def _has_table_signature(page) -> bool:
+    """Cheap pre-filter before extract_tables (a page failing it can't yield a record)."""
+    text = re.sub(r"\s", "", "".join(c["text"] for c in page.chars))
+    if "SerialNo" not in text:
+        return False
+    h_edges = v_edges = 0
+    for edge in page.edges:
+        if edge["orientation"] == "h":
+            h_edges += 1
+        else:
+            v_edges += 1
+    return h_edges >= _MIN_H_EDGES and v_edges >= _MIN_V_EDGES
+
+
+def count_pages(pdf_path: str | Path) -> int:
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        return len(pdf.pages)
+
+
+def parse_pdf_pages(pdf_path: str | Path, start: int = 0, stop: int | None = None,
+                    use_cache: bool = True, stats: dict | None = None) -> list[tuple[int, dict]]:
+    """
+    Parse TAS record pages in [start, stop). Returns [(page_index, record)].
+    Unit of work for parallel migration (one page range per worker task).
+
+    Args:
+        use_cache: reuse cached per-page results (fresh results are stored either way)
+        stats: if given, incremented with pages "cached" / "skipped" / "parsed"
+    """
+    stats = stats if stats is not None else {}
+    for key in ("cached", "skipped", "parsed"):
+        stats.setdefault(key, 0)
+
+    results = []
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        pages = pdf.pages[start:stop]
+        digests = [page_digest(page) for page in pages]
+        cached = {}
+        if use_cache:
+            try:
+                cached = db.get_cached_pages([d for d in digests if d], PARSER_VERSION)
+            except Exception as e:
+                print(f"TAS page cache lookup error: {e}")
+
+        new_entries = []
+        for offset, (page, digest) in enumerate(zip(pages, digests)):
+            if digest is not None and digest in cached:
+                rec = cached[digest]
+                stats["cached"] += 1
+            else:
+                if _has_table_signature(page):
+                    rec = _parse_page(page)
+                    stats["parsed"] += 1
+                else:
+                    rec = None
+                    stats["skipped"] += 1
+                if digest is not None:
+                    new_entries.append((digest, rec))
+            if rec:
+                results.append((start + offset, rec))
+            # release cached layout objects of finished pages
+            page.close()
+
+    if new_entries:
+        try:
+            db.store_cached_pages(new_entries, PARSER_VERSION)
+        except Exception as e:
+            print(f"TAS page cache store error: {e}")
+    return results
+
+
 def parse_pdf(pdf_path: str | Path) -> list[dict]:
     """Parse all TAS record pages from a PDF file. Returns list of dicts."""
     records = []
     seen = set()
 
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            rec = _parse_page(page)
-            if rec and rec["serial_no"] not in seen:
-                seen.add(rec["serial_no"])
-                records.append(rec)
+    for _, rec in parse_pdf_pages(pdf_path):
+        if rec["serial_no"] not in seen:
+            seen.add(rec["serial_no"])
+            records.append(rec)
 
     return records
@@ -1,11 +1,26 @@
 """
 Generate TAS PPT slides from DB records.
-Uses the New_Rev.pptx as a visual template (copies slide XML + image).
+Uses the New_Rev.pptx as a visual template (copies slide XML).
+
+- Template slides are parsed once per (path, mtime) and compiled: the record slide is
+  filled with placeholder tokens via _fill_table, serialized, and split into static
+  XML pieces + value slots. Rendering a record is then string joins (no shape copies).
+- Decks are written as a zip stream, one slide part per record, so the full deck is
+  never held in memory.
 """
 import copy
 import io
+import re
+import threading
+import zipfile
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable, Iterator
+
+from lxml import etree
 from pptx import Presentation
+from pptx.oxml import parse_xml
 from pptx.oxml.ns import qn
 
 TEMPLATES_DIR        = Path(__file__).parent / "templates"
@@ -13,38 +28,252 @@ TEMPLATE_PATH        = TEMPLATES_DIR / "AI System 조치 이력 관리_New_Rev.p
 LEGACY_TEMPLATE_PATH = TEMPLATES_DIR / "AI System 조치 이력 관리_Legacy_Rev.pptx"
 TEMPLATE_SLIDE_IDX   = 5  # first TAS record slide (index 5 = slide 6)
 
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+_SLIDE_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+_SLIDE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide"
+_CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# Skeleton parts rewritten per deck (slide list depends on the record count)
+_PRESENTATION = "ppt/presentation.xml"
+_PRESENTATION_RELS = "ppt/_rels/presentation.xml.rels"
+_CONTENT_TYPES = "[Content_Types].xml"
+_SKELETON_SLIDE = "ppt/slides/slide1.xml"
+_SKELETON_SLIDE_RELS = "ppt/slides/_rels/slide1.xml.rels"
+
 
 # ---------------------------------------------------------------------------
-# Low-level helpers
+# Template cache
 # ---------------------------------------------------------------------------
 
-def _copy_slide_to_prs(src_slide, dst_prs) -> object:
-    """
-    Deep-copy a slide (including its image) into a destination Presentation.
-    Returns the new slide object.
-    """
-    blank_layout = dst_prs.slide_layouts[6]  # Blank layout
-    new_slide = dst_prs.slides.add_slide(blank_layout)
+# Placeholder for each record field while compiling (private-use chars never occur in templates)
+_FIELDS = (
+    "serial_no", "site", "manager", "issue_date", "check_date", "action_date",
+    "core_version", "non_core_version", "hw_status", "symptom", "cause", "action",
+    "next_plan", "author", "author_date", "reviewer", "approver",
+)
+_TOKEN_RECORD = {f: f"\ue000{f}\ue001" for f in _FIELDS}
+_TOKEN_RE = re.compile("\ue000(\\w+)\ue001")
+_A_T_RE = re.compile(r"<a:t(?: [^>]*)?>")
+# XML 1.0에서 허용되지 않는 제어 문자 (python-pptx는 이 경우 예외)
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _escape(text: str) -> str:
+    text = _INVALID_XML_CHARS.sub("", text)
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\r", "&#13;")
+
+
+@dataclass(frozen=True)
+class _Slot:
+    field: str
+    # paragraph slot: value lines become separate <a:p> (same as _set_cell_text)
+    head: str = ""     # "<a:p ...>...<a:t>"
+    prefix: str = ""   # escaped text before the value on the first line
+    suffix: str = ""   # escaped text after the value on the last line
+    tail: str = ""     # "</a:t>...</a:p>"
+    paragraph: bool = False
+
+    def render(self, value: str) -> str:
+        if not self.paragraph:
+            return _escape(value)
+        lines = [_escape(line) for line in value.split("\n")]
+        lines[0] = self.prefix + lines[0]
+        lines[-1] += self.suffix
+        return "".join(self.head + line + self.tail for line in lines)
+
+
+@dataclass(frozen=True)
+class _Template:
+    slide_width: int
+    slide_height: int
+    pieces: tuple  # static slide XML between slots (len(slots) + 1)
+    slots: tuple
+
+    def render(self, record: dict) -> bytes:
+        out = [self.pieces[0]]
+        for slot, piece in zip(self.slots, self.pieces[1:]):
+            value = record.get(slot.field)
+            out.append(slot.render("" if value is None else str(value)))
+            out.append(piece)
+        return "".join(out).encode("utf-8")
+
+
+def _compile_slide(xml: str) -> tuple[tuple, tuple]:
+    """Split token-filled slide XML into static pieces and value slots."""
+    pieces, slots, cursor = [], [], 0
+    for match in _TOKEN_RE.finditer(xml):
+        pos, end = match.span()
+        if pos < cursor:
+            continue
+        p_start = max(xml.rfind("<a:p>", cursor, pos), xml.rfind("<a:p ", cursor, pos))
+        p_end = xml.find("</a:p>", end)
+        segment = xml[p_start:p_end] if p_start >= 0 and p_end >= 0 else ""
+        t_tags = list(_A_T_RE.finditer(segment))
+        if len(t_tags) == 1 and len(_TOKEN_RE.findall(segment)) == 1:
+            # single-run paragraph written by _set_cell_text
+            t_start = p_start + t_tags[0].end()
+            t_end = xml.index("</a:t>", end)
+            p_end += len("</a:p>")
+            pieces.append(xml[cursor:p_start])
+            slots.append(_Slot(
+                field=match.group(1), head=xml[p_start:t_start], prefix=xml[t_start:pos],
+                suffix=xml[end:t_end], tail=xml[t_end:p_end], paragraph=True,
+            ))
+            cursor = p_end
+        else:
+            pieces.append(xml[cursor:pos])
+            slots.append(_Slot(field=match.group(1)))
+            cursor = end
+    pieces.append(xml[cursor:])
+    return tuple(pieces), tuple(slots)
+
+
+_template_cache: dict[Path, tuple[int, _Template]] = {}
+_template_lock = threading.Lock()
 
-    sp_tree = new_slide.shapes._spTree
+
+def _load_template(path: Path) -> _Template:
+    """Parse and compile a template deck once per (path, mtime)."""
+    mtime = path.stat().st_mtime_ns
+    with _template_lock:
+        cached = _template_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    src_prs = Presentation(str(path))
+    src_tree = copy.deepcopy(src_prs.slides[TEMPLATE_SLIDE_IDX].shapes._spTree)
+    # Pictures reference the template's image parts, which are not copied
+    for pic_el in src_tree.findall(".//" + qn("p:pic")):
+        pic_el.getparent().remove(pic_el)
+
+    # Fill a blank-layout slide with tokens (shapes API needs a slide bound to a package)
+    skeleton = _skeleton(src_prs.slide_width, src_prs.slide_height)
+    work_slide = Presentation(io.BytesIO(skeleton.package)).slides[0]
+    sp_tree = work_slide.shapes._spTree
     sp_tree.clear()
-    for el in src_slide.shapes._spTree:
-        sp_tree.append(copy.deepcopy(el))
+    sp_tree.extend(list(src_tree))
+    _fill_table(work_slide, _TOKEN_RECORD)
+
+    pieces, slots = _compile_slide(_xml_bytes(work_slide._element).decode("utf-8"))
+    template = _Template(src_prs.slide_width, src_prs.slide_height, pieces, slots)
+    with _template_lock:
+        _template_cache[path] = (mtime, template)
+    return template
+
+
+def _load_templates() -> dict[str, _Template]:
+    templates = {}
+    for grp, path in (("NEW", TEMPLATE_PATH), ("LEGACY", LEGACY_TEMPLATE_PATH)):
+        if path.exists():
+            templates[grp] = _load_template(path)
+    if not templates:
+        raise RuntimeError("No template files found")
+    return templates
+
+
+@dataclass(frozen=True)
+class _Skeleton:
+    package: bytes              # full one-slide deck (source of the work slide)
+    parts: tuple                # ((name, bytes), ...) copied verbatim
+    presentation: bytes
+    presentation_rels: bytes
+    content_types: bytes
+    slide_rels: bytes
+    slide_rel_id: str
+
+
+@lru_cache(maxsize=8)
+def _skeleton(slide_width: int, slide_height: int) -> _Skeleton:
+    """Blank deck with one Blank-layout slide, split into reusable parts."""
+    prs = Presentation()
+    prs.slide_width = slide_width
+    prs.slide_height = slide_height
+    prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
+    buf = io.BytesIO()
+    prs.save(buf)
+
+    special = {_PRESENTATION, _PRESENTATION_RELS, _CONTENT_TYPES, _SKELETON_SLIDE, _SKELETON_SLIDE_RELS}
+    with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as zf:
+        parts = tuple((name, zf.read(name)) for name in zf.namelist() if name not in special)
+        presentation_rels = zf.read(_PRESENTATION_RELS)
+        rel_id = next(
+            rel.get("Id") for rel in etree.fromstring(presentation_rels)
+            if rel.get("Target") == "slides/slide1.xml"
+        )
+        return _Skeleton(
+            package=buf.getvalue(),
+            parts=parts,
+            presentation=zf.read(_PRESENTATION),
+            presentation_rels=presentation_rels,
+            content_types=zf.read(_CONTENT_TYPES),
+            slide_rels=zf.read(_SKELETON_SLIDE_RELS),
+            slide_rel_id=rel_id,
+        )
+
+
+def _xml_bytes(root) -> bytes:
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def _presentation_xml(skeleton: _Skeleton, count: int) -> bytes:
+    root = etree.fromstring(skeleton.presentation)
+    sld_id_lst = root.find(qn("p:sldIdLst"))
+    sld_id_lst.clear()
+    for i in range(1, count + 1):
+        etree.SubElement(sld_id_lst, qn("p:sldId"), {"id": str(255 + i), qn("r:id"): f"rIdTas{i}"})
+    if not count:
+        root.remove(sld_id_lst)
+    return _xml_bytes(root)
+
+
+def _presentation_rels_xml(skeleton: _Skeleton, count: int) -> bytes:
+    root = etree.fromstring(skeleton.presentation_rels)
+    for rel in root:
+        if rel.get("Id") == skeleton.slide_rel_id:
+            root.remove(rel)
+            break
+    for i in range(1, count + 1):
+        etree.SubElement(root, f"{{{_REL_NS}}}Relationship",
+                         {"Id": f"rIdTas{i}", "Type": _SLIDE_REL_TYPE, "Target": f"slides/slide{i}.xml"})
+    return _xml_bytes(root)
+
+
+def _content_types_xml(skeleton: _Skeleton, count: int) -> bytes:
+    root = etree.fromstring(skeleton.content_types)
+    for override in root:
+        if override.get("PartName") == "/" + _SKELETON_SLIDE:
+            root.remove(override)
+            break
+    for i in range(1, count + 1):
+        etree.SubElement(root, f"{{{_CT_NS}}}Override",
+                         {"PartName": f"/ppt/slides/slide{i}.xml", "ContentType": _SLIDE_CONTENT_TYPE})
+    return _xml_bytes(root)
+
 
-    for pic_el in sp_tree.findall(
-        ".//{http://schemas.openxmlformats.org/presentationml/2006/main}pic"
-    ):
-        parent = pic_el.getparent()
-        if parent is not None:
-            parent.remove(pic_el)
+class _ChunkSink:
+    """Write-only, non-seekable file object for ZipFile; drained by the response generator."""
 
-    for sp_el in list(sp_tree):
-        tag = sp_el.tag.split("}")[-1] if "}" in sp_el.tag else sp_el.tag
-        if tag == "pic":
-            sp_tree.remove(sp_el)
+    def __init__(self):
+        self._chunks: list[bytes] = []
 
-    return new_slide
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
 
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# ---------------------------------------------------------------------------
+# Slide filling
+# ---------------------------------------------------------------------------
 
 def _set_cell_text(cell, text: str, preserve_runs: bool = False):
     """Replace all text in a table cell, keeping the first run's formatting."""
@@ -61,8 +290,6 @@ def _set_cell_text(cell, text: str, preserve_runs: bool = False):
 
     lines = text.split("\n") if text else [""]
     for line in lines:
-        from pptx.oxml import parse_xml
-
         p_xml = '<a:p xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"/>'
         p_el = parse_xml(p_xml)
 
@@ -70,12 +297,10 @@ def _set_cell_text(cell, text: str, preserve_runs: bool = False):
             r_el = copy.deepcopy(first_run_xml)
             t_el = r_el.find(qn("a:t"))
             if t_el is None:
-                from lxml import etree
                 t_el = etree.SubElement(r_el, qn("a:t"))
             t_el.text = line
             p_el.append(r_el)
         else:
-            from lxml import etree
             r_el = etree.SubElement(p_el, qn("a:r"))
             t_el = etree.SubElement(r_el, qn("a:t"))
             t_el.text = line
@@ -136,56 +361,48 @@ def _fill_table(slide, record: dict):
 # Public API
 # ---------------------------------------------------------------------------
 
-def _get_template_slide(system_group: str):
-    """Return (src_prs, src_slide) for the given system group."""
-    path = LEGACY_TEMPLATE_PATH if system_group == "LEGACY" else TEMPLATE_PATH
-    src_prs = Presentation(str(path))
-    return src_prs, src_prs.slides[TEMPLATE_SLIDE_IDX]
-
-
-def generate_single_pptx(record: dict) -> bytes:
-    """Generate a single-slide PPTX for one record."""
-    grp = record.get("system_group", "NEW")
-    src_prs, src_slide = _get_template_slide(grp)
-
-    dst_prs = Presentation()
-    dst_prs.slide_width = src_prs.slide_width
-    dst_prs.slide_height = src_prs.slide_height
+def _write_deck(records: Iterable[dict], templates: dict[str, _Template], skeleton: _Skeleton) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    zf = zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED)
+    for name, data in skeleton.parts:
+        zf.writestr(name, data)
+    yield sink.drain()
 
-    new_slide = _copy_slide_to_prs(src_slide, dst_prs)
-    _fill_table(new_slide, record)
+    default = templates.get("NEW", next(iter(templates.values())))
+    count = 0
+    for record in records:
+        count += 1
+        template = templates.get(record.get("system_group", "NEW"), default)
+        zf.writestr(f"ppt/slides/slide{count}.xml", template.render(record))
+        zf.writestr(f"ppt/slides/_rels/slide{count}.xml.rels", skeleton.slide_rels)
+        yield sink.drain()
 
-    buf = io.BytesIO()
-    dst_prs.save(buf)
-    return buf.getvalue()
+    zf.writestr(_PRESENTATION, _presentation_xml(skeleton, count))
+    zf.writestr(_PRESENTATION_RELS, _presentation_rels_xml(skeleton, count))
+    zf.writestr(_CONTENT_TYPES, _content_types_xml(skeleton, count))
+    zf.close()
+    yield sink.drain()
 
 
-def generate_multi_pptx(records: list[dict]) -> bytes:
+def stream_pptx(records: Iterable[dict]) -> Iterator[bytes]:
     """
-    Generate a multi-slide PPTX for multiple records.
+    Stream a PPTX deck (one slide per record) as zip chunks.
     Records may mix NEW and LEGACY groups; each uses its own template.
+
+    Templates are loaded eagerly so a missing template raises here,
+    before the response starts.
     """
-    templates: dict[str, tuple] = {}
-    for grp in ("NEW", "LEGACY"):
-        path = LEGACY_TEMPLATE_PATH if grp == "LEGACY" else TEMPLATE_PATH
-        if path.exists():
-            prs = Presentation(str(path))
-            templates[grp] = (prs, prs.slides[TEMPLATE_SLIDE_IDX])
+    templates = _load_templates()
+    base = templates.get("NEW", next(iter(templates.values())))
+    skeleton = _skeleton(base.slide_width, base.slide_height)
+    return _write_deck(records, templates, skeleton)
 
-    if not templates:
-        raise RuntimeError("No template files found")
 
-    base_prs_tmpl = templates.get("NEW", list(templates.values())[0])[0]
-    dst_prs = Presentation()
-    dst_prs.slide_width = base_prs_tmpl.slide_width
-    dst_prs.slide_height = base_prs_tmpl.slide_height
+def generate_single_pptx(record: dict) -> bytes:
+    """Generate a single-slide PPTX for one record."""
+    return b"".join(stream_pptx([record]))
 
-    for record in records:
-        grp = record.get("system_group", "NEW")
-        _, src_slide = templates.get(grp, list(templates.values())[0])
-        new_slide = _copy_slide_to_prs(src_slide, dst_prs)
-        _fill_table(new_slide, record)
 
-    buf = io.BytesIO()
-    dst_prs.save(buf)
-    return buf.getvalue()
+def generate_multi_pptx(records: list[dict]) -> bytes:
+    """Generate a multi-slide PPTX for multiple records (in memory — prefer stream_pptx)."""
+    return b"".join(stream_pptx(records))
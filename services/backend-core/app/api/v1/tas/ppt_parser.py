@@ -3,6 +3,7 @@ Parse existing PPTX files into dict records for DB migration.
 Supports both Legacy_Rev and New_Rev formats.
 """
 import re
+import zipfile
 from pathlib import Path
 from pptx import Presentation
 
@@ -114,15 +115,34 @@ def parse_slide(slide) -> dict | None:
     return data
 
 
+def count_slides(pptx_path: str | Path) -> int:
+    """Slide count from presentation.xml (no full package load)."""
+    with zipfile.ZipFile(str(pptx_path)) as zf:
+        xml = zf.read("ppt/presentation.xml").decode("utf-8", errors="ignore")
+    return len(re.findall(r"<(?:\w+:)?sldId\s", xml))
+
+
+def parse_pptx_slides(pptx_path: str | Path, start: int = 0, stop: int | None = None) -> list[tuple[int, dict]]:
+    """
+    Parse TAS record slides in [start, stop). Returns [(slide_index, record)].
+    Unit of work for parallel migration (one slide range per worker task).
+    """
+    prs = Presentation(str(pptx_path))
+    results = []
+    for offset, slide in enumerate(list(prs.slides)[start:stop]):
+        rec = parse_slide(slide)
+        if rec:
+            results.append((start + offset, rec))
+    return results
+
+
 def parse_pptx(pptx_path: str | Path) -> list[dict]:
     """Parse all TAS record slides from a PPTX file. Returns list of dicts."""
-    prs = Presentation(str(pptx_path))
     records = []
     seen = set()
 
-    for slide in prs.slides:
-        rec = parse_slide(slide)
-        if rec and rec["serial_no"] not in seen:
+    for _, rec in parse_pptx_slides(pptx_path):
+        if rec["serial_no"] not in seen:
             seen.add(rec["serial_no"])
             records.append(rec)
 
@@ -2,19 +2,20 @@
 TAS (Technical Action Summary) API Routes
 System 이상발생 분석 관리 - AI System 이상발생 이력 CRUD + PPT 생성
 """
+import json
 import os
+import shutil
 import tempfile
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Literal
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal
 
 from app.api.v1.tas import database as db
-from app.api.v1.tas.ppt_generator import generate_single_pptx, generate_multi_pptx
-from app.api.v1.tas.ppt_parser import parse_pptx
-from app.api.v1.tas.pdf_parser import parse_pdf
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -49,10 +50,21 @@ class RecordIn(BaseModel):
 # ---------------------------------------------------------------------------
 
 @router.get("/records")
-def list_records(search: str = "", site: str = "", system_group: str = ""):
-    records = db.list_records(search=search, site=site, system_group=system_group)
+def list_records(
+    search: str = "",
+    site: str = "",
+    system_group: str = "",
+    limit: int | None = Query(None, ge=1, le=1000, description="페이지 크기 (없으면 전체)"),
+    offset: int = Query(0, ge=0),
+):
+    records = db.list_records(search=search, site=site, system_group=system_group,
+                              limit=limit, offset=offset)
+    if limit is None:
+        total = len(records)
+    else:
+        total = db.count_records(search=search, site=site, system_group=system_group)
     sites = db.list_sites(system_group=system_group)
-    return {"records": records, "total": len(records), "sites": sites}
+    return {"records": records, "total": total, "sites": sites, "limit": limit, "offset": offset}
 
 
 @router.get("/records/{record_id}")
@@ -96,6 +108,7 @@ def delete_record(record_id: int):
 
 # ---------------------------------------------------------------------------
 # Routes: PPT Download
+# (python-pptx / pdfplumber는 무거우므로 사용하는 라우트에서 import)
 # ---------------------------------------------------------------------------
 
 @router.get("/download/single/{record_id}")
@@ -103,13 +116,13 @@ def download_single(record_id: int):
     record = db.get_record(record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Record not found")
-    pptx_bytes = generate_single_pptx(record)
+    from app.api.v1.tas.ppt_generator import stream_pptx, PPTX_MEDIA_TYPE
     serial = record["serial_no"]
     grp = record.get("system_group", "NEW")
     filename = f"TAS_{grp}_{serial}.pptx"
     return StreamingResponse(
-        iter([pptx_bytes]),
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        stream_pptx([record]),
+        media_type=PPTX_MEDIA_TYPE,
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
 
@@ -119,11 +132,12 @@ def download_all(search: str = "", site: str = "", system_group: str = ""):
     records = db.list_records(search=search, site=site, system_group=system_group)
     if not records:
         raise HTTPException(status_code=404, detail="No records found")
-    pptx_bytes = generate_multi_pptx(records)
+    from app.api.v1.tas.ppt_generator import stream_pptx, PPTX_MEDIA_TYPE
     label = system_group or "전체"
+    # 슬라이드마다 zip chunk를 내보내므로 전체 deck을 메모리에 만들지 않음
     return StreamingResponse(
-        iter([pptx_bytes]),
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        stream_pptx(records),
+        media_type=PPTX_MEDIA_TYPE,
         headers={"Content-Disposition": f"attachment; filename=TAS_{label}_이력.pptx"},
     )
 
@@ -132,50 +146,104 @@ def download_all(search: str = "", site: str = "", system_group: str = ""):
 # Routes: Migration (PPT/PDF → DB)
 # ---------------------------------------------------------------------------
 
-def _run_migration(file_path: str, system_group: str) -> dict:
-    """Shared migration logic. Supports both .pptx and .pdf files."""
-    ext = Path(file_path).suffix.lower()
-    if ext == ".pdf":
-        records = parse_pdf(file_path)
-    else:
-        records = parse_pptx(file_path)
-
-    inserted, skipped, errors = 0, 0, []
-    for rec in records:
-        rec["system_group"] = system_group
-        if db.get_record_by_serial(rec["serial_no"], system_group):
-            skipped += 1
-        else:
-            try:
-                db.create_record(rec)
-                inserted += 1
-            except Exception as e:
-                errors.append(f"{rec['serial_no']}: {str(e)}")
-    return {"total": len(records), "inserted": inserted, "skipped": skipped, "errors": errors}
+def _run_migration(file_path: str, system_group: str, filename: str = "", use_cache: bool = True) -> dict:
+    """Shared migration logic. Supports .pptx / .pdf files and zip archives of them."""
+    from app.api.v1.tas.migration import expand_archives, migrate_files
+    files, errors = expand_archives([(filename or Path(file_path).name, file_path)], Path(file_path).parent)
+    result = migrate_files(files, system_group, use_cache)
+    result["errors"] = errors + result["errors"]
+    return result
+
+
+def _check_group(system_group: str):
+    if system_group not in db.GROUPS:
+        raise HTTPException(status_code=400, detail=f"system_group must be one of {db.GROUPS}")
+
+
+async def _save_upload(file: UploadFile, directory: str, index: int) -> str:
+    ext = Path(file.filename or "").suffix.lower()
+    path = os.path.join(directory, f"{index}{ext}")
+    with open(path, "wb") as out:
+        while chunk := await file.read(1024 * 1024):
+            out.write(chunk)
+    return path
 
 
 @router.post("/migrate")
 async def migrate(
     file: UploadFile = File(...),
     system_group: str = Form("NEW"),
+    use_cache: bool = Form(True),
 ):
-    if system_group not in db.GROUPS:
-        raise HTTPException(status_code=400, detail=f"system_group must be one of {db.GROUPS}")
+    """use_cache=false면 PDF 페이지 파싱 캐시를 무시하고 전체 페이지를 다시 파싱"""
+    _check_group(system_group)
 
     fname = file.filename or ""
     ext = Path(fname).suffix.lower()
-    if ext not in (".pptx", ".pdf"):
-        raise HTTPException(status_code=400, detail="PPTX 또는 PDF 파일만 업로드 가능합니다")
+    if ext not in (".pptx", ".pdf", ".zip"):
+        raise HTTPException(status_code=400, detail="PPTX, PDF 또는 ZIP 파일만 업로드 가능합니다")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            tmp_path = await _save_upload(file, tmp_dir, 0)
+            # 파싱은 CPU 작업 — 이벤트 루프를 막지 않도록 threadpool에서
+            return await run_in_threadpool(_run_migration, tmp_path, system_group, fname, use_cache)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/migrate/batch")
+async def migrate_batch(
+    files: List[UploadFile] = File(...),
+    system_group: str = Form("NEW"),
+    use_cache: bool = Form(True),
+):
+    """
+    여러 PPTX / PDF (또는 zip) 일괄 이관 (NDJSON 스트리밍)
+
+    - 페이지 / 슬라이드 구간 단위로 process pool에서 병렬 파싱 (TAS_MIGRATION_WORKERS)
+    - PDF는 페이지 단위 파싱 결과를 캐시 — 수정된 파일 재이관 시 바뀐 페이지만 파싱
+    - 진행 이벤트를 한 줄씩: {"type": "file" | "progress" | "error", ...}
+    - 마지막 줄은 {"type": "summary", "total", "inserted", "skipped", "errors", ...}
+    """
+    _check_group(system_group)
+    if len(files) > settings.TAS_MIGRATION_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {settings.TAS_MIGRATION_MAX_FILES}개 파일까지 이관할 수 있습니다."
+        )
+
+    from app.api.v1.tas.migration import expand_archives, run_migration
 
-    tmp_path = None
+    # 스트리밍 시작 전에 업로드를 임시 디렉토리에 저장 (generator 종료 시 삭제)
+    tmp_dir = tempfile.mkdtemp(prefix="tas_migrate_")
     try:
-        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
-            tmp_path = tmp.name
-            while chunk := await file.read(1024 * 1024):
-                tmp.write(chunk)
-        return _run_migration(tmp_path, system_group)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+        saved = [(file.filename or f"file{i}", await _save_upload(file, tmp_dir, i))
+                 for i, file in enumerate(files)]
+        targets, errors = await run_in_threadpool(expand_archives, saved, tmp_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    def stream():
+        try:
+            for message in errors:
+                yield json.dumps({"type": "error", "error": message}, ensure_ascii=False) + "\n"
+            for event in run_migration(targets, system_group, use_cache):
+                if event["type"] == "summary":
+                    event["errors"] = errors + event["errors"]
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.delete("/migrate/cache")
+def clear_migration_cache(stale_only: bool = False):
+    """PDF 페이지 파싱 캐시 삭제 (stale_only=true면 현재 파서 버전이 아닌 항목만)"""
+    keep_version = None
+    if stale_only:
+        from app.api.v1.tas.pdf_parser import PARSER_VERSION
+        keep_version = PARSER_VERSION
+    return {"deleted": db.clear_page_cache(keep_version)}
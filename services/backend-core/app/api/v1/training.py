@@ -1,111 +1,181 @@
 """
 AI Training API
 모델 학습 및 재학습 (GPU 작업)
+
+학습은 training runner가 별도 프로세스로 실행 (app.services.training_jobs)
+- POST /training/start: 작업 등록 (queued) → runner가 순서대로 실행
+- GET /training/{job_id}/status: DB의 실제 상태 / epoch 진행률
+- POST /training/{job_id}/stop: 중단 요청 (epoch 경계에서 중단, 응답 없으면 강제 종료)
+- GET /training/{job_id}/events: 진행 상황 SSE (text/event-stream)
 """
 
-from fastapi import APIRouter, BackgroundTasks
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 
+from app.core.config import settings
+from app.services.trainers import MODES
+from app.services.training_jobs import FINAL_STATUSES, training_jobs, training_runner
+
 router = APIRouter(prefix="/training", tags=["AI Training"])
 
+DEFAULT_EPOCHS = 10
+SSE_KEEPALIVE_SECONDS = 15.0
+
 
 class TrainingStartRequest(BaseModel):
     """학습 시작 요청"""
     jobId: str
     modelName: str
     datasetId: str
+    mode: str = "yolo"  # yolo, tiny (GPU 없이 runner 동작 확인용)
     config: Dict[str, Any]
 
 
+def _get_job(job_id: str) -> dict:
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job not found: {job_id}")
+    return job
+
+
 @router.post("/start")
-async def start_training(
-    request: TrainingStartRequest,
-    background_tasks: BackgroundTasks
-):
+async def start_training(request: TrainingStartRequest):
     """
     AI 모델 학습 시작
 
-    - GPU 사용하여 모델 학습
-    - MLflow에 결과 기록
+    - 작업을 등록하고 즉시 반환 (status: queued), runner가 TRAINING_MAX_CONCURRENT만큼 동시에 실행
+    - GPU 사용하여 모델 학습, MLflow에 결과 기록 (yolo)
+    - config: epochs, imgsz, batch, baseWeights, version, trainArgs ... (tiny: learningRate, samples, epochSleep)
     """
-
-    background_tasks.add_task(
-        run_training_task,
-        request.jobId,
-        request.modelName,
-        request.datasetId,
-        request.config
+    if request.mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {list(MODES)}")
+    try:
+        epochs = int(request.config.get("epochs", DEFAULT_EPOCHS))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="config.epochs must be an integer")
+    if epochs < 1:
+        raise HTTPException(status_code=400, detail="config.epochs must be >= 1")
+
+    job = await run_in_threadpool(
+        training_jobs.create, request.jobId, request.modelName, request.datasetId,
+        request.mode, request.config, epochs,
     )
+    if job is None:
+        raise HTTPException(status_code=409, detail=f"Training job already exists: {request.jobId}")
+    training_runner.wake()
 
     return {
-        "message": "Training started",
-        "jobId": request.jobId,
-        "status": "running"
+        "message": "Training queued",
+        "jobId": job["jobId"],
+        "status": job["status"]
     }
 
 
 @router.get("/{job_id}/status")
 async def get_training_status(job_id: str):
-    """학습 상태 조회"""
-
-    # TODO: DB에서 학습 상태 조회
-    return {
-        "jobId": job_id,
-        "status": "running",
-        "progress": 0.5,
-        "currentEpoch": 5,
-        "totalEpochs": 10
-    }
+    """학습 상태 조회 (queued / running / stopping / completed / cancelled / failed)"""
+    job = await run_in_threadpool(_get_job, job_id)
+    return {key: value for key, value in job.items() if key != "result"}
 
 
 @router.post("/{job_id}/stop")
 async def stop_training(job_id: str):
-    """학습 중단"""
+    """
+    학습 중단
+
+    queued 작업은 즉시 cancelled, 실행 중이면 stopping → 현재 epoch 후 cancelled
+    """
+    job = await run_in_threadpool(training_jobs.request_cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job not found: {job_id}")
+    if not job["cancelRequested"]:
+        raise HTTPException(status_code=409, detail=f"Training job already {job['status']}: {job_id}")
+    training_runner.wake()
 
-    # TODO: 학습 프로세스 중단
     return {
-        "message": "Training stopped",
-        "jobId": job_id
+        "message": "Training stopped" if job["status"] == "cancelled" else "Training stop requested",
+        "jobId": job_id,
+        "status": job["status"]
     }
 
 
 @router.get("/{job_id}/results")
 async def get_training_results(job_id: str):
-    """학습 결과 조회"""
+    """학습 결과 조회 (종료된 작업만) — 최종 metrics / 가중치 / epoch별 이력"""
+    job = await run_in_threadpool(_get_job, job_id)
+    if job["status"] not in FINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Training job is {job['status']}: {job_id}")
+    result = job["result"] or {}
+    epochs = await run_in_threadpool(training_jobs.epochs, job_id)
 
-    # TODO: MLflow에서 결과 조회
     return {
         "jobId": job_id,
-        "metrics": {
-            "accuracy": 0.95,
-            "loss": 0.05,
-            "f1_score": 0.93
-        },
-        "mlflowRunId": "abc123"
+        "status": job["status"],
+        "error": job["error"],
+        "metrics": result.get("metrics") or job["metrics"] or {},
+        "weights": result.get("weights"),
+        "modelKey": result.get("modelKey"),
+        "bestEpoch": result.get("bestEpoch"),
+        "stoppedEarly": result.get("stoppedEarly"),
+        "mlflowRunId": result.get("mlflowRunId"),
+        "epochs": epochs,
     }
 
 
-async def run_training_task(
+def _sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/{job_id}/events")
+async def stream_training_events(
     job_id: str,
-    model_name: str,
-    dataset_id: str,
-    config: Dict[str, Any]
+    request: Request,
+    after: int = Query(0, ge=0, description="이 epoch 이후부터 전송"),
+    last_event_id: Optional[str] = Header(None),
 ):
     """
-    실제 학습 실행 (백그라운드)
-
-    작업:
-    1. 데이터셋 로드
-    2. 모델 초기화
-    3. GPU 학습 실행
-    4. MLflow에 메트릭 기록
-    5. DB 업데이트
-    """
-
-    try:
-        print(f"Starting training job {job_id}")
-        # TODO: 실제 학습 로직 구현
+    학습 진행 상황 SSE (text/event-stream)
 
-    except Exception as e:
-        print(f"Training error: {str(e)}")
+    - event: progress — epoch 완료마다 (id = epoch, 재연결 시 Last-Event-ID 이후부터 재전송)
+    - event: status — 상태 변경 시
+    - event: end — 작업 종료 (completed / cancelled / failed) 후 스트림 종료
+    """
+    await run_in_threadpool(_get_job, job_id)
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+
+    async def events():
+        cursor, status, last_sent = after, None, time.monotonic()
+        while not await request.is_disconnected():
+            job = await run_in_threadpool(training_jobs.get, job_id)
+            if job is None:
+                return
+            for epoch in await run_in_threadpool(training_jobs.epochs, job_id, cursor):
+                cursor = epoch["epoch"]
+                yield _sse("progress", {**epoch, "totalEpochs": job["totalEpochs"]}, cursor)
+                last_sent = time.monotonic()
+            if job["status"] != status:
+                status = job["status"]
+                yield _sse("status", {key: value for key, value in job.items() if key != "result"})
+                last_sent = time.monotonic()
+            if status in FINAL_STATUSES:
+                yield _sse("end", job)
+                return
+            if time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(settings.TRAINING_POLL_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
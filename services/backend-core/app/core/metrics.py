@@ -0,0 +1,311 @@
+"""
+Prometheus Metrics
+/metrics 엔드포인트 및 hot-path 계측 도구
+
+- 여러 uvicorn 워커로 실행할 때는 PROMETHEUS_MULTIPROC_DIR 환경변수를 지정하면
+  워커별 메트릭을 파일로 공유하여 /metrics에서 합산합니다.
+  (디렉터리는 서버 시작 전에 비워 두어야 함)
+- prometheus_client가 설치되지 않은 환경에서는 모든 계측이 no-op으로 동작합니다.
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+        generate_latest, multiprocess,
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# 이미지 처리 / 외부 API 호출은 수 ms ~ 수십 초 범위
+_STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+
+class _NoopMetric:
+    """prometheus_client 미설치 시 대체 객체"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, *args, **kwargs):
+        pass
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    def dec(self, *args, **kwargs):
+        pass
+
+    def set(self, *args, **kwargs):
+        pass
+
+
+if PROMETHEUS_AVAILABLE:
+    if MULTIPROC_DIR:
+        os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+    HTTP_REQUEST_DURATION = Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template",
+        ["method", "route", "status"],
+    )
+    HTTP_REQUESTS_IN_FLIGHT = Gauge(
+        "http_requests_in_flight",
+        "HTTP requests currently being processed",
+        ["method"],
+        multiprocess_mode="livesum",
+    )
+    STAGE_DURATION = Histogram(
+        "stage_duration_seconds",
+        "Duration of hot-path processing stages",
+        ["component", "stage"],
+        buckets=_STAGE_BUCKETS,
+    )
+    EXECUTOR_QUEUE_DEPTH = Gauge(
+        "executor_queue_depth",
+        "Tasks submitted to an executor and not yet finished",
+        ["executor"],
+        multiprocess_mode="livesum",
+    )
+    DB_QUERY_DURATION = Histogram(
+        "db_query_duration_seconds",
+        "Database statement execution time",
+        ["operation"],
+        buckets=_DB_BUCKETS,
+    )
+    RCA_UPSTREAM_DURATION = Histogram(
+        "rca_upstream_duration_seconds",
+        "Latency of the upstream LLM call for RCA analysis",
+        ["model", "outcome"],
+        buckets=_STAGE_BUCKETS,
+    )
+    RCA_TOKENS = Counter(
+        "rca_tokens_total",
+        "Tokens consumed by RCA analysis",
+        ["model", "kind"],
+    )
+    RCA_UPSTREAM_RETRIES = Counter(
+        "rca_upstream_retries_total",
+        "Retried upstream LLM calls for RCA analysis",
+        ["model", "error"],
+    )
+    RCA_CACHE_LOOKUPS = Counter(
+        "rca_cache_lookups_total",
+        "RCA result cache lookups by result",
+        ["result"],
+    )
+    RCA_UPLOAD_BYTES = Counter(
+        "rca_upload_bytes_total",
+        "RCA image bytes before (original) and after (sent) preprocessing",
+        ["kind"],
+    )
+    INFERENCE_ITEMS = Counter(
+        "inference_items_total",
+        "Inference job images processed by outcome",
+        ["outcome"],
+    )
+    INFERENCE_MODEL_EVENTS = Counter(
+        "inference_model_events_total",
+        "Resident model cache events (hit, load, evict)",
+        ["event"],
+    )
+    INFERENCE_BATCH_FILL = Histogram(
+        "inference_batch_fill_ratio",
+        "Micro-batch size divided by the configured max batch size",
+        ["model"],
+        buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0),
+    )
+    INFERENCE_BATCH_QUEUE_WAIT = Histogram(
+        "inference_batch_queue_wait_seconds",
+        "Time an image waited in the micro-batch queue before its forward pass",
+        ["model"],
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+    )
+else:
+    HTTP_REQUEST_DURATION = HTTP_REQUESTS_IN_FLIGHT = STAGE_DURATION = _NoopMetric()
+    EXECUTOR_QUEUE_DEPTH = DB_QUERY_DURATION = _NoopMetric()
+    RCA_UPSTREAM_DURATION = RCA_TOKENS = RCA_UPSTREAM_RETRIES = RCA_CACHE_LOOKUPS = _NoopMetric()
+    RCA_UPLOAD_BYTES = INFERENCE_ITEMS = INFERENCE_BATCH_FILL = INFERENCE_BATCH_QUEUE_WAIT = _NoopMetric()
+    INFERENCE_MODEL_EVENTS = _NoopMetric()
+
+
+# ========== 계측 헬퍼 ==========
+
+# 요청 단위 stage 기록 (profiler 활성화 시 요청마다 리스트가 설정됨, 비활성 시 None)
+request_stages: contextvars.ContextVar = contextvars.ContextVar("request_stages", default=None)
+
+
+def record_stage(component: str, stage: str, seconds: float):
+    """stage 소요 시간 기록 (Prometheus + 현재 요청의 stage breakdown)"""
+    STAGE_DURATION.labels(component, stage).observe(seconds)
+    stages = request_stages.get()
+    if stages is not None:
+        # list.append는 thread-safe — executor 워커에서도 같은 리스트에 기록
+        stages.append((f"{component}.{stage}", seconds))
+
+
+@contextmanager
+def stage_timer(component: str, stage: str):
+    """
+    처리 단계 소요 시간 측정
+
+    사용 예:
+        with stage_timer("yolo", "predict"):
+            results = model.predict(image)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(component, stage, time.perf_counter() - start)
+
+
+def submit_tracked(executor, name: str, fn, *args, **kwargs):
+    """
+    executor.submit() 대체 — 제출 시 queue depth +1, 실행 완료 시 -1
+
+    사용 예:
+        futures = [submit_tracked(pool, "slicer", process_slice, t) for t in tasks]
+    """
+    gauge = EXECUTOR_QUEUE_DEPTH.labels(name)
+    # 요청 context(stage 기록 등)를 워커 스레드로 전달
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            return context.run(fn, *args, **kwargs)
+        finally:
+            gauge.dec()
+
+    gauge.inc()
+    try:
+        return executor.submit(run)
+    except Exception:
+        gauge.dec()
+        raise
+
+
+def instrument_engine(engine):
+    """SQLAlchemy 엔진의 statement 실행 시간 기록"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+        DB_QUERY_DURATION.labels(operation).observe(time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def render_latest() -> tuple:
+    """/metrics 응답 (body, content_type)"""
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus_client is not installed\n", "text/plain; charset=utf-8"
+
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+# ========== ASGI Middleware ==========
+
+# route id → 이 route가 include된 router prefix 목록 (보통 1개)
+_route_prefixes: Dict[int, List[str]] = {}
+_MAX_PREFIXES_PER_ROUTE = 8
+
+
+def route_template(scope) -> str:
+    """
+    요청이 매칭된 라우트의 전체 경로 템플릿 (예: /api/v1/customer-spec/spec/{spec_id})
+
+    include_router로 등록된 라우트의 scope["route"].path는 FastAPI 버전에 따라 router 기준
+    상대 경로(/spec/{spec_id})이므로, 실제 경로에서 route.path_regex가 매칭되는 뒷부분을 찾아
+    앞부분(router / mount prefix)을 붙입니다. prefix는 route별로 기억해 다음 요청에서 재사용합니다.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    regex = getattr(route, "path_regex", None)
+    if regex is None:
+        return template
+    path = scope["path"]
+    root_path = scope.get("root_path") or ""
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    prefixes = _route_prefixes.setdefault(id(route), [])
+    for prefix in prefixes:
+        if path.startswith(prefix) and regex.match(path[len(prefix):]):
+            return prefix + template
+    # 가장 긴 뒷부분부터 (= 가장 짧은 prefix) 매칭 — 경로 파라미터는 segment 수가 고정이므로 유일
+    for index in [i for i, char in enumerate(path) if char == "/"] + [len(path)]:
+        if regex.match(path[index:]):
+            prefix = path[:index]
+            if len(prefixes) < _MAX_PREFIXES_PER_ROUTE:
+                prefixes.append(prefix)
+            return prefix + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    라우트 템플릿 기준 요청 지연시간 / in-flight 요청 수 기록
+
+    경로 파라미터별로 라벨이 폭증하지 않도록 실제 경로 대신
+    라우팅 후 매칭된 라우트의 전체 path 템플릿(route_template)을 라벨로 사용합니다.
+    """
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        # 라우트 템플릿은 라우팅 후에야 알 수 있으므로 in-flight는 method 기준으로 기록
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            HTTP_REQUEST_DURATION.labels(method, route_template(scope), str(status["code"])).observe(
+                time.perf_counter() - start
+            )
@@ -0,0 +1,378 @@
+"""
+Request Profiler
+opt-in 샘플링 프로파일러 + 느린 요청 기록
+
+- PROFILER_ENABLED=false(기본)이면 middleware / admin 라우터가 등록되지 않아 비용 없음
+- 활성화 시 모든 요청의 소요 시간과 stage breakdown(stage_timer 기록)을 최근 N건 보관
+- PROFILER_SAMPLE_RATE 비율로 샘플링되거나 `X-Profile: 1` 헤더가 있는 요청은
+  sys._current_frames() 기반 샘플링 프로파일(wall / CPU)을 캡처하여 파일로 저장
+  → speedscope JSON 또는 collapsed stack(flamegraph.pl) 형식으로 다운로드
+
+샘플러는 프로세스의 모든 스레드를 샘플링합니다 (이벤트 루프 + threadpool/executor 워커).
+동시에 처리 중인 다른 요청의 스택이 함께 기록될 수 있으므로 스택 루트의 스레드명으로 구분하세요.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core import metrics
+from app.core.config import settings
+
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+
+# 작업 대기 중인 워커 스레드의 최상위 프레임 (wall 프로파일에서 제외)
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+
+def _thread_cpu_time(thread_id: int) -> Optional[float]:
+    """스레드별 CPU 시간 (Linux 등 pthread_getcpuclockid 지원 플랫폼)"""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError):
+        return None
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename.replace("\\", "/")
+    short = "/".join(filename.rsplit("/", 2)[-2:])
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+# ========== 샘플링 프로파일 ==========
+
+class ProfileSession:
+    """요청 하나에 대한 샘플 누적 (stack → [wall 초, cpu 초, 샘플 수])"""
+
+    def __init__(self, loop_thread_id: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.loop_thread_id = loop_thread_id
+        self.started_at = time.perf_counter()
+        self.stacks: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+
+    def add(self, stack: str, wall: float, cpu: float):
+        entry = self.stacks[stack]
+        entry[0] += wall
+        entry[1] += cpu
+        entry[2] += 1
+
+
+class SamplingProfiler:
+    """
+    활성 세션이 있을 때만 동작하는 백그라운드 샘플러 스레드
+
+    세션이 모두 끝나면 스레드는 Event 대기 상태로 들어가 CPU를 쓰지 않습니다.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._sessions: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cpu_times: Dict[int, float] = {}
+
+    def start_session(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.append(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop_session(self, session: ProfileSession):
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+            if not self._sessions:
+                self._wakeup.clear()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while True:
+            if not self._wakeup.is_set():
+                self._cpu_times.clear()
+                self._wakeup.wait()
+                last = time.perf_counter()
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            wall = now - last
+            last = now
+
+            with self._lock:
+                sessions = list(self._sessions)
+            if not sessions:
+                continue
+
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            loop_ids = {s.loop_thread_id for s in sessions}
+            samples = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                top = frame.f_code
+                if thread_id not in loop_ids and \
+                        (os.path.basename(top.co_filename), top.co_name) in _IDLE_FRAMES:
+                    continue
+
+                cpu_now = _thread_cpu_time(thread_id)
+                cpu_prev = self._cpu_times.get(thread_id)
+                cpu = cpu_now - cpu_prev if cpu_now is not None and cpu_prev is not None else 0.0
+                if cpu_now is not None:
+                    self._cpu_times[thread_id] = cpu_now
+
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(thread_names.get(thread_id, str(thread_id)))
+                samples.append((";".join(reversed(labels)), cpu))
+
+            for session in sessions:
+                for stack, cpu in samples:
+                    session.add(stack, wall, cpu)
+
+
+# ========== 저장 / 내보내기 ==========
+
+class ProfileStore:
+    """캡처된 프로파일을 디렉터리에 JSON으로 저장 (최대 max_profiles개, 오래된 것부터 삭제)"""
+
+    def __init__(self, output_dir: str, max_profiles: int = 100):
+        self.output_dir = output_dir
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.output_dir, f"{profile_id}.json")
+
+    def save(self, session: ProfileSession, info: dict) -> str:
+        data = dict(info)
+        data["profile_id"] = session.id
+        data["stacks"] = [
+            {"stack": stack, "wall": wall, "cpu": cpu, "samples": count}
+            for stack, (wall, cpu, count) in session.stacks.items()
+        ]
+        with self._lock:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(self._path(session.id), "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            self._prune()
+        return session.id
+
+    def _prune(self):
+        files = sorted(
+            (os.path.join(self.output_dir, name) for name in os.listdir(self.output_dir) if name.endswith(".json")),
+            key=os.path.getmtime,
+        )
+        for path in files[:max(0, len(files) - self.max_profiles)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def load(self, profile_id: str) -> Optional[dict]:
+        # profile_id는 uuid hex — 경로 조작 방지
+        if not profile_id.isalnum():
+            return None
+        path = self._path(profile_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def list(self) -> List[dict]:
+        if not os.path.isdir(self.output_dir):
+            return []
+        profiles = []
+        for name in os.listdir(self.output_dir):
+            if not name.endswith(".json"):
+                continue
+            data = self.load(name[:-5])
+            if data:
+                data.pop("stacks", None)
+                profiles.append(data)
+        profiles.sort(key=lambda p: p.get("timestamp", ""), reverse=True)
+        return profiles
+
+
+def to_collapsed(profile: dict, mode: str = "wall") -> str:
+    """
+    collapsed stack 형식 ("frame;frame;frame weight")
+
+    wall: 샘플 수, cpu: 마이크로초 (flamegraph.pl은 정수 weight 필요)
+    """
+    lines = []
+    for entry in profile["stacks"]:
+        weight = entry["samples"] if mode == "wall" else int(entry["cpu"] * 1_000_000)
+        if weight > 0:
+            lines.append(f"{entry['stack']} {weight}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(profile: dict) -> dict:
+    """speedscope 파일 형식 (wall / cpu 두 개의 sampled profile)"""
+    frames: List[dict] = []
+    frame_index: Dict[str, int] = {}
+    samples = []
+    for entry in profile["stacks"]:
+        indices = []
+        for label in entry["stack"].split(";"):
+            if label not in frame_index:
+                frame_index[label] = len(frames)
+                frames.append({"name": label})
+            indices.append(frame_index[label])
+        samples.append(indices)
+
+    name = f"{profile.get('method', '')} {profile.get('path', '')}".strip()
+    profiles = []
+    for mode, key in (("wall", "wall"), ("cpu", "cpu")):
+        weights = [entry[key] for entry in profile["stacks"]]
+        profiles.append({
+            "type": "sampled",
+            "name": f"{name} [{mode}]",
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        })
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "pcb-inspection-backend",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+        "activeProfileIndex": 0,
+    }
+
+
+# ========== 느린 요청 기록 ==========
+
+class RecentRequests:
+    """최근 N건 요청 기록 (소요 시간 / stage breakdown / profile_id)"""
+
+    def __init__(self, size: int = 500):
+        self._records = deque(maxlen=size)
+
+    def add(self, record: dict):
+        self._records.append(record)
+
+    def slowest(self, limit: int = 20, route: Optional[str] = None) -> List[dict]:
+        """
+        소요 시간이 긴 순서
+
+        Args:
+            route: 전체 라우트 템플릿으로 필터 (예: /api/v1/slicer/process, /api/v1/rca/history/{analysis_id})
+        """
+        records = list(self._records)
+        if route:
+            records = [r for r in records if r["route"] == route]
+        records.sort(key=lambda r: r["duration_ms"], reverse=True)
+        return records[:limit]
+
+
+def summarize_stages(stages: List[tuple]) -> Dict[str, dict]:
+    summary: Dict[str, dict] = {}
+    for name, seconds in stages:
+        item = summary.setdefault(name, {"count": 0, "total_ms": 0.0})
+        item["count"] += 1
+        item["total_ms"] += seconds * 1000
+    for item in summary.values():
+        item["total_ms"] = round(item["total_ms"], 3)
+    return summary
+
+
+# 싱글톤 인스턴스 (샘플러 스레드는 첫 프로파일 요청 시 시작)
+sampling_profiler = SamplingProfiler(interval=settings.PROFILER_INTERVAL_MS / 1000)
+profile_store = ProfileStore(settings.PROFILER_OUTPUT_DIR, max_profiles=settings.PROFILER_MAX_PROFILES)
+recent_requests = RecentRequests(size=settings.PROFILER_RECENT_REQUESTS)
+
+
+# ========== ASGI Middleware ==========
+
+class ProfilerMiddleware:
+    """
+    요청 소요 시간 / stage breakdown 기록 + 샘플링 프로파일 캡처
+
+    X-Profile 헤더는 admin_token이 설정된 경우 X-Admin-Token이 일치할 때만 적용됩니다.
+    """
+
+    def __init__(self, app, sample_rate: float = 0.0, admin_token: str = "",
+                 exclude_paths=("/metrics",)):
+        self.app = app
+        self.profiler = sampling_profiler
+        self.store = profile_store
+        self.recent = recent_requests
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token.encode() if admin_token else b""
+        self.exclude_paths = set(exclude_paths)
+
+    def _should_profile(self, scope) -> bool:
+        headers = dict(scope.get("headers") or [])
+        if headers.get(PROFILE_HEADER, b"").lower() in (b"1", b"true", b"yes"):
+            if not self.admin_token or headers.get(ADMIN_TOKEN_HEADER) == self.admin_token:
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(threading.get_ident()) if self._should_profile(scope) else None
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if session is not None:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-profile-id", session.id.encode())]
+            await send(message)
+
+        stages: List[tuple] = []
+        token = metrics.request_stages.set(stages)
+        if session is not None:
+            self.profiler.start_session(session)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.request_stages.reset(token)
+            record = {
+                "timestamp": datetime.now().isoformat(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": metrics.route_template(scope),
+                "status": status["code"],
+                "duration_ms": round(duration * 1000, 3),
+                "stages": summarize_stages(stages),
+                "profile_id": None,
+            }
+            if session is not None:
+                self.profiler.stop_session(session)
+                try:
+                    record["profile_id"] = self.store.save(session, {
+                        k: record[k] for k in ("timestamp", "method", "path", "route", "status", "duration_ms")
+                    })
+                except OSError as e:
+                    print(f"Profile save error: {e}")
+            self.recent.add(record)
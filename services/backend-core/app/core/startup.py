@@ -0,0 +1,84 @@
+"""
+Startup Timing / Background Warm-up
+서버 시작 시간 기록 및 무거운 의존성 사전 로드
+
+- 라우터 모듈은 torch / openai / pptx / pdfplumber / tkinter 를 첫 사용 시 import 합니다.
+- 서버가 트래픽을 받기 시작한 뒤 warm-up 태스크가 백그라운드 스레드에서
+  이 모듈들을 미리 import 하여 첫 요청 지연을 없앱니다 (STARTUP_WARMUP).
+- 각 단계 소요 시간은 /api/ai/startup 에서 조회할 수 있습니다.
+  import 시간 회귀 검사는 benchmarks/import_time.py 참고.
+"""
+
+import asyncio
+import importlib
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+
+# 백그라운드에서 미리 import 할 모듈 (앞쪽이 먼저 로드됨)
+WARMUP_MODULES: Tuple[str, ...] = (
+    "torch",
+    "openai",
+    "app.api.v1.tas.ppt_generator",
+    "app.api.v1.tas.ppt_parser",
+    "app.api.v1.tas.pdf_parser",
+)
+
+_state: Dict = {
+    "app_import_seconds": None,
+    "lifespan_seconds": None,
+    "warmup": {"status": "pending", "seconds": None, "steps": {}},
+}
+
+
+def record(name: str, seconds: float):
+    """시작 단계 소요 시간 기록 (app_import_seconds, lifespan_seconds)"""
+    _state[name] = round(seconds, 4)
+
+
+def get_state() -> dict:
+    warmup = _state["warmup"]
+    return {
+        **_state,
+        "warmup": {**warmup, "steps": dict(warmup["steps"])},
+    }
+
+
+def module_if_loaded(name: str):
+    """이미 import된 모듈이면 반환, 아니면 None (import를 유발하지 않음)"""
+    return sys.modules.get(name)
+
+
+def _import_step(name: str) -> Callable[[], None]:
+    return lambda: importlib.import_module(name)
+
+
+def _warm_up_sync(extra_steps: List[Tuple[str, Callable[[], None]]]):
+    warmup = _state["warmup"]
+    warmup["status"] = "running"
+    start = time.perf_counter()
+    steps = [(name, _import_step(name)) for name in WARMUP_MODULES] + extra_steps
+    for name, step in steps:
+        step_start = time.perf_counter()
+        try:
+            step()
+            warmup["steps"][name] = {"seconds": round(time.perf_counter() - step_start, 4)}
+        except Exception as e:
+            # 선택 의존성(GPU 환경 전용 torch 등)이 없어도 서버 동작에는 영향 없음
+            warmup["steps"][name] = {"error": f"{type(e).__name__}: {e}"}
+    warmup["seconds"] = round(time.perf_counter() - start, 4)
+    warmup["status"] = "done"
+
+
+async def warm_up(delay: float = 0.0, extra_steps: List[Tuple[str, Callable[[], None]]] = None):
+    """
+    무거운 의존성 사전 로드 (lifespan에서 asyncio 태스크로 실행)
+
+    Args:
+        delay: 시작 전 대기 시간 (서버가 listen 상태가 된 뒤 시작하도록)
+        extra_steps: 추가 warm-up 작업 [(이름, 함수)]
+    """
+    if delay:
+        await asyncio.sleep(delay)
+    await asyncio.to_thread(_warm_up_sync, list(extra_steps or []))
@@ -1,26 +1,63 @@
 """
 Database connection management
 """
-from sqlalchemy import create_engine
+import asyncio
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from app.core.config import settings
+
 # pg8000 드라이버 사용 (순수 Python, 인코딩 문제 없음)
 # 로컬 PostgreSQL의 pcb_inspection_db 데이터베이스 사용
 DATABASE_URL = "postgresql+pg8000://postgres:0@localhost:5432/pcb_inspection_db"
 
-# SQLAlchemy engine 생성
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
+
+
+def _async_url(url: str) -> str:
+    """비동기 엔진용 URL — 드라이버가 지정되지 않았거나 동기 드라이버면 asyncpg로 변경"""
+    parsed = make_url(url)
+    backend, _, driver = parsed.drivername.partition("+")
+    if backend == "postgresql" and driver not in ("asyncpg", "psycopg"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+# 비동기 엔진용 URL (Settings.ASYNC_DATABASE_URL, 비어 있으면 동기 엔진과 같은 DB + asyncpg 드라이버)
+# asyncpg는 항상 client_encoding=UTF8로 접속하고 문자열을 UTF-8로 디코딩 (pg8000 기본값과 동일)
+# → 서버 encoding이 UTF8이 아니면 두 드라이버가 다르게 동작할 수 있으므로 시작 시 check_encodings로 확인
+ASYNC_DATABASE_URL = _async_url(settings.ASYNC_DATABASE_URL or DATABASE_URL)
+
+# 풀 설정 (Settings / 환경변수로 조정)
+_pool_options = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
     pool_pre_ping=True,
     echo=False
 )
 
+# SQLAlchemy engine 생성
+engine = create_engine(DATABASE_URL, **_pool_options)
+
 # SessionLocal class 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 비동기 engine / session
+# async def 핸들러에서 이벤트 루프를 block하지 않고 DB 접근할 때 사용
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -29,6 +66,9 @@ def get_db():
     """
     Dependency for getting database session
     FastAPI dependency로 사용
+
+    동기 세션이므로 이 dependency를 쓰는 핸들러는 async def가 아닌 def로 선언하여
+    threadpool에서 실행되도록 해야 합니다.
     """
     db = SessionLocal()
     try:
@@ -37,6 +77,56 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency for getting async database session
+    async def 핸들러에서 사용 (lazy load 불가 → selectinload 등으로 미리 로드)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def check_encodings() -> dict:
+    """
+    동기(pg8000) / 비동기(asyncpg) 연결의 server / client encoding 확인 (앱 시작 시 호출)
+
+    Returns:
+        {"sync": (server, client), "async": (server, client), "ok": 두 연결 모두 UTF8인지}
+    """
+    query = text("SELECT current_setting('server_encoding'), current_setting('client_encoding')")
+
+    def sync_encoding():
+        with engine.connect() as conn:
+            return tuple(conn.execute(query).one())
+
+    sync = await asyncio.to_thread(sync_encoding)
+    async with async_engine.connect() as conn:
+        async_ = tuple((await conn.execute(query)).one())
+    ok = all(value.upper().replace("-", "") == "UTF8" for value in sync + async_)
+    return {"sync": sync, "async": async_, "ok": ok}
+
+
+def create_sqlite_session_factory(path: str, models) -> sessionmaker:
+    """
+    SQLite 파일 DB 세션 팩토리 (로컬 / 테스트용 stand-in)
+
+    ai_spec_v2 schema를 기본 schema로 매핑하고 models의 테이블을 생성합니다.
+    """
+    from sqlalchemy import event
+
+    local_engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30}).execution_options(
+        schema_translate_map={"ai_spec_v2": None}
+    )
+
+    @event.listens_for(local_engine, "connect")
+    def _pragmas(conn, _):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+
+    models[0].metadata.create_all(local_engine, tables=[model.__table__ for model in models])
+    return sessionmaker(bind=local_engine, autoflush=False)
+
+
 def init_db():
     """
     Initialize database (create all tables)
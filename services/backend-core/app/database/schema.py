@@ -1,7 +1,9 @@
 """
 Database schema for Customer Spec Management
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Boolean, DateTime, ForeignKey, Text, JSON, Index, UniqueConstraint
+from sqlalchemy import cast, desc, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -9,6 +11,17 @@ from datetime import datetime
 Base = declarative_base()
 
 
+def ensure_indexes(bind):
+    """
+    모델에 선언된 인덱스 생성 (없는 것만)
+
+    create_all은 이미 존재하는 테이블에 새로 추가된 인덱스를 만들지 않으므로 시작 시 함께 호출
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
 class CustomerSpec(Base):
     """고객 Spec 메인 테이블"""
     __tablename__ = 'customer_specs'
@@ -150,7 +163,13 @@ class Expression(Base):
 class RCAAnalysisHistory(Base):
     """RCA 분석 이력 테이블"""
     __tablename__ = 'rca_analysis_history'
-    __table_args__ = {"schema": "ai_spec_v2"}
+    __table_args__ = (
+        # 이력 목록 keyset 페이지네이션 (created_at DESC, id DESC) + 필터별 정렬
+        Index("ix_rca_history_created_id", "created_at", "id"),
+        Index("ix_rca_history_severity_created_id", "severity", "created_at", "id"),
+        Index("ix_rca_history_defect_type_created_id", "defect_type", "created_at", "id"),
+        {"schema": "ai_spec_v2"},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     analysis_id = Column(String(50), unique=True, nullable=False, index=True)  # RCA-YYYYMMDD-XXXXXXXX
@@ -182,3 +201,434 @@ class RCAAnalysisHistory(Base):
 
     def __repr__(self):
         return f"<RCAAnalysisHistory(id='{self.analysis_id}', defect='{self.defect_type}')>"
+
+
+def rca_history_search_document(table=None):
+    """
+    RCA 이력 전문 검색용 tsvector 식 (GIN 인덱스와 검색 쿼리가 같은 식을 사용해야 인덱스가 적용됨)
+
+    - 한국어 형태소 사전이 없으므로 'simple' 구성 (검색 시 prefix 매칭으로 조사 처리)
+    - 가중치: defect_type A / location·analysis·causes B / solutions C
+    - JSON 컬럼은 \\uXXXX 이스케이프로 저장되므로 jsonb로 변환 후 text로 (한글 복원)
+    """
+    c = (table if table is not None else RCAAnalysisHistory.__table__).c
+    simple = text("'simple'::regconfig")
+
+    # 리터럴은 bind parameter가 아닌 SQL에 직접 포함 (인덱스 식과 쿼리 식이 동일해야 함)
+    # concat_ws는 IMMUTABLE이 아니므로 || 사용
+    empty, space = text("''"), text("' '")
+
+    def text_of(*columns):
+        expression = None
+        for column in columns:
+            value = cast(cast(column, JSONB), Text) if isinstance(column.type, JSON) else column
+            value = func.coalesce(value, empty)
+            expression = value if expression is None else expression.op("||")(space).op("||")(value)
+        return expression
+
+    def weighted(weight, *columns):
+        return func.setweight(func.to_tsvector(simple, text_of(*columns)), text(f"'{weight}'::\"char\""))
+
+    return weighted("A", c.defect_type).op("||")(
+        weighted("B", c.location, c.analysis, c.causes)
+    ).op("||")(
+        weighted("C", c.solutions)
+    )
+
+
+# 전문 검색 GIN 인덱스 (PostgreSQL 전용)
+Index(
+    "ix_rca_history_search",
+    rca_history_search_document(RCAAnalysisHistory.__table__),
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
+
+class RCAImageSignature(Base):
+    """RCA 분석 이미지 perceptual hash (유사 이미지 검색용)"""
+    __tablename__ = 'rca_image_signatures'
+    __table_args__ = {"schema": "ai_spec_v2"}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    analysis_id = Column(String(50), unique=True, nullable=False, index=True)
+    phash = Column(BigInteger, nullable=False)  # 64bit DCT pHash (signed)
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<RCAImageSignature(analysis_id='{self.analysis_id}')>"
+
+
+class RCAResultCache(Base):
+    """
+    RCA 분석 결과 캐시 테이블
+
+    cache_key = sha256(이미지 내용 hash + additional_context + model + prompt version)
+    phash_b0~b3: 64bit perceptual hash를 16bit씩 나눈 값 (근접 중복 후보 검색용 인덱스)
+    """
+    __tablename__ = 'rca_result_cache'
+    __table_args__ = (
+        Index("ix_rca_cache_scope_b0", "scope_hash", "phash_b0"),
+        Index("ix_rca_cache_scope_b1", "scope_hash", "phash_b1"),
+        Index("ix_rca_cache_scope_b2", "scope_hash", "phash_b2"),
+        Index("ix_rca_cache_scope_b3", "scope_hash", "phash_b3"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False)
+    # context + model + prompt version (같은 scope 안에서만 근접 중복 매칭)
+    scope_hash = Column(String(64), nullable=False)
+    model = Column(String(100))
+    prompt_version = Column(String(32))
+
+    # perceptual hash (signed 64bit) 및 16bit 밴드
+    phash = Column(BigInteger)
+    phash_b0 = Column(Integer)
+    phash_b1 = Column(Integer)
+    phash_b2 = Column(Integer)
+    phash_b3 = Column(Integer)
+
+    # 캐시된 결과
+    analysis_id = Column(String(50))  # 최초 분석 ID
+    analysis = Column(JSON)
+    usage = Column(JSON)  # 최초 분석 시 토큰 사용량
+
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+    expires_at = Column(DateTime, index=True)  # None이면 만료 없음
+    last_hit_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<RCAResultCache(key='{self.cache_key[:12]}', analysis_id='{self.analysis_id}')>"
+
+
+class DashboardStatCount(Base):
+    """
+    대시보드 통계 누적 건수 (stats_service가 쓰기 트랜잭션 안에서 증분 UPSERT)
+
+    metric: spec_customer / spec_category (key = customer / category3), defect_types, defect_conditions,
+            rca_severity (key = severity), _built (초기 집계 완료 표시)
+    """
+    __tablename__ = 'dashboard_stat_counts'
+    __table_args__ = {"schema": "ai_spec_v2"}
+
+    metric = Column(String(50), primary_key=True)
+    key = Column(String(200), primary_key=True, default='')  # NULL 값은 ''로 저장
+    count = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DashboardStatCount(metric='{self.metric}', key='{self.key}', count={self.count})>"
+
+
+class RCAStatBucket(Base):
+    """RCA 시간 단위 건수 (severity / defect_type별, STATS_RCA_RETENTION_DAYS 보관)"""
+    __tablename__ = 'rca_stat_buckets'
+    __table_args__ = {"schema": "ai_spec_v2"}
+
+    bucket_start = Column(DateTime, primary_key=True)  # 정시 (hour)
+    severity = Column(String(20), primary_key=True, default='')  # NULL 값은 ''로 저장
+    defect_type = Column(String(100), primary_key=True, default='')
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<RCAStatBucket(bucket_start='{self.bucket_start}', severity='{self.severity}', count={self.count})>"
+
+
+class InferenceJob(Base):
+    """
+    추론 작업 (단건 /inference 또는 배치 /inference/batch)
+
+    이미지별 작업 단위는 InferenceJobItem — 워커는 item을 job 구분 없이 묶어서 처리
+    """
+    __tablename__ = 'inference_jobs'
+    __table_args__ = (
+        Index("ix_inference_jobs_status_created", "status", "created_at"),
+        # lot / bundle 요약의 진행률 (대기 / 실패 이미지 수)
+        Index("ix_inference_jobs_lot", "lot_id"),
+        Index("ix_inference_jobs_bundle", "bundle_id"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(100), unique=True, nullable=False, index=True)  # inferenceId / batchId
+    kind = Column(String(20), nullable=False)  # single, batch
+    status = Column(String(20), nullable=False, default='queued')  # queued, running, completed, partial, failed
+    customer_id = Column(String(100))
+    product_id = Column(String(100))
+    lot_id = Column(String(100))
+    bundle_id = Column(String(100))
+    model_key = Column(String(200))  # 라우팅된 모델 (name:version) — 등록 시 inference_model_routes로 결정
+
+    total_items = Column(Integer, nullable=False, default=0)
+    done_items = Column(Integer, nullable=False, default=0)
+    failed_items = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<InferenceJob(job_id='{self.job_id}', status='{self.status}')>"
+
+
+class InferenceJobItem(Base):
+    """추론 작업 이미지 1장 (queue 역할 — status='queued' 행을 SKIP LOCKED로 claim)"""
+    __tablename__ = 'inference_job_items'
+    __table_args__ = (
+        # claim: status='queued' ORDER BY priority DESC, id
+        Index("ix_inference_items_claim", "status", desc("priority"), "id"),
+        # 모델별 claim (같은 모델 item을 묶어 모델 교체 최소화)
+        Index("ix_inference_items_model_claim", "status", "model_key", desc("priority"), "id"),
+        Index("ix_inference_items_job_seq", "job_id", "seq"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    # SQLite stand-in에서는 INTEGER PRIMARY KEY여야 자동 증가
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey('ai_spec_v2.inference_jobs.id', ondelete='CASCADE'), nullable=False)
+    seq = Column(Integer, nullable=False)  # job 안의 이미지 순서
+    image_url = Column(Text, nullable=False)
+    priority = Column(Integer, nullable=False, default=0)  # 높을수록 먼저 (단건 요청 > 배치)
+    model_key = Column(String(200))  # 라우팅된 모델 (name:version), job과 동일
+
+    status = Column(String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    claimed_by = Column(String(100))
+    lease_expires_at = Column(DateTime)
+
+    result = Column(JSON)  # 요약 {"count", "imageSize", "model", "judgment", ...} — detection은 inference_detections
+    error = Column(Text)
+    latency_ms = Column(Float)
+
+    created_at = Column(DateTime, default=datetime.now)
+    finished_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<InferenceJobItem(id={self.id}, status='{self.status}')>"
+
+
+class InferenceModelRoute(Base):
+    """
+    (고객, 제품) → 추론 모델 버전 라우팅
+
+    customer_id / product_id의 '*'는 전체 매칭
+    조회 순서: (고객, 제품) → (고객, *) → (*, 제품) → (*, *) → DEFAULT_MODEL_NAME
+    """
+    __tablename__ = 'inference_model_routes'
+    __table_args__ = (
+        UniqueConstraint("customer_id", "product_id", name="uq_inference_model_routes_target"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    customer_id = Column(String(100), nullable=False, default='*')
+    product_id = Column(String(100), nullable=False, default='*')
+    model_name = Column(String(100), nullable=False)
+    model_version = Column(String(50), nullable=False, default='')
+    backend = Column(String(20), nullable=False, default='auto')  # auto (INFERENCE_MODEL_BACKEND), yolo, contour
+    pinned = Column(Boolean, nullable=False, default=False)  # 메모리 부족 시에도 언로드하지 않음
+    enabled = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f"<InferenceModelRoute(customer='{self.customer_id}', product='{self.product_id}', model='{self.model_name}:{self.model_version}')>"
+
+
+class InferenceResult(Base):
+    """
+    이미지별 추론 결과 + Spec 판정 (워커가 item 완료 시 bulk insert)
+
+    lot / bundle 단위 조회가 대부분이므로 (lot_id, id), (bundle_id, id) 인덱스로 조회
+    """
+    __tablename__ = 'inference_results'
+    __table_args__ = (
+        Index("ix_inference_results_lot", "lot_id", "id"),
+        Index("ix_inference_results_bundle", "bundle_id", "id"),
+        Index("ix_inference_results_job", "job_id", "seq"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    item_id = Column(BigInteger, ForeignKey('ai_spec_v2.inference_job_items.id', ondelete='CASCADE'),
+                     nullable=False, unique=True)
+    job_id = Column(Integer, ForeignKey('ai_spec_v2.inference_jobs.id', ondelete='CASCADE'), nullable=False)
+    seq = Column(Integer, nullable=False)
+    customer_id = Column(String(100))
+    product_id = Column(String(100))
+    lot_id = Column(String(100))
+    bundle_id = Column(String(100))
+    image_url = Column(Text, nullable=False)
+    model_key = Column(String(200))
+    image_width = Column(Integer)
+    image_height = Column(Integer)
+
+    # Spec 판정 (customer_specs 기준)
+    spec_id = Column(Integer)  # 판정에 사용한 CustomerSpec (없으면 NULL)
+    judgment = Column(String(10), nullable=False)  # OK, NG, UNKNOWN
+    defect_count = Column(Integer, nullable=False, default=0)
+    ng_count = Column(Integer, nullable=False, default=0)
+    unknown_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<InferenceResult(item_id={self.item_id}, judgment='{self.judgment}')>"
+
+
+class InferenceDetection(Base):
+    """
+    추론 결과 detection 1건 (bbox / polygon·RLE / class / score / 측정값 / 판정)
+
+    lot_id / bundle_id는 결과 테이블과 join 없이 lot 단위로 조회하기 위해 중복 저장
+    """
+    __tablename__ = 'inference_detections'
+    __table_args__ = (
+        Index("ix_inference_detections_result", "result_id"),
+        Index("ix_inference_detections_lot_class", "lot_id", "class_name"),
+        Index("ix_inference_detections_bundle_class", "bundle_id", "class_name"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    result_id = Column(BigInteger, ForeignKey('ai_spec_v2.inference_results.id', ondelete='CASCADE'),
+                       nullable=False)
+    lot_id = Column(String(100))
+    bundle_id = Column(String(100))
+    seq = Column(Integer, nullable=False)  # 이미지 안의 detection 순서
+
+    class_id = Column(Integer)
+    class_name = Column(String(100))  # = DefectType.ai_code
+    score = Column(Float)
+    x1 = Column(Float)
+    y1 = Column(Float)
+    x2 = Column(Float)
+    y2 = Column(Float)
+    polygon = Column(JSON)  # [[x, y], ...] (segmentation 모델)
+    rle = Column(JSON)  # {"size": [h, w], "counts": [...]} (mask를 RLE로 주는 모델)
+    area = Column(Float)
+    measurements = Column(JSON)  # {"longest", "width", "height", "area", "perimeter"} (pixel)
+
+    defect_type_id = Column(Integer)  # 매칭된 DefectType
+    judgment = Column(String(10), nullable=False)  # OK, NG, UNKNOWN
+    judgment_reason = Column(String(100))
+
+    def __repr__(self):
+        return f"<InferenceDetection(result_id={self.result_id}, class='{self.class_name}', judgment='{self.judgment}')>"
+
+
+class InferenceLotSummary(Base):
+    """
+    lot / bundle별 누적 집계 (결과 저장 시 같은 트랜잭션에서 증분 UPSERT)
+
+    scope: 'lot' 또는 'bundle', scope_id: lot_id / bundle_id
+    bundle id는 lot마다 다시 쓰일 수 있으므로 키는 (scope, lot_id, scope_id) — lot 행은 lot_id = scope_id
+    """
+    __tablename__ = 'inference_lot_summaries'
+    __table_args__ = (
+        UniqueConstraint("scope", "lot_id", "scope_id", name="uq_inference_lot_summaries_scope"),
+        Index("ix_inference_lot_summaries_lot", "lot_id", "scope"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scope = Column(String(10), nullable=False)  # lot, bundle
+    scope_id = Column(String(100), nullable=False)
+    lot_id = Column(String(100), nullable=False)
+    customer_id = Column(String(100))
+    product_id = Column(String(100))
+
+    images = Column(Integer, nullable=False, default=0)
+    ok_images = Column(Integer, nullable=False, default=0)
+    ng_images = Column(Integer, nullable=False, default=0)
+    unknown_images = Column(Integer, nullable=False, default=0)
+    defects = Column(Integer, nullable=False, default=0)
+    ng_defects = Column(Integer, nullable=False, default=0)
+
+    first_result_at = Column(DateTime)
+    last_result_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<InferenceLotSummary(scope='{self.scope}', id='{self.scope_id}', images={self.images})>"
+
+
+class InferenceLotDefectCount(Base):
+    """lot / bundle별 불량 유형(class_name) 누적 건수"""
+    __tablename__ = 'inference_lot_defect_counts'
+    __table_args__ = (
+        UniqueConstraint("scope", "lot_id", "scope_id", "class_name", name="uq_inference_lot_defect_counts_class"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scope = Column(String(10), nullable=False)
+    lot_id = Column(String(100), nullable=False)
+    scope_id = Column(String(100), nullable=False)
+    class_name = Column(String(100), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    ng_count = Column(Integer, nullable=False, default=0)
+    images = Column(Integer, nullable=False, default=0)  # 해당 유형이 1건 이상 검출된 이미지 수
+    max_score = Column(Float)
+
+    def __repr__(self):
+        return f"<InferenceLotDefectCount(scope='{self.scope}', id='{self.scope_id}', class='{self.class_name}', count={self.count})>"
+
+
+class TrainingJob(Base):
+    """
+    모델 학습 작업 (/training/start)
+
+    학습은 runner가 별도 프로세스로 실행하고, 진행 상황(epoch / metrics)을 이 행과 training_job_epochs에 기록
+    """
+    __tablename__ = 'training_jobs'
+    __table_args__ = (
+        Index("ix_training_jobs_status_created", "status", "created_at"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(100), unique=True, nullable=False, index=True)
+    model_name = Column(String(100), nullable=False)
+    dataset_id = Column(String(100), nullable=False)
+    mode = Column(String(20), nullable=False, default='yolo')  # yolo, tiny (CPU 테스트용)
+    config = Column(JSON)
+
+    # queued, running, stopping, completed, cancelled, failed
+    status = Column(String(20), nullable=False, default='queued')
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    current_epoch = Column(Integer, nullable=False, default=0)
+    total_epochs = Column(Integer, nullable=False, default=0)
+    metrics = Column(JSON)  # 마지막 epoch metrics
+    result = Column(JSON)  # {"weights", "modelKey", "bestEpoch", "metrics", "mlflowRunId"}
+    error = Column(Text)
+
+    runner_id = Column(String(100))  # 실행 중인 runner (host:pid)
+    pid = Column(Integer)  # 학습 프로세스 pid
+    heartbeat_at = Column(DateTime)
+
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<TrainingJob(job_id='{self.job_id}', status='{self.status}')>"
+
+
+class TrainingEpoch(Base):
+    """학습 epoch별 metrics (진행 이력 / SSE 재전송)"""
+    __tablename__ = 'training_job_epochs'
+    __table_args__ = (
+        UniqueConstraint("job_id", "epoch", name="uq_training_job_epochs_epoch"),
+        {"schema": "ai_spec_v2"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey('ai_spec_v2.training_jobs.id', ondelete='CASCADE'), nullable=False)
+    epoch = Column(Integer, nullable=False)
+    metrics = Column(JSON)
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<TrainingEpoch(job_id={self.job_id}, epoch={self.epoch})>"
@@ -6,6 +6,7 @@
 
 import cv2
 import numpy as np
+from app.core.metrics import stage_timer
 from .base_extractor import BaseExtractor, ExtractionMode
 
 
@@ -37,6 +38,11 @@ class BoxAutoExtractor(BaseExtractor):
         Returns:
             mask: 이진 마스크 (uint8, 0 or 255)
         """
+        with stage_timer("box_auto", self.method):
+            return self._extract(image, x, y, w, h)
+
+    def _extract(self, image, x, y, w, h):
+        """method별 Segmentation 분기"""
         if self.method == "grabcut":
             return self._grabcut_advanced(image, x, y, w, h)
         elif self.method == "watershed":
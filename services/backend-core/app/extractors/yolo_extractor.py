@@ -5,6 +5,7 @@ YOLO 기반 자동 추출 (최종 수정 버전)
 
 import cv2
 import numpy as np
+from app.core.metrics import stage_timer
 from .base_extractor import BaseExtractor, ExtractionMode
 
 
@@ -55,7 +56,8 @@ class YOLOExtractor(BaseExtractor):
         
         try:
             # YOLO 추론
-            results = self.model.predict(source=image, verbose=False)
+            with stage_timer("yolo", "predict"):
+                results = self.model.predict(source=image, verbose=False)
             
             if not results:
                 print("YOLO 결과가 없습니다.")
@@ -63,52 +65,53 @@ class YOLOExtractor(BaseExtractor):
             
             H, W = image.shape[:2]
             
-            for r in results:
-                # ★ masks 존재 여부 확인 (중요!)
-                if not hasattr(r, 'masks') or r.masks is None:
-                    print("경고: Segmentation mask가 없습니다. Detection 전용 모델일 수 있습니다.")
-                    continue
+            with stage_timer("yolo", "contour_decode"):
+                for r in results:
+                    # ★ masks 존재 여부 확인 (중요!)
+                    if not hasattr(r, 'masks') or r.masks is None:
+                        print("경고: Segmentation mask가 없습니다. Detection 전용 모델일 수 있습니다.")
+                        continue
                 
-                # ★ masks.data 접근 (안전하게)
-                try:
-                    # GPU 텐서를 CPU numpy로 변환
-                    if hasattr(r.masks.data, 'cpu'):
-                        segs = r.masks.data.cpu().numpy()
-                    else:
-                        segs = r.masks.data
+                    # ★ masks.data 접근 (안전하게)
+                    try:
+                        # GPU 텐서를 CPU numpy로 변환
+                        if hasattr(r.masks.data, 'cpu'):
+                            segs = r.masks.data.cpu().numpy()
+                        else:
+                            segs = r.masks.data
                     
-                    # numpy array가 아닌 경우 변환
-                    if not isinstance(segs, np.ndarray):
-                        segs = np.array(segs)
+                        # numpy array가 아닌 경우 변환
+                        if not isinstance(segs, np.ndarray):
+                            segs = np.array(segs)
                     
-                except Exception as e:
-                    print(f"masks 데이터 변환 실패: {e}")
-                    continue
+                    except Exception as e:
+                        print(f"masks 데이터 변환 실패: {e}")
+                        continue
                 
-                # 각 마스크 처리
-                for seg in segs:
-                    try:
-                        # 마스크를 uint8로 변환
-                        mask = (seg * 255).astype(np.uint8)
+                    # 각 마스크 처리
+                    for seg in segs:
+                        try:
+                            # 마스크를 uint8로 변환
+                            mask = (seg * 255).astype(np.uint8)
                         
-                        # 원본 이미지 크기로 resize
-                        mask = cv2.resize(mask, (W, H), interpolation=cv2.INTER_NEAREST)
+                            # 원본 이미지 크기로 resize
+                            mask = cv2.resize(mask, (W, H), interpolation=cv2.INTER_NEAREST)
                         
-                        # 이진화
-                        mask = (mask > 127).astype(np.uint8) * 255
+                            # 이진화
+                            mask = (mask > 127).astype(np.uint8) * 255
                         
-                        # Contour 찾기
-                        cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL,
-                                                   cv2.CHAIN_APPROX_SIMPLE)
+                            # Contour 찾기
+                            cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL,
+                                                       cv2.CHAIN_APPROX_SIMPLE)
                         
-                        # 최소 면적 이상인 contour만 추가
-                        for cnt in cnts:
-                            if cv2.contourArea(cnt) >= self.min_area:
-                                contours.append(cnt)
+                            # 최소 면적 이상인 contour만 추가
+                            for cnt in cnts:
+                                if cv2.contourArea(cnt) >= self.min_area:
+                                    contours.append(cnt)
                     
-                    except Exception as e:
-                        print(f"개별 마스크 처리 실패: {e}")
-                        continue
+                        except Exception as e:
+                            print(f"개별 마스크 처리 실패: {e}")
+                            continue
         
         except Exception as e:
             print(f"YOLO 추출 실패: {e}")
@@ -3,34 +3,85 @@ FastAPI Main Application
 AI/ML 전용 백엔드 - GPU 기반 추론 및 학습
 """
 
+import time
+
+_import_start = time.perf_counter()
+
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import inference, training, models, images, datasets, extraction
 from app.api.v1 import customer_spec, slicer, rca, tas
 from app.api.v1.tas import database as tas_db
+from app.api.v1.tas import migration as tas_migration
 from app.core.config import settings
-from app.database.connection import engine
-from app.database.schema import Base
+from app.core import metrics, startup
+from app.database.connection import engine, async_engine, check_encodings
+from app.database.schema import Base, ensure_indexes
+from app.services import inference_batcher
+from app.services.image_store import image_loader
+from app.services.inference_jobs import inference_workers
+from app.services.model_registry import model_registry
+from app.services.rca_service import rca_service
+from app.services.stats_service import stats_service
+from app.services.training_jobs import training_runner
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """앱 시작/종료 시 실행되는 이벤트"""
+    lifespan_start = time.perf_counter()
     # 시작 시: DB 테이블 생성
     try:
         Base.metadata.create_all(bind=engine)
+        ensure_indexes(engine)
         print("Database tables created successfully")
     except Exception as e:
         print(f"Database initialization error: {e}")
+    # 대시보드 통계 누적 집계 (최초 실행 시 원본 테이블에서 재집계)
+    try:
+        await asyncio.to_thread(stats_service.ensure_built)
+    except Exception as e:
+        print(f"Dashboard stats initialization error: {e}")
+    # 동기(pg8000) / 비동기(asyncpg) 드라이버가 같은 encoding으로 접속하는지 확인
+    try:
+        encodings = await check_encodings()
+        if not encodings["ok"]:
+            print(f"Database encoding warning: sync(server, client)={encodings['sync']}, "
+                  f"async={encodings['async']} — non-UTF8 encodings may decode differently")
+    except Exception as e:
+        print(f"Database encoding check error: {e}")
     # TAS SQLite DB 초기화
     try:
         tas_db.init_db()
         print("TAS database initialized successfully")
     except Exception as e:
         print(f"TAS database initialization error: {e}")
+    # 추론 작업 워커 (INFERENCE_WORKERS=0이면 별도 워커 프로세스만 사용)
+    inference_workers.start(settings.INFERENCE_WORKERS)
+    # 학습 runner (TRAINING_RUNNER_ENABLED=false면 별도 runner 프로세스만 사용)
+    if settings.TRAINING_RUNNER_ENABLED:
+        training_runner.start()
+    startup.record("lifespan_seconds", time.perf_counter() - lifespan_start)
+
+    # 무거운 의존성(torch, openai, pptx, pdfplumber) 백그라운드 사전 로드
+    warmup_task = None
+    if settings.STARTUP_WARMUP:
+        warmup_task = asyncio.create_task(startup.warm_up(
+            delay=settings.STARTUP_WARMUP_DELAY,
+            extra_steps=[("rca_client", lambda: rca_service.client)],
+        ))
     yield
     # 종료 시: 정리 작업 (필요시)
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    tas_migration.shutdown_pool()
+    await asyncio.to_thread(inference_workers.stop)
+    await asyncio.to_thread(training_runner.stop)
+    model_registry.close()
+    inference_batcher.close_all()
+    image_loader.close()
 
 # FastAPI 앱 생성
 app = FastAPI(
@@ -42,6 +93,20 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Prometheus 메트릭 (라우트별 지연시간 / in-flight, DB 쿼리 시간)
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
+# 요청 프로파일러 (opt-in, 비활성 시 등록하지 않음)
+if settings.PROFILER_ENABLED:
+    from app.core.profiler import ProfilerMiddleware
+    app.add_middleware(
+        ProfilerMiddleware,
+        sample_rate=settings.PROFILER_SAMPLE_RATE,
+        admin_token=settings.PROFILER_ADMIN_TOKEN,
+    )
+
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +114,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # API 라우터 등록
@@ -62,6 +128,9 @@ app.include_router(customer_spec.router, prefix="/api/v1/customer-spec", tags=["
 app.include_router(slicer.router, prefix="/api/v1/slicer", tags=["Image Slicer"])
 app.include_router(rca.router, prefix="/api/v1/rca", tags=["RCA Analysis"])
 app.include_router(tas.router, prefix="/api/v1/tas", tags=["TAS - System 이상발생 분석"])
+if settings.PROFILER_ENABLED:
+    from app.api.v1 import profiler
+    app.include_router(profiler.router, prefix="/api/v1/admin/profiler", tags=["Profiler"])
 
 
 @app.get("/")
@@ -74,19 +143,42 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape 엔드포인트"""
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/api/ai/health")
 async def health_check():
-    """헬스 체크"""
-    import torch
+    """
+    헬스 체크
+
+    torch는 warm-up이 끝나기 전이면 import하지 않고 GPU 정보를 null로 반환
+    (rolling restart 시 health check가 torch import로 수 초간 막히지 않도록)
+    """
+    torch = startup.module_if_loaded("torch")
+    gpu_available = torch.cuda.is_available() if torch else None
 
     return {
         "status": "healthy",
         "service": "AI Backend",
-        "gpu_available": torch.cuda.is_available(),
-        "gpu_count": torch.cuda.device_count() if torch.cuda.is_available() else 0,
+        "gpu_available": gpu_available,
+        "gpu_count": (torch.cuda.device_count() if gpu_available else 0) if torch else None,
+        "warmup": startup.get_state()["warmup"]["status"],
     }
 
 
+@app.get("/api/ai/startup")
+async def startup_report():
+    """시작 단계별 소요 시간 (app import / lifespan / 백그라운드 warm-up)"""
+    return startup.get_state()
+
+
+startup.record("app_import_seconds", time.perf_counter() - _import_start)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
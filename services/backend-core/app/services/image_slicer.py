@@ -0,0 +1,146 @@
+"""
+Image Slicer Service
+대형 PCB 이미지를 타일 단위로 분할 / 썸네일 생성
+
+slicer API(/api/v1/slicer/process)와 benchmarks에서 공통으로 사용합니다.
+"""
+
+import base64
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+from PIL import Image
+
+from app.core.metrics import stage_timer, submit_tracked
+
+
+# (crop_box, paste_x, paste_y, filename)
+SliceTask = Tuple[Tuple[int, int, int, int], int, int, str]
+
+
+def plan_slices(
+    img_width: int,
+    img_height: int,
+    slice_width: int,
+    slice_height: int,
+    overlap_ratio: int = 0,
+    naming_pattern: str = 'slice_{row}_{col}',
+    file_format: str = 'jpg'
+) -> Tuple[List[SliceTask], int, int]:
+    """
+    슬라이스 작업 목록 생성
+
+    Args:
+        overlap_ratio: 겹침 비율 (%, 0 ~ 99)
+
+    Returns:
+        (tasks, rows, cols)
+    """
+    overlap_ratio = min(max(overlap_ratio, 0), 99)
+
+    overlap_x_px = int(slice_width * (overlap_ratio / 100))
+    overlap_y_px = int(slice_height * (overlap_ratio / 100))
+
+    step_x = max(1, slice_width - overlap_x_px)
+    step_y = max(1, slice_height - overlap_y_px)
+
+    # 행/열 계산
+    cols = math.ceil((img_width - slice_width) / step_x) + 1
+    rows = math.ceil((img_height - slice_height) / step_y) + 1
+
+    tasks = []
+    for r in range(rows):
+        for c in range(cols):
+            left = c * step_x
+            upper = r * step_y
+            right = left + slice_width
+            lower = upper + slice_height
+
+            crop_box = (
+                max(left, 0),
+                max(upper, 0),
+                min(right, img_width),
+                min(lower, img_height)
+            )
+
+            paste_x = 0 if left >= 0 else abs(left)
+            paste_y = 0 if upper >= 0 else abs(upper)
+
+            # 파일명 생성
+            filename = naming_pattern.replace('{row}', str(r))
+            filename = filename.replace('{col}', str(c))
+            filename = filename.replace('{index}', str(r * cols + c))
+            filename = f"{filename}.{file_format}"
+
+            tasks.append((crop_box, paste_x, paste_y, filename))
+
+    return tasks, rows, cols
+
+
+def slice_image(
+    img: Image.Image,
+    output_folder: str,
+    tasks: List[SliceTask],
+    slice_width: int,
+    slice_height: int,
+    file_format: str = 'jpg',
+    max_workers: Optional[int] = None
+):
+    """타일 crop + 패딩 + 저장 (스레드 병렬)"""
+    file_format = file_format.lower()
+
+    def process_slice(task):
+        crop_box, paste_x, paste_y, filename = task
+        with stage_timer("slicer", "crop"):
+            cropped_img = img.crop(crop_box)
+            padded_img = Image.new("RGB", (slice_width, slice_height), (0, 0, 0))
+            padded_img.paste(cropped_img, (paste_x, paste_y))
+
+        output_path = os.path.join(output_folder, filename)
+
+        # 파일 형식에 따라 저장 (인코딩 + 쓰기)
+        with stage_timer("slicer", "encode_write"):
+            if file_format in ['jpg', 'jpeg']:
+                padded_img.save(output_path, 'JPEG', quality=95)
+            elif file_format == 'png':
+                padded_img.save(output_path, 'PNG')
+            elif file_format == 'bmp':
+                padded_img.save(output_path, 'BMP')
+            else:
+                padded_img.save(output_path)
+
+    # 병렬 처리
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 4, 8)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for task in tasks:
+            submit_tracked(executor, "slicer", process_slice, task)
+
+
+def encode_thumbnail(img: Image.Image, size: Tuple[int, int]) -> str:
+    """썸네일 생성 → JPEG base64 data URL (img는 in-place로 축소됨)"""
+    img.thumbnail(size)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buffered = BytesIO()
+    img.save(buffered, format="JPEG")
+    return f"data:image/jpeg;base64,{base64.b64encode(buffered.getvalue()).decode()}"
+
+
+def make_thumbnails(output_folder: str, filenames: List[str], size: Tuple[int, int] = (150, 150)) -> List[dict]:
+    """저장된 슬라이스 파일의 썸네일 목록 (읽기 실패한 파일은 건너뜀)"""
+    thumbnails = []
+    for filename in filenames:
+        result_path = os.path.join(output_folder, filename)
+        try:
+            with Image.open(result_path) as result_img:
+                thumbnails.append({
+                    'filename': filename,
+                    'data': encode_thumbnail(result_img, size)
+                })
+        except Exception:
+            pass
+    return thumbnails
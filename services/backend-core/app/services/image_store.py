@@ -0,0 +1,645 @@
+"""
+Image Store
+추론 이미지 로드 (MinIO / S3 호환 object storage, 파일시스템, http) + 로컬 디스크 LRU 캐시
+
+- 이미지 주소 (요청 본문으로 들어오므로 허용 목록 밖의 주소는 ImageAddressError)
+    s3://bucket/key          object storage (MINIO_BUCKET_NAME + IMAGE_ALLOWED_BUCKETS)
+    lots/L1/0001.png         scheme 없는 상대 경로 → MINIO_BUCKET_NAME 버킷의 object key
+    /abs/path.png, file://   로컬 파일 (IMAGE_LOCAL_ROOTS 아래만, 기본 사용 안 함, 캐시하지 않음)
+    http(s)://...            HTTP GET (IMAGE_HTTP_HOSTS의 host만, 기본 사용 안 함, 캐시하지 않음)
+- object는 디스크 캐시(IMAGE_CACHE_DIR, 최대 IMAGE_CACHE_MAX_MB)에 ETag와 함께 저장하고
+  다음 요청은 If-None-Match 조건부 GET → 304면 캐시 파일 사용 (변경된 object만 다시 받음)
+  용량 초과 시 가장 오래 사용하지 않은 파일부터 삭제 (LRU)
+- S3 client는 프로세스당 1개 (urllib3 connection pool = IMAGE_FETCH_THREADS) — boto3 client는 thread-safe
+- 여러 장은 fetch 스레드 풀에서 병렬 로드, 같은 object 동시 요청은 1회만 다운로드
+- 파일은 스레드별 재사용 buffer(bytearray)로 readinto 후 디코딩 (이미지마다 bytes 할당 / 복사 없음)
+- IMAGE_STORE_BACKEND=filesystem이면 {IMAGE_STORE_ROOT}/{bucket}/{key}를 object로 사용 (테스트 / 로컬)
+"""
+
+import base64
+import hashlib
+import os
+import threading
+import urllib.error
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+from urllib.parse import unquote, urlparse
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import stage_timer, submit_tracked
+
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ObjectRef:
+    bucket: str
+    key: str
+
+    @property
+    def uri(self) -> str:
+        return f"s3://{self.bucket}/{self.key}"
+
+
+class ImageAddressError(ValueError):
+    """잘못되었거나 허용되지 않은 이미지 주소 (다시 시도해도 실패)"""
+
+
+def parse_image_url(url: str, default_bucket: str) -> Union[ObjectRef, Path, str]:
+    """
+    Returns:
+        ObjectRef (object storage) / Path (로컬 파일) / str (http URL)
+
+    Raises:
+        ImageAddressError: 빈 주소 / bucket만 있는 s3 주소
+    """
+    if not url or not url.strip():
+        raise ImageAddressError("이미지 주소가 비어 있습니다")
+    parsed = urlparse(url)
+    if parsed.scheme in ("http", "https"):
+        return url
+    if parsed.scheme == "file":
+        return Path(unquote(parsed.path))
+    if parsed.scheme == "s3":
+        key = parsed.path.lstrip("/")
+        if not parsed.netloc or not key:
+            raise ImageAddressError(f"잘못된 object 주소입니다: {url}")
+        return ObjectRef(parsed.netloc, key)
+    if os.path.isabs(url):
+        return Path(url)
+    return ObjectRef(default_bucket, url.lstrip("/"))
+
+
+# ========== Backends ==========
+
+@dataclass
+class FetchResult:
+    """object 조회 결과 (not_modified면 chunks 없음)"""
+    etag: str
+    not_modified: bool = False
+    chunks: Optional[Iterator[bytes]] = None
+    size: Optional[int] = None
+
+
+class FileSystemBackend:
+    """{root}/{bucket}/{key} 파일을 object로 사용 (MinIO 없이 테스트)"""
+
+    name = "filesystem"
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def _path(self, ref: ObjectRef) -> Path:
+        path = (self.root / ref.bucket / ref.key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"잘못된 object key입니다: {ref.key}")
+        return path
+
+    def fetch(self, ref: ObjectRef, if_none_match: Optional[str] = None) -> FetchResult:
+        path = self._path(ref)
+        stat = path.stat()
+        etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        if if_none_match == etag:
+            return FetchResult(etag, not_modified=True)
+
+        def chunks():
+            with open(path, "rb") as f:
+                while chunk := f.read(_CHUNK_SIZE):
+                    yield chunk
+        return FetchResult(etag, chunks=chunks(), size=stat.st_size)
+
+
+class S3Backend:
+    """MinIO / S3 호환 object storage (boto3 client 1개를 스레드 간 공유)"""
+
+    name = "s3"
+
+    def __init__(self, endpoint: str, access_key: str, secret_key: str, secure: bool = False,
+                 pool_size: int = 16):
+        self.endpoint = endpoint if "://" in endpoint else f"{'https' if secure else 'http'}://{endpoint}"
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.pool_size = pool_size
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # boto3는 첫 object 요청 시 import
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import boto3
+                    from botocore.config import Config
+                    self._client = boto3.client(
+                        "s3",
+                        endpoint_url=self.endpoint,
+                        aws_access_key_id=self.access_key,
+                        aws_secret_access_key=self.secret_key,
+                        config=Config(
+                            max_pool_connections=self.pool_size,
+                            retries={"max_attempts": 3, "mode": "standard"},
+                            s3={"addressing_style": "path"},
+                        ),
+                    )
+        return self._client
+
+    def fetch(self, ref: ObjectRef, if_none_match: Optional[str] = None) -> FetchResult:
+        from botocore.exceptions import ClientError
+
+        kwargs = {"IfNoneMatch": if_none_match} if if_none_match else {}
+        try:
+            response = self.client.get_object(Bucket=ref.bucket, Key=ref.key, **kwargs)
+        except ClientError as e:
+            status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if if_none_match and (status == 304 or e.response.get("Error", {}).get("Code") in ("304", "NotModified")):
+                return FetchResult(if_none_match, not_modified=True)
+            raise
+        body = response["Body"]
+        return FetchResult(response.get("ETag", ""), chunks=body.iter_chunks(_CHUNK_SIZE),
+                           size=response.get("ContentLength"))
+
+
+# ========== Disk LRU cache ==========
+
+@dataclass
+class _CacheEntry:
+    etag: str
+    path: Path
+    size: int
+
+
+class DiskLRUCache:
+    """
+    object별 최신 ETag 파일 1개를 보관하는 디스크 캐시
+
+    파일명: {sha256(object uri)}-{base64url(etag)} — 재시작 시 디렉터리 스캔만으로 index 복원
+    여러 프로세스가 같은 디렉터리를 쓰면 각자 index를 가지며, 다른 프로세스가 지운 파일은 miss로 처리
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _ensure_ready(self):
+        # 디렉터리 생성 / 스캔은 첫 사용 시 (import 시 디스크 작업 없음)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    self._scan()
+                    self._ready = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def _name(uri: str) -> str:
+        return hashlib.sha256(uri.encode("utf-8")).hexdigest()
+
+    def _scan(self):
+        files = []
+        for path in self.directory.glob("*/*"):
+            if path.name.endswith(".tmp"):
+                # 저장 중 중단된 임시 파일
+                path.unlink(missing_ok=True)
+                continue
+            name, sep, encoded = path.name.partition("-")
+            if not sep:
+                continue
+            try:
+                etag = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8")
+                stat = path.stat()
+            except (ValueError, OSError):
+                continue
+            files.append((stat.st_mtime, name, _CacheEntry(etag, path, stat.st_size)))
+        for _, name, entry in sorted(files, key=lambda item: item[0]):
+            self._entries[name] = entry
+            self._bytes += entry.size
+        self._evict()
+
+    def lookup(self, uri: str) -> Optional[_CacheEntry]:
+        """캐시된 항목 (ETag 확인 전) — 사용 순서 갱신"""
+        if not self.enabled:
+            return None
+        self._ensure_ready()
+        name = self._name(uri)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if not entry.path.exists():
+                self._entries.pop(name)
+                self._bytes -= entry.size
+                return None
+            self._entries.move_to_end(name)
+        # 재시작 후 LRU 순서 복원용 (atime은 noatime 마운트에서 갱신되지 않음)
+        try:
+            os.utime(entry.path)
+        except OSError:
+            pass
+        return entry
+
+    def store(self, uri: str, etag: str, chunks: Iterator[bytes]) -> Path:
+        """object 내용을 캐시 파일로 저장 (임시 파일 → rename), 이전 ETag 파일은 삭제"""
+        self._ensure_ready()
+        name = self._name(uri)
+        encoded = base64.urlsafe_b64encode(etag.encode("utf-8")).decode("ascii")
+        path = self.directory / name[:2] / f"{name}-{encoded}"
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        size = 0
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        with self._lock:
+            old = self._entries.pop(name, None)
+            if old is not None:
+                self._bytes -= old.size
+                if old.path != path:
+                    old.path.unlink(missing_ok=True)
+            self._entries[name] = _CacheEntry(etag, path, size)
+            self._bytes += size
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            entry.path.unlink(missing_ok=True)
+
+    def clear(self) -> int:
+        if not self.enabled:
+            return 0
+        self._ensure_ready()
+        with self._lock:
+            count = len(self._entries)
+            for entry in self._entries.values():
+                entry.path.unlink(missing_ok=True)
+            self._entries.clear()
+            self._bytes = 0
+        return count
+
+    def stats(self) -> dict:
+        if self.enabled:
+            self._ensure_ready()
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+# ========== Reusable read buffers ==========
+
+_buffers = threading.local()
+
+
+def _buffer(size: int) -> bytearray:
+    """스레드별 재사용 buffer (필요한 크기보다 작을 때만 새로 할당)"""
+    buffer = getattr(_buffers, "data", None)
+    if buffer is None or len(buffer) < size:
+        buffer = bytearray(max(size, 1 << 20))
+        _buffers.data = buffer
+    return buffer
+
+
+def _read_file(path: Path) -> memoryview:
+    """파일 전체를 스레드 buffer로 읽기 (같은 스레드의 다음 읽기 전까지 유효)"""
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        view = memoryview(_buffer(size))[:size]
+        read = 0
+        while read < size:
+            n = f.readinto(view[read:])
+            if not n:
+                break
+            read += n
+    return view[:read]
+
+
+def _read_chunks(chunks: Iterator[bytes], size_hint: Optional[int]) -> memoryview:
+    view = memoryview(_buffer(size_hint or 0))
+    used = 0
+    for chunk in chunks:
+        if used + len(chunk) > len(view):
+            # Content-Length 없는 응답 — buffer를 늘려서 이어 씀
+            grown = _buffer((used + len(chunk)) * 2)
+            grown[:used] = view[:used]
+            view = memoryview(grown)
+        view[used:used + len(chunk)] = chunk
+        used += len(chunk)
+    return view[:used]
+
+
+def decode_image(data) -> np.ndarray:
+    """
+    bytes / memoryview → BGR 이미지
+
+    Raises:
+        ValueError: 디코딩 실패
+    """
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("이미지를 디코딩할 수 없습니다")
+    return image
+
+
+# ========== Load errors ==========
+
+LOAD_ERROR_MESSAGE = "이미지를 불러올 수 없습니다"
+
+
+def describe_load_error(error: Exception) -> str:
+    """
+    API 응답 / 작업 결과에 남길 로드 오류 메시지
+
+    원래 예외 문구(경로 / 연결 오류 등)는 파일 존재 여부나 내부망 정보를 드러낼 수 있으므로
+    주소 검증 오류만 그대로 쓰고 나머지는 공통 문구로 바꿉니다 (원래 오류는 서버 로그에만).
+    """
+    if isinstance(error, ImageAddressError):
+        return str(error)
+    return LOAD_ERROR_MESSAGE
+
+
+# 다시 받아도 같은 결과인 object storage 오류 코드
+_PERMANENT_S3_CODES = {"NoSuchKey", "NoSuchBucket", "InvalidBucketName", "AccessDenied", "InvalidObjectName",
+                       "400", "403", "404"}
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    이미지 로드 예외가 일시 오류(다시 시도하면 성공할 수 있음)인지 여부
+
+    - 일시 오류: 연결 / timeout 등 네트워크·IO 오류, HTTP 408·429·5xx, object storage 5xx / throttling
+    - 영구 오류: 잘못된 주소 / 디코딩 실패 (ValueError), 없는 파일 / 권한 없음, HTTP 4xx, NoSuchKey 등
+    """
+    if isinstance(error, ValueError):
+        return False
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in (408, 429) or error.code >= 500
+    if isinstance(error, (FileNotFoundError, IsADirectoryError, NotADirectoryError, PermissionError)):
+        return False
+    if isinstance(error, OSError):
+        return True
+    try:
+        from botocore.exceptions import BotoCoreError, ClientError
+    except ImportError:
+        return True
+    if isinstance(error, ClientError):
+        code = str(error.response.get("Error", {}).get("Code", ""))
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return code not in _PERMANENT_S3_CODES and not (400 <= status < 500 and status not in (408, 429))
+    if isinstance(error, BotoCoreError):
+        return True
+    # 알 수 없는 오류는 재시도 (INFERENCE_MAX_ATTEMPTS에서 실패 처리)
+    return True
+
+
+# ========== Loader ==========
+
+class _AllowlistRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """허용 host 밖으로의 redirect 거부 (redirect로 내부 주소에 접근하지 못하도록)"""
+
+    def __init__(self, hosts: frozenset):
+        self.hosts = hosts
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if (urlparse(newurl).hostname or "").lower() not in self.hosts:
+            raise ImageAddressError("허용되지 않은 host로 redirect되었습니다")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+class ImageLoader:
+    """추론용 이미지 로더 (object storage + 디스크 캐시 + 병렬 fetch)"""
+
+    def __init__(self, backend_factory: Callable, cache: DiskLRUCache, default_bucket: str,
+                 threads: int = 16, allowed_buckets: Iterable[str] = (), local_roots: Iterable[str] = (),
+                 http_hosts: Iterable[str] = ()):
+        """
+        Args:
+            backend_factory: backend 생성 함수 (첫 object 요청 시 1회 호출)
+            cache: 디스크 캐시 (max_bytes=0이면 캐시 없이 메모리로 바로 디코딩)
+            default_bucket: scheme 없는 주소의 bucket
+            threads: 병렬 fetch 스레드 수
+            allowed_buckets: default_bucket 외에 s3:// 주소로 허용할 bucket
+            local_roots: 로컬 파일 주소를 허용할 디렉터리 (비어 있으면 로컬 파일 주소 거부)
+            http_hosts: http(s) 주소를 허용할 host (비어 있으면 http 주소 거부)
+        """
+        self._backend_factory = backend_factory
+        self._backend = None
+        self.cache = cache
+        self.default_bucket = default_bucket
+        self.allowed_buckets = frozenset([default_bucket, *allowed_buckets])
+        self.local_roots = tuple(Path(root).resolve() for root in local_roots)
+        self.http_hosts = frozenset(host.lower() for host in http_hosts)
+        self._http = urllib.request.build_opener(_AllowlistRedirectHandler(self.http_hosts))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="image-fetch")
+        self._inflight: dict = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "revalidated": 0, "misses": 0, "downloaded_bytes": 0}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._backend_factory()
+        return self._backend
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    # ----- object → 캐시 파일 -----
+
+    def _fetch_object(self, ref: ObjectRef) -> Path:
+        entry = self.cache.lookup(ref.uri)
+        result = self.backend.fetch(ref, if_none_match=entry.etag if entry else None)
+        if result.not_modified:
+            self._count("hits")
+            return entry.path
+        self._count("revalidated" if entry else "misses")
+
+        def counted(chunks):
+            for chunk in chunks:
+                self._count("downloaded_bytes", len(chunk))
+                yield chunk
+        return self.cache.store(ref.uri, result.etag, counted(result.chunks))
+
+    def _cached_path(self, ref: ObjectRef) -> Path:
+        """같은 object 동시 요청은 다운로드 1회만 (나머지는 결과 대기)"""
+        with self._lock:
+            future = self._inflight.get(ref.uri)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[ref.uri] = future
+        if not owner:
+            return future.result()
+        try:
+            path = self._fetch_object(ref)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(ref.uri, None)
+
+    def _read_cached(self, ref: ObjectRef) -> memoryview:
+        """
+        캐시 파일 읽기
+
+        _cached_path()와 읽기 사이에 다른 스레드 / 프로세스의 evict로 파일이 지워질 수 있으므로
+        1회 다시 받고, 그래도 없으면 (캐시보다 큰 object 등) 캐시 없이 메모리로 읽음
+        """
+        for _ in range(2):
+            path = self._cached_path(ref)
+            try:
+                return _read_file(path)
+            except FileNotFoundError:
+                continue
+        return self._read_direct(ref)
+
+    def _read_direct(self, ref: ObjectRef) -> memoryview:
+        result = self.backend.fetch(ref)
+        self._count("misses")
+        data = _read_chunks(result.chunks, result.size)
+        self._count("downloaded_bytes", len(data))
+        return data
+
+    # ----- 공개 API -----
+
+    def resolve(self, url: str) -> Union[ObjectRef, Path, str]:
+        """
+        주소 해석 + 허용 목록 확인 (요청 접수 시 미리 검증할 때도 사용)
+
+        Raises:
+            ImageAddressError: 잘못된 주소 / 허용되지 않은 bucket · 로컬 경로 · host
+        """
+        target = parse_image_url(url, self.default_bucket)
+        if isinstance(target, ObjectRef):
+            if target.bucket not in self.allowed_buckets:
+                raise ImageAddressError(f"허용되지 않은 bucket입니다: {target.bucket}")
+        elif isinstance(target, Path):
+            path = target.resolve()
+            if not any(root == path or root in path.parents for root in self.local_roots):
+                raise ImageAddressError("로컬 파일 주소는 허용되지 않습니다")
+            return path
+        elif (urlparse(target).hostname or "").lower() not in self.http_hosts:
+            raise ImageAddressError("허용되지 않은 http 주소입니다")
+        return target
+
+    def load(self, url: str) -> np.ndarray:
+        """
+        이미지 1장 로드 + 디코딩
+
+        Raises:
+            ImageAddressError: 잘못되었거나 허용되지 않은 주소
+            ValueError / OSError / botocore 예외: 다운로드 / 디코딩 실패
+        """
+        target = self.resolve(url)
+        with stage_timer("image_store", "fetch"):
+            if isinstance(target, str):
+                with self._http.open(target, timeout=30) as response:
+                    data = _read_chunks(iter(lambda: response.read(_CHUNK_SIZE), b""),
+                                        response.length)
+            elif isinstance(target, Path):
+                data = _read_file(target)
+            elif self.cache.enabled:
+                data = self._read_cached(target)
+            else:
+                data = self._read_direct(target)
+        with stage_timer("image_store", "decode"):
+            return decode_image(data)
+
+    def load_many(self, urls: List[str]) -> List[Union[np.ndarray, Exception]]:
+        """여러 장 병렬 로드 (입력 순서, 실패한 항목은 예외 객체)"""
+        futures = [submit_tracked(self._pool, "image_fetch", self.load, url) for url in urls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def prefetch(self, urls: List[str]) -> List[Future]:
+        """object를 디스크 캐시에 미리 받아 둠 (디코딩 없음, 캐시 비활성 / 로컬 / http 주소는 무시)"""
+        if not self.cache.enabled:
+            return []
+        futures = []
+        for url in urls:
+            try:
+                target = self.resolve(url)
+            except ImageAddressError:
+                continue
+            if isinstance(target, ObjectRef) and self.cache.lookup(target.uri) is None:
+                futures.append(submit_tracked(self._pool, "image_prefetch", self._prefetch_one, target))
+        return futures
+
+    def _prefetch_one(self, ref: ObjectRef):
+        try:
+            self._cached_path(ref)
+        except Exception as e:
+            # prefetch 실패는 실제 로드 시 다시 시도 / 오류 보고
+            print(f"Image prefetch error ({ref.uri}): {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["revalidated"] + counters["misses"]
+        return {
+            "backend": getattr(self._backend, "name", settings.IMAGE_STORE_BACKEND),
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None,
+            "cache": self.cache.stats(),
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_backend():
+    """IMAGE_STORE_BACKEND 설정에 맞는 backend"""
+    if settings.IMAGE_STORE_BACKEND == "filesystem":
+        return FileSystemBackend(settings.IMAGE_STORE_ROOT)
+    return S3Backend(
+        settings.MINIO_ENDPOINT,
+        settings.MINIO_ACCESS_KEY,
+        settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE,
+        pool_size=settings.IMAGE_FETCH_THREADS,
+    )
+
+
+# 싱글톤 인스턴스
+image_loader = ImageLoader(
+    create_backend,
+    DiskLRUCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_MB * 1024 * 1024),
+    default_bucket=settings.MINIO_BUCKET_NAME,
+    threads=settings.IMAGE_FETCH_THREADS,
+    allowed_buckets=settings.IMAGE_ALLOWED_BUCKETS,
+    local_roots=settings.IMAGE_LOCAL_ROOTS,
+    http_hosts=settings.IMAGE_HTTP_HOSTS,
+)
@@ -0,0 +1,201 @@
+"""
+Inference Micro-Batcher
+동시에 들어온 추론 요청을 모아 모델 forward pass 1회로 처리 (dynamic batching)
+
+- 요청(이미지)은 모델별 queue에 들어가고, batch 스레드가 첫 요청 도착 후
+  max_wait_ms 동안 또는 max_batch_size가 찰 때까지 모아서 predict_batch 1회 실행
+- 결과는 요청별 Future로 돌려줌 (예외는 해당 batch의 모든 요청에 전달)
+- 워커 스레드들이 claim한 batch, /inference/predict 단건 요청이 같은 batch로 합쳐짐
+- 메트릭: batch 채움 비율(inference_batch_fill_ratio), queue 대기 시간(inference_batch_queue_wait_seconds)
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.core import metrics
+from app.core.config import settings
+
+
+@dataclass
+class _Request:
+    image: np.ndarray = field(repr=False)
+    future: Future
+    enqueued: float
+
+
+class MicroBatcher:
+    """모델 1개 앞의 요청 병합기 (batch 스레드 1개)"""
+
+    def __init__(self, predict_fn: Callable[[List[np.ndarray]], list], name: str = "model",
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Args:
+            predict_fn: 이미지 리스트 → 이미지별 결과 리스트 (모델 predict_batch)
+            name: 메트릭 라벨 (모델 key)
+            max_batch_size: forward pass 1회 최대 이미지 수
+            max_wait_ms: 첫 요청 도착 후 batch를 채우기 위해 기다리는 최대 시간
+        """
+        self.predict_fn = predict_fn
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._stop = threading.Event()
+        self._counters = {"requests": 0, "batches": 0, "images": 0, "wait_seconds": 0.0}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"microbatch-{name}", daemon=True)
+        self._thread.start()
+
+    # ========== 요청 ==========
+
+    def submit(self, image: np.ndarray) -> Future:
+        """이미지 1장 추론 요청 (결과: detection 리스트)"""
+        future: Future = Future()
+        if self._stop.is_set():
+            future.set_exception(RuntimeError(f"batcher for {self.name} is closed"))
+            return future
+        self._queue.put(_Request(image, future, time.perf_counter()))
+        return future
+
+    def predict(self, images: List[np.ndarray], timeout: float = None) -> list:
+        """여러 장 요청 후 결과 대기 (입력 순서 유지) — 다른 호출자의 요청과 같은 batch로 합쳐질 수 있음"""
+        futures = [self.submit(image) for image in images]
+        return [future.result(timeout) for future in futures]
+
+    async def predict_async(self, image: np.ndarray) -> list:
+        """async 핸들러용 (이벤트 루프를 막지 않고 대기)"""
+        return await asyncio.wrap_future(self.submit(image))
+
+    # ========== batch 스레드 ==========
+
+    def _collect(self) -> List[_Request]:
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first.enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # 대기 시간이 지나도 이미 queue에 있는 요청은 함께 처리
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            # 호출자가 이미 취소한 요청은 제외
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            waits = [started - request.enqueued for request in batch]
+            for wait in waits:
+                metrics.INFERENCE_BATCH_QUEUE_WAIT.labels(self.name).observe(wait)
+            metrics.INFERENCE_BATCH_FILL.labels(self.name).observe(len(batch) / self.max_batch_size)
+            with self._lock:
+                self._counters["requests"] += len(batch)
+                self._counters["batches"] += 1
+                self._counters["wait_seconds"] += sum(waits)
+
+            try:
+                results = self.predict_fn([request.image for request in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"model returned {len(results)} results for {len(batch)} images")
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+        # 종료 시 남은 요청 실패 처리
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError(f"batcher for {self.name} is closed"))
+
+    def close(self, timeout: float = 5.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        batches = counters["batches"]
+        return {
+            "model": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "requests": counters["requests"],
+            "batches": batches,
+            "pending": self._queue.qsize(),
+            "avg_batch_size": round(counters["requests"] / batches, 2) if batches else None,
+            "avg_fill_ratio": round(counters["requests"] / batches / self.max_batch_size, 4) if batches else None,
+            "avg_queue_wait_ms": round(counters["wait_seconds"] / counters["requests"] * 1000, 3)
+            if counters["requests"] else None,
+        }
+
+
+# ========== 모델별 batcher ==========
+
+_batchers: Dict[int, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(model) -> MicroBatcher:
+    """모델 인스턴스별 batcher (첫 요청 시 생성)"""
+    with _batchers_lock:
+        batcher = _batchers.get(id(model))
+        if batcher is None:
+            batcher = MicroBatcher(
+                model.predict_batch,
+                name=model.key,
+                max_batch_size=settings.INFERENCE_MICROBATCH_MAX_SIZE,
+                max_wait_ms=settings.INFERENCE_MICROBATCH_MAX_WAIT_MS,
+            )
+            _batchers[id(model)] = batcher
+        return batcher
+
+
+def release_batcher(model):
+    """모델 해제 시 batcher 종료"""
+    with _batchers_lock:
+        batcher = _batchers.pop(id(model), None)
+    if batcher is not None:
+        batcher.close()
+
+
+def predict(model, images: List[np.ndarray]) -> list:
+    """micro-batching을 거쳐 추론 (INFERENCE_MICROBATCH_ENABLED=false면 바로 predict_batch)"""
+    if not settings.INFERENCE_MICROBATCH_ENABLED:
+        return model.predict_batch(images)
+    return get_batcher(model).predict(images)
+
+
+def close_all():
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+        _batchers.clear()
+    for batcher in batchers:
+        batcher.close()
+
+
+def stats() -> List[dict]:
+    with _batchers_lock:
+        return [batcher.stats() for batcher in _batchers.values()]
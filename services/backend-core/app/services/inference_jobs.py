@@ -0,0 +1,666 @@
+"""
+Inference Job Engine
+추론 작업 queue / 워커 (ai_spec_v2.inference_jobs, inference_job_items)
+
+- 요청은 job 1건 + 이미지별 item 행으로 저장 (item 테이블이 곧 persistent queue)
+- 워커는 job 구분 없이 같은 모델(model_key)의 queued item을 batch 크기만큼 claim
+  (Postgres: SELECT ... FOR UPDATE SKIP LOCKED → 여러 워커 / 프로세스가 겹치지 않게 가져감)
+  모델은 등록 시 (고객, 제품) 라우트로 정해지며, 이미 상주 중인 모델의 item을 먼저 가져가
+  모델 교체를 줄임 (INFERENCE_MODEL_SWAP_MAX_WAIT보다 오래 기다린 item은 교체하고 처리)
+  → 이미지 병렬 로드 → 모델 forward pass 1회 → 고객 Spec OK/NG 판정
+  → item 상태 / 결과·detection(inference_results) / job 진행률을 한 트랜잭션으로 저장
+- claim한 item에는 lease를 두고, 워커가 죽어 lease가 만료되면 다시 queued로 돌림
+  (INFERENCE_MAX_ATTEMPTS 초과 시 failed)
+- API 프로세스 안 워커 스레드(INFERENCE_WORKERS) 또는 별도 워커 프로세스로 실행:
+    python -m app.services.inference_jobs --processes 2
+- 로컬 / 테스트용으로 SQLite 파일 DB도 사용 가능 (create_local_session_factory)
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.database.connection import SessionLocal, create_sqlite_session_factory
+from app.database.schema import (
+    InferenceJob, InferenceJobItem, InferenceModelRoute, InferenceResult, InferenceDetection,
+    InferenceLotSummary, InferenceLotDefectCount,
+    CustomerSpec, DefectType, DefectCondition, MeasurementCondition, Specification, Expression
+)
+from app.services import inference_batcher
+from app.services.image_store import ImageLoader, describe_load_error, image_loader, is_transient_error
+from app.services.inference_results import inference_results, write_results
+from app.services.model_registry import ModelRegistry, model_registry
+from app.services.spec_judgment import SpecJudge, spec_judge
+
+
+JOB_KINDS = ("single", "batch")
+FINAL_STATUSES = ("completed", "partial", "failed")
+
+# 단건 요청은 대기 중인 대용량 배치보다 먼저 처리
+PRIORITY_SINGLE = 10
+PRIORITY_BATCH = 0
+
+
+@dataclass
+class ClaimedItem:
+    """워커가 claim한 이미지 1장"""
+    id: int
+    job_pk: int
+    job_id: str
+    seq: int
+    image_url: str
+    attempts: int
+    customer_id: Optional[str] = None
+    product_id: Optional[str] = None
+    model_key: Optional[str] = None
+    lot_id: Optional[str] = None
+    bundle_id: Optional[str] = None
+
+
+@dataclass
+class ItemOutcome:
+    """item 처리 결과 (status: done / failed / retry)"""
+    item: ClaimedItem
+    status: str
+    result: Optional[dict] = None  # 요약 (item.result에 저장)
+    detections: Optional[list] = None  # inference_results / inference_detections에 저장
+    error: Optional[str] = None
+    latency_ms: Optional[float] = None
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class InferenceJobStore:
+    """job / item 저장소 (동기 — 워커 스레드 / threadpool에서 호출)"""
+
+    def __init__(self, session_factory: Callable = SessionLocal, lease_seconds: int = 300,
+                 max_attempts: int = 3):
+        """
+        Args:
+            session_factory: Session 생성 함수 (기본 Postgres SessionLocal)
+            lease_seconds: claim 후 결과 저장까지 허용 시간 (초과 시 다른 워커가 재처리)
+            max_attempts: item당 최대 처리 시도 횟수
+        """
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+
+    # ========== 등록 / 조회 ==========
+
+    def create_job(self, job_id: str, kind: str, image_urls: List[str],
+                   customer_id: Optional[str] = None, product_id: Optional[str] = None,
+                   lot_id: Optional[str] = None, bundle_id: Optional[str] = None,
+                   model_key: Optional[str] = None) -> Optional[dict]:
+        """
+        job + item 등록 (단일 트랜잭션)
+
+        model_key: 추론할 모델 (name:version, 없으면 DEFAULT_MODEL_NAME)
+
+        Returns:
+            job 상태 dict, 같은 job_id가 이미 있으면 None
+        """
+        priority = PRIORITY_SINGLE if kind == "single" else PRIORITY_BATCH
+        with self.session_factory() as db:
+            job = InferenceJob(
+                job_id=job_id, kind=kind, status="queued",
+                customer_id=customer_id, product_id=product_id, lot_id=lot_id, bundle_id=bundle_id,
+                model_key=model_key, total_items=len(image_urls), done_items=0, failed_items=0,
+                created_at=datetime.now(),
+            )
+            db.add(job)
+            try:
+                db.flush()
+            except IntegrityError:
+                db.rollback()
+                return None
+            if image_urls:
+                # executemany (insertmanyvalues) — 수천 장 배치도 한 번에 등록
+                db.execute(insert(InferenceJobItem), [
+                    {"job_id": job.id, "seq": seq, "image_url": url, "priority": priority,
+                     "model_key": model_key, "status": "queued", "attempts": 0, "created_at": job.created_at}
+                    for seq, url in enumerate(image_urls)
+                ])
+            else:
+                job.status, job.finished_at = "completed", job.created_at
+            db.commit()
+            return self._job_dict(job)
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self.session_factory() as db:
+            job = db.execute(select(InferenceJob).where(InferenceJob.job_id == job_id)).scalar_one_or_none()
+            return self._job_dict(job) if job else None
+
+    def get_results(self, job_id: str, offset: int = 0, limit: int = 100,
+                    status: Optional[str] = None) -> Optional[List[dict]]:
+        """item별 결과 (seq 순), job이 없으면 None"""
+        with self.session_factory() as db:
+            job_pk = db.execute(select(InferenceJob.id).where(InferenceJob.job_id == job_id)).scalar_one_or_none()
+            if job_pk is None:
+                return None
+            statement = select(InferenceJobItem).where(InferenceJobItem.job_id == job_pk)
+            if status:
+                statement = statement.where(InferenceJobItem.status == status)
+            rows = db.execute(
+                statement.order_by(InferenceJobItem.seq).offset(offset).limit(limit)
+            ).scalars().all()
+            detections = inference_results.detections_by_item(db, [row.id for row in rows if row.status == "done"])
+            return [
+                {
+                    "seq": row.seq,
+                    "imageUrl": row.image_url,
+                    "status": row.status,
+                    "attempts": row.attempts,
+                    "result": {**row.result, "detections": detections.get(row.id, [])} if row.result else row.result,
+                    "error": row.error,
+                    "latencyMs": row.latency_ms,
+                    "finishedAt": _iso(row.finished_at),
+                }
+                for row in rows
+            ]
+
+    def peek_queued(self, limit: int) -> List[str]:
+        """다음에 claim될 이미지 주소 (lock 없음 — prefetch용)"""
+        with self.session_factory() as db:
+            return list(db.execute(
+                select(InferenceJobItem.image_url)
+                .where(InferenceJobItem.status == "queued")
+                .order_by(InferenceJobItem.priority.desc(), InferenceJobItem.id)
+                .limit(limit)
+            ).scalars())
+
+    def queue_depth(self) -> dict:
+        """item 상태별 건수 (queued / running)"""
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(InferenceJobItem.status, func.count())
+                .where(InferenceJobItem.status.in_(("queued", "running")))
+                .group_by(InferenceJobItem.status)
+            ).all()
+        return {"queued": 0, "running": 0, **{status: count for status, count in rows}}
+
+    @staticmethod
+    def _job_dict(job: InferenceJob) -> dict:
+        finished = job.done_items + job.failed_items
+        return {
+            "jobId": job.job_id,
+            "kind": job.kind,
+            "status": job.status,
+            "customerId": job.customer_id,
+            "productId": job.product_id,
+            "lotId": job.lot_id,
+            "bundleId": job.bundle_id,
+            "model": job.model_key,
+            "totalImages": job.total_items,
+            "doneImages": job.done_items,
+            "failedImages": job.failed_items,
+            "progress": round(finished / job.total_items, 4) if job.total_items else 1.0,
+            "error": job.error,
+            "createdAt": _iso(job.created_at),
+            "startedAt": _iso(job.started_at),
+            "finishedAt": _iso(job.finished_at),
+        }
+
+    # ========== 워커용 ==========
+
+    def claim(self, worker_id: str, limit: int, resident_keys=(),
+              max_swap_wait: float = 10.0) -> List[ClaimedItem]:
+        """
+        같은 모델의 queued item을 최대 limit개 claim (priority 높은 순 → 등록 순)
+
+        job 구분 없이 가져오므로 동시에 들어온 여러 요청의 이미지가 한 batch로 묶입니다.
+        Args:
+            resident_keys: 워커에 이미 로드된 모델 key (해당 모델 item 우선)
+            max_swap_wait: queue 맨 앞 item이 이 시간(초) 이상 기다렸으면 상주 여부와 관계없이 처리
+        """
+        now = datetime.now()
+        with self.session_factory() as db:
+            found, model_key = self._pick_model(db, limit, set(resident_keys), max_swap_wait, now)
+            if not found:
+                return []
+            candidates = (
+                select(InferenceJobItem.id)
+                .where(InferenceJobItem.status == "queued",
+                       InferenceJobItem.model_key == model_key if model_key
+                       else InferenceJobItem.model_key.is_(None))
+                .order_by(InferenceJobItem.priority.desc(), InferenceJobItem.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                # IN (subquery)는 semi join으로 재실행되어 LIMIT가 무시될 수 있으므로 CTE로 1회만 평가
+                .cte("candidates")
+                .prefix_with("MATERIALIZED")
+            )
+            rows = db.execute(
+                update(InferenceJobItem)
+                .where(InferenceJobItem.id == candidates.c.id, InferenceJobItem.status == "queued")
+                .values(status="running", attempts=InferenceJobItem.attempts + 1, claimed_by=worker_id,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds))
+                .returning(InferenceJobItem.id, InferenceJobItem.job_id, InferenceJobItem.seq,
+                           InferenceJobItem.image_url, InferenceJobItem.attempts, InferenceJobItem.model_key)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if not rows:
+                db.commit()
+                return []
+
+            job_pks = {row.job_id for row in rows}
+            jobs = {
+                job.id: job for job in db.execute(
+                    select(InferenceJob.id, InferenceJob.job_id, InferenceJob.customer_id, InferenceJob.product_id,
+                           InferenceJob.lot_id, InferenceJob.bundle_id)
+                    .where(InferenceJob.id.in_(job_pks))
+                ).all()
+            }
+            db.execute(
+                update(InferenceJob)
+                .where(InferenceJob.id.in_(job_pks), InferenceJob.status == "queued")
+                .values(status="running", started_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+        return [
+            ClaimedItem(
+                id=row.id, job_pk=row.job_id, job_id=jobs[row.job_id].job_id, seq=row.seq,
+                image_url=row.image_url, attempts=row.attempts,
+                customer_id=jobs[row.job_id].customer_id, product_id=jobs[row.job_id].product_id,
+                model_key=row.model_key, lot_id=jobs[row.job_id].lot_id, bundle_id=jobs[row.job_id].bundle_id,
+            )
+            for row in sorted(rows, key=lambda r: r.id)
+        ]
+
+    @staticmethod
+    def _pick_model(db, limit: int, resident_keys: set, max_swap_wait: float, now: datetime) -> tuple:
+        """
+        이번 claim에서 처리할 모델 선택 → (queued item 존재 여부, model_key)
+
+        queue 앞쪽(limit * 4개)만 lock 없이 조회:
+        맨 앞 item의 모델이 상주 중이거나 오래 기다렸으면 그 모델,
+        아니면 같은 priority 안에서 상주 모델의 item이 있으면 그 모델 (모델 교체 없이 처리)
+        """
+        rows = db.execute(
+            select(InferenceJobItem.model_key, InferenceJobItem.priority, InferenceJobItem.created_at)
+            .where(InferenceJobItem.status == "queued")
+            .order_by(InferenceJobItem.priority.desc(), InferenceJobItem.id)
+            .limit(max(1, limit) * 4)
+        ).all()
+        if not rows:
+            return False, None
+        head = rows[0]
+        if not resident_keys or head.model_key in resident_keys \
+                or (now - head.created_at).total_seconds() >= max_swap_wait:
+            return True, head.model_key
+        for row in rows:
+            if row.priority != head.priority:
+                break
+            if row.model_key in resident_keys:
+                return True, row.model_key
+        return True, head.model_key
+
+    def finish(self, worker_id: str, outcomes: List[ItemOutcome], model_key: Optional[str] = None) -> int:
+        """
+        item 결과 저장 + job 진행률 / 최종 상태 갱신 (단일 트랜잭션)
+
+        lease 만료로 다른 워커가 가져간 item은 claimed_by가 달라 갱신되지 않습니다 (중복 집계 방지).
+        Returns:
+            반영된 item 수
+        """
+        if not outcomes:
+            return 0
+        now = datetime.now()
+        deltas: dict = {}
+        applied = 0
+        results = []
+        with self.session_factory() as db:
+            for outcome in outcomes:
+                values = dict(status=outcome.status, result=outcome.result, error=outcome.error,
+                              latency_ms=outcome.latency_ms, finished_at=now, lease_expires_at=None)
+                if outcome.status == "retry":
+                    # 일시 오류 — 다시 queue에 넣음 (시도 횟수 초과 시 실패 처리)
+                    if outcome.item.attempts < self.max_attempts:
+                        values.update(status="queued", claimed_by=None, finished_at=None)
+                    else:
+                        values.update(status="failed")
+                matched = db.execute(
+                    update(InferenceJobItem)
+                    .where(InferenceJobItem.id == outcome.item.id, InferenceJobItem.status == "running",
+                           InferenceJobItem.claimed_by == worker_id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if not matched or values["status"] == "queued":
+                    continue
+                applied += 1
+                if values["status"] == "done" and outcome.detections is not None:
+                    results.append((outcome.item, outcome.result or {}, outcome.detections))
+                done, failed = deltas.get(outcome.item.job_pk, (0, 0))
+                deltas[outcome.item.job_pk] = (done + (values["status"] == "done"),
+                                               failed + (values["status"] == "failed"))
+
+            # 결과 / detection bulk 저장 (item 상태와 같은 트랜잭션)
+            write_results(db, results, now)
+            for job_pk, (done, failed) in deltas.items():
+                self._advance_job(db, job_pk, done, failed, now, model_key)
+            db.commit()
+        return applied
+
+    def requeue_expired(self) -> int:
+        """lease가 만료된 running item (워커 비정상 종료) 재등록 / 시도 초과 시 실패 처리"""
+        now = datetime.now()
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(InferenceJobItem.id, InferenceJobItem.job_id, InferenceJobItem.attempts)
+                .where(InferenceJobItem.status == "running", InferenceJobItem.lease_expires_at < now)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                return 0
+            retry = [row.id for row in rows if row.attempts < self.max_attempts]
+            exhausted = [row for row in rows if row.attempts >= self.max_attempts]
+            if retry:
+                db.execute(
+                    update(InferenceJobItem).where(InferenceJobItem.id.in_(retry))
+                    .values(status="queued", claimed_by=None, lease_expires_at=None)
+                    .execution_options(synchronize_session=False)
+                )
+            if exhausted:
+                db.execute(
+                    update(InferenceJobItem).where(InferenceJobItem.id.in_([row.id for row in exhausted]))
+                    .values(status="failed", error="lease expired (worker did not finish)",
+                            lease_expires_at=None, finished_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                failed_by_job: dict = {}
+                for row in exhausted:
+                    failed_by_job[row.job_id] = failed_by_job.get(row.job_id, 0) + 1
+                for job_pk, failed in failed_by_job.items():
+                    self._advance_job(db, job_pk, 0, failed, now)
+            db.commit()
+        return len(rows)
+
+    @staticmethod
+    def _advance_job(db, job_pk: int, done: int, failed: int, now: datetime, model_key: Optional[str] = None):
+        values = dict(done_items=InferenceJob.done_items + done, failed_items=InferenceJob.failed_items + failed)
+        if model_key:
+            values["model_key"] = func.coalesce(InferenceJob.model_key, model_key)
+        # 증분 UPDATE (row lock) — 여러 워커가 동시에 갱신해도 누락 없음
+        row = db.execute(
+            update(InferenceJob).where(InferenceJob.id == job_pk).values(**values)
+            .returning(InferenceJob.total_items, InferenceJob.done_items, InferenceJob.failed_items)
+            .execution_options(synchronize_session=False)
+        ).one()
+        if row.done_items + row.failed_items >= row.total_items:
+            status = "completed" if row.failed_items == 0 else "failed" if row.done_items == 0 else "partial"
+            db.execute(
+                update(InferenceJob).where(InferenceJob.id == job_pk)
+                .values(status=status, finished_at=now)
+                .execution_options(synchronize_session=False)
+            )
+
+
+def create_local_session_factory(path: str) -> Callable:
+    """
+    SQLite 파일 DB 세션 팩토리 (로컬 / 테스트용 stand-in)
+
+    ai_spec_v2 schema를 기본 schema로 매핑하고 추론 작업 / 결과 / 고객 Spec 테이블을 생성합니다.
+    SQLite는 쓰기 트랜잭션이 직렬화되므로 SKIP LOCKED 없이도 claim이 겹치지 않습니다.
+    """
+    return create_sqlite_session_factory(path, (
+        InferenceJob, InferenceJobItem, InferenceModelRoute, InferenceResult, InferenceDetection,
+        InferenceLotSummary, InferenceLotDefectCount, CustomerSpec, DefectType, DefectCondition, MeasurementCondition, Specification, Expression,
+    ))
+
+
+# ========== 워커 ==========
+
+class InferenceWorker:
+    """queue에서 item batch를 가져와 추론하는 워커 (스레드 / 프로세스 1개당 1개)"""
+
+    def __init__(self, store: InferenceJobStore, models: Optional[ModelRegistry] = None,
+                 batch_size: int = 16, poll_interval: float = 0.2, loader: Optional[ImageLoader] = None,
+                 prefetch_items: int = 0, worker_id: Optional[str] = None, max_swap_wait: float = 10.0,
+                 judge: Optional[SpecJudge] = None):
+        """
+        Args:
+            models: 모델 레지스트리 (기본: 프로세스 싱글톤 — 같은 프로세스의 워커끼리 상주 모델 공유)
+            batch_size: 1회 claim / forward pass 최대 이미지 수
+            poll_interval: queue가 비었을 때 다음 조회까지 대기 (초)
+            loader: 이미지 로더 (기본: object storage + 디스크 캐시 싱글톤)
+            prefetch_items: claim 직후 다음 queued 이미지를 디스크 캐시에 미리 받는 수
+            max_swap_wait: 상주하지 않은 모델의 item을 뒤로 미루는 최대 시간 (초)
+            judge: 고객 Spec 판정기 (기본: 싱글톤)
+        """
+        self.store = store
+        self.models = models or model_registry
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.loader = loader or image_loader
+        self.prefetch_items = prefetch_items
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.max_swap_wait = max_swap_wait
+        self.judge = judge or spec_judge
+        self._last_reap = 0.0
+
+    def run_once(self) -> int:
+        """batch 1회 처리, 처리한 item 수 반환 (queue가 비었으면 0)"""
+        if time.monotonic() - self._last_reap > self.store.lease_seconds / 4:
+            self._last_reap = time.monotonic()
+            try:
+                self.store.requeue_expired()
+            except Exception as e:
+                print(f"Inference requeue error: {e}")
+
+        items = self.store.claim(self.worker_id, self.batch_size, self.models.resident_keys(), self.max_swap_wait)
+        if not items:
+            return 0
+        if self.prefetch_items:
+            # 이번 batch를 추론하는 동안 다음 batch 이미지 다운로드
+            try:
+                self.loader.prefetch(self.store.peek_queued(self.prefetch_items))
+            except Exception as e:
+                print(f"Inference prefetch error: {e}")
+        outcomes, model_key = self.process(items)
+        self.store.finish(self.worker_id, outcomes, model_key)
+        for outcome in outcomes:
+            metrics.INFERENCE_ITEMS.labels(outcome.status).inc()
+        return len(items)
+
+    def process(self, items: List[ClaimedItem]) -> tuple:
+        """이미지 병렬 로드 → forward pass 1회 → (outcomes, model key)"""
+        started = time.perf_counter()
+        with stage_timer("inference", "load"):
+            loaded = list(zip(items, self.loader.load_many([item.image_url for item in items])))
+
+        # 네트워크 / IO 오류는 다시 queue에 넣고, 잘못된 주소 / 디코딩 실패는 바로 실패 처리
+        # 결과에는 공통 문구만 남김 (원래 오류는 로그에만)
+        outcomes = []
+        for item, value in loaded:
+            if isinstance(value, Exception):
+                print(f"Image load error ({item.image_url}): {value}")
+                outcomes.append(ItemOutcome(item, "retry" if is_transient_error(value) else "failed",
+                                            error=describe_load_error(value)))
+        ready = [(item, image) for item, image in loaded if not isinstance(image, Exception)]
+        if not ready:
+            return outcomes, None
+
+        # claim은 모델 1개 단위지만, 직접 호출되는 경우를 위해 model_key별로 나눠 추론
+        groups: dict = {}
+        for item, image in ready:
+            groups.setdefault(item.model_key, []).append((item, image))
+        model_key = None
+        for key, group in groups.items():
+            try:
+                with self.models.use(self.models.spec_for_key(key)) as model:
+                    # 다른 워커 스레드 / 단건 요청과 같은 forward pass로 합쳐질 수 있음
+                    predictions = inference_batcher.predict(model, [image for _, image in group])
+            except Exception as e:
+                # 모델 로드 / 추론 오류는 일시적일 수 있으므로 재시도
+                print(f"Inference error: {e}")
+                outcomes.extend(ItemOutcome(item, "retry", error=str(e)) for item, _ in group)
+                continue
+
+            latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            for (item, image), detections in zip(group, predictions):
+                summary = {
+                    "count": len(detections),
+                    "imageSize": [int(image.shape[1]), int(image.shape[0])],
+                    "model": model.key,
+                    **self._judge(item, detections),
+                }
+                outcomes.append(ItemOutcome(item, "done", result=summary, detections=detections,
+                                            latency_ms=latency_ms))
+            model_key = model.key
+        return outcomes, model_key
+
+    def _judge(self, item: ClaimedItem, detections: List[dict]) -> dict:
+        """고객 Spec 판정 (실패해도 추론 결과는 저장 — 판정만 UNKNOWN)"""
+        with stage_timer("inference", "judge"):
+            try:
+                return self.judge.judge(item.customer_id, item.product_id, detections)
+            except Exception as e:
+                print(f"Spec judgment error: {e}")
+                return {"judgment": "UNKNOWN", "specId": None, "ngCount": 0, "unknownCount": len(detections)}
+
+    def run(self, stop_event: threading.Event, wake_event: Optional[threading.Event] = None):
+        """stop_event가 설정될 때까지 queue 처리"""
+        while not stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                print(f"Inference worker error: {e}")
+                processed = 0
+            if processed:
+                continue
+            # queue가 비었으면 poll_interval 대기 (같은 프로세스의 enqueue는 wake_event로 즉시 깨움)
+            if wake_event is not None:
+                wake_event.wait(self.poll_interval)
+                wake_event.clear()
+            else:
+                stop_event.wait(self.poll_interval)
+
+
+class InferenceWorkerPool:
+    """API 프로세스 안에서 실행하는 워커 스레드"""
+
+    def __init__(self, store: InferenceJobStore):
+        self.store = store
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._workers: List[InferenceWorker] = []
+
+    def start(self, count: int):
+        if self._threads or count <= 0:
+            return
+        self._stop.clear()
+        for index in range(count):
+            worker = InferenceWorker(
+                self.store,
+                batch_size=settings.INFERENCE_BATCH_SIZE,
+                poll_interval=settings.INFERENCE_POLL_INTERVAL,
+                prefetch_items=settings.INFERENCE_PREFETCH_ITEMS,
+                max_swap_wait=settings.INFERENCE_MODEL_SWAP_MAX_WAIT,
+            )
+            thread = threading.Thread(target=worker.run, args=(self._stop, self._wake),
+                                      name=f"inference-worker-{index}", daemon=True)
+            thread.start()
+            self._workers.append(worker)
+            self._threads.append(thread)
+
+    def wake(self):
+        """새 작업 등록 시 대기 중인 워커를 즉시 깨움"""
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads, self._workers = [], []
+
+    @property
+    def running(self) -> int:
+        return sum(thread.is_alive() for thread in self._threads)
+
+
+# 싱글톤 인스턴스
+inference_jobs = InferenceJobStore(
+    lease_seconds=settings.INFERENCE_LEASE_SECONDS,
+    max_attempts=settings.INFERENCE_MAX_ATTEMPTS,
+)
+inference_workers = InferenceWorkerPool(inference_jobs)
+
+
+# ========== 워커 프로세스 (CLI) ==========
+
+def _worker_process(database: Optional[str]):
+    store, models, judge = inference_jobs, model_registry, spec_judge
+    if database:
+        session_factory = create_local_session_factory(database)
+        store = InferenceJobStore(session_factory, settings.INFERENCE_LEASE_SECONDS, settings.INFERENCE_MAX_ATTEMPTS)
+        models = ModelRegistry(
+            session_factory,
+            memory_budget_bytes=settings.INFERENCE_MODEL_MEMORY_MB * 1024 * 1024,
+            max_models=settings.INFERENCE_MAX_RESIDENT_MODELS,
+            route_cache_seconds=settings.INFERENCE_ROUTE_CACHE_SECONDS,
+        )
+        judge = SpecJudge(session_factory, settings.INFERENCE_SPEC_CACHE_SECONDS)
+    worker = InferenceWorker(
+        store,
+        models,
+        batch_size=settings.INFERENCE_BATCH_SIZE,
+        poll_interval=settings.INFERENCE_POLL_INTERVAL,
+        prefetch_items=settings.INFERENCE_PREFETCH_ITEMS,
+        max_swap_wait=settings.INFERENCE_MODEL_SWAP_MAX_WAIT,
+        judge=judge,
+    )
+    print(f"Inference worker started: {worker.worker_id}")
+    stop = threading.Event()
+    try:
+        worker.run(stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        models.close()
+        image_loader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference job worker")
+    parser.add_argument("--processes", type=int, default=1, help="워커 프로세스 수")
+    parser.add_argument("--sqlite", default=None, help="Postgres 대신 사용할 SQLite 파일 (로컬 테스트)")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _worker_process(args.sqlite)
+        return
+    # 프로세스마다 모델 / CUDA context를 따로 가지도록 spawn
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_worker_process, args=(args.sqlite,), daemon=True)
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Inference Models
+추론 작업용 모델 래퍼 (배치 단위 forward pass)
+
+- yolo: ultralytics YOLO (.pt) — 이미지 리스트 1회 predict로 GPU 배치 추론
+- contour: OpenCV 임계값 + contour 기반 CPU 모델 (가중치 없는 개발 / 테스트 환경용, 명시적으로 지정한 경우만)
+- auto: INFERENCE_MODEL_BACKEND 설정을 따름 (기본 yolo)
+  가중치가 없으면 contour로 대신하지 않고 FileNotFoundError → 워커는 재시도 후 실패 처리
+  가중치 경로: {MODEL_PATH}/{name}/{version}.pt (version 없으면 {MODEL_PATH}/{name}.pt)
+
+모든 모델은 predict_batch(images) → 이미지별 detection 리스트를 반환합니다.
+detection: {"class_id", "class_name", "score", "bbox": [x1, y1, x2, y2], "polygon": [[x, y], ...] | None, "area"}
+"""
+
+import threading
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import stage_timer
+
+
+BACKENDS = ("auto", "yolo", "contour")
+
+
+class InferenceModel:
+    """추론 모델 공통 인터페이스"""
+
+    backend = "base"
+
+    def __init__(self, name: str, version: str = ""):
+        self.name = name
+        self.version = version
+
+    @property
+    def key(self) -> str:
+        """결과에 기록하는 모델 식별자 (name:version)"""
+        return f"{self.name}:{self.version}" if self.version else self.name
+
+    def load(self):
+        """가중치 로드 + warm-up"""
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[List[dict]]:
+        """BGR 이미지 리스트 → 이미지별 detection 리스트 (입력 순서 유지)"""
+        raise NotImplementedError
+
+    def memory_bytes(self) -> int:
+        """상주 메모리 추정치 (모델 LRU 예산 계산용)"""
+        return 1024 * 1024
+
+    def unload(self):
+        """LRU에서 제외될 때 호출 (GPU 메모리 해제)"""
+
+
+class YOLOInferenceModel(InferenceModel):
+    """ultralytics YOLO (detection / segmentation)"""
+
+    backend = "yolo"
+
+    def __init__(self, name: str, weights_path: str, version: str = "",
+                 imgsz: int = 640, conf: float = 0.25):
+        super().__init__(name, version)
+        self.weights_path = weights_path
+        self.imgsz = imgsz
+        self.conf = conf
+        self.device = f"cuda:{settings.GPU_DEVICE_ID}" if settings.USE_GPU else "cpu"
+        self.model = None
+        # ultralytics predictor는 thread-safe하지 않음 (micro-batching 비활성 시 여러 워커 스레드가 호출)
+        self._lock = threading.Lock()
+
+    def load(self):
+        # ultralytics / torch는 첫 모델 로드 시 import
+        from ultralytics import YOLO
+        import torch
+
+        if self.device.startswith("cuda") and not torch.cuda.is_available():
+            self.device = "cpu"
+        self.model = YOLO(self.weights_path)
+        # Warm-up (CUDA 커널 / 메모리 할당을 첫 요청 전에)
+        dummy = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        self.model.predict(dummy, imgsz=self.imgsz, device=self.device, verbose=False)
+
+    def memory_bytes(self) -> int:
+        # 파라미터 + buffer 크기 (activation / CUDA context는 제외)
+        module = getattr(self.model, "model", None)
+        if module is None:
+            return super().memory_bytes()
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def unload(self):
+        self.model = None
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[List[dict]]:
+        if not images:
+            return []
+        with self._lock, stage_timer("inference", "yolo_predict"):
+            results = self.model.predict(list(images), imgsz=self.imgsz, conf=self.conf,
+                                         device=self.device, verbose=False)
+        with stage_timer("inference", "yolo_decode"):
+            return [self._decode(r) for r in results]
+
+    @staticmethod
+    def _decode(result) -> List[dict]:
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+        xyxy = boxes.xyxy.cpu().numpy()
+        scores = boxes.conf.cpu().numpy()
+        classes = boxes.cls.cpu().numpy().astype(int)
+        polygons = result.masks.xy if getattr(result, "masks", None) is not None else None
+        names = result.names or {}
+
+        detections = []
+        for i, (box, score, class_id) in enumerate(zip(xyxy, scores, classes)):
+            polygon = polygons[i] if polygons is not None and i < len(polygons) else None
+            if polygon is not None and len(polygon) >= 3:
+                area = float(cv2.contourArea(polygon.astype(np.float32)))
+                polygon = np.round(polygon, 1).tolist()
+            else:
+                area = float((box[2] - box[0]) * (box[3] - box[1]))
+                polygon = None
+            detections.append({
+                "class_id": int(class_id),
+                "class_name": str(names.get(int(class_id), class_id)),
+                "score": round(float(score), 4),
+                "bbox": [round(float(v), 1) for v in box],
+                "polygon": polygon,
+                "area": round(area, 1),
+            })
+        return detections
+
+
+class ContourInferenceModel(InferenceModel):
+    """
+    OpenCV contour 기반 CPU 모델
+
+    배경 대비 어두운 / 밝은 영역(Otsu 임계값)을 결함 후보로 검출합니다.
+    GPU / 가중치 없이 작업 엔진 전체 경로를 돌려 보기 위한 stand-in이며 정확도 목적이 아닙니다.
+    """
+
+    backend = "contour"
+
+    def __init__(self, name: str = "contour", version: str = "cv", min_area: int = 20,
+                 max_detections: int = 100):
+        super().__init__(name, version)
+        self.min_area = min_area
+        self.max_detections = max_detections
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[List[dict]]:
+        with stage_timer("inference", "contour_predict"):
+            return [self._predict(image) for image in images]
+
+    def _predict(self, image: np.ndarray) -> List[dict]:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        if int(gray.max()) == int(gray.min()):
+            return []
+        # 배경(중앙값)보다 어두운 쪽 / 밝은 쪽 중 면적이 작은 쪽을 결함으로 간주
+        _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        if cv2.countNonZero(mask) > mask.size // 2:
+            mask = cv2.bitwise_not(mask)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        background = float(np.median(gray))
+        detections = []
+        for contour in contours:
+            area = float(cv2.contourArea(contour))
+            if area < self.min_area:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            region = gray[y:y + h, x:x + w]
+            # 배경과의 밝기 차이를 점수로 사용 (0~1)
+            score = min(1.0, abs(float(region.mean()) - background) / 128.0)
+            detections.append({
+                "class_id": 0,
+                "class_name": "defect",
+                "score": round(score, 4),
+                "bbox": [float(x), float(y), float(x + w), float(y + h)],
+                "polygon": contour.reshape(-1, 2).astype(float).tolist(),
+                "area": round(area, 1),
+            })
+        detections.sort(key=lambda d: d["area"], reverse=True)
+        return detections[:self.max_detections]
+
+
+def weights_path(name: str, version: str = "") -> Path:
+    if version:
+        return Path(settings.MODEL_PATH) / name / f"{version}.pt"
+    return Path(settings.MODEL_PATH) / f"{name}.pt"
+
+
+def create_model(name: str, backend: str = "auto", version: str = "") -> InferenceModel:
+    """
+    모델 생성 + 로드
+
+    Raises:
+        ValueError: 알 수 없는 backend
+        FileNotFoundError: yolo backend인데 가중치 파일 없음
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if backend == "auto":
+        # 설정값 auto(이전 기본값)도 yolo로 처리 — 가중치가 없다고 stand-in 모델로 바꾸지 않음
+        backend = "contour" if settings.INFERENCE_MODEL_BACKEND == "contour" else "yolo"
+    path = weights_path(name, version)
+
+    if backend == "yolo":
+        if not path.exists():
+            raise FileNotFoundError(f"Model weights not found: {path}")
+        model = YOLOInferenceModel(name, str(path), version)
+    else:
+        model = ContourInferenceModel(version=version or "cv")
+    with stage_timer("inference", "model_load"):
+        model.load()
+    return model
+
@@ -0,0 +1,247 @@
+"""
+Inference Results
+이미지별 추론 결과 / detection 저장 (ai_spec_v2.inference_results, inference_detections) + lot / bundle 조회
+
+- 워커의 InferenceJobStore.finish 트랜잭션 안에서 batch 단위로 저장
+  · 결과: multi-row INSERT ... RETURNING (insertmanyvalues) → item_id별 result id
+  · detection: 행 수가 COPY_MIN_ROWS 이상이면 Postgres COPY (pg8000 / psycopg2), 아니면 multi-row INSERT
+  · lot / bundle 누적 집계(lot_summary)도 같은 트랜잭션에서 증분 반영
+- 조회는 lot_id / bundle_id 인덱스 + keyset(id) 순서
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import insert, select
+
+from app.database.connection import SessionLocal
+from app.database.schema import InferenceDetection, InferenceResult
+from app.services.lot_summary import apply_results
+
+
+# 이보다 적으면 COPY 준비 비용이 더 큼 (multi-row INSERT 사용)
+COPY_MIN_ROWS = 500
+
+DETECTION_COLUMNS = (
+    "result_id", "lot_id", "bundle_id", "seq", "class_id", "class_name", "score",
+    "x1", "y1", "x2", "y2", "polygon", "rle", "area", "measurements",
+    "defect_type_id", "judgment", "judgment_reason",
+)
+_JSON_COLUMNS = {"polygon", "rle", "measurements"}
+
+
+def _detection_row(result_id: int, lot_id: Optional[str], bundle_id: Optional[str], seq: int,
+                   detection: dict) -> dict:
+    x1, y1, x2, y2 = (list(detection.get("bbox") or []) + [None] * 4)[:4]
+    return {
+        "result_id": result_id,
+        "lot_id": lot_id,
+        "bundle_id": bundle_id,
+        "seq": seq,
+        "class_id": detection.get("class_id"),
+        "class_name": detection.get("class_name"),
+        "score": detection.get("score"),
+        "x1": x1, "y1": y1, "x2": x2, "y2": y2,
+        "polygon": detection.get("polygon"),
+        "rle": detection.get("rle"),
+        "area": detection.get("area"),
+        "measurements": detection.get("measurements"),
+        "defect_type_id": detection.get("defect_type_id"),
+        "judgment": detection.get("judgment") or "UNKNOWN",
+        "judgment_reason": detection.get("judgment_reason"),
+    }
+
+
+def write_results(db, entries: Sequence[tuple], now: datetime) -> Dict[int, int]:
+    """
+    결과 + detection bulk 저장 (commit은 호출자)
+
+    Args:
+        entries: (ClaimedItem, 요약 dict, detection 리스트) — 요약: imageSize / model / judgment / specId / ngCount ...
+    Returns:
+        item id → result id
+    """
+    if not entries:
+        return {}
+    rows = []
+    for item, summary, detections in entries:
+        width, height = (summary.get("imageSize") or [None, None])[:2]
+        rows.append({
+            "item_id": item.id,
+            "job_id": item.job_pk,
+            "seq": item.seq,
+            "customer_id": item.customer_id,
+            "product_id": item.product_id,
+            "lot_id": item.lot_id,
+            "bundle_id": item.bundle_id,
+            "image_url": item.image_url,
+            "model_key": summary.get("model"),
+            "image_width": width,
+            "image_height": height,
+            "spec_id": summary.get("specId"),
+            "judgment": summary.get("judgment") or "UNKNOWN",
+            "defect_count": len(detections),
+            "ng_count": summary.get("ngCount", 0),
+            "unknown_count": summary.get("unknownCount", 0),
+            "created_at": now,
+        })
+    result_ids = {
+        row.item_id: row.id
+        for row in db.execute(
+            insert(InferenceResult).returning(InferenceResult.id, InferenceResult.item_id), rows
+        )
+    }
+
+    detection_rows = [
+        _detection_row(result_ids[item.id], item.lot_id, item.bundle_id, seq, detection)
+        for item, _, detections in entries
+        for seq, detection in enumerate(detections)
+    ]
+    copied = len(detection_rows) >= COPY_MIN_ROWS and _copy_rows(
+        db, InferenceDetection.__table__, DETECTION_COLUMNS, detection_rows)
+    if detection_rows and not copied:
+        db.execute(insert(InferenceDetection), detection_rows)
+    apply_results(db, entries, now)
+    return result_ids
+
+
+def _copy_rows(db, table, columns: Sequence[str], rows: List[dict]) -> bool:
+    """
+    Postgres COPY FROM STDIN (CSV)으로 저장, 지원하지 않는 드라이버면 False
+
+    같은 Session 트랜잭션의 DBAPI 연결을 사용하므로 commit / rollback이 함께 적용됨
+    """
+    connection = db.connection()
+    dialect = connection.dialect
+    if dialect.name != "postgresql" or dialect.driver not in ("pg8000", "psycopg2"):
+        return False
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            "" if row[c] is None else json.dumps(row[c], ensure_ascii=False) if c in _JSON_COLUMNS else row[c]
+            for c in columns
+        ])
+    buffer.seek(0)
+    name = f"{table.schema}.{table.name}" if table.schema else table.name
+    statement = f"COPY {name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if dialect.driver == "pg8000":
+            cursor.execute(statement, stream=io.BytesIO(buffer.getvalue().encode("utf-8")))
+        else:
+            cursor.copy_expert(statement, buffer)
+    finally:
+        cursor.close()
+    return True
+
+
+def _detection_dict(row: InferenceDetection) -> dict:
+    return {
+        "classId": row.class_id,
+        "className": row.class_name,
+        "score": row.score,
+        "bbox": [row.x1, row.y1, row.x2, row.y2],
+        "polygon": row.polygon,
+        "rle": row.rle,
+        "area": row.area,
+        "measurements": row.measurements,
+        "defectTypeId": row.defect_type_id,
+        "judgment": row.judgment,
+        "judgmentReason": row.judgment_reason,
+    }
+
+
+def _result_dict(row: InferenceResult) -> dict:
+    return {
+        "id": row.id,
+        "seq": row.seq,
+        "customerId": row.customer_id,
+        "productId": row.product_id,
+        "lotId": row.lot_id,
+        "bundleId": row.bundle_id,
+        "imageUrl": row.image_url,
+        "model": row.model_key,
+        "imageSize": [row.image_width, row.image_height],
+        "specId": row.spec_id,
+        "judgment": row.judgment,
+        "defectCount": row.defect_count,
+        "ngCount": row.ng_count,
+        "unknownCount": row.unknown_count,
+        "createdAt": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+class InferenceResultStore:
+    """저장된 추론 결과 조회"""
+
+    def __init__(self, session_factory: Callable = SessionLocal):
+        self.session_factory = session_factory
+
+    @staticmethod
+    def detections_for(db, result_ids: Iterable[int]) -> Dict[int, List[dict]]:
+        """result id → detection 리스트 (seq 순)"""
+        result_ids = list(result_ids)
+        grouped: Dict[int, List[dict]] = {result_id: [] for result_id in result_ids}
+        if not result_ids:
+            return grouped
+        rows = db.execute(
+            select(InferenceDetection)
+            .where(InferenceDetection.result_id.in_(result_ids))
+            .order_by(InferenceDetection.result_id, InferenceDetection.seq)
+        ).scalars()
+        for row in rows:
+            grouped[row.result_id].append(_detection_dict(row))
+        return grouped
+
+    def detections_by_item(self, db, item_ids: Iterable[int]) -> Dict[int, List[dict]]:
+        """job item id → detection 리스트 (GET /inference/jobs/{id}/results용)"""
+        item_ids = list(item_ids)
+        if not item_ids:
+            return {}
+        pairs = db.execute(
+            select(InferenceResult.item_id, InferenceResult.id).where(InferenceResult.item_id.in_(item_ids))
+        ).all()
+        detections = self.detections_for(db, [result_id for _, result_id in pairs])
+        return {item_id: detections[result_id] for item_id, result_id in pairs}
+
+    def query(self, lot_id: Optional[str] = None, bundle_id: Optional[str] = None,
+              judgment: Optional[str] = None, after_id: Optional[int] = None, limit: int = 100,
+              include_detections: bool = False) -> dict:
+        """
+        lot / bundle 결과 (id 순 keyset 페이지네이션)
+
+        Returns:
+            {"results": [...], "nextCursor": 다음 페이지 after_id (없으면 None)}
+        """
+        statement = select(InferenceResult)
+        if lot_id is not None:
+            statement = statement.where(InferenceResult.lot_id == lot_id)
+        if bundle_id is not None:
+            statement = statement.where(InferenceResult.bundle_id == bundle_id)
+        if judgment:
+            statement = statement.where(InferenceResult.judgment == judgment)
+        if after_id is not None:
+            statement = statement.where(InferenceResult.id > after_id)
+        with self.session_factory() as db:
+            rows = db.execute(statement.order_by(InferenceResult.id).limit(limit + 1)).scalars().all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            results = [_result_dict(row) for row in rows]
+            if include_detections:
+                detections = self.detections_for(db, [row.id for row in rows])
+                for result in results:
+                    result["detections"] = detections[result["id"]]
+        return {
+            "results": results,
+            "nextCursor": results[-1]["id"] if has_more else None,
+        }
+
+
+# 싱글톤 인스턴스
+inference_results = InferenceResultStore()
@@ -0,0 +1,265 @@
+"""
+Lot Summary
+lot / bundle별 추론 결과 누적 집계 (ai_spec_v2.inference_lot_summaries, inference_lot_defect_counts)
+
+- 워커가 결과를 저장하는 트랜잭션 안에서 batch의 증분만 UPSERT
+  (INSERT ... ON CONFLICT DO UPDATE SET images = images + excluded.images ...)
+  → 결과 커밋과 동시에 집계가 반영되며, 조회 시 detection 전체를 다시 읽지 않음
+- 여러 워커가 같은 lot을 갱신해도 row lock으로 직렬화 (키 순서로 갱신해 deadlock 방지)
+- 수동 삭제 등으로 집계가 어긋나면 rebuild_lot으로 결과 테이블에서 재계산
+- bundle id는 lot마다 다시 쓰일 수 있으므로 bundle 집계는 (lot_id, bundle_id)로 구분 (lot 없는 bundle은 집계하지 않음)
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import case, delete, distinct, func, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.database.connection import SessionLocal
+from app.database.schema import (
+    InferenceDetection, InferenceJob, InferenceLotDefectCount, InferenceLotSummary, InferenceResult
+)
+
+
+SUMMARY_COUNTERS = ("images", "ok_images", "ng_images", "unknown_images", "defects", "ng_defects")
+DEFECT_COUNTERS = ("count", "ng_count", "images")
+
+_DIALECT_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _scopes(item) -> List[tuple]:
+    """item이 반영될 집계 키 [(scope, lot_id, scope_id)]"""
+    if not item.lot_id:
+        return []
+    scopes = [("lot", item.lot_id, item.lot_id)]
+    if item.bundle_id:
+        scopes.append(("bundle", item.lot_id, item.bundle_id))
+    return scopes
+
+
+def _upsert(db, table, rows: List[dict], keys: Sequence[str], counters: Sequence[str], extra: dict):
+    if not rows:
+        return
+    dialect_insert = _DIALECT_INSERT.get(db.connection().dialect.name)
+    if dialect_insert is None:
+        raise RuntimeError(f"lot summary upsert is not supported on {db.connection().dialect.name}")
+    statement = dialect_insert(table).values(rows)
+    excluded = statement.excluded
+    set_ = {name: table.c[name] + excluded[name] for name in counters}
+    set_.update({name: value(table.c, excluded) for name, value in extra.items()})
+    db.execute(statement.on_conflict_do_update(index_elements=list(keys), set_=set_))
+
+
+def apply_results(db, entries: Sequence[tuple], now: datetime):
+    """
+    저장된 결과 batch를 lot / bundle 집계에 반영 (commit은 호출자)
+
+    Args:
+        entries: (ClaimedItem, 요약 dict, detection 리스트) — inference_results.write_results와 동일
+    """
+    summaries: Dict[tuple, dict] = {}
+    defects: Dict[tuple, dict] = {}
+    for item, summary, detections in entries:
+        judgment = summary.get("judgment") or "UNKNOWN"
+        by_class: Dict[str, list] = defaultdict(list)
+        for detection in detections:
+            by_class[detection.get("class_name") or "unknown"].append(detection)
+
+        for scope, lot_id, scope_id in _scopes(item):
+            row = summaries.setdefault((scope, lot_id, scope_id), {
+                "scope": scope, "scope_id": scope_id,
+                "lot_id": lot_id, "customer_id": item.customer_id, "product_id": item.product_id,
+                **{name: 0 for name in SUMMARY_COUNTERS},
+                "first_result_at": now, "last_result_at": now,
+            })
+            row["images"] += 1
+            row["ok_images"] += judgment == "OK"
+            row["ng_images"] += judgment == "NG"
+            row["unknown_images"] += judgment not in ("OK", "NG")
+            row["defects"] += len(detections)
+            row["ng_defects"] += summary.get("ngCount", 0)
+
+            for class_name, group in by_class.items():
+                counts = defects.setdefault((scope, lot_id, scope_id, class_name), {
+                    "scope": scope, "lot_id": lot_id, "scope_id": scope_id, "class_name": class_name,
+                    **{name: 0 for name in DEFECT_COUNTERS}, "max_score": None,
+                })
+                counts["count"] += len(group)
+                counts["ng_count"] += sum(d.get("judgment") == "NG" for d in group)
+                counts["images"] += 1
+                scores = [d["score"] for d in group if d.get("score") is not None]
+                if scores:
+                    counts["max_score"] = max(scores + ([counts["max_score"]] if counts["max_score"] is not None else []))
+
+    summary_table = InferenceLotSummary.__table__
+    defect_table = InferenceLotDefectCount.__table__
+    _upsert(db, summary_table, [summaries[key] for key in sorted(summaries)], ("scope", "lot_id", "scope_id"),
+            SUMMARY_COUNTERS, {
+                "last_result_at": lambda c, excluded: excluded.last_result_at,
+                "first_result_at": lambda c, excluded: func.coalesce(c.first_result_at, excluded.first_result_at),
+            })
+    _upsert(db, defect_table, [defects[key] for key in sorted(defects)], ("scope", "lot_id", "scope_id", "class_name"),
+            DEFECT_COUNTERS, {
+                "max_score": lambda c, excluded: case(
+                    (c.max_score.is_(None) | (excluded.max_score > c.max_score), excluded.max_score),
+                    else_=c.max_score,
+                ),
+            })
+
+
+def _summary_dict(row: InferenceLotSummary) -> dict:
+    return {
+        "scope": row.scope,
+        "id": row.scope_id,
+        "lotId": row.lot_id,
+        "customerId": row.customer_id,
+        "productId": row.product_id,
+        "images": row.images,
+        "okImages": row.ok_images,
+        "ngImages": row.ng_images,
+        "unknownImages": row.unknown_images,
+        "ngRate": round(row.ng_images / row.images, 4) if row.images else None,
+        "defects": row.defects,
+        "ngDefects": row.ng_defects,
+        "firstResultAt": row.first_result_at.isoformat() if row.first_result_at else None,
+        "lastResultAt": row.last_result_at.isoformat() if row.last_result_at else None,
+    }
+
+
+class LotSummaryService:
+    """lot / bundle 집계 조회 / 재계산"""
+
+    def __init__(self, session_factory: Callable = SessionLocal):
+        self.session_factory = session_factory
+
+    def get_summary(self, scope: str, scope_id: str, top: int = 5, lot_id: Optional[str] = None) -> Optional[dict]:
+        """
+        집계 + 불량 유형별 건수 + 작업 진행률, 결과 / 작업이 모두 없으면 None
+
+        lot_id: bundle이 속한 lot (scope가 bundle이면 필수, lot이면 scope_id)
+        complete: 해당 lot / bundle의 추론 작업이 모두 끝났는지 (queued / running 없음)
+        """
+        if scope == "lot":
+            lot_id = scope_id
+            job_filter = [InferenceJob.lot_id == lot_id]
+        else:
+            if not lot_id:
+                raise ValueError("bundle 집계 조회에는 lot_id가 필요합니다")
+            job_filter = [InferenceJob.lot_id == lot_id, InferenceJob.bundle_id == scope_id]
+        with self.session_factory() as db:
+            row = db.execute(
+                select(InferenceLotSummary)
+                .where(InferenceLotSummary.scope == scope, InferenceLotSummary.lot_id == lot_id,
+                       InferenceLotSummary.scope_id == scope_id)
+            ).scalar_one_or_none()
+            defect_rows = db.execute(
+                select(InferenceLotDefectCount)
+                .where(InferenceLotDefectCount.scope == scope, InferenceLotDefectCount.lot_id == lot_id,
+                       InferenceLotDefectCount.scope_id == scope_id)
+                .order_by(InferenceLotDefectCount.count.desc(), InferenceLotDefectCount.class_name)
+            ).scalars().all()
+            jobs = db.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.sum(InferenceJob.total_items), 0),
+                    func.coalesce(func.sum(InferenceJob.failed_items), 0),
+                    func.coalesce(func.sum(case((InferenceJob.status.in_(("queued", "running")), 1), else_=0)), 0),
+                ).where(*job_filter)
+            ).one()
+        job_count, total_images, failed_images, active_jobs = (int(value) for value in jobs)
+        if row is None and job_count == 0:
+            return None
+
+        summary = _summary_dict(row) if row is not None else {
+            "scope": scope, "id": scope_id, "lotId": lot_id,
+            "customerId": None, "productId": None,
+            "images": 0, "okImages": 0, "ngImages": 0, "unknownImages": 0, "ngRate": None,
+            "defects": 0, "ngDefects": 0, "firstResultAt": None, "lastResultAt": None,
+        }
+        by_type = [
+            {"className": d.class_name, "count": d.count, "ngCount": d.ng_count,
+             "images": d.images, "maxScore": d.max_score}
+            for d in defect_rows
+        ]
+        return {
+            **summary,
+            "defectsByType": by_type,
+            "topDefects": sorted(by_type, key=lambda d: (-d["ngCount"], -d["count"], d["className"]))[:top],
+            "progress": {
+                "jobs": job_count,
+                "activeJobs": active_jobs,
+                "totalImages": total_images,
+                "failedImages": failed_images,
+                "complete": job_count > 0 and active_jobs == 0,
+            },
+        }
+
+    def list_bundles(self, lot_id: str) -> List[dict]:
+        """lot 안의 bundle별 집계"""
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(InferenceLotSummary)
+                .where(InferenceLotSummary.lot_id == lot_id, InferenceLotSummary.scope == "bundle")
+                .order_by(InferenceLotSummary.scope_id)
+            ).scalars().all()
+            return [_summary_dict(row) for row in rows]
+
+    def rebuild_lot(self, lot_id: str) -> Optional[dict]:
+        """
+        lot + lot 안의 bundle 집계를 결과 테이블에서 재계산
+
+        처리 중인 lot에 실행하면 동시에 저장된 batch가 빠질 수 있으므로 lot 완료 후 실행
+        """
+        results = InferenceResult.__table__.c
+        detections = InferenceDetection.__table__.c
+
+        def judgment_sum(value):
+            return func.sum(case((results.judgment == value, 1), else_=0))
+
+        with self.session_factory() as db:
+            # lot 행과 이 lot의 bundle 행만 (다른 lot의 같은 bundle id는 그대로)
+            db.execute(delete(InferenceLotSummary).where(InferenceLotSummary.lot_id == lot_id))
+            db.execute(delete(InferenceLotDefectCount).where(InferenceLotDefectCount.lot_id == lot_id))
+
+            summary_rows, defect_rows = [], []
+            for scope, key in (("lot", results.lot_id), ("bundle", results.bundle_id)):
+                detection_key = detections.lot_id if scope == "lot" else detections.bundle_id
+                for row in db.execute(
+                    select(
+                        key.label("scope_id"), func.max(results.customer_id), func.max(results.product_id),
+                        func.count(), judgment_sum("OK"), judgment_sum("NG"),
+                        func.sum(case((results.judgment.in_(("OK", "NG")), 0), else_=1)),
+                        func.sum(results.defect_count), func.sum(results.ng_count),
+                        func.min(results.created_at), func.max(results.created_at),
+                    ).where(results.lot_id == lot_id, key.is_not(None)).group_by(key)
+                ).all():
+                    summary_rows.append(dict(zip(
+                        ("scope_id", "customer_id", "product_id") + SUMMARY_COUNTERS
+                        + ("first_result_at", "last_result_at"), row
+                    ), scope=scope, lot_id=lot_id))
+                # GROUP BY와 SELECT의 식이 같아야 하므로 bind parameter 대신 리터럴
+                class_name = func.coalesce(detections.class_name, literal_column("'unknown'"))
+                for row in db.execute(
+                    select(
+                        detection_key, class_name, func.count(),
+                        func.sum(case((detections.judgment == "NG", 1), else_=0)),
+                        func.count(distinct(detections.result_id)), func.max(detections.score),
+                    ).where(detections.lot_id == lot_id, detection_key.is_not(None))
+                    .group_by(detection_key, class_name)
+                ).all():
+                    defect_rows.append(dict(zip(
+                        ("scope_id", "class_name") + DEFECT_COUNTERS + ("max_score",), row
+                    ), scope=scope, lot_id=lot_id))
+            if summary_rows:
+                db.execute(InferenceLotSummary.__table__.insert(), summary_rows)
+            if defect_rows:
+                db.execute(InferenceLotDefectCount.__table__.insert(), defect_rows)
+            db.commit()
+        print(f"Lot summary rebuilt: {lot_id} ({len(summary_rows)} summaries, {len(defect_rows)} defect types)")
+        return self.get_summary("lot", lot_id)
+
+
+# 싱글톤 인스턴스
+lot_summaries = LotSummaryService()
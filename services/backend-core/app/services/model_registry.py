@@ -0,0 +1,309 @@
+"""
+Model Registry
+(고객, 제품) → 모델 버전 라우팅 + 상주 모델 LRU
+
+- 라우팅: ai_spec_v2.inference_model_routes
+  (고객, 제품) → (고객, *) → (*, 제품) → (*, *) → DEFAULT_MODEL_NAME 순서로 매칭
+  라우트 테이블은 작으므로 전체를 메모리에 두고 INFERENCE_ROUTE_CACHE_SECONDS마다 다시 읽음
+- 상주 모델: 모델 key(name:version)별 1개 인스턴스, 메모리 합계(INFERENCE_MODEL_MEMORY_MB) /
+  개수(INFERENCE_MAX_RESIDENT_MODELS) 초과 시 가장 오래 사용하지 않은 모델부터 언로드
+  pinned 모델과 추론 중인 모델은 언로드하지 않음
+- 같은 모델 동시 로드 요청은 1회만 로드 (모델별 lock)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core import metrics
+from app.core.config import settings
+from app.database.connection import SessionLocal
+from app.database.schema import InferenceModelRoute
+from app.services import inference_batcher
+from app.services.inference_model import InferenceModel, create_model
+
+
+WILDCARD = "*"
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """라우팅 결과 (로드할 모델)"""
+    name: str
+    version: str = ""
+    backend: str = "auto"
+    pinned: bool = False
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}:{self.version}" if self.version else self.name
+
+
+@dataclass
+class _Resident:
+    model: InferenceModel
+    memory_bytes: int
+    pinned: bool
+    in_use: int = 0
+    loaded_at: float = 0.0
+    last_used: float = 0.0
+    uses: int = 0
+
+
+class ModelRegistry:
+    """모델 라우팅 + 상주 모델 관리 (프로세스당 1개)"""
+
+    def __init__(self, session_factory: Callable = SessionLocal,
+                 factory: Optional[Callable[[ModelSpec], InferenceModel]] = None,
+                 memory_budget_bytes: int = 4096 * 1024 * 1024, max_models: int = 4,
+                 route_cache_seconds: float = 30.0):
+        """
+        Args:
+            factory: ModelSpec → 로드된 모델 (기본: inference_model.create_model)
+            memory_budget_bytes: 상주 모델 메모리 합계 상한
+            max_models: 상주 모델 수 상한
+            route_cache_seconds: 라우트 테이블 재조회 주기
+        """
+        self.session_factory = session_factory
+        self.factory = factory or (lambda spec: create_model(spec.name, spec.backend, spec.version))
+        self.memory_budget_bytes = memory_budget_bytes
+        self.max_models = max(1, max_models)
+        self.route_cache_seconds = route_cache_seconds
+        self._routes: Dict[Tuple[str, str], ModelSpec] = {}
+        self._specs: Dict[str, ModelSpec] = {}
+        self._routes_loaded_at: Optional[float] = None
+        self._resident: "OrderedDict[str, _Resident]" = OrderedDict()
+        self._pinned: set = set()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    # ========== 라우팅 ==========
+
+    @staticmethod
+    def default_spec() -> ModelSpec:
+        return ModelSpec(settings.DEFAULT_MODEL_NAME, "", settings.INFERENCE_MODEL_BACKEND)
+
+    def _refresh_routes(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._routes_loaded_at is not None \
+                and now - self._routes_loaded_at < self.route_cache_seconds:
+            return
+        try:
+            with self.session_factory() as db:
+                rows = db.execute(
+                    select(InferenceModelRoute).where(InferenceModelRoute.enabled.is_(True))
+                ).scalars().all()
+        except Exception as e:
+            # DB 오류 시 이전 라우트 유지 (다음 요청에서 재시도)
+            print(f"Model route refresh error: {e}")
+            return
+        routes = {
+            (row.customer_id, row.product_id): ModelSpec(row.model_name, row.model_version or "",
+                                                         row.backend or "auto", bool(row.pinned))
+            for row in rows
+        }
+        with self._lock:
+            self._routes = routes
+            self._specs = {spec.key: spec for spec in routes.values()}
+            self._routes_loaded_at = now
+
+    def invalidate_routes(self):
+        """라우트 변경 시 즉시 재조회 (다른 프로세스는 route_cache_seconds 내 반영)"""
+        self._routes_loaded_at = None
+
+    def resolve(self, customer_id: Optional[str], product_id: Optional[str]) -> ModelSpec:
+        """(고객, 제품) → 모델"""
+        self._refresh_routes()
+        customer_id, product_id = customer_id or WILDCARD, product_id or WILDCARD
+        with self._lock:
+            for key in ((customer_id, product_id), (customer_id, WILDCARD),
+                        (WILDCARD, product_id), (WILDCARD, WILDCARD)):
+                spec = self._routes.get(key)
+                if spec is not None:
+                    return spec
+        return self.default_spec()
+
+    def spec_for_key(self, model_key: Optional[str]) -> ModelSpec:
+        """queue item의 model_key → ModelSpec (라우트가 삭제됐으면 key를 그대로 해석)"""
+        if not model_key:
+            return self.default_spec()
+        self._refresh_routes()
+        with self._lock:
+            spec = self._specs.get(model_key)
+        if spec is not None:
+            return spec
+        name, _, version = model_key.partition(":")
+        if name == settings.DEFAULT_MODEL_NAME and not version:
+            return self.default_spec()
+        return ModelSpec(name, version, settings.INFERENCE_MODEL_BACKEND)
+
+    # ========== 상주 모델 ==========
+
+    def _is_pinned(self, key: str, spec: Optional[ModelSpec] = None) -> bool:
+        return key in self._pinned or key in settings.INFERENCE_PINNED_MODELS or bool(spec and spec.pinned)
+
+    def get(self, spec: ModelSpec) -> InferenceModel:
+        """상주 모델 반환 (없으면 로드 후 LRU 정리) — 추론 중 언로드를 막으려면 use() 사용"""
+        with self.use(spec) as model:
+            return model
+
+    @contextmanager
+    def use(self, spec: ModelSpec):
+        """추론하는 동안 언로드되지 않도록 모델 사용 표시"""
+        model = self.acquire(spec)
+        try:
+            yield model
+        finally:
+            self.release(spec)
+
+    def acquire(self, spec: ModelSpec) -> InferenceModel:
+        """모델 사용 시작 (release 전까지 언로드되지 않음) — async 핸들러처럼 with를 쓰기 어려운 곳용"""
+        return self._acquire(spec).model
+
+    def release(self, spec: ModelSpec):
+        with self._lock:
+            resident = self._resident.get(spec.key)
+            if resident is not None:
+                resident.in_use = max(0, resident.in_use - 1)
+            victims = self._evict()
+        self._unload_all(victims)
+
+    def _acquire(self, spec: ModelSpec) -> _Resident:
+        key = spec.key
+        with self._lock:
+            resident = self._resident.get(key)
+            if resident is not None:
+                return self._mark_used(key, resident, "hit")
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                resident = self._resident.get(key)
+                if resident is not None:
+                    return self._mark_used(key, resident, "hit")
+            model = self.factory(spec)
+            try:
+                memory = max(0, int(model.memory_bytes()))
+            except Exception:
+                memory = 0
+            with self._lock:
+                resident = _Resident(model, memory, self._is_pinned(key, spec), loaded_at=time.time())
+                self._resident[key] = resident
+                self._mark_used(key, resident, "load")
+                victims = self._evict()
+            self._unload_all(victims)
+            return resident
+
+    def _mark_used(self, key: str, resident: _Resident, event: str) -> _Resident:
+        # self._lock 안에서 호출
+        resident.in_use += 1
+        resident.uses += 1
+        resident.last_used = time.time()
+        self._resident.move_to_end(key)
+        metrics.INFERENCE_MODEL_EVENTS.labels(event).inc()
+        return resident
+
+    def _evict(self) -> list:
+        """
+        예산 초과 시 LRU 순으로 상주 목록에서 제외 (self._lock 안에서 호출)
+
+        실제 언로드(batcher 종료 / GPU 메모리 해제)는 lock 밖에서 _unload_all로 수행
+        """
+        def over_budget():
+            total = sum(r.memory_bytes for r in self._resident.values())
+            return len(self._resident) > self.max_models or total > self.memory_budget_bytes
+
+        victims = []
+        for key in list(self._resident):
+            if not over_budget():
+                break
+            resident = self._resident[key]
+            if resident.pinned or resident.in_use > 0:
+                continue
+            del self._resident[key]
+            victims.append((key, resident))
+        return victims
+
+    def _unload_all(self, victims: list):
+        for key, resident in victims:
+            self._unload(key, resident)
+
+    @staticmethod
+    def _unload(key: str, resident: _Resident):
+        inference_batcher.release_batcher(resident.model)
+        try:
+            resident.model.unload()
+        except Exception as e:
+            print(f"Model unload error ({key}): {e}")
+        metrics.INFERENCE_MODEL_EVENTS.labels("evict").inc()
+
+    def resident_keys(self) -> List[str]:
+        with self._lock:
+            return list(self._resident)
+
+    def set_pinned(self, model_key: str, pinned: bool) -> bool:
+        """상주 모델 고정 / 해제 (상주 중이 아니어도 이후 로드 시 적용), 상주 여부 반환"""
+        with self._lock:
+            if pinned:
+                self._pinned.add(model_key)
+            else:
+                self._pinned.discard(model_key)
+            resident = self._resident.get(model_key)
+            if resident is not None:
+                spec = self._specs.get(model_key)
+                resident.pinned = self._is_pinned(model_key, spec)
+            victims = self._evict()
+        self._unload_all(victims)
+        return resident is not None
+
+    def unload(self, model_key: str) -> bool:
+        """상주 모델 즉시 언로드 (추론 중이면 False)"""
+        with self._lock:
+            resident = self._resident.get(model_key)
+            if resident is None or resident.in_use > 0:
+                return False
+            del self._resident[model_key]
+        self._unload(model_key, resident)
+        return True
+
+    def close(self):
+        with self._lock:
+            residents = list(self._resident.items())
+            self._resident.clear()
+        self._unload_all(residents)
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = [
+                {
+                    "key": key,
+                    "model": r.model.key,
+                    "backend": r.model.backend,
+                    "memoryBytes": r.memory_bytes,
+                    "pinned": r.pinned,
+                    "inUse": r.in_use,
+                    "uses": r.uses,
+                    "loadedAt": r.loaded_at,
+                    "lastUsed": r.last_used,
+                }
+                for key, r in self._resident.items()
+            ]
+        return {
+            "memoryBudgetBytes": self.memory_budget_bytes,
+            "maxModels": self.max_models,
+            "memoryBytes": sum(m["memoryBytes"] for m in models),
+            "models": models,
+        }
+
+
+# 싱글톤 인스턴스
+model_registry = ModelRegistry(
+    memory_budget_bytes=settings.INFERENCE_MODEL_MEMORY_MB * 1024 * 1024,
+    max_models=settings.INFERENCE_MAX_RESIDENT_MODELS,
+    route_cache_seconds=settings.INFERENCE_ROUTE_CACHE_SECONDS,
+)
@@ -0,0 +1,172 @@
+"""
+Rate Limiter / Retry
+외부 API(OpenAI 등) 호출용 동시성 + RPM/TPM 제한 및 재시도
+
+- RateLimiter: 최근 60초 sliding window 기준 요청 수 / 토큰 수 예산 + 동시 실행 수 제한
+- retry_async: 지수 backoff + full jitter 재시도 (Retry-After 헤더 우선)
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+WINDOW_SECONDS = 60.0
+
+
+class RateLimiter:
+    """
+    동시 실행 수 + 분당 요청 수(RPM) + 분당 토큰 수(TPM) 제한
+
+    사용 예:
+        async with limiter.slot(estimated_tokens=3000) as reservation:
+            response = await client.chat.completions.create(...)
+            reservation.settle(response.usage.total_tokens)
+    """
+
+    def __init__(self, max_concurrency: int = 4, rpm: int = 0, tpm: int = 0):
+        """
+        Args:
+            max_concurrency: 동시 실행 최대 수
+            rpm: 분당 요청 수 (0이면 제한 없음)
+            tpm: 분당 토큰 수 (0이면 제한 없음)
+        """
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # (timestamp, tokens) — 예약된 요청 기록
+        self._window: deque = deque()
+
+    def _ensure_primitives(self):
+        # asyncio primitive는 이벤트 루프 안에서 생성
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._lock = asyncio.Lock()
+
+    def _prune(self, now: float):
+        while self._window and now - self._window[0][0] >= WINDOW_SECONDS:
+            self._window.popleft()
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """예산이 확보될 때까지 기다려야 하는 시간 (0이면 즉시 가능)"""
+        wait = 0.0
+        if self.rpm and len(self._window) >= self.rpm:
+            # 가장 오래된 요청이 window에서 빠질 때까지
+            wait = max(wait, self._window[len(self._window) - self.rpm][0] + WINDOW_SECONDS - now)
+        if self.tpm:
+            # 단일 요청이 TPM보다 크면 window가 빌 때까지만 기다림
+            tokens = min(tokens, self.tpm)
+            used = sum(t for _, t in self._window)
+            if used + tokens > self.tpm:
+                freed = 0
+                for ts, t in self._window:
+                    freed += t
+                    if used - freed + tokens <= self.tpm:
+                        wait = max(wait, ts + WINDOW_SECONDS - now)
+                        break
+        return wait
+
+    async def _reserve(self, tokens: int) -> list:
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                self._prune(now)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    entry = [now, tokens]
+                    self._window.append(entry)
+                    return entry
+            await asyncio.sleep(min(wait, WINDOW_SECONDS))
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int = 0):
+        """동시성 slot + RPM/TPM 예산 확보"""
+        self._ensure_primitives()
+        async with self._semaphore:
+            entry = await self._reserve(estimated_tokens)
+            yield _Reservation(entry)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        self._prune(now)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rpm_limit": self.rpm,
+            "tpm_limit": self.tpm,
+            "requests_last_minute": len(self._window),
+            "tokens_last_minute": sum(t for _, t in self._window),
+        }
+
+
+class _Reservation:
+    """예약 토큰을 실제 사용량으로 보정"""
+
+    def __init__(self, entry: list):
+        self._entry = entry
+
+    def settle(self, actual_tokens: int):
+        self._entry[1] = actual_tokens
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """HTTP 응답의 Retry-After / retry-after-ms 헤더 값 (없으면 None)"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """429 / 5xx / 타임아웃 / 연결 오류만 재시도"""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    name = type(exc).__name__
+    return name in ("APITimeoutError", "APIConnectionError", "TimeoutException", "ConnectError") \
+        or isinstance(exc, (asyncio.TimeoutError, ConnectionError))
+
+
+async def retry_async(
+    fn: Callable[[], Awaitable[T]],
+    max_retries: int = 4,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    on_retry: Optional[Callable[[int, Exception, float], None]] = None,
+) -> T:
+    """
+    지수 backoff + full jitter 재시도
+
+    delay = uniform(0, min(max_delay, base_delay * 2^attempt)),
+    서버가 Retry-After를 주면 그 값 이상 대기 (max_delay와 무관, 최대 60초)
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            server_delay = retry_after_seconds(e)
+            if server_delay is not None:
+                # 서버가 지정한 시간 전에 재시도하면 다시 429가 나므로 그대로 따름 (최대 1 window)
+                delay = max(delay, min(server_delay, WINDOW_SECONDS))
+            if on_retry:
+                on_retry(attempt + 1, e, delay)
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -0,0 +1,301 @@
+"""
+RCA Result Cache
+동일 / 근접 중복 이미지 재분석 방지용 결과 캐시 (ai_spec_v2.rca_result_cache)
+
+- 정확 일치: sha256(이미지 bytes) + additional_context + model + prompt version (+ 전처리 옵션)
+- 근접 중복 (선택): 같은 context / model / prompt version 안에서 64bit perceptual hash
+  Hamming 거리 RCA_CACHE_PHASH_DISTANCE 이하 (재인코딩 / 리사이즈된 같은 이미지)
+  pHash를 16bit 밴드 4개로 나눠 인덱싱 → 거리 3 이하면 적어도 한 밴드는 정확히 일치하므로
+  밴드 일치 후보만 조회합니다.
+"""
+
+import hashlib
+import io
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import delete, func, or_, select, update
+
+from app.core import metrics
+from app.core.config import settings
+from app.database.connection import SessionLocal
+from app.database.schema import RCAResultCache
+
+
+PHASH_BANDS = 4
+# 밴드 인덱스로 후보를 빠짐없이 찾을 수 있는 최대 거리 (PHASH_BANDS - 1)
+MAX_PHASH_DISTANCE = PHASH_BANDS - 1
+
+_DCT_SIZE = 32
+_HASH_SIZE = 8
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """DCT-II 정규직교 행렬"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(_DCT_SIZE)
+
+
+def perceptual_hash(image_data: bytes) -> Optional[int]:
+    """
+    64bit DCT perceptual hash (unsigned)
+
+    grayscale 32x32 축소 → 2D DCT → 저주파 8x8 (DC 제외 중앙값 기준) 비트화
+    디코딩 실패 시 None
+    """
+    try:
+        with Image.open(io.BytesIO(image_data)) as image:
+            # JPEG는 디코딩 단계에서 축소 (대형 이미지도 수 ms)
+            image.draft("L", (_DCT_SIZE * 2, _DCT_SIZE * 2))
+            pixels = np.asarray(
+                image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.Resampling.LANCZOS),
+                dtype=np.float64,
+            )
+    except Exception:
+        return None
+    low = (_DCT @ pixels @ _DCT.T)[:_HASH_SIZE, :_HASH_SIZE].flatten()
+    bits = low > np.median(low[1:])
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+
+def _to_signed(value: int) -> int:
+    # Postgres BIGINT는 signed
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _bands(value: int) -> list:
+    return [(value >> (16 * i)) & 0xFFFF for i in range(PHASH_BANDS)]
+
+
+def _sha256(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheKey:
+    """이미지 1장 + 분석 조건에 대한 캐시 키"""
+    cache_key: str
+    content_hash: str
+    scope_hash: str
+    model: str
+    prompt_version: str
+    image_data: bytes = field(repr=False)
+    _phash: Optional[int] = field(default=None, repr=False)
+    _phash_done: bool = field(default=False, repr=False)
+
+    @property
+    def phash(self) -> Optional[int]:
+        """perceptual hash (필요할 때 한 번만 계산)"""
+        if not self._phash_done:
+            self._phash = perceptual_hash(self.image_data)
+            self._phash_done = True
+        return self._phash
+
+
+@dataclass
+class CacheHit:
+    analysis_id: str
+    analysis: dict
+    usage: dict
+    cached_at: Optional[datetime]
+    match: str  # exact / near / inflight
+    distance: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "match": self.match,
+            "distance": self.distance,
+            "source_id": self.analysis_id,
+            "cached_at": self.cached_at.isoformat() if self.cached_at else None,
+            "original_usage": self.usage,
+        }
+
+
+class RCAResultCacheStore:
+    """RCA 결과 캐시 (DB 저장, 동기 — threadpool에서 호출)"""
+
+    def __init__(self, enabled: bool = True, ttl_hours: float = 168,
+                 near_duplicate: bool = False, phash_distance: int = MAX_PHASH_DISTANCE):
+        """
+        Args:
+            enabled: 캐시 사용 여부
+            ttl_hours: 캐시 유효 시간 (0이면 만료 없음)
+            near_duplicate: perceptual hash 근접 중복 매칭 사용 여부
+            phash_distance: 근접 중복 허용 Hamming 거리 (최대 MAX_PHASH_DISTANCE)
+        """
+        self.enabled = enabled
+        self.ttl_hours = ttl_hours
+        self.near_duplicate = near_duplicate
+        self.phash_distance = max(0, min(phash_distance, MAX_PHASH_DISTANCE))
+        self._lock = threading.Lock()
+        self._counters = {"exact_hits": 0, "near_hits": 0, "inflight_hits": 0, "misses": 0,
+                          "stored": 0, "tokens_saved": 0}
+
+    def make_key(self, image_data: bytes, additional_context: str, model: str, prompt_version: str,
+                 variant: str = "") -> CacheKey:
+        """
+        Args:
+            variant: 모델 입력을 바꾸는 기타 조건 (전처리 옵션 등) — 다르면 별도 캐시
+        """
+        content_hash = hashlib.sha256(image_data).hexdigest()
+        scope_hash = _sha256((additional_context or "").strip(), model, prompt_version, variant)
+        return CacheKey(
+            cache_key=_sha256(content_hash, scope_hash),
+            content_hash=content_hash,
+            scope_hash=scope_hash,
+            model=model,
+            prompt_version=prompt_version,
+            image_data=image_data,
+        )
+
+    def _count(self, name: str, tokens: int = 0):
+        with self._lock:
+            self._counters[name] += 1
+            self._counters["tokens_saved"] += tokens
+
+    def record_hit(self, hit: CacheHit):
+        """조회 결과 집계 (in-flight 공유 포함)"""
+        self._count(f"{hit.match}_hits", (hit.usage or {}).get("total_tokens", 0) or 0)
+        metrics.RCA_CACHE_LOOKUPS.labels(hit.match).inc()
+
+    def lookup(self, key: CacheKey) -> Optional[CacheHit]:
+        """정확 일치 → (설정 시) 근접 중복 순으로 조회, 없으면 None"""
+        now = datetime.now()
+        not_expired = or_(RCAResultCache.expires_at.is_(None), RCAResultCache.expires_at > now)
+        try:
+            with SessionLocal() as db:
+                row = db.execute(
+                    select(RCAResultCache).where(RCAResultCache.cache_key == key.cache_key, not_expired)
+                ).scalar_one_or_none()
+                match, distance = "exact", 0
+
+                if row is None and self.near_duplicate and key.phash is not None:
+                    bands = _bands(key.phash)
+                    candidates = db.execute(
+                        select(RCAResultCache).where(
+                            RCAResultCache.scope_hash == key.scope_hash,
+                            not_expired,
+                            or_(*(getattr(RCAResultCache, f"phash_b{i}") == band for i, band in enumerate(bands))),
+                        )
+                    ).scalars().all()
+                    best = None
+                    for candidate in candidates:
+                        d = hamming_distance(candidate.phash, key.phash)
+                        if d <= self.phash_distance and (best is None or d < best[0]):
+                            best = (d, candidate)
+                    if best is not None:
+                        distance, row = best
+                        match = "near"
+
+                if row is None:
+                    self._count("misses")
+                    metrics.RCA_CACHE_LOOKUPS.labels("miss").inc()
+                    return None
+
+                hit = CacheHit(row.analysis_id, row.analysis or {}, row.usage or {}, row.created_at, match, distance)
+                db.execute(
+                    update(RCAResultCache)
+                    .where(RCAResultCache.id == row.id)
+                    .values(hit_count=RCAResultCache.hit_count + 1, last_hit_at=now)
+                )
+                db.commit()
+        except Exception as e:
+            print(f"RCA cache lookup error: {e}")
+            return None
+        self.record_hit(hit)
+        return hit
+
+    def store(self, key: CacheKey, analysis_id: str, analysis: dict, usage: dict) -> bool:
+        """분석 결과 저장 (같은 키가 있으면 덮어씀 — 만료된 항목 갱신)"""
+        now = datetime.now()
+        phash = key.phash
+        values = dict(
+            content_hash=key.content_hash,
+            scope_hash=key.scope_hash,
+            model=key.model,
+            prompt_version=key.prompt_version,
+            phash=_to_signed(phash) if phash is not None else None,
+            **({f"phash_b{i}": band for i, band in enumerate(_bands(phash))} if phash is not None else {}),
+            analysis_id=analysis_id,
+            analysis=analysis,
+            usage=usage,
+            hit_count=0,
+            created_at=now,
+            expires_at=now + timedelta(hours=self.ttl_hours) if self.ttl_hours > 0 else None,
+            last_hit_at=None,
+        )
+        try:
+            with SessionLocal() as db:
+                row = db.execute(
+                    select(RCAResultCache).where(RCAResultCache.cache_key == key.cache_key)
+                ).scalar_one_or_none()
+                if row is None:
+                    db.add(RCAResultCache(cache_key=key.cache_key, **values))
+                else:
+                    for name, value in values.items():
+                        setattr(row, name, value)
+                db.commit()
+        except Exception as e:
+            # 동시 저장으로 인한 unique 충돌 등 — 캐시 저장 실패는 분석 결과에 영향 없음
+            print(f"RCA cache store error: {e}")
+            return False
+        self._count("stored")
+        return True
+
+    def purge(self, expired_only: bool = True) -> int:
+        """만료된 (또는 전체) 캐시 항목 삭제, 삭제 건수 반환"""
+        statement = delete(RCAResultCache)
+        if expired_only:
+            statement = statement.where(RCAResultCache.expires_at.is_not(None),
+                                        RCAResultCache.expires_at <= datetime.now())
+        with SessionLocal() as db:
+            deleted = db.execute(statement).rowcount
+            db.commit()
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["exact_hits"] + counters["near_hits"] + counters["inflight_hits"] + counters["misses"]
+        hits = lookups - counters["misses"]
+        result = {
+            "enabled": self.enabled,
+            "ttl_hours": self.ttl_hours,
+            "near_duplicate": self.near_duplicate,
+            "phash_distance": self.phash_distance,
+            **counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
+        try:
+            with SessionLocal() as db:
+                result["entries"] = db.execute(select(func.count(RCAResultCache.id))).scalar_one()
+        except Exception as e:
+            print(f"RCA cache stats error: {e}")
+            result["entries"] = None
+        return result
+
+
+# 싱글톤 인스턴스
+rca_result_cache = RCAResultCacheStore(
+    enabled=settings.RCA_CACHE_ENABLED,
+    ttl_hours=settings.RCA_CACHE_TTL_HOURS,
+    near_duplicate=settings.RCA_CACHE_NEAR_DUPLICATE,
+    phash_distance=settings.RCA_CACHE_PHASH_DISTANCE,
+)
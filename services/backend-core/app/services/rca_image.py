@@ -0,0 +1,230 @@
+"""
+RCA Image Preprocessing
+RCA 업로드 전 이미지 전처리 (ROI crop / 모델 유효 해상도로 축소 / JPEG·PNG 선택)
+
+- detail="high": 모델이 2048x2048 안으로 → 짧은 변 768로 축소한 뒤 512px 타일로 처리하므로
+  그보다 큰 이미지는 업로드 크기만 늘고 결과는 같음 → 업로드 전에 같은 크기로 축소
+- detail="low": 512x512 이하 1장 (85 토큰)
+- ROI가 주어지면 padding을 포함해 crop (타일 수 = 토큰 감소)
+- 형식: 사진(색상 수 많음)은 JPEG, 도면 / 마스크 등 색상 수 적은 이미지는 PNG
+"""
+
+import base64
+import io
+import math
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from app.core import metrics
+from app.core.metrics import stage_timer
+
+
+DETAILS = ("high", "low")
+IMAGE_FORMATS = ("auto", "jpeg", "png", "original")
+
+# 업로드 그대로 보낼 수 있는 형식
+_PASSTHROUGH_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png"}
+# auto 형식에서 PNG를 선택하는 최대 색상 수 (64x64 축소본 기준)
+_PNG_MAX_COLORS = 256
+
+
+def estimate_image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """
+    이미지 입력 토큰 추정
+
+    high: 2048x2048 안으로 축소 → 짧은 변 768로 축소 → 512px 타일당 170 + 기본 85
+    low: 85 고정
+    """
+    if detail == "low":
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def effective_scale(width: int, height: int, detail: str = "high", max_side: int = 0) -> float:
+    """모델이 실제로 보는 해상도까지의 축소 비율 (1.0 이하)"""
+    if detail == "low":
+        scale = min(1.0, 512 / max(width, height))
+    else:
+        scale = min(1.0, 2048 / max(width, height))
+        scale *= min(1.0, 768 / (min(width, height) * scale))
+    if max_side:
+        scale = min(scale, max_side / max(width, height))
+    return scale
+
+
+def parse_roi(value: str) -> Optional[Tuple[int, int, int, int]]:
+    """
+    "x,y,w,h" 문자열 → (x, y, w, h), 빈 문자열이면 None
+
+    Raises:
+        ValueError: 형식 오류 / 크기 0 이하
+    """
+    if not value or not value.strip():
+        return None
+    parts = [int(round(float(p))) for p in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("roi는 'x,y,w,h' 형식이어야 합니다.")
+    x, y, w, h = parts
+    if w <= 0 or h <= 0:
+        raise ValueError("roi의 너비와 높이는 0보다 커야 합니다.")
+    return x, y, w, h
+
+
+@dataclass
+class ImageOptions:
+    """요청별 전처리 옵션"""
+    detail: str = "high"
+    image_format: str = "auto"  # auto / jpeg / png / original
+    max_side: int = 0  # 0이면 detail 기준 유효 해상도까지만 축소
+    roi: Optional[Tuple[int, int, int, int]] = None  # (x, y, w, h) 원본 픽셀 좌표
+    roi_padding: float = 0.25  # ROI 주변 여백 (ROI 크기 대비 비율)
+    jpeg_quality: int = 90
+    enabled: bool = True  # False면 BMP 변환만 (기존 동작)
+
+    def variant(self) -> str:
+        """결과 캐시 scope 구분용 문자열 (모델 입력이 달라지는 옵션)"""
+        if not self.enabled:
+            return "raw"
+        return f"{self.detail}|{self.image_format}|{self.max_side}|{self.roi}|{self.roi_padding}|{self.jpeg_quality}"
+
+
+@dataclass
+class PreparedImage:
+    """전처리 결과 (업로드 데이터 + 리포트)"""
+    base64_data: str = field(repr=False)
+    mime_type: str
+    detail: str
+    original_size: Tuple[int, int]
+    size: Tuple[int, int]
+    original_bytes: int
+    bytes: int
+    roi: Optional[Tuple[int, int, int, int]]
+    estimated_image_tokens: int
+    original_estimated_image_tokens: int
+
+    def report(self) -> dict:
+        return {
+            "detail": self.detail,
+            "format": self.mime_type,
+            "original_size": list(self.original_size),
+            "size": list(self.size),
+            "roi": list(self.roi) if self.roi else None,
+            "original_bytes": self.original_bytes,
+            "bytes": self.bytes,
+            "bytes_saved": self.original_bytes - self.bytes,
+            "estimated_image_tokens": self.estimated_image_tokens,
+            "original_estimated_image_tokens": self.original_estimated_image_tokens,
+        }
+
+
+def _padded_roi(roi, padding: float, width: int, height: int) -> Tuple[int, int, int, int]:
+    """padding 적용 + 이미지 경계로 자른 (left, top, right, bottom)"""
+    x, y, w, h = roi
+    pad_x, pad_y = int(w * padding), int(h * padding)
+    left, top = max(0, x - pad_x), max(0, y - pad_y)
+    right, bottom = min(width, x + w + pad_x), min(height, y + h + pad_y)
+    if right <= left or bottom <= top:
+        raise ValueError(f"roi {roi}가 이미지 범위({width}x{height})를 벗어납니다.")
+    return left, top, right, bottom
+
+
+def _choose_format(image: Image.Image, requested: str) -> str:
+    if requested in ("jpeg", "png"):
+        return requested.upper()
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        return "PNG"
+    thumb = image.convert("RGB")
+    thumb.thumbnail((64, 64))
+    # 가늘고 긴 crop은 축소본 픽셀 수 자체가 적으므로 픽셀 수 대비로도 제한
+    max_colors = max(2, min(_PNG_MAX_COLORS, thumb.width * thumb.height // 8))
+    return "PNG" if thumb.getcolors(maxcolors=max_colors) is not None else "JPEG"
+
+
+def _encode(image: Image.Image, fmt: str, jpeg_quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "JPEG":
+        image.convert("RGB").save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+    else:
+        if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            image = image.convert("RGBA" if "A" in image.mode else "RGB")
+        image.save(buffer, format="PNG", optimize=False, compress_level=6)
+    return buffer.getvalue()
+
+
+def prepare_image(image_data: bytes, options: Optional[ImageOptions] = None) -> PreparedImage:
+    """
+    업로드용 이미지 준비 (CPU 작업 — threadpool에서 호출)
+
+    Raises:
+        ValueError: ROI가 이미지 범위를 벗어남
+    """
+    options = options or ImageOptions()
+    with stage_timer("rca", "preprocess"), Image.open(io.BytesIO(image_data)) as image:
+        original_size = image.size
+        original_tokens = estimate_image_tokens(*original_size, detail="high")
+        source_format = image.format
+
+        if not options.enabled:
+            # 기존 동작: BMP 등 미지원 형식만 PNG 변환
+            if source_format in _PASSTHROUGH_FORMATS:
+                data, mime = image_data, _PASSTHROUGH_FORMATS[source_format]
+            else:
+                data, mime = _encode(image, "PNG", options.jpeg_quality), "image/png"
+            return PreparedImage(
+                base64.b64encode(data).decode("utf-8"), mime, "high", original_size, original_size,
+                len(image_data), len(data), None, original_tokens, original_tokens,
+            )
+
+        crop = _padded_roi(options.roi, options.roi_padding, *original_size) if options.roi else None
+        region_w, region_h = (crop[2] - crop[0], crop[3] - crop[1]) if crop else original_size
+        scale = effective_scale(region_w, region_h, options.detail, options.max_side)
+        target = (max(1, round(region_w * scale)), max(1, round(region_h * scale)))
+
+        unchanged = crop is None and scale >= 1.0 and source_format in _PASSTHROUGH_FORMATS
+        keep_format = options.image_format in ("original", (source_format or "").lower()) \
+            or (options.image_format == "auto" and source_format == "JPEG")
+        if unchanged and keep_format:
+            # 축소 / crop 불필요하고 형식도 그대로면 재인코딩하지 않음
+            data, mime = image_data, _PASSTHROUGH_FORMATS[source_format]
+        else:
+            if crop is None and scale < 1.0:
+                # JPEG는 디코딩 단계에서 1/2^n 축소 (target 이상 크기 유지)
+                image.draft(image.mode, target)
+                crop_box = None
+            else:
+                crop_box = crop
+            work = image.crop(crop_box) if crop_box else image
+            if work.size != target:
+                work = work.resize(target, Image.Resampling.LANCZOS)
+
+            if options.image_format == "original":
+                fmt = source_format if source_format in _PASSTHROUGH_FORMATS else "PNG"
+            else:
+                fmt = _choose_format(work, options.image_format)
+            data = _encode(work, fmt, options.jpeg_quality)
+            mime = f"image/{fmt.lower()}"
+
+            if unchanged and len(image_data) <= len(data):
+                # 재인코딩이 더 크면 원본 사용 (같은 해상도)
+                data, mime = image_data, _PASSTHROUGH_FORMATS[source_format]
+
+    metrics.RCA_UPLOAD_BYTES.labels("original").inc(len(image_data))
+    metrics.RCA_UPLOAD_BYTES.labels("sent").inc(len(data))
+    return PreparedImage(
+        base64_data=base64.b64encode(data).decode("utf-8"),
+        mime_type=mime,
+        detail=options.detail,
+        original_size=original_size,
+        size=target,
+        original_bytes=len(image_data),
+        bytes=len(data),
+        roi=(crop[0], crop[1], crop[2] - crop[0], crop[3] - crop[1]) if crop else None,
+        estimated_image_tokens=estimate_image_tokens(*target, detail=options.detail),
+        original_estimated_image_tokens=original_tokens,
+    )
@@ -0,0 +1,274 @@
+"""
+RCA History Search
+과거 RCA 분석 검색 (증상 텍스트 전문 검색 / 유사 이미지 검색)
+
+- 전문 검색: defect_type / location / analysis / causes / solutions 의 tsvector GIN 인덱스
+  (schema.rca_history_search_document) + ts_rank_cd 순위
+- 유사 이미지: 분석 시 저장한 64bit perceptual hash (rca_image_signatures)를
+  메모리 numpy 배열로 유지하고 XOR + popcount로 Hamming 거리 계산
+  (10만 건 기준 수 ms, 다른 워커가 추가한 행은 검색 시 id 증분 + gap 재조회로 반영)
+"""
+
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.core.metrics import stage_timer
+from app.database.schema import RCAAnalysisHistory, RCAImageSignature, rca_history_search_document
+
+
+# 바이트별 set bit 수 (uint64 popcount용)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# 검색어 토큰 (한글 / 영문 / 숫자)
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_tsquery(query: str, match_all: bool = True) -> Optional[str]:
+    """
+    사용자 검색어 → to_tsquery 문자열 (토큰별 prefix 매칭)
+
+    'simple' 구성은 한국어 조사를 분리하지 않으므로 "도금" 검색이 "도금이" / "도금을"과
+    매칭되도록 prefix(:*)로 검색합니다. 토큰은 \\w 문자만 포함하므로 tsquery 문법 주입 없음.
+    """
+    tokens = [token.lower() for token in _TOKEN.findall(query or "")]
+    if not tokens:
+        return None
+    return (" & " if match_all else " | ").join(f"{token}:*" for token in tokens)
+
+
+def _popcount64(values: np.ndarray) -> np.ndarray:
+    return _POPCOUNT8[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class ImageSimilarityIndex:
+    """
+    분석 이미지 pHash 메모리 인덱스 (Hamming 거리 top-k)
+
+    id는 commit 순서가 아니라 INSERT(flush) 시점에 정해지므로, 먼저 id를 받은 트랜잭션이 나중에
+    commit되면 "마지막 id 이후" 조회에서 빠집니다. 조회 중 비어 있던 id(gap)를 기억해 두었다가
+    gap_ttl 동안 다시 조회하고 (그 후에도 없으면 rollback된 것으로 간주), full_reload_seconds마다
+    전체를 다시 읽어 다른 워커의 삭제도 반영합니다.
+    """
+
+    def __init__(self, gap_ttl: float = 600.0, max_gaps: int = 10000, full_reload_seconds: float = 3600.0):
+        self.gap_ttl = gap_ttl
+        self.max_gaps = max_gaps
+        self.full_reload_seconds = full_reload_seconds
+        self._lock = threading.Lock()
+        self._analysis_ids: List[str] = []
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._last_id = 0
+        self._gaps: Dict[int, float] = {}  # 아직 commit되지 않은 id → 처음 발견한 시각
+        self._loaded_at: Optional[float] = None
+
+    def refresh(self, db: Session):
+        """마지막으로 읽은 id 이후 + 아직 비어 있는 id(gap)의 signature를 조회해 인덱스에 반영"""
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded_at is None or now - self._loaded_at >= self.full_reload_seconds:
+                self._analysis_ids, self._hashes = [], np.empty(0, dtype=np.uint64)
+                self._last_id, self._gaps, self._loaded_at = 0, {}, now
+
+            self._gaps = {gap: seen for gap, seen in self._gaps.items() if now - seen < self.gap_ttl}
+            condition = RCAImageSignature.id > self._last_id
+            if self._gaps:
+                condition = or_(condition, RCAImageSignature.id.in_(list(self._gaps)))
+            rows = db.execute(
+                select(RCAImageSignature.id, RCAImageSignature.analysis_id, RCAImageSignature.phash)
+                .where(condition)
+                .order_by(RCAImageSignature.id)
+            ).all()
+            if not rows:
+                return
+            new_hashes = np.array([row.phash for row in rows], dtype=np.int64).view(np.uint64)
+            self._analysis_ids.extend(row.analysis_id for row in rows)
+            self._hashes = np.concatenate([self._hashes, new_hashes])
+
+            found = {row.id for row in rows}
+            for row_id in found.intersection(self._gaps):
+                del self._gaps[row_id]
+            max_id = rows[-1].id
+            if max_id > self._last_id:
+                for gap in range(self._last_id + 1, max_id):
+                    if len(self._gaps) >= self.max_gaps:
+                        break
+                    if gap not in found:
+                        self._gaps[gap] = now
+                self._last_id = max_id
+
+    def remove(self, analysis_id: str):
+        """이력 삭제 시 인덱스에서 제외"""
+        with self._lock:
+            if analysis_id not in self._analysis_ids:
+                return
+            keep = [i for i, a in enumerate(self._analysis_ids) if a != analysis_id]
+            self._analysis_ids = [self._analysis_ids[i] for i in keep]
+            self._hashes = self._hashes[keep]
+
+    def search(self, phash: int, limit: int = 10, max_distance: int = 64,
+               exclude: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Hamming 거리 오름차순 [(analysis_id, distance)]"""
+        with self._lock:
+            if not len(self._hashes):
+                return []
+            distances = _popcount64(self._hashes ^ np.uint64(phash & 0xFFFFFFFFFFFFFFFF))
+            candidates = np.flatnonzero(distances <= max_distance)
+            # 제외 대상 1건을 고려해 limit + 1개 선택
+            k = min(limit + 1, len(candidates))
+            if k == 0:
+                return []
+            top = candidates[np.argpartition(distances[candidates], k - 1)[:k]]
+            top = top[np.argsort(distances[top], kind="stable")]
+            results = [(self._analysis_ids[i], int(distances[i])) for i in top]
+        return [r for r in results if r[0] != exclude][:limit]
+
+    def __len__(self):
+        return len(self._hashes)
+
+
+class RCASearchService:
+    """RCA 이력 검색"""
+
+    def __init__(self):
+        self.image_index = ImageSimilarityIndex()
+
+    def search_text(
+        self,
+        db: Session,
+        query: str,
+        limit: int = 20,
+        match_all: bool = True,
+        severity: Optional[str] = None,
+        defect_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[dict]:
+        """
+        증상 텍스트 전문 검색 (관련도 → 최신순)
+
+        Args:
+            query: 검색어 (공백 구분, 각 토큰 prefix 매칭)
+            match_all: True면 모든 토큰 포함 (AND), False면 하나 이상 (OR)
+        """
+        tsquery_text = build_tsquery(query, match_all)
+        if tsquery_text is None:
+            return []
+        document = rca_history_search_document()
+        tsquery = func.to_tsquery(text("'simple'::regconfig"), tsquery_text)
+        rank = func.ts_rank_cd(document, tsquery).label("rank")
+
+        statement = select(
+            RCAAnalysisHistory.analysis_id,
+            RCAAnalysisHistory.filename,
+            RCAAnalysisHistory.created_at,
+            RCAAnalysisHistory.defect_detected,
+            RCAAnalysisHistory.defect_type,
+            RCAAnalysisHistory.severity,
+            RCAAnalysisHistory.confidence,
+            RCAAnalysisHistory.analysis,
+            rank,
+        ).where(document.op("@@")(tsquery))
+        if severity:
+            statement = statement.where(RCAAnalysisHistory.severity == severity)
+        if defect_type:
+            statement = statement.where(RCAAnalysisHistory.defect_type == defect_type)
+        if date_from:
+            statement = statement.where(RCAAnalysisHistory.created_at >= date_from)
+        if date_to:
+            statement = statement.where(RCAAnalysisHistory.created_at <= date_to)
+        statement = statement.order_by(rank.desc(), RCAAnalysisHistory.created_at.desc()).limit(limit)
+
+        with stage_timer("rca_search", "text"):
+            rows = db.execute(statement).all()
+        return [
+            {
+                **_summary(row),
+                "rank": round(float(row.rank), 6),
+                # 목록 미리보기용 분석 내용 앞부분
+                "snippet": (row.analysis or "")[:200],
+            }
+            for row in rows
+        ]
+
+    def save_signature(self, db: Session, analysis_id: str, phash: int):
+        """분석 이미지 signature 저장 (commit은 호출 측 — 이력 저장과 같은 트랜잭션)"""
+        signed = phash - (1 << 64) if phash >= (1 << 63) else phash
+        db.add(RCAImageSignature(analysis_id=analysis_id, phash=signed))
+
+    def delete_signature(self, db: Session, analysis_id: str):
+        """signature 삭제 (commit은 호출 측)"""
+        db.query(RCAImageSignature).filter(RCAImageSignature.analysis_id == analysis_id).delete()
+        self.image_index.remove(analysis_id)
+
+    def get_signature(self, db: Session, analysis_id: str) -> Optional[int]:
+        value = db.execute(
+            select(RCAImageSignature.phash).where(RCAImageSignature.analysis_id == analysis_id)
+        ).scalar_one_or_none()
+        return value & 0xFFFFFFFFFFFFFFFF if value is not None else None
+
+    def search_similar(self, db: Session, phash: int, limit: int = 10, max_distance: int = 16,
+                       exclude: Optional[str] = None) -> List[dict]:
+        """
+        유사 이미지 이력 검색 (Hamming 거리 오름차순)
+
+        Args:
+            phash: 기준 이미지 perceptual hash (unsigned 64bit)
+            max_distance: 최대 Hamming 거리 (0~64, 작을수록 엄격)
+            exclude: 결과에서 제외할 analysis_id (기준 이력 자신)
+        """
+        with stage_timer("rca_search", "similar"):
+            self.image_index.refresh(db)
+            # 다른 워커에서 삭제된 이력이 섞여 있을 수 있으므로 여유 있게 조회 후 DB 기준으로 거름
+            matches = self.image_index.search(phash, limit * 2, max_distance, exclude)
+            if not matches:
+                return []
+            rows = db.execute(
+                select(
+                    RCAAnalysisHistory.analysis_id,
+                    RCAAnalysisHistory.filename,
+                    RCAAnalysisHistory.created_at,
+                    RCAAnalysisHistory.defect_detected,
+                    RCAAnalysisHistory.defect_type,
+                    RCAAnalysisHistory.severity,
+                    RCAAnalysisHistory.confidence,
+                ).where(RCAAnalysisHistory.analysis_id.in_([analysis_id for analysis_id, _ in matches]))
+            ).all()
+        by_id = {row.analysis_id: row for row in rows}
+        results = []
+        for analysis_id, distance in matches:
+            row = by_id.get(analysis_id)
+            if row is None:
+                continue
+            results.append({
+                **_summary(row),
+                "distance": distance,
+                "similarity": round(1 - distance / 64, 4),
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+
+def _summary(row) -> dict:
+    return {
+        "id": row.analysis_id,
+        "filename": row.filename,
+        "timestamp": row.created_at.isoformat() if row.created_at else "",
+        "analysis": {
+            "defect_detected": row.defect_detected,
+            "defect_type": row.defect_type,
+            "severity": row.severity,
+            "confidence": row.confidence
+        }
+    }
+
+
+# 싱글톤 인스턴스
+rca_search = RCASearchService()
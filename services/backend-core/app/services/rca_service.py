@@ -3,19 +3,33 @@ RCA (Root Cause Analysis) Service
 PCB 불량 이미지 분석 및 원인 진단 서비스
 """
 
+import asyncio
 import base64
-import io
+import hashlib
 import json
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, List
-from PIL import Image
-from openai import OpenAI
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional, List, Tuple
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
-from app.database.schema import RCAAnalysisHistory
+from app.core import metrics
+from app.database.schema import RCAAnalysisHistory, RCAResultCache
 from app.database.connection import SessionLocal
+from app.services.rate_limiter import RateLimiter, retry_async
+from app.services.rca_cache import CacheHit, perceptual_hash, rca_result_cache
+from app.services.rca_image import ImageOptions, prepare_image
+from app.services.rca_search import rca_search
+from app.services.stats_service import stats_service
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 
 # 이미지 분석용 시스템 프롬프트
@@ -68,39 +82,269 @@ If the image is not a PCB or there are no defects (normal condition):
 """
 
 
+# 이미지와 함께 보내는 사용자 메시지
+RCA_USER_MESSAGE = "Analyze this PCB image for defects and provide results in JSON format. Respond in Korean for all text fields."
+
+# 프롬프트 버전 (프롬프트가 바뀌면 이전 캐시 결과는 재사용하지 않음)
+RCA_PROMPT_VERSION = hashlib.sha256((IMAGE_ANALYSIS_PROMPT + RCA_USER_MESSAGE).encode("utf-8")).hexdigest()[:12]
+
+# 응답 최대 토큰 (TPM 예산 예약에도 사용)
+RCA_MAX_TOKENS = 2000
+
+# /save 대기 중인 분석 pHash 보관 최대 개수
+_PENDING_SIGNATURES_MAX = 1024
+
+
+def estimate_request_tokens(image_tokens: int) -> int:
+    """TPM 예약용 요청 토큰 추정 (프롬프트 + 이미지 + 최대 응답)"""
+    return len(IMAGE_ANALYSIS_PROMPT) // 4 + 100 + image_tokens + RCA_MAX_TOKENS
+
+
+def default_image_options() -> ImageOptions:
+    """설정 기반 기본 전처리 옵션 (요청별로 일부 항목 덮어씀)"""
+    return ImageOptions(
+        detail=settings.RCA_IMAGE_DETAIL,
+        image_format=settings.RCA_IMAGE_FORMAT,
+        max_side=settings.RCA_IMAGE_MAX_SIDE,
+        roi_padding=settings.RCA_ROI_PADDING,
+        jpeg_quality=settings.RCA_JPEG_QUALITY,
+        enabled=settings.RCA_PREPROCESS_ENABLED,
+    )
+
+
+# ========== 이력 조회 projection / cursor ==========
+
+# 목록용 (큰 Text / JSON 컬럼 제외)
+_HISTORY_SUMMARY_COLUMNS = (
+    RCAAnalysisHistory.id,
+    RCAAnalysisHistory.analysis_id,
+    RCAAnalysisHistory.filename,
+    RCAAnalysisHistory.created_at,
+    RCAAnalysisHistory.defect_detected,
+    RCAAnalysisHistory.defect_type,
+    RCAAnalysisHistory.severity,
+    RCAAnalysisHistory.confidence,
+    RCAAnalysisHistory.total_tokens,
+)
+
+_HISTORY_FULL_COLUMNS = _HISTORY_SUMMARY_COLUMNS + (
+    RCAAnalysisHistory.location,
+    RCAAnalysisHistory.analysis,
+    RCAAnalysisHistory.causes,
+    RCAAnalysisHistory.solutions,
+    RCAAnalysisHistory.process_checks,
+    RCAAnalysisHistory.prompt_tokens,
+    RCAAnalysisHistory.completion_tokens,
+)
+
+
+def _encode_history_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("잘못된 cursor 값입니다.")
+
+
+def _history_summary(row) -> dict:
+    return {
+        "success": True,
+        "id": row.analysis_id,
+        "filename": row.filename,
+        "timestamp": row.created_at.isoformat() if row.created_at else "",
+        "analysis": {
+            "defect_detected": row.defect_detected,
+            "defect_type": row.defect_type,
+            "severity": row.severity,
+            "confidence": row.confidence
+        },
+        "usage": {
+            "total_tokens": row.total_tokens
+        }
+    }
+
+
+def _history_full(row) -> dict:
+    return {
+        "success": True,
+        "id": row.analysis_id,
+        "filename": row.filename,
+        "timestamp": row.created_at.isoformat() if row.created_at else "",
+        "analysis": {
+            "defect_detected": row.defect_detected,
+            "defect_type": row.defect_type,
+            "severity": row.severity,
+            "confidence": row.confidence,
+            "location": row.location,
+            "analysis": row.analysis,
+            "causes": row.causes or [],
+            "solutions": row.solutions or [],
+            "process_checks": row.process_checks or []
+        },
+        "usage": {
+            "prompt_tokens": row.prompt_tokens,
+            "completion_tokens": row.completion_tokens,
+            "total_tokens": row.total_tokens
+        }
+    }
+
+
 class RCAService:
     """RCA 서비스 클래스"""
 
     def __init__(self):
-        self.client: Optional[OpenAI] = None
-        self._initialize_client()
+        # openai 패키지 import / 클라이언트 생성은 첫 사용 시 (서버 시작 시간 단축)
+        self._client: Optional["AsyncOpenAI"] = None
+        self._client_lock = threading.Lock()
+        self.limiter = RateLimiter(
+            max_concurrency=settings.RCA_MAX_CONCURRENCY,
+            rpm=settings.RCA_RPM_LIMIT,
+            tpm=settings.RCA_TPM_LIMIT,
+        )
+        self.cache = rca_result_cache
+        # 저장 전 분석의 이미지 pHash (analysis_id → pHash, LRU)
+        self._pending_signatures: "OrderedDict[str, int]" = OrderedDict()
+        self._signature_lock = threading.Lock()
+        # 같은 캐시 키로 진행 중인 분석 (동시 중복 요청은 upstream 호출 1회를 공유)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def client(self) -> Optional["AsyncOpenAI"]:
+        """OpenAI 비동기 클라이언트 (최초 접근 시 생성)"""
+        if self._client is None and settings.OPENAI_API_KEY:
+            with self._client_lock:
+                if self._client is None:
+                    self._initialize_client()
+        return self._client
 
     def _initialize_client(self):
-        """OpenAI 클라이언트 초기화"""
-        if settings.OPENAI_API_KEY:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        """OpenAI 클라이언트 초기화 (재시도는 retry_async에서 처리하므로 SDK 재시도는 끔)"""
+        from openai import AsyncOpenAI
+        self._client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+            timeout=settings.RCA_REQUEST_TIMEOUT,
+            max_retries=0,
+        )
 
     def is_available(self) -> bool:
         """서비스 사용 가능 여부"""
-        return self.client is not None
+        return bool(settings.OPENAI_API_KEY)
+
+    def _build_messages(self, image_base64: str, image_type: str, user_message: str, detail: str = "high") -> list:
+        """Chat Completions 메시지 (시스템 프롬프트 + 이미지 + 텍스트)"""
+        return [
+            {
+                "role": "system",
+                "content": IMAGE_ANALYSIS_PROMPT
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": user_message
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{image_type};base64,{image_base64}",
+                            "detail": detail
+                        }
+                    }
+                ]
+            }
+        ]
 
-    def _encode_image(self, image_data: bytes, content_type: str) -> tuple[str, str]:
+    async def _create_completion(self, messages: list, estimated_tokens: int):
         """
-        이미지를 base64로 인코딩
-        BMP는 PNG로 변환
+        OpenAI Chat Completions 호출
+
+        - RateLimiter로 동시성 / RPM / TPM 예산 확보 (재시도도 새 요청으로 계산)
+        - 429 / 5xx / 타임아웃은 지수 backoff + jitter로 재시도
         """
-        if 'bmp' in content_type.lower():
-            image = Image.open(io.BytesIO(image_data))
-            buffer = io.BytesIO()
-            image.save(buffer, format='PNG')
-            buffer.seek(0)
-            return base64.b64encode(buffer.getvalue()).decode('utf-8'), 'image/png'
+        model = settings.OPENAI_MODEL
+
+        async def attempt():
+            async with self.limiter.slot(estimated_tokens) as reservation:
+                start = time.perf_counter()
+                outcome = "error"
+                try:
+                    response = await self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=RCA_MAX_TOKENS,
+                        temperature=0.3
+                    )
+                    outcome = "success"
+                except Exception as e:
+                    if getattr(e, "status_code", None) == 429:
+                        outcome = "rate_limited"
+                    # 실패한 호출은 토큰을 소비하지 않음 (요청 수에는 계속 포함)
+                    reservation.settle(0)
+                    raise
+                finally:
+                    metrics.RCA_UPSTREAM_DURATION.labels(model, outcome).observe(time.perf_counter() - start)
+                if response.usage:
+                    reservation.settle(response.usage.total_tokens)
+                return response
+
+        def on_retry(attempt_no: int, error: Exception, delay: float):
+            metrics.RCA_UPSTREAM_RETRIES.labels(model, type(error).__name__).inc()
+
+        response = await retry_async(
+            attempt,
+            max_retries=settings.RCA_MAX_RETRIES,
+            base_delay=settings.RCA_RETRY_BASE_DELAY,
+            max_delay=settings.RCA_RETRY_MAX_DELAY,
+            on_retry=on_retry,
+        )
+        metrics.RCA_TOKENS.labels(model, "prompt").inc(response.usage.prompt_tokens)
+        metrics.RCA_TOKENS.labels(model, "completion").inc(response.usage.completion_tokens)
+        return response
+
+    def _extract_json(self, response_text: str) -> Optional[dict]:
+        """응답 텍스트에서 JSON 분석 결과 추출 (실패 시 None)"""
+        try:
+            # JSON 블록 추출
+            if "```json" in response_text:
+                json_str = response_text.split("```json")[1].split("```")[0].strip()
+            elif "```" in response_text:
+                json_str = response_text.split("```")[1].split("```")[0].strip()
+            else:
+                json_str = response_text.strip()
+
+            return json.loads(json_str)
+        except json.JSONDecodeError:
+            return None
 
-        return base64.b64encode(image_data).decode('utf-8'), content_type
+    def _parse_analysis(self, response_text: str) -> dict:
+        """응답 텍스트에서 JSON 분석 결과 추출"""
+        parsed = self._extract_json(response_text)
+        if parsed is None:
+            # JSON 파싱 실패 시 텍스트 응답 반환
+            return {
+                "defect_detected": True,
+                "defect_type": "Analysis Complete",
+                "severity": "medium",
+                "confidence": 0.8,
+                "location": "Entire image",
+                "analysis": response_text,
+                "causes": [],
+                "solutions": [],
+                "process_checks": []
+            }
+        return parsed
 
     def _save_to_db(self, analysis_id: str, filename: str, analysis_result: dict,
-                   usage: dict, additional_context: str = "") -> bool:
-        """분석 결과를 DB에 저장"""
+                   usage: dict, additional_context: str = "", image_phash: Optional[int] = None) -> bool:
+        """분석 결과를 DB에 저장 (image_phash가 있으면 유사 이미지 검색용 signature도 함께 저장)"""
         try:
             db = SessionLocal()
             history = RCAAnalysisHistory(
@@ -121,6 +365,8 @@ class RCAService:
                 additional_context=additional_context
             )
             db.add(history)
+            if image_phash is not None:
+                rca_search.save_signature(db, analysis_id, image_phash)
             db.commit()
             db.close()
             return True
@@ -131,7 +377,34 @@ class RCAService:
     def save_analysis(self, analysis_id: str, filename: str, analysis_result: dict,
                      usage: dict, additional_context: str = "") -> bool:
         """외부에서 호출 가능한 분석 결과 저장 메서드"""
-        return self._save_to_db(analysis_id, filename, analysis_result, usage, additional_context)
+        return self._save_to_db(analysis_id, filename, analysis_result, usage, additional_context,
+                                image_phash=self._pop_signature(analysis_id))
+
+    def _remember_signature(self, analysis_id: str, image_phash: Optional[int]):
+        """저장하지 않은 분석의 pHash 보관 (나중에 /save로 저장될 때 signature로 사용)"""
+        if image_phash is None:
+            return
+        with self._signature_lock:
+            self._pending_signatures[analysis_id] = image_phash
+            self._pending_signatures.move_to_end(analysis_id)
+            while len(self._pending_signatures) > _PENDING_SIGNATURES_MAX:
+                self._pending_signatures.popitem(last=False)
+
+    def _pop_signature(self, analysis_id: str) -> Optional[int]:
+        with self._signature_lock:
+            image_phash = self._pending_signatures.pop(analysis_id, None)
+        if image_phash is not None:
+            return image_phash
+        # 다른 워커에서 분석된 경우: 결과 캐시에 남아 있는 pHash 사용
+        try:
+            with SessionLocal() as db:
+                value = db.execute(
+                    select(RCAResultCache.phash).where(RCAResultCache.analysis_id == analysis_id).limit(1)
+                ).scalar_one_or_none()
+        except Exception as e:
+            print(f"DB query error: {e}")
+            return None
+        return value & 0xFFFFFFFFFFFFFFFF if value is not None else None
 
     async def analyze_image(
         self,
@@ -139,7 +412,9 @@ class RCAService:
         content_type: str,
         filename: str,
         additional_context: str = "",
-        save_to_history: bool = True
+        save_to_history: bool = True,
+        use_cache: bool = True,
+        image_options: Optional[ImageOptions] = None
     ) -> dict:
         """
         PCB 이미지 분석
@@ -149,9 +424,12 @@ class RCAService:
             content_type: MIME 타입
             filename: 파일명
             additional_context: 추가 컨텍스트
+            use_cache: 같은 이미지 / context / model / prompt 결과가 캐시에 있으면 재사용
+                       (False면 재분석 후 캐시 갱신)
+            image_options: 업로드 전처리 옵션 (None이면 설정 기본값)
 
         Returns:
-            분석 결과 딕셔너리
+            분석 결과 딕셔너리 ("preprocess": 전송 크기 / 토큰 추정, 캐시 사용 시 "cache" 포함)
         """
         if not self.is_available():
             return {
@@ -165,74 +443,53 @@ class RCAService:
         except (UnicodeDecodeError, UnicodeEncodeError):
             safe_filename = "image_file"
 
+        options = image_options or default_image_options()
+        cache_key, inflight = None, None
+        if self.cache.enabled:
+            cache_key = self.cache.make_key(image_data, additional_context, settings.OPENAI_MODEL,
+                                            RCA_PROMPT_VERSION, variant=options.variant())
+            # use_cache=False면 조회 없이 재분석 후 캐시 갱신
+            hit = await run_in_threadpool(self.cache.lookup, cache_key) if use_cache else None
+            if hit is None and use_cache and cache_key.cache_key in self._inflight:
+                # 같은 이미지 분석이 진행 중이면 그 결과를 기다림 (실패 / 취소 시 None)
+                hit = await asyncio.shield(self._inflight[cache_key.cache_key])
+                if hit is not None:
+                    hit = CacheHit(hit.analysis_id, hit.analysis, hit.usage, hit.cached_at, "inflight")
+                    self.cache.record_hit(hit)
+            if hit is not None:
+                return await self._cached_result(hit, safe_filename, additional_context, save_to_history,
+                                                 image_data, cache_key)
+            if cache_key.cache_key not in self._inflight:
+                inflight = asyncio.get_running_loop().create_future()
+                self._inflight[cache_key.cache_key] = inflight
+
         try:
-            # 이미지 인코딩
-            image_base64, image_type = self._encode_image(image_data, content_type)
+            # ROI crop / 축소 / 형식 선택 (CPU 작업은 threadpool에서)
+            try:
+                prepared = await run_in_threadpool(prepare_image, image_data, options)
+            except (ValueError, OSError) as e:
+                return {
+                    "success": False,
+                    "error": f"이미지 전처리 오류: {e}",
+                    "invalid_input": True
+                }
 
             # 사용자 메시지 구성
-            user_message = "Analyze this PCB image for defects and provide results in JSON format. Respond in Korean for all text fields."
+            user_message = RCA_USER_MESSAGE
             if additional_context:
                 user_message += f"\n\nAdditional context: {additional_context}"
 
             # OpenAI API 호출
-            response = self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": IMAGE_ANALYSIS_PROMPT
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": user_message
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{image_type};base64,{image_base64}",
-                                    "detail": "high"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=2000,
-                temperature=0.3
-            )
+            messages = self._build_messages(prepared.base64_data, prepared.mime_type, user_message, prepared.detail)
+            response = await self._create_completion(messages, estimate_request_tokens(prepared.estimated_image_tokens))
 
             # 응답 파싱
             response_text = response.choices[0].message.content
-
-            # JSON 추출 시도
-            try:
-                # JSON 블록 추출
-                if "```json" in response_text:
-                    json_str = response_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in response_text:
-                    json_str = response_text.split("```")[1].split("```")[0].strip()
-                else:
-                    json_str = response_text.strip()
-
-                analysis_result = json.loads(json_str)
-            except json.JSONDecodeError:
-                # JSON 파싱 실패 시 텍스트 응답 반환
-                analysis_result = {
-                    "defect_detected": True,
-                    "defect_type": "Analysis Complete",
-                    "severity": "medium",
-                    "confidence": 0.8,
-                    "location": "Entire image",
-                    "analysis": response_text,
-                    "causes": [],
-                    "solutions": [],
-                    "process_checks": []
-                }
+            parsed = self._extract_json(response_text)
+            analysis_result = parsed if parsed is not None else self._parse_analysis(response_text)
 
             # 분석 ID 생성
-            analysis_id = f"RCA-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+            analysis_id = self._new_analysis_id()
 
             usage = {
                 "prompt_tokens": response.usage.prompt_tokens,
@@ -247,12 +504,26 @@ class RCAService:
                 "timestamp": datetime.now().isoformat(),
                 "analysis": analysis_result,
                 "usage": usage,
-                "saved": save_to_history
+                "saved": save_to_history,
+                "cached": False,
+                "preprocess": prepared.report()
             }
 
-            # DB에 저장 (save_to_history가 True일 때만)
+            # 캐시 저장 (JSON 파싱에 실패한 응답은 캐시하지 않음)
+            if cache_key is not None and parsed is not None:
+                await run_in_threadpool(self.cache.store, cache_key, analysis_id, analysis_result, usage)
+                if inflight is not None:
+                    inflight.set_result(CacheHit(analysis_id, analysis_result, usage, datetime.now(), "exact"))
+
+            # DB에 저장 (save_to_history가 True일 때만, 아니면 /save 대비 pHash만 보관)
+            image_phash = await run_in_threadpool(self._image_phash, image_data, cache_key)
             if save_to_history:
-                self._save_to_db(analysis_id, safe_filename, analysis_result, usage, additional_context)
+                await run_in_threadpool(
+                    self._save_to_db, analysis_id, safe_filename, analysis_result, usage, additional_context,
+                    image_phash
+                )
+            else:
+                self._remember_signature(analysis_id, image_phash)
 
             return result
 
@@ -266,127 +537,200 @@ class RCAService:
                 "success": False,
                 "error": error_msg
             }
+        finally:
+            if inflight is not None:
+                if not inflight.done():
+                    inflight.set_result(None)
+                self._inflight.pop(cache_key.cache_key, None)
+
+    def _new_analysis_id(self) -> str:
+        return f"RCA-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
 
-    def get_history(self, limit: int = 50, offset: int = 0) -> List[dict]:
-        """분석 이력 조회 (DB에서)"""
+    def _image_phash(self, image_data: bytes, cache_key=None) -> Optional[int]:
+        """유사 이미지 검색용 pHash (캐시 키에서 이미 계산했으면 재사용)"""
+        return cache_key.phash if cache_key is not None else perceptual_hash(image_data)
+
+    async def _cached_result(self, hit: CacheHit, filename: str, additional_context: str,
+                             save_to_history: bool, image_data: bytes, cache_key=None) -> dict:
+        """
+        캐시 결과 응답 (upstream 호출 없음 → 토큰 사용량 0)
+
+        새 분석 ID 발급 (원본 분석 ID는 cache.source_id) — 나중에 /save로 저장해도 원본 이력과 충돌 없음
+        """
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        analysis_id = self._new_analysis_id()
+        image_phash = await run_in_threadpool(self._image_phash, image_data, cache_key)
+        if save_to_history:
+            await run_in_threadpool(
+                self._save_to_db, analysis_id, filename, hit.analysis, usage, additional_context, image_phash
+            )
+        else:
+            self._remember_signature(analysis_id, image_phash)
+        return {
+            "success": True,
+            "id": analysis_id,
+            "filename": filename,
+            "timestamp": datetime.now().isoformat(),
+            "analysis": hit.analysis,
+            "usage": usage,
+            "saved": save_to_history,
+            "cached": True,
+            "cache": hit.to_dict()
+        }
+
+    async def analyze_batch(
+        self,
+        items: List[dict],
+        additional_context: str = "",
+        save_to_history: bool = True,
+        use_cache: bool = True,
+        image_options: Optional[ImageOptions] = None
+    ) -> AsyncIterator[dict]:
+        """
+        여러 이미지 동시 분석 — 완료되는 순서대로 결과 yield
+
+        Args:
+            items: [{"index", "filename", "content_type", "data"}]
+
+        동시성 / RPM / TPM은 self.limiter가 제한하므로 모든 항목을 한 번에 태스크로 띄움
+        """
+        async def run(item: dict) -> dict:
+            result = await self.analyze_image(
+                image_data=item["data"],
+                content_type=item["content_type"],
+                filename=item["filename"],
+                additional_context=additional_context,
+                save_to_history=save_to_history,
+                use_cache=use_cache,
+                image_options=image_options
+            )
+            return {"index": item["index"], "filename": item["filename"], **result}
+
+        tasks = [asyncio.create_task(run(item)) for item in items]
         try:
-            db = SessionLocal()
-            histories = db.query(RCAAnalysisHistory)\
-                .order_by(RCAAnalysisHistory.created_at.desc())\
-                .offset(offset)\
-                .limit(limit)\
-                .all()
-
-            result = []
-            for h in histories:
-                result.append({
-                    "success": True,
-                    "id": h.analysis_id,
-                    "filename": h.filename,
-                    "timestamp": h.created_at.isoformat() if h.created_at else "",
-                    "analysis": {
-                        "defect_detected": h.defect_detected,
-                        "defect_type": h.defect_type,
-                        "severity": h.severity,
-                        "confidence": h.confidence,
-                        "location": h.location,
-                        "analysis": h.analysis,
-                        "causes": h.causes or [],
-                        "solutions": h.solutions or [],
-                        "process_checks": h.process_checks or []
-                    },
-                    "usage": {
-                        "prompt_tokens": h.prompt_tokens,
-                        "completion_tokens": h.completion_tokens,
-                        "total_tokens": h.total_tokens
-                    }
-                })
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 클라이언트 연결 종료 등으로 중단되면 남은 호출 취소
+            for task in tasks:
+                task.cancel()
+
+    @contextmanager
+    def _session(self, db: Optional[Session] = None):
+        """요청 범위 세션이 있으면 재사용, 없으면 새 세션 (종료 시 close)"""
+        if db is not None:
+            yield db
+            return
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
             db.close()
-            return result
+
+    def get_history(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        view: str = "full",
+        severity: Optional[str] = None,
+        defect_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        db: Optional[Session] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        분석 이력 조회 (최신순)
+
+        Args:
+            cursor: 이전 페이지의 next_cursor (keyset 페이지네이션, offset 대신 사용)
+            view: full (전체 분석 내용) / summary (목록용 주요 컬럼만 조회)
+            severity / defect_type / date_from / date_to: 필터 (인덱스 사용)
+            db: 요청 범위 세션 (없으면 새로 생성)
+
+        Returns:
+            (이력 목록, 다음 페이지 cursor — 마지막 페이지면 None)
+
+        Raises:
+            ValueError: 잘못된 cursor
+        """
+        columns = _HISTORY_FULL_COLUMNS if view == "full" else _HISTORY_SUMMARY_COLUMNS
+        query = select(*columns)
+        if severity:
+            query = query.where(RCAAnalysisHistory.severity == severity)
+        if defect_type:
+            query = query.where(RCAAnalysisHistory.defect_type == defect_type)
+        if date_from:
+            query = query.where(RCAAnalysisHistory.created_at >= date_from)
+        if date_to:
+            query = query.where(RCAAnalysisHistory.created_at <= date_to)
+        if cursor:
+            created_at, row_id = _decode_history_cursor(cursor)
+            query = query.where(
+                tuple_(RCAAnalysisHistory.created_at, RCAAnalysisHistory.id) < tuple_(created_at, row_id)
+            )
+        elif offset:
+            query = query.offset(offset)
+        query = query.order_by(RCAAnalysisHistory.created_at.desc(), RCAAnalysisHistory.id.desc()).limit(limit + 1)
+
+        try:
+            with self._session(db) as session:
+                rows = session.execute(query).all()
         except Exception as e:
             print(f"DB query error: {e}")
-            return []
+            return [], None
 
-    def get_history_item(self, analysis_id: str) -> Optional[dict]:
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_history_cursor(rows[-1].created_at, rows[-1].id)
+        to_dict = _history_full if view == "full" else _history_summary
+        return [to_dict(row) for row in rows], next_cursor
+
+    def get_history_item(self, analysis_id: str, db: Optional[Session] = None) -> Optional[dict]:
         """특정 분석 이력 조회 (DB에서)"""
         try:
-            db = SessionLocal()
-            h = db.query(RCAAnalysisHistory)\
-                .filter(RCAAnalysisHistory.analysis_id == analysis_id)\
-                .first()
-            db.close()
-
-            if not h:
-                return None
-
-            return {
-                "success": True,
-                "id": h.analysis_id,
-                "filename": h.filename,
-                "timestamp": h.created_at.isoformat() if h.created_at else "",
-                "analysis": {
-                    "defect_detected": h.defect_detected,
-                    "defect_type": h.defect_type,
-                    "severity": h.severity,
-                    "confidence": h.confidence,
-                    "location": h.location,
-                    "analysis": h.analysis,
-                    "causes": h.causes or [],
-                    "solutions": h.solutions or [],
-                    "process_checks": h.process_checks or []
-                },
-                "usage": {
-                    "prompt_tokens": h.prompt_tokens,
-                    "completion_tokens": h.completion_tokens,
-                    "total_tokens": h.total_tokens
-                }
-            }
+            with self._session(db) as session:
+                row = session.execute(
+                    select(*_HISTORY_FULL_COLUMNS).where(RCAAnalysisHistory.analysis_id == analysis_id)
+                ).first()
         except Exception as e:
             print(f"DB query error: {e}")
             return None
+        return _history_full(row) if row else None
 
-    def delete_history_item(self, analysis_id: str) -> bool:
+    def delete_history_item(self, analysis_id: str, db: Optional[Session] = None) -> bool:
         """분석 이력 삭제 (DB에서)"""
         try:
-            db = SessionLocal()
-            h = db.query(RCAAnalysisHistory)\
-                .filter(RCAAnalysisHistory.analysis_id == analysis_id)\
-                .first()
-            if h:
-                db.delete(h)
-                db.commit()
-                db.close()
+            with self._session(db) as session:
+                h = session.query(RCAAnalysisHistory)\
+                    .filter(RCAAnalysisHistory.analysis_id == analysis_id)\
+                    .first()
+                if not h:
+                    return False
+                session.delete(h)
+                rca_search.delete_signature(session, analysis_id)
+                session.commit()
                 return True
-            db.close()
-            return False
         except Exception as e:
             print(f"DB delete error: {e}")
             return False
 
+    def get_cache_stats(self) -> dict:
+        """결과 캐시 통계 (hit / miss / 절약 토큰 / 항목 수)"""
+        return self.cache.stats()
+
+    def clear_cache(self, expired_only: bool = True) -> int:
+        """결과 캐시 정리 (만료 항목만 또는 전체)"""
+        return self.cache.purge(expired_only=expired_only)
+
     def get_statistics(self) -> dict:
-        """통계 정보 (DB에서)"""
-        try:
-            db = SessionLocal()
-            total = db.query(RCAAnalysisHistory).count()
-            high = db.query(RCAAnalysisHistory).filter(RCAAnalysisHistory.severity == "high").count()
-            medium = db.query(RCAAnalysisHistory).filter(RCAAnalysisHistory.severity == "medium").count()
-            low = db.query(RCAAnalysisHistory).filter(RCAAnalysisHistory.severity == "low").count()
-            db.close()
+        """통계 정보 (stats_service DB 누적 집계)"""
+        return stats_service.get_rca_stats()
 
-            return {
-                "total": total,
-                "high": high,
-                "medium": medium,
-                "low": low
-            }
-        except Exception as e:
-            print(f"DB stats error: {e}")
-            return {
-                "total": 0,
-                "high": 0,
-                "medium": 0,
-                "low": 0
-            }
+    def get_statistics_timeseries(self, bucket: str = "hour", days: int = 7) -> List[dict]:
+        """시간 버킷별 severity / defect_type 통계"""
+        return stats_service.get_rca_timeseries(bucket=bucket, days=days)
 
 
 # 싱글톤 인스턴스
@@ -0,0 +1,351 @@
+"""
+Spec Judgment
+추론 detection → 고객 Spec(ai_spec_v2.customer_specs 이하) 기준 OK / NG 판정
+
+Spec 선택: customer == customer_id, category3 == product_id 중 rms_rev가 가장 높은 Spec
+          (제품 Spec이 없으면 고객의 최신 Spec)
+Spec 트리는 (고객, 제품)별로 한 번 읽어 Python 구조로 변환 후 INFERENCE_SPEC_CACHE_SECONDS 동안 재사용
+
+detection 판정 (class_name == DefectType.ai_code):
+1. 매칭되는 불량 유형이 없으면 UNKNOWN
+2. score < threshold_ok 이면 OK (낮은 신뢰도)
+3. DefectCondition (machine_type 미지정 조건 우선, idx 순 첫 번째)
+   - MeasurementCondition별로 Specification 트리를 평가해 참이면 NG
+     · Specification: 자신의 Expression 전부 AND, SubSpecification과 sub_logical_operator로 결합
+     · Specification끼리는 root_logical_operator로 결합 (기본 AND)
+     · measurement_condition_value / inequality_sign이 있으면 해당 측정값이 조건을 만족할 때만 적용
+     · 필요한 측정값이 없으면 default_result_value
+   - MeasurementCondition이 없으면 no_measurement_default_result
+4. 결과가 UNKNOWN이고 score >= threshold_ng 이면 NG
+이미지 판정: NG detection 수 >= CustomerSpec.threshold 이면 NG, Spec이 없으면 UNKNOWN, 그 외 OK
+
+측정값 (pixel): longest / width(shortest) — 최소 외접 사각형의 긴 변 / 짧은 변, area, perimeter, height
+단위가 MicroMeter / MilliMeter면 INFERENCE_UM_PER_PIXEL로 환산
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.database.connection import SessionLocal
+from app.database.schema import (
+    CustomerSpec, DefectType, DefectCondition, MeasurementCondition, Specification
+)
+
+
+OK, NG, UNKNOWN = "OK", "NG", "UNKNOWN"
+JUDGMENTS = (OK, NG, UNKNOWN)
+
+# Spec JSON의 결과 값 (AI_OK / AI_NG / AI_UNKNOWN_NONE ...) → 판정
+_RESULT_VALUES = {"AI_OK": OK, "AI_NG": NG, "OK": OK, "NG": NG}
+
+_COMPARE = {
+    "gte": lambda a, b: a >= b,
+    "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "lt": lambda a, b: a < b,
+    "eq": lambda a, b: math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6),
+}
+
+_MEASUREMENT_ALIASES = {
+    "longest": "longest", "length": "longest", "long": "longest",
+    "width": "width", "shortest": "width", "short": "width",
+    "area": "area", "perimeter": "perimeter", "height": "height",
+}
+
+
+def _result_value(value: Optional[str]) -> str:
+    return _RESULT_VALUES.get((value or "").strip().upper(), UNKNOWN)
+
+
+def _is_or(operator: Optional[str]) -> bool:
+    return (operator or "").strip().upper() == "OR"
+
+
+class _MissingMeasurement(Exception):
+    pass
+
+
+# ========== 측정값 ==========
+
+def measure(detection: dict) -> dict:
+    """detection polygon(없으면 bbox) → pixel 측정값"""
+    x1, y1, x2, y2 = detection["bbox"]
+    polygon = detection.get("polygon")
+    if polygon and len(polygon) >= 3:
+        points = np.asarray(polygon, dtype=np.float32)
+        (_, _), (w, h), _ = cv2.minAreaRect(points)
+        area = float(detection.get("area") or cv2.contourArea(points))
+        perimeter = float(cv2.arcLength(points, True))
+    else:
+        w, h = x2 - x1, y2 - y1
+        area = float(detection.get("area") or w * h)
+        perimeter = 2.0 * (w + h)
+    return {
+        "longest": round(float(max(w, h)), 2),
+        "width": round(float(min(w, h)), 2),
+        "height": round(float(y2 - y1), 2),
+        "area": round(area, 2),
+        "perimeter": round(perimeter, 2),
+    }
+
+
+def _measurement_value(measurements: dict, name: Optional[str], unit: Optional[str]) -> float:
+    key = _MEASUREMENT_ALIASES.get((name or "").strip().lower())
+    if key is None or measurements.get(key) is None:
+        raise _MissingMeasurement(name)
+    value = float(measurements[key])
+    unit = (unit or "").strip().lower()
+    scale = 1.0
+    if unit in ("micrometer", "um", "µm"):
+        scale = settings.INFERENCE_UM_PER_PIXEL
+    elif unit in ("millimeter", "mm"):
+        scale = settings.INFERENCE_UM_PER_PIXEL / 1000.0
+    return value * (scale * scale if key == "area" else scale)
+
+
+# ========== 변환된 Spec 트리 ==========
+
+@dataclass
+class _SpecNode:
+    measurement_name: Optional[str]
+    unit: Optional[str]
+    sub_or: bool
+    expressions: List[Tuple[str, float]]
+    children: List["_SpecNode"] = field(default_factory=list)
+
+    def evaluate(self, measurements: dict) -> bool:
+        results = []
+        if self.expressions:
+            value = _measurement_value(measurements, self.measurement_name, self.unit)
+            results.append(all(_COMPARE.get(sign, lambda a, b: False)(value, threshold)
+                               for sign, threshold in self.expressions))
+        results.extend(child.evaluate(measurements) for child in self.children)
+        if not results:
+            return False
+        return any(results) if self.sub_or else all(results)
+
+
+@dataclass
+class _MeasurementRule:
+    measurement_name: Optional[str]
+    default_result: str
+    root_or: bool
+    gate: Optional[Tuple[str, float, Optional[str]]]  # (부등호, 값, 단위)
+    specs: List[_SpecNode]
+
+    def judge(self, measurements: dict) -> Optional[str]:
+        """NG / OK, 적용 대상이 아니면 None"""
+        try:
+            if self.gate is not None:
+                sign, threshold, unit = self.gate
+                value = _measurement_value(measurements, self.measurement_name, unit)
+                if not _COMPARE.get(sign, lambda a, b: False)(value, threshold):
+                    return None
+            if not self.specs:
+                return None
+            results = [spec.evaluate(measurements) for spec in self.specs]
+        except _MissingMeasurement:
+            return self.default_result
+        hit = any(results) if self.root_or else all(results)
+        return NG if hit else OK
+
+
+@dataclass
+class _DefectRule:
+    defect_type_id: int
+    ai_code: str
+    defect_name: str
+    threshold_ok: Optional[float]
+    threshold_ng: Optional[float]
+    no_measurement_result: str
+    measurements: List[_MeasurementRule]
+
+    def judge(self, detection: dict, measurements: dict) -> Tuple[str, str]:
+        score = float(detection.get("score") or 0.0)
+        if self.threshold_ok is not None and score < self.threshold_ok:
+            return OK, "score below threshold_ok"
+        verdict, reason = self.no_measurement_result, "no measurement condition"
+        if self.measurements:
+            verdicts = [rule.judge(measurements) for rule in self.measurements]
+            verdicts = [v for v in verdicts if v is not None]
+            if NG in verdicts:
+                verdict, reason = NG, "measurement spec"
+            elif OK in verdicts:
+                verdict, reason = OK, "within measurement spec"
+            elif verdicts:
+                verdict, reason = UNKNOWN, "measurement unavailable"
+        if verdict == UNKNOWN and self.threshold_ng is not None and score >= self.threshold_ng:
+            return NG, "score above threshold_ng"
+        return verdict, reason
+
+
+@dataclass
+class CompiledSpec:
+    spec_id: int
+    customer: str
+    category3: str
+    rms_rev: int
+    threshold: int
+    rules: Dict[str, _DefectRule]
+
+
+def _compile_spec_node(spec: Specification, children: Dict[int, List[Specification]]) -> _SpecNode:
+    return _SpecNode(
+        measurement_name=spec.measurement_name,
+        unit=spec.unit,
+        sub_or=_is_or(spec.sub_logical_operator),
+        expressions=[((e.inequality_sign or "").strip().lower(), float(e.value)) for e in spec.expressions],
+        children=[_compile_spec_node(child, children) for child in children.get(spec.id, [])],
+    )
+
+
+def _compile_spec_tree(specifications: List[Specification]) -> List[_SpecNode]:
+    # MeasurementCondition의 Specification은 SubSpecification까지 한 번에 로드됨 → parent_spec_id로 트리 구성
+    children: Dict[int, List[Specification]] = {}
+    for spec in sorted(specifications, key=lambda s: s.id):
+        if spec.parent_spec_id is not None:
+            children.setdefault(spec.parent_spec_id, []).append(spec)
+    return [_compile_spec_node(spec, children)
+            for spec in sorted(specifications, key=lambda s: s.id) if spec.parent_spec_id is None]
+
+
+def _compile_defect_type(defect_type: DefectType) -> _DefectRule:
+    conditions = sorted(defect_type.defect_conditions, key=lambda c: (c.idx is None, c.idx or 0))
+    # 장비 구분 없는 조건 우선 (추론 요청에는 장비 정보가 없음)
+    generic = [c for c in conditions if (c.machine_type or "None") == "None"]
+    condition = (generic or conditions or [None])[0]
+
+    measurements = []
+    no_measurement = UNKNOWN
+    if condition is not None:
+        no_measurement = _result_value(condition.no_measurement_default_result)
+        for mc in sorted(condition.measurement_conditions, key=lambda m: (m.idx is None, m.idx or 0)):
+            gate = None
+            if mc.measurement_condition_value is not None and mc.measurement_condition_inequality_sign:
+                gate = (mc.measurement_condition_inequality_sign.strip().lower(),
+                        float(mc.measurement_condition_value), mc.measurement_condition_unit)
+            measurements.append(_MeasurementRule(
+                measurement_name=mc.measurement_name,
+                default_result=_result_value(mc.default_result_value),
+                root_or=_is_or(mc.root_logical_operator),
+                gate=gate,
+                specs=_compile_spec_tree(mc.specifications),
+            ))
+    return _DefectRule(
+        defect_type_id=defect_type.id,
+        ai_code=defect_type.ai_code,
+        defect_name=defect_type.defect_name,
+        threshold_ok=defect_type.threshold_ok,
+        threshold_ng=defect_type.threshold_ng,
+        no_measurement_result=no_measurement,
+        measurements=measurements,
+    )
+
+
+# ========== 판정 ==========
+
+class SpecJudge:
+    """(고객, 제품)별 Spec 캐시 + detection 판정"""
+
+    def __init__(self, session_factory: Callable = SessionLocal, cache_seconds: float = 60.0):
+        self.session_factory = session_factory
+        self.cache_seconds = cache_seconds
+        self._cache: Dict[Tuple[str, str], Tuple[float, Optional[CompiledSpec]]] = {}
+        self._lock = threading.Lock()
+
+    def get_spec(self, customer_id: Optional[str], product_id: Optional[str]) -> Optional[CompiledSpec]:
+        if not customer_id:
+            return None
+        key = (customer_id, product_id or "")
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and now - cached[0] < self.cache_seconds:
+            return cached[1]
+        try:
+            spec = self._load(customer_id, product_id)
+        except Exception as e:
+            # DB 오류 시 이전 Spec 유지 (없으면 판정 보류)
+            print(f"Spec load error ({customer_id}, {product_id}): {e}")
+            return cached[1] if cached is not None else None
+        with self._lock:
+            self._cache[key] = (now, spec)
+        return spec
+
+    def _load(self, customer_id: str, product_id: Optional[str]) -> Optional[CompiledSpec]:
+        with self.session_factory() as db:
+            base = (
+                select(CustomerSpec)
+                .where(CustomerSpec.customer == customer_id)
+                .order_by(CustomerSpec.rms_rev.desc(), CustomerSpec.id.desc())
+                .limit(1)
+                .options(
+                    selectinload(CustomerSpec.defect_types)
+                    .selectinload(DefectType.defect_conditions)
+                    .selectinload(DefectCondition.measurement_conditions)
+                    .selectinload(MeasurementCondition.specifications)
+                    .selectinload(Specification.expressions),
+                )
+            )
+            spec = None
+            if product_id:
+                spec = db.execute(base.where(CustomerSpec.category3 == product_id)).scalar_one_or_none()
+            if spec is None:
+                spec = db.execute(base).scalar_one_or_none()
+            if spec is None:
+                return None
+            rules = {}
+            for defect_type in spec.defect_types:
+                # 같은 ai_code가 여러 면(TOP / BOTTOM)에 있으면 첫 번째 사용
+                rules.setdefault(defect_type.ai_code, _compile_defect_type(defect_type))
+            return CompiledSpec(spec.id, spec.customer, spec.category3, spec.rms_rev,
+                                max(1, spec.threshold or 1), rules)
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def judge(self, customer_id: Optional[str], product_id: Optional[str], detections: List[dict]) -> dict:
+        """
+        detection별 측정값 / 판정을 detection dict에 추가하고 이미지 판정 반환
+
+        Returns:
+            {"judgment", "specId", "ngCount", "unknownCount"}
+        """
+        spec = self.get_spec(customer_id, product_id)
+        ng = unknown = 0
+        for detection in detections:
+            measurements = measure(detection)
+            detection["measurements"] = measurements
+            rule = spec.rules.get(detection.get("class_name")) if spec is not None else None
+            if rule is None:
+                verdict, reason = UNKNOWN, "no spec for class" if spec is not None else "no customer spec"
+            else:
+                verdict, reason = rule.judge(detection, measurements)
+                detection["defect_type_id"] = rule.defect_type_id
+            detection["judgment"], detection["judgment_reason"] = verdict, reason
+            ng += verdict == NG
+            unknown += verdict == UNKNOWN
+        if spec is None:
+            judgment = UNKNOWN
+        else:
+            judgment = NG if ng >= spec.threshold else OK
+        return {
+            "judgment": judgment,
+            "specId": spec.spec_id if spec is not None else None,
+            "ngCount": ng,
+            "unknownCount": unknown,
+        }
+
+
+# 싱글톤 인스턴스
+spec_judge = SpecJudge(cache_seconds=settings.INFERENCE_SPEC_CACHE_SECONDS)
@@ -0,0 +1,327 @@
+"""
+Dashboard Statistics Service
+대시보드 통계 (Customer Spec / RCA) — DB 누적 집계 테이블
+
+- ai_spec_v2.dashboard_stat_counts / rca_stat_buckets에 건수를 누적
+- ORM insert / delete / update(집계 키 변경) 이벤트를 모아 flush 직후 같은 트랜잭션에서 증분 UPSERT
+  → 원본 행과 집계가 함께 commit / rollback되므로 중복 / 누락이 없고, 모든 uvicorn 워커가 같은 값을 읽음
+- ORM 이벤트가 없는 bulk SQL(Spec 복사 등)은 호출자가 record()로 같은 트랜잭션에서 증분을 기록
+- 최초 실행(집계 테이블이 비어 있음) 또는 수동 복구 시 rebuild()로 원본 테이블에서 재집계
+  Postgres에서는 집계 테이블을 EXCLUSIVE lock으로 잠가 진행 중인 증분과 겹치지 않게 함
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Sequence
+
+from sqlalchemy import delete, event, func, inspect, literal_column, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.database.connection import SessionLocal
+from app.database.schema import (
+    CustomerSpec, DashboardStatCount, DefectType, DefectCondition, RCAAnalysisHistory, RCAStatBucket
+)
+
+
+SEVERITIES = ("high", "medium", "low")
+
+# session.info에 flush 전 증분을 쌓아두는 키
+_PENDING_KEY = "stats_pending_deltas"
+
+# 초기 집계 완료 표시 (dashboard_stat_counts.metric)
+_BUILT_METRIC = "_built"
+
+_DIALECT_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _key(value) -> str:
+    return "" if value is None else str(value)
+
+
+class StatsService:
+    """대시보드 통계 (DB 누적 집계 조회 / 갱신)"""
+
+    def __init__(self, rca_retention_days: int = 30):
+        self.rca_retention_days = rca_retention_days
+
+    # ========== 증분 기록 ==========
+
+    def _cutoff(self) -> datetime:
+        return _hour(datetime.now() - timedelta(days=self.rca_retention_days))
+
+    def record(self, db, deltas: Sequence[tuple]):
+        """
+        증분 UPSERT (commit은 호출자 — 원본 쓰기와 같은 트랜잭션)
+
+        Args:
+            deltas: ("spec", n, customer, category3) / ("defect_type", n) / ("defect_condition", n)
+                    / ("rca", n, created_at, severity, defect_type)  — n은 +/- 건수
+        """
+        if not deltas:
+            return
+        counts: Counter = Counter()
+        buckets: Counter = Counter()
+        cutoff = self._cutoff()
+        for kind, n, *values in deltas:
+            if kind == "spec":
+                customer, category3 = values
+                counts[("spec_customer", _key(customer))] += n
+                counts[("spec_category", _key(category3))] += n
+            elif kind == "defect_type":
+                counts[("defect_types", "")] += n
+            elif kind == "defect_condition":
+                counts[("defect_conditions", "")] += n
+            elif kind == "rca":
+                created_at, severity, defect_type = values
+                counts[("rca_severity", _key(severity))] += n
+                # 보관 기간이 지나 정리된 버킷은 건드리지 않음
+                if created_at is not None and created_at >= cutoff:
+                    buckets[(_hour(created_at), _key(severity), _key(defect_type))] += n
+
+        connection = db.connection()
+        # 키 순서로 갱신해 동시 트랜잭션 간 deadlock 방지
+        self._upsert(connection, DashboardStatCount.__table__, ("metric", "key"), [
+            {"metric": metric, "key": key, "count": n}
+            for (metric, key), n in sorted(counts.items()) if n
+        ])
+        self._upsert(connection, RCAStatBucket.__table__, ("bucket_start", "severity", "defect_type"), [
+            {"bucket_start": hour, "severity": severity, "defect_type": defect_type, "count": n}
+            for (hour, severity, defect_type), n in sorted(buckets.items()) if n
+        ])
+
+    @staticmethod
+    def _upsert(connection, table, keys: Sequence[str], rows: List[dict]):
+        if not rows:
+            return
+        dialect_insert = _DIALECT_INSERT.get(connection.dialect.name)
+        if dialect_insert is None:
+            raise RuntimeError(f"stats upsert is not supported on {connection.dialect.name}")
+        statement = dialect_insert(table).values(rows)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=list(keys), set_={"count": table.c.count + statement.excluded.count}
+        ))
+
+    # ========== 재집계 ==========
+
+    def ensure_built(self):
+        """집계 테이블이 비어 있으면 (최초 실행) 원본 테이블에서 재집계, 보관 기간 지난 버킷 정리"""
+        with SessionLocal() as db:
+            built = db.execute(
+                select(DashboardStatCount.count).where(DashboardStatCount.metric == _BUILT_METRIC)
+            ).scalar_one_or_none()
+            db.execute(delete(RCAStatBucket).where(RCAStatBucket.bucket_start < self._cutoff()))
+            db.commit()
+        if not built:
+            self.rebuild(only_if_missing=True)
+
+    def rebuild(self, only_if_missing: bool = False):
+        """원본 테이블에서 전체 재집계 (단일 트랜잭션)"""
+        with SessionLocal() as db:
+            if db.connection().dialect.name == "postgresql":
+                # 진행 중인 증분 트랜잭션이 끝날 때까지 기다리고, 재집계 중 새 증분은 대기시킴
+                db.execute(text(
+                    f"LOCK TABLE {DashboardStatCount.__table__.fullname}, {RCAStatBucket.__table__.fullname} "
+                    "IN EXCLUSIVE MODE"
+                ))
+            if only_if_missing and db.execute(
+                select(DashboardStatCount.count).where(DashboardStatCount.metric == _BUILT_METRIC)
+            ).scalar_one_or_none():
+                # 다른 워커가 먼저 재집계함
+                db.commit()
+                return
+
+            counts = [
+                {"metric": "spec_customer", "key": _key(customer), "count": n}
+                for customer, n in db.execute(
+                    select(CustomerSpec.customer, func.count()).group_by(CustomerSpec.customer))
+            ] + [
+                {"metric": "spec_category", "key": _key(category3), "count": n}
+                for category3, n in db.execute(
+                    select(CustomerSpec.category3, func.count()).group_by(CustomerSpec.category3))
+            ] + [
+                {"metric": "rca_severity", "key": _key(severity), "count": n}
+                for severity, n in db.execute(
+                    select(RCAAnalysisHistory.severity, func.count()).group_by(RCAAnalysisHistory.severity))
+            ] + [
+                {"metric": "defect_types", "key": "",
+                 "count": db.execute(select(func.count()).select_from(DefectType)).scalar_one()},
+                {"metric": "defect_conditions", "key": "",
+                 "count": db.execute(select(func.count()).select_from(DefectCondition)).scalar_one()},
+                {"metric": _BUILT_METRIC, "key": "", "count": 1},
+            ]
+
+            # GROUP BY와 SELECT의 식이 같아야 하므로 bind parameter 대신 리터럴
+            hour_col = func.date_trunc(literal_column("'hour'"), RCAAnalysisHistory.created_at)
+            buckets = [
+                {"bucket_start": hour, "severity": _key(severity), "defect_type": _key(defect_type), "count": n}
+                for hour, severity, defect_type, n in db.execute(
+                    select(hour_col, RCAAnalysisHistory.severity, RCAAnalysisHistory.defect_type, func.count())
+                    .where(RCAAnalysisHistory.created_at >= self._cutoff())
+                    .group_by(hour_col, RCAAnalysisHistory.severity, RCAAnalysisHistory.defect_type)
+                )
+            ]
+
+            db.execute(delete(DashboardStatCount))
+            db.execute(delete(RCAStatBucket))
+            db.execute(DashboardStatCount.__table__.insert(), counts)
+            if buckets:
+                db.execute(RCAStatBucket.__table__.insert(), buckets)
+            db.commit()
+        print(f"Dashboard stats rebuilt ({len(counts)} counts, {len(buckets)} RCA buckets)")
+
+    # ========== 조회 ==========
+
+    @staticmethod
+    def _counts() -> Dict[str, Dict[str, int]]:
+        with SessionLocal() as db:
+            rows = db.execute(select(DashboardStatCount.metric, DashboardStatCount.key, DashboardStatCount.count))
+            grouped: Dict[str, Dict[str, int]] = {}
+            for metric, key, count in rows:
+                grouped.setdefault(metric, {})[key] = count
+        return grouped
+
+    def get_spec_stats(self) -> dict:
+        """Customer Spec 통계 (/customer-spec/stats, /api/ai-judgment/stats)"""
+        counts = self._counts()
+        by_customer = sorted((k, v) for k, v in counts.get("spec_customer", {}).items() if v > 0 and k)
+        by_category = sorted((k, v) for k, v in counts.get("spec_category", {}).items() if v > 0 and k)
+        return {
+            "total_specs": sum(v for _, v in by_customer),
+            "total_defect_types": counts.get("defect_types", {}).get("", 0),
+            "total_defect_conditions": counts.get("defect_conditions", {}).get("", 0),
+            "total_customers": len(by_customer),
+            "total_categories": len(by_category),
+            "by_customer": [{"customer": c, "count": n} for c, n in by_customer],
+            "by_category": [{"category": c, "count": n} for c, n in by_category],
+        }
+
+    def get_rca_stats(self) -> dict:
+        """RCA severity별 통계 (/rca/statistics)"""
+        by_severity = self._counts().get("rca_severity", {})
+        stats = {"total": sum(by_severity.values())}
+        for severity in SEVERITIES:
+            stats[severity] = by_severity.get(severity, 0)
+        return stats
+
+    def get_rca_timeseries(self, bucket: str = "hour", days: int = 7) -> List[dict]:
+        """
+        RCA 시간 버킷별 severity / defect_type 건수
+
+        Args:
+            bucket: "hour" 또는 "day"
+            days: 최근 N일 (최대 rca_retention_days)
+        """
+        since = _hour(datetime.now() - timedelta(days=min(days, self.rca_retention_days)))
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(RCAStatBucket.bucket_start, RCAStatBucket.severity, RCAStatBucket.defect_type,
+                       RCAStatBucket.count)
+                .where(RCAStatBucket.bucket_start >= since, RCAStatBucket.count > 0)
+            ).all()
+
+        merged: Dict[datetime, Dict[str, Counter]] = {}
+        for hour, severity, defect_type, count in rows:
+            key = hour.replace(hour=0) if bucket == "day" else hour
+            target = merged.setdefault(key, {"severity": Counter(), "defect_type": Counter()})
+            target["severity"][severity or None] += count
+            target["defect_type"][defect_type or None] += count
+
+        series = []
+        for key in sorted(merged):
+            by_severity = {k: v for k, v in merged[key]["severity"].items() if v > 0}
+            by_defect_type = {k: v for k, v in merged[key]["defect_type"].items() if v > 0}
+            total = sum(by_severity.values())
+            if total == 0:
+                continue
+            series.append({
+                "bucket_start": key.isoformat(),
+                "total": total,
+                "by_severity": by_severity,
+                "by_defect_type": by_defect_type,
+            })
+        return series
+
+
+# ========== ORM 이벤트 연결 ==========
+
+def _queue(target, delta: tuple):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, []).append(delta)
+
+
+def _spec_delta(target, sign):
+    return ("spec", sign, target.customer, target.category3)
+
+
+def _rca_delta(target, sign):
+    return ("rca", sign, target.created_at, target.severity, target.defect_type)
+
+
+_TRACKED = {
+    CustomerSpec: _spec_delta,
+    DefectType: lambda target, sign: ("defect_type", sign),
+    DefectCondition: lambda target, sign: ("defect_condition", sign),
+    RCAAnalysisHistory: _rca_delta,
+}
+
+# update 시 집계 키가 바뀌면 이전 값 -1 / 새 값 +1
+_KEY_FIELDS = {
+    CustomerSpec: ("customer", "category3"),
+    RCAAnalysisHistory: ("created_at", "severity", "defect_type"),
+}
+
+
+def _previous(target, fields: Sequence[str]):
+    """변경된 키 필드가 있으면 변경 전 값을 가진 객체, 없으면 None"""
+    state = inspect(target)
+    values, changed = {}, False
+    for name in fields:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name], changed = history.deleted[0], True
+        else:
+            values[name] = getattr(target, name)
+    return SimpleNamespace(**values) if changed else None
+
+
+def _register_listeners(service: StatsService):
+    for model, make_delta in _TRACKED.items():
+        def on_insert(mapper, connection, target, make_delta=make_delta):
+            _queue(target, make_delta(target, 1))
+
+        def on_delete(mapper, connection, target, make_delta=make_delta):
+            _queue(target, make_delta(target, -1))
+
+        event.listen(model, "after_insert", on_insert)
+        event.listen(model, "after_delete", on_delete)
+
+    for model, fields in _KEY_FIELDS.items():
+        def on_update(mapper, connection, target, make_delta=_TRACKED[model], fields=fields):
+            previous = _previous(target, fields)
+            if previous is not None:
+                _queue(target, make_delta(previous, -1))
+                _queue(target, make_delta(target, 1))
+
+        event.listen(model, "after_update", on_update)
+
+    @event.listens_for(Session, "after_flush")
+    def on_flush(session, flush_context):
+        # flush한 트랜잭션 안에서 기록 → 원본 행과 함께 commit / rollback
+        service.record(session, session.info.pop(_PENDING_KEY, None))
+
+    @event.listens_for(Session, "after_rollback")
+    def on_rollback(session):
+        session.info.pop(_PENDING_KEY, None)
+
+
+# 싱글톤 인스턴스
+stats_service = StatsService(rca_retention_days=settings.STATS_RCA_RETENTION_DAYS)
+_register_listeners(stats_service)
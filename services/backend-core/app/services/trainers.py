@@ -0,0 +1,204 @@
+"""
+Trainers
+학습 프로세스 안에서 실행되는 학습 루프 (app.services.training_jobs가 별도 프로세스로 호출)
+
+- yolo: ultralytics YOLO 학습 ({TRAINING_DATA_DIR}/{datasetId}/data.yaml)
+  완료 시 best.pt를 {MODEL_PATH}/{modelName}/{version}.pt로 복사 → 추론 라우트에서 modelName:version으로 사용
+- tiny: numpy logistic regression (datasetId로 seed를 정한 합성 데이터)
+  GPU / 데이터셋 없이 runner / 진행률 / 중단 / SSE 경로를 테스트하기 위한 CPU 전용 모드
+
+공통 인터페이스: train(job, device, on_epoch, should_stop) → result dict
+- on_epoch(epoch, total_epochs, metrics): epoch마다 호출 (1부터)
+- should_stop(): 중단 요청 여부 — epoch 경계(tiny는 batch마다)에서 확인하고 현재까지 결과로 종료
+- result["stoppedEarly"]: 중단 요청으로 모든 epoch를 마치기 전에 끝났는지
+  (마지막 epoch 후에 들어온 중단 요청은 완료로 봄 — runner가 cancelled / completed 판단에 사용)
+"""
+
+import hashlib
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+from app.core.config import settings
+
+
+MODES = ("yolo", "tiny")
+
+OnEpoch = Callable[[int, int, Dict[str, float]], None]
+
+
+def train(job: dict, device: str, on_epoch: OnEpoch, should_stop: Callable[[], bool]) -> dict:
+    output_dir = (Path(settings.TRAINING_OUTPUT_DIR) / job["job_id"]).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if job["mode"] == "tiny":
+        return _train_tiny(job, output_dir, on_epoch, should_stop)
+    if job["mode"] == "yolo":
+        return _train_yolo(job, device, output_dir, on_epoch, should_stop)
+    raise ValueError(f"Unknown training mode: {job['mode']}")
+
+
+# ========== tiny (CPU 테스트용) ==========
+
+def _train_tiny(job: dict, output_dir: Path, on_epoch: OnEpoch, should_stop: Callable[[], bool]) -> dict:
+    import numpy as np
+
+    config = job.get("config") or {}
+    epochs = job["total_epochs"]
+    samples = int(config.get("samples", 2048))
+    features = int(config.get("features", 32))
+    batch_size = max(1, int(config.get("batchSize", 64)))
+    learning_rate = float(config.get("learningRate", 0.5))
+    epoch_sleep = float(config.get("epochSleep", 0.0))  # 긴 학습 흉내 (중단 / SSE 테스트)
+
+    # 같은 데이터셋 id면 같은 데이터
+    seed = int(hashlib.sha256(job["dataset_id"].encode()).hexdigest()[:8], 16)
+    rng = np.random.default_rng(seed)
+    true_w = rng.normal(size=features)
+    x = rng.normal(size=(samples, features))
+    y = ((x @ true_w + rng.normal(scale=0.5, size=samples)) > 0).astype(np.float64)
+    split = int(samples * 0.8)
+    x_train, y_train, x_val, y_val = x[:split], y[:split], x[split:], y[split:]
+
+    def evaluate(w, b, xs, ys):
+        p = 1.0 / (1.0 + np.exp(-(xs @ w + b)))
+        p = np.clip(p, 1e-7, 1 - 1e-7)
+        loss = float(-np.mean(ys * np.log(p) + (1 - ys) * np.log(1 - p)))
+        return loss, float(np.mean((p > 0.5) == ys))
+
+    w, b = np.zeros(features), 0.0
+    best, best_epoch, completed = None, 0, 0
+    for epoch in range(1, epochs + 1):
+        order = rng.permutation(split)
+        for start in range(0, split, batch_size):
+            if should_stop():
+                break
+            index = order[start:start + batch_size]
+            p = 1.0 / (1.0 + np.exp(-(x_train[index] @ w + b)))
+            error = p - y_train[index]
+            w -= learning_rate * x_train[index].T @ error / len(index)
+            b -= learning_rate * float(error.mean())
+        else:
+            if epoch_sleep:
+                time.sleep(epoch_sleep)
+            loss, accuracy = evaluate(w, b, x_train, y_train)
+            val_loss, val_accuracy = evaluate(w, b, x_val, y_val)
+            metrics = {"loss": round(loss, 6), "accuracy": round(accuracy, 6),
+                       "val_loss": round(val_loss, 6), "val_accuracy": round(val_accuracy, 6)}
+            on_epoch(epoch, epochs, metrics)
+            completed = epoch
+            if best is None or val_loss < best["val_loss"]:
+                best, best_epoch = metrics, epoch
+                np.savez(output_dir / "tiny.npz", w=w, b=b)
+            if not should_stop():
+                continue
+        break
+
+    return {
+        "weights": str(output_dir / "tiny.npz") if best is not None else None,
+        "modelKey": None,
+        "bestEpoch": best_epoch,
+        "metrics": best or {},
+        "stoppedEarly": completed < epochs,
+    }
+
+
+# ========== YOLO ==========
+
+def _train_yolo(job: dict, device: str, output_dir: Path, on_epoch: OnEpoch,
+                should_stop: Callable[[], bool]) -> dict:
+    # ultralytics / torch는 학습 프로세스에서만 import
+    from ultralytics import YOLO
+
+    config = job.get("config") or {}
+    data = Path(settings.TRAINING_DATA_DIR) / job["dataset_id"] / "data.yaml"
+    if not data.exists():
+        raise FileNotFoundError(f"Dataset not found: {data}")
+
+    tracker = _MlflowTracker(job) if config.get("mlflow", True) else None
+    model = YOLO(config.get("baseWeights", "yolov8n.pt"))
+    stopped = {"early": False}
+
+    def on_fit_epoch_end(trainer):
+        metrics = {k: round(float(v), 6) for k, v in (trainer.metrics or {}).items()}
+        if getattr(trainer, "tloss", None) is not None:
+            metrics["loss"] = round(float(trainer.tloss.sum()), 6)
+        on_epoch(trainer.epoch + 1, trainer.epochs, metrics)
+        if tracker is not None:
+            tracker.log_metrics(metrics, trainer.epoch + 1)
+        if should_stop():
+            # 현재 epoch까지 저장 후 학습 루프 종료 (ultralytics는 epoch 경계에서 stop 확인)
+            # 마지막 epoch 뒤의 중단 요청은 조기 종료가 아님 (patience 조기 종료도 중단으로 보지 않음)
+            stopped["early"] = stopped["early"] or trainer.epoch + 1 < trainer.epochs
+            trainer.stop = True
+
+    model.add_callback("on_fit_epoch_end", on_fit_epoch_end)
+    model.train(
+        data=str(data),
+        epochs=job["total_epochs"],
+        imgsz=int(config.get("imgsz", 640)),
+        batch=config.get("batch", 16),
+        device=device,
+        workers=settings.TRAINING_CPU_THREADS,
+        project=str(output_dir.parent),
+        name=job["job_id"],
+        exist_ok=True,
+        verbose=False,
+        **(config.get("trainArgs") or {}),
+    )
+
+    trainer = model.trainer
+    best = Path(trainer.best)
+    version = str(config.get("version") or job["job_id"])
+    result = {"weights": None, "modelKey": None, "bestEpoch": None,
+              "metrics": {k: round(float(v), 6) for k, v in (trainer.metrics or {}).items()},
+              "stoppedEarly": stopped["early"]}
+    if best.exists():
+        # 추론 모델 경로로 배포 ({MODEL_PATH}/{name}/{version}.pt)
+        from app.services.inference_model import weights_path
+        target = weights_path(job["model_name"], version)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(best, target)
+        result.update(weights=str(target), modelKey=f"{job['model_name']}:{version}",
+                      bestEpoch=getattr(trainer, "best_epoch", None))
+    if tracker is not None:
+        result["mlflowRunId"] = tracker.finish(result)
+    return result
+
+
+class _MlflowTracker:
+    """MLflow 기록 (mlflow 미설치 / 서버 연결 실패 시 기록 생략)"""
+
+    def __init__(self, job: dict):
+        self.run = None
+        try:
+            import mlflow
+            mlflow.set_tracking_uri(settings.MLFLOW_TRACKING_URI)
+            mlflow.set_experiment(settings.MLFLOW_EXPERIMENT_NAME)
+            self.mlflow = mlflow
+            self.run = mlflow.start_run(run_name=job["job_id"])
+            mlflow.log_params({"model_name": job["model_name"], "dataset_id": job["dataset_id"],
+                               "epochs": job["total_epochs"],
+                               **{k: v for k, v in (job.get("config") or {}).items() if not isinstance(v, dict)}})
+        except Exception as e:
+            print(f"MLflow disabled: {e}")
+
+    def log_metrics(self, metrics: dict, step: int):
+        if self.run is None:
+            return
+        try:
+            # MLflow metric 이름에 '(' 등은 허용되지 않음
+            self.mlflow.log_metrics({k.replace("(", "_").replace(")", ""): v for k, v in metrics.items()}, step=step)
+        except Exception as e:
+            print(f"MLflow log error: {e}")
+
+    def finish(self, result: dict):
+        if self.run is None:
+            return None
+        try:
+            if result.get("weights"):
+                self.mlflow.log_artifact(result["weights"])
+            self.mlflow.end_run()
+        except Exception as e:
+            print(f"MLflow finish error: {e}")
+        return self.run.info.run_id
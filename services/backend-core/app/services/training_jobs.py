@@ -0,0 +1,547 @@
+"""
+Training Job Runner
+모델 학습 작업 상태 / 진행률 / 중단 (ai_spec_v2.training_jobs, training_job_epochs)
+
+- /training/start는 작업을 queued로 저장만 하고, runner가 claim해서 별도 프로세스(spawn)로 학습
+  → API 프로세스의 이벤트 루프 / 추론 워커 / 메모리와 분리되고, 학습 프로세스가 죽어도 API는 영향 없음
+- 학습 프로세스 → runner: multiprocessing Queue로 epoch metrics / 종료 결과 전달 → runner가 DB에 기록
+  (학습 프로세스는 DB에 접속하지 않음)
+- 중단: API가 cancel_requested 설정 → runner가 학습 프로세스의 Event를 set
+  → 학습 루프가 epoch(tiny는 batch) 경계에서 현재까지 결과를 저장하고 종료
+  TRAINING_CANCEL_GRACE_SECONDS 안에 끝나지 않으면 terminate
+- 리소스 제한 (학습 프로세스): nice, BLAS / OpenMP 스레드 수, 사용할 GPU(CUDA_VISIBLE_DEVICES),
+  GPU 메모리 비율, CPU 학습 시 메모리 상한(RLIMIT_AS)
+- 동시 학습 수(TRAINING_MAX_CONCURRENT)는 모든 runner 합계 — claim을 advisory lock으로 직렬화
+- runner가 비정상 종료되면 heartbeat가 끊긴 작업을 다른 runner가 failed 처리
+- API 프로세스 안(TRAINING_RUNNER_ENABLED) 또는 별도 프로세스로 실행:
+    python -m app.services.training_jobs
+- 로컬 / 테스트용으로 SQLite 파일 DB도 사용 가능 (create_local_session_factory, --sqlite)
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.database.connection import SessionLocal, create_sqlite_session_factory
+from app.database.schema import TrainingEpoch, TrainingJob
+
+
+ACTIVE_STATUSES = ("running", "stopping")
+FINAL_STATUSES = ("completed", "cancelled", "failed")
+
+# claim 직렬화용 advisory lock key (Postgres)
+_CLAIM_LOCK_KEY = 0x7261696E
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class TrainingJobStore:
+    """학습 작업 저장소 (동기 — runner 스레드 / threadpool에서 호출)"""
+
+    def __init__(self, session_factory: Callable = SessionLocal):
+        self.session_factory = session_factory
+
+    # ========== 등록 / 조회 ==========
+
+    def create(self, job_id: str, model_name: str, dataset_id: str, mode: str,
+               config: dict, total_epochs: int) -> Optional[dict]:
+        """작업 등록 (queued), 같은 job_id가 이미 있으면 None"""
+        with self.session_factory() as db:
+            job = TrainingJob(
+                job_id=job_id, model_name=model_name, dataset_id=dataset_id, mode=mode, config=config,
+                status="queued", cancel_requested=False, current_epoch=0, total_epochs=total_epochs,
+                created_at=datetime.now(),
+            )
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return None
+            return self._job_dict(job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self.session_factory() as db:
+            job = db.execute(select(TrainingJob).where(TrainingJob.job_id == job_id)).scalar_one_or_none()
+            return self._job_dict(job) if job else None
+
+    def epochs(self, job_id: str, after: int = 0) -> List[dict]:
+        """epoch별 metrics (after 이후, epoch 순)"""
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(TrainingEpoch)
+                .join(TrainingJob, TrainingJob.id == TrainingEpoch.job_id)
+                .where(TrainingJob.job_id == job_id, TrainingEpoch.epoch > after)
+                .order_by(TrainingEpoch.epoch)
+            ).scalars().all()
+            return [
+                {"epoch": row.epoch, "metrics": row.metrics, "createdAt": _iso(row.created_at)}
+                for row in rows
+            ]
+
+    def request_cancel(self, job_id: str) -> Optional[dict]:
+        """
+        중단 요청 — queued는 즉시 cancelled, running은 stopping (runner가 학습 프로세스에 전달)
+
+        Returns:
+            변경 후 작업 dict (이미 끝난 작업은 그대로), 작업이 없으면 None
+        """
+        now = datetime.now()
+        with self.session_factory() as db:
+            db.execute(
+                update(TrainingJob)
+                .where(TrainingJob.job_id == job_id, TrainingJob.status == "queued")
+                .values(status="cancelled", cancel_requested=True, finished_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(
+                update(TrainingJob)
+                .where(TrainingJob.job_id == job_id, TrainingJob.status == "running")
+                .values(status="stopping", cancel_requested=True)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        return self.get(job_id)
+
+    @staticmethod
+    def _job_dict(job: TrainingJob) -> dict:
+        return {
+            "jobId": job.job_id,
+            "modelName": job.model_name,
+            "datasetId": job.dataset_id,
+            "mode": job.mode,
+            "config": job.config,
+            "status": job.status,
+            "cancelRequested": job.cancel_requested,
+            "currentEpoch": job.current_epoch,
+            "totalEpochs": job.total_epochs,
+            "progress": round(job.current_epoch / job.total_epochs, 4) if job.total_epochs else 0.0,
+            "metrics": job.metrics,
+            "result": job.result,
+            "error": job.error,
+            "runnerId": job.runner_id,
+            "createdAt": _iso(job.created_at),
+            "startedAt": _iso(job.started_at),
+            "finishedAt": _iso(job.finished_at),
+            "heartbeatAt": _iso(job.heartbeat_at),
+        }
+
+    # ========== runner용 ==========
+
+    def claim_next(self, runner_id: str, max_concurrent: int) -> Optional[dict]:
+        """실행 중인 학습이 max_concurrent 미만이면 가장 오래된 queued 작업을 running으로 claim"""
+        now = datetime.now()
+        with self.session_factory() as db:
+            if db.connection().dialect.name == "postgresql":
+                # 실행 수 확인 → claim 사이에 다른 runner가 끼어들지 않도록 (트랜잭션 종료 시 해제)
+                db.execute(select(func.pg_advisory_xact_lock(_CLAIM_LOCK_KEY)))
+            active = db.execute(
+                select(func.count()).select_from(TrainingJob).where(TrainingJob.status.in_(ACTIVE_STATUSES))
+            ).scalar_one()
+            if active >= max_concurrent:
+                db.commit()
+                return None
+            job = db.execute(
+                select(TrainingJob)
+                .where(TrainingJob.status == "queued")
+                .order_by(TrainingJob.created_at, TrainingJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar_one_or_none()
+            if job is None:
+                db.commit()
+                return None
+            job.status, job.runner_id = "running", runner_id
+            job.started_at = job.heartbeat_at = now
+            claimed = {
+                "job_id": job.job_id, "model_name": job.model_name, "dataset_id": job.dataset_id,
+                "mode": job.mode, "config": job.config or {}, "total_epochs": job.total_epochs,
+            }
+            db.commit()
+            return claimed
+
+    def set_pid(self, job_id: str, pid: Optional[int]):
+        with self.session_factory() as db:
+            db.execute(
+                update(TrainingJob).where(TrainingJob.job_id == job_id).values(pid=pid)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    def record_epoch(self, job_id: str, epoch: int, total_epochs: int, metrics: dict):
+        """epoch 완료 기록 (진행률 + 이력)"""
+        now = datetime.now()
+        with self.session_factory() as db:
+            job_pk = db.execute(
+                update(TrainingJob)
+                .where(TrainingJob.job_id == job_id, TrainingJob.status.in_(ACTIVE_STATUSES))
+                .values(current_epoch=epoch, total_epochs=total_epochs, metrics=metrics, heartbeat_at=now)
+                .returning(TrainingJob.id)
+                .execution_options(synchronize_session=False)
+            ).scalar_one_or_none()
+            if job_pk is not None:
+                db.add(TrainingEpoch(job_id=job_pk, epoch=epoch, metrics=metrics, created_at=now))
+            db.commit()
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        """running / stopping 작업 종료 기록 (completed / cancelled / failed)"""
+        with self.session_factory() as db:
+            db.execute(
+                update(TrainingJob)
+                .where(TrainingJob.job_id == job_id, TrainingJob.status.in_(ACTIVE_STATUSES))
+                .values(status=status, result=result, error=error, pid=None, finished_at=datetime.now())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    def heartbeat(self, job_ids: Iterable[str]):
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        with self.session_factory() as db:
+            db.execute(
+                update(TrainingJob)
+                .where(TrainingJob.job_id.in_(job_ids), TrainingJob.status.in_(ACTIVE_STATUSES))
+                .values(heartbeat_at=datetime.now())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    def cancel_requested_ids(self, job_ids: Iterable[str]) -> set:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return set()
+        with self.session_factory() as db:
+            return set(db.execute(
+                select(TrainingJob.job_id)
+                .where(TrainingJob.job_id.in_(job_ids), TrainingJob.cancel_requested.is_(True))
+            ).scalars())
+
+    def fail_stale(self, timeout: float) -> int:
+        """heartbeat가 timeout 이상 끊긴 실행 중 작업 (runner 비정상 종료) 실패 처리"""
+        now = datetime.now()
+        with self.session_factory() as db:
+            job_ids = list(db.execute(
+                update(TrainingJob)
+                .where(TrainingJob.status.in_(ACTIVE_STATUSES),
+                       TrainingJob.heartbeat_at < now - timedelta(seconds=timeout))
+                .values(status="failed", error="training runner heartbeat lost", pid=None, finished_at=now)
+                .returning(TrainingJob.job_id)
+                .execution_options(synchronize_session=False)
+            ).scalars())
+            db.commit()
+        for job_id in job_ids:
+            print(f"Training job {job_id} failed: runner heartbeat lost")
+        return len(job_ids)
+
+
+def create_local_session_factory(path: str) -> Callable:
+    """
+    SQLite 파일 DB 세션 팩토리 (로컬 / 테스트용 stand-in, 학습 작업 / epoch 테이블 생성)
+
+    advisory lock이 없지만 SQLite는 쓰기 트랜잭션이 직렬화되므로 claim이 겹치지 않습니다.
+    """
+    return create_sqlite_session_factory(path, (TrainingJob, TrainingEpoch))
+
+
+# ========== 학습 프로세스 ==========
+
+def resolve_device(mode: str) -> str:
+    """학습 장치 (cpu 또는 GPU 번호 "0" / "0,1")"""
+    if mode == "tiny":
+        return "cpu"
+    device = settings.TRAINING_DEVICE
+    if device == "auto":
+        device = str(settings.GPU_DEVICE_ID) if settings.USE_GPU else "cpu"
+    return device
+
+
+def _apply_limits(limits: dict) -> str:
+    """학습 프로세스 리소스 제한 (torch / numpy import 전에 호출), 학습 라이브러리에 넘길 device 반환"""
+    if limits["nice"] > 0:
+        try:
+            os.nice(limits["nice"])
+        except OSError as e:
+            print(f"Training nice error: {e}")
+    threads = str(max(1, limits["cpu_threads"]))
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = threads
+
+    device = limits["device"]
+    if device == "cpu":
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+        # GPU 학습은 CUDA가 큰 가상 주소 공간을 예약하므로 RLIMIT_AS는 CPU 학습에만 적용
+        if limits["memory_limit_mb"] > 0:
+            try:
+                import resource
+                limit = limits["memory_limit_mb"] * 1024 * 1024
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+            except (ImportError, ValueError, OSError) as e:
+                print(f"Training memory limit error: {e}")
+        return "cpu"
+
+    # 지정한 GPU만 보이게 하고, 프로세스 안에서는 0부터 다시 번호를 매김
+    os.environ["CUDA_VISIBLE_DEVICES"] = device
+    visible = ",".join(str(index) for index in range(len(device.split(","))))
+    if limits["gpu_memory_fraction"] > 0:
+        try:
+            import torch
+            for index in range(torch.cuda.device_count()):
+                torch.cuda.set_per_process_memory_fraction(limits["gpu_memory_fraction"], index)
+        except Exception as e:
+            print(f"Training GPU memory limit error: {e}")
+    return visible
+
+
+def _train_process(job: dict, messages, cancel_event, limits: dict):
+    """학습 프로세스 진입점 (spawn) — 진행 상황은 messages로만 전달"""
+    job_id = job["job_id"]
+    parent_pid = os.getppid()
+
+    def should_stop() -> bool:
+        # runner가 죽으면 (부모 변경) 고아 프로세스로 계속 학습하지 않음
+        return cancel_event.is_set() or os.getppid() != parent_pid
+
+    def on_epoch(epoch: int, total_epochs: int, metrics: dict):
+        messages.put(("epoch", job_id, {"epoch": epoch, "totalEpochs": total_epochs, "metrics": metrics}))
+
+    try:
+        device = _apply_limits(limits)
+        from app.services import trainers
+        result = trainers.train(job, device, on_epoch, should_stop)
+        # 학습이 끝난 뒤(배포 후 포함)에 들어온 중단 요청으로 완료된 작업을 cancelled로 만들지 않음
+        messages.put(("cancelled" if result.get("stoppedEarly") else "completed", job_id, {"result": result}))
+    except Exception as e:
+        traceback.print_exc()
+        messages.put(("failed", job_id, {"error": f"{type(e).__name__}: {e}"}))
+
+
+@dataclass
+class _Child:
+    process: multiprocessing.Process
+    cancel_event: object
+    cancel_at: Optional[float] = None
+    final: Optional[str] = None
+
+
+# ========== runner ==========
+
+class TrainingRunner:
+    """queued 학습 작업을 claim해서 학습 프로세스를 실행 / 감시 (supervisor 스레드 1개)"""
+
+    def __init__(self, store: TrainingJobStore, max_concurrent: int = 1, poll_interval: float = 1.0,
+                 cancel_grace_seconds: float = 60.0, heartbeat_timeout: float = 120.0):
+        """
+        Args:
+            max_concurrent: 동시에 실행하는 학습 수 (모든 runner 합계)
+            poll_interval: queue / 중단 요청 확인 주기 (초)
+            cancel_grace_seconds: 중단 요청 후 강제 종료까지 대기 시간
+            heartbeat_timeout: 다른 runner의 heartbeat가 끊긴 작업을 실패 처리하는 기준
+        """
+        self.store = store
+        self.max_concurrent = max(1, max_concurrent)
+        self.poll_interval = poll_interval
+        self.cancel_grace_seconds = cancel_grace_seconds
+        self.heartbeat_timeout = heartbeat_timeout
+        self.runner_id = f"{socket.gethostname()}:{os.getpid()}"
+        # fork는 부모의 스레드 / DB 연결 / CUDA context를 복제하므로 spawn 사용
+        self._context = multiprocessing.get_context("spawn")
+        self._messages = None
+        self._children: Dict[str, _Child] = {}
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="training-runner", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """새 작업 / 중단 요청 시 즉시 확인"""
+        self._wake.set()
+
+    def stop(self, timeout: float = 10.0):
+        """runner 종료 — 실행 중인 학습은 중단 요청 후 timeout 안에 끝나지 않으면 강제 종료 (failed 처리)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout + self.poll_interval + 5.0)
+            self._thread = None
+
+    @property
+    def running(self) -> int:
+        return sum(child.process.is_alive() for child in self._children.values())
+
+    def run(self):
+        if self._messages is None:
+            self._messages = self._context.Queue()
+        print(f"Training runner started: {self.runner_id}")
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Training runner error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        self._shutdown()
+
+    def run_once(self):
+        self._drain()
+        self._relay_cancel()
+        self._reap()
+        self.store.heartbeat(self._children)
+        self.store.fail_stale(self.heartbeat_timeout)
+        self._launch()
+
+    # ---------- 내부 ----------
+
+    def _launch(self):
+        while len(self._children) < self.max_concurrent and not self._stop.is_set():
+            job = self.store.claim_next(self.runner_id, self.max_concurrent)
+            if job is None:
+                return
+            limits = {
+                "device": resolve_device(job["mode"]),
+                "nice": settings.TRAINING_NICE,
+                "cpu_threads": settings.TRAINING_CPU_THREADS,
+                "memory_limit_mb": settings.TRAINING_MEMORY_LIMIT_MB,
+                "gpu_memory_fraction": settings.TRAINING_GPU_MEMORY_FRACTION,
+            }
+            cancel_event = self._context.Event()
+            # daemon이면 ultralytics dataloader worker 프로세스를 만들 수 없음 → stop()에서 직접 정리
+            process = self._context.Process(
+                target=_train_process, args=(job, self._messages, cancel_event, limits),
+                name=f"training-{job['job_id']}",
+            )
+            try:
+                process.start()
+            except Exception as e:
+                self.store.finish(job["job_id"], "failed", error=f"failed to start training process: {e}")
+                continue
+            self._children[job["job_id"]] = _Child(process, cancel_event)
+            self.store.set_pid(job["job_id"], process.pid)
+            print(f"Training job {job['job_id']} started (pid {process.pid}, device {limits['device']})")
+
+    def _drain(self):
+        while True:
+            try:
+                kind, job_id, payload = self._messages.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self._handle(kind, job_id, payload)
+            except Exception as e:
+                print(f"Training message error ({job_id} {kind}): {e}")
+
+    def _handle(self, kind: str, job_id: str, payload: dict):
+        child = self._children.get(job_id)
+        if kind == "epoch":
+            self.store.record_epoch(job_id, payload["epoch"], payload["totalEpochs"], payload["metrics"])
+            return
+        if kind == "cancelled" and self._stop.is_set():
+            # runner 종료로 중단된 작업은 사용자 중단과 구분
+            kind, payload = "failed", {"error": "training interrupted: runner stopped", **payload}
+        self.store.finish(job_id, kind, result=payload.get("result"), error=payload.get("error"))
+        if child is not None:
+            child.final = kind
+        print(f"Training job {job_id} {kind}")
+
+    def _relay_cancel(self):
+        waiting = [job_id for job_id, child in self._children.items() if child.cancel_at is None]
+        now = time.monotonic()
+        for job_id in self.store.cancel_requested_ids(waiting):
+            self._cancel(job_id, now)
+        for job_id, child in self._children.items():
+            if child.cancel_at is not None and child.process.is_alive() \
+                    and now - child.cancel_at > self.cancel_grace_seconds:
+                print(f"Training job {job_id} did not stop in {self.cancel_grace_seconds}s, terminating")
+                child.process.terminate()
+
+    def _cancel(self, job_id: str, now: float):
+        child = self._children[job_id]
+        child.cancel_event.set()
+        child.cancel_at = now
+
+    def _reap(self):
+        for job_id, child in list(self._children.items()):
+            if child.process.is_alive():
+                continue
+            child.process.join()
+            # 종료 직전에 보낸 결과 메시지 반영
+            self._drain()
+            if child.final is None:
+                if child.cancel_at is not None and not self._stop.is_set():
+                    self.store.finish(job_id, "cancelled", error="training process terminated after cancel request")
+                else:
+                    self.store.finish(job_id, "failed",
+                                      error=f"training process exited with code {child.process.exitcode}")
+                print(f"Training job {job_id} process exited ({child.process.exitcode})")
+            del self._children[job_id]
+
+    def _shutdown(self, timeout: float = 10.0):
+        now = time.monotonic()
+        for job_id in self._children:
+            self._cancel(job_id, now)
+        deadline = now + timeout
+        for child in self._children.values():
+            child.process.join(max(0.0, deadline - time.monotonic()))
+            if child.process.is_alive():
+                child.process.terminate()
+                child.process.join(5.0)
+        self._reap()
+
+
+# 싱글톤 인스턴스
+training_jobs = TrainingJobStore()
+training_runner = TrainingRunner(
+    training_jobs,
+    max_concurrent=settings.TRAINING_MAX_CONCURRENT,
+    poll_interval=settings.TRAINING_POLL_INTERVAL,
+    cancel_grace_seconds=settings.TRAINING_CANCEL_GRACE_SECONDS,
+    heartbeat_timeout=settings.TRAINING_HEARTBEAT_TIMEOUT,
+)
+
+
+# ========== runner 프로세스 (CLI) ==========
+
+def main():
+    parser = argparse.ArgumentParser(description="Training job runner")
+    parser.add_argument("--max-concurrent", type=int, default=settings.TRAINING_MAX_CONCURRENT,
+                        help="동시에 실행하는 학습 수 (모든 runner 합계)")
+    parser.add_argument("--sqlite", default=None, help="Postgres 대신 사용할 SQLite 파일 (로컬 테스트)")
+    args = parser.parse_args()
+
+    store = TrainingJobStore(create_local_session_factory(args.sqlite)) if args.sqlite else training_jobs
+    runner = TrainingRunner(
+        store,
+        max_concurrent=args.max_concurrent,
+        poll_interval=settings.TRAINING_POLL_INTERVAL,
+        cancel_grace_seconds=settings.TRAINING_CANCEL_GRACE_SECONDS,
+        heartbeat_timeout=settings.TRAINING_HEARTBEAT_TIMEOUT,
+    )
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        runner._stop.set()
+        runner._shutdown()
+
+
+if __name__ == "__main__":
+    main()
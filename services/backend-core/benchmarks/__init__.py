@@ -0,0 +1,7 @@
+"""
+CPU 집약 코드 벤치마크 (extractors / mask 후처리 / slicer)
+합성 PCB 이미지로 측정하며 결과 JSON을 커밋 간 비교합니다.
+
+    python -m benchmarks.run --help
+    python -m benchmarks.compare --help
+"""
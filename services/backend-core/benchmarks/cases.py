@@ -0,0 +1,216 @@
+"""
+벤치마크 케이스 정의
+
+각 케이스는 (group, name, size, params) 로 식별되며 run()만 측정 대상입니다.
+setup()이 있으면 매 반복마다 측정 전에 호출되어 그 반환값이 run()에 전달됩니다
+(예: 슬라이서 출력 폴더 초기화).
+"""
+
+import inspect
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import cv2
+from PIL import Image
+
+from app.extractors import BoxAutoExtractor, MaskPostProcessor, PolygonExtractor, YOLOExtractor
+from app.services.image_slicer import encode_thumbnail, make_thumbnails, plan_slices, slice_image
+
+from . import synthetic
+
+
+@dataclass
+class Case:
+    group: str
+    name: str
+    size: str
+    run: Callable[..., Any]
+    params: Dict[str, Any] = field(default_factory=dict)
+    setup: Optional[Callable[[], Any]] = None
+    teardown: Optional[Callable[[Any], None]] = None
+
+    @property
+    def key(self) -> str:
+        """결과 비교용 고유 키 (예: slicer/slice[tile=512,overlap=25]@4k)"""
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.group}/{self.name}{f'[{params}]' if params else ''}@{self.size}"
+
+
+# ========== Box Auto Extractor ==========
+
+# grabCut은 박스가 아닌 전체 이미지를 대상으로 반복하므로 1k에서도 수 초, 4k 이상은 수 분 걸림
+_BOX_METHOD_MAX_SIZE = {"grabcut": "1k"}
+
+
+def box_auto_cases(size: str, respect_limits: bool = True) -> List[Case]:
+    image = synthetic.pcb_image(size)
+    x, y, w, h = synthetic.defect_box(size)
+    extractor = BoxAutoExtractor()
+    cases = []
+    for method in extractor.get_available_methods():
+        limit = _BOX_METHOD_MAX_SIZE.get(method)
+        if respect_limits and limit and synthetic.SIZES[size] > synthetic.SIZES[limit]:
+            continue
+        cases.append(Case(
+            "box_auto", method, size,
+            run=lambda method=method: extractor.extract_with_method(image, x, y, w, h, method),
+            params={"box": w},
+        ))
+    return cases
+
+
+# ========== Mask Post Processor ==========
+
+_MASK_OP_PREFIXES = ("apply_", "adjust_", "select_", "merge_", "filter_", "refine_",
+                     "invert_", "fill_", "smooth_", "extract_")
+# grayscale 이미지를 입력으로 받는 op
+_GRAY_INPUT_OPS = {"adjust_threshold_offset", "apply_adaptive_gaussian", "apply_adaptive_mean"}
+
+
+def mask_op_names() -> List[str]:
+    """MaskPostProcessor의 공개 op 목록 (새 op가 추가되면 자동 포함)"""
+    return sorted(
+        name for name, _ in inspect.getmembers(MaskPostProcessor, inspect.isfunction)
+        if name.startswith(_MASK_OP_PREFIXES)
+    )
+
+
+def mask_op_cases(size: str) -> List[Case]:
+    mask = synthetic.defect_mask(size)
+    gray = cv2.cvtColor(synthetic.pcb_image(size), cv2.COLOR_BGR2GRAY)
+    processor = MaskPostProcessor()
+    cases = []
+    for name in mask_op_names():
+        if name == "apply_skeleton" and not processor.is_skimage_available():
+            continue
+        op = getattr(processor, name)
+        source = gray if name in _GRAY_INPUT_OPS else mask
+        cases.append(Case("mask_ops", name, size, run=lambda op=op, source=source: op(source)))
+    return cases
+
+
+# ========== YOLO contour decode ==========
+
+class _StubMasks:
+    def __init__(self, data):
+        self.data = data
+
+
+class _StubResult:
+    def __init__(self, data):
+        self.masks = _StubMasks(data)
+
+
+class StubYOLOModel:
+    """predict()가 고정 segmentation 마스크를 반환하는 모델 (추론 비용 제외, decode만 측정)"""
+
+    def __init__(self, count: int, resolution: int = 640):
+        self._results = [_StubResult(synthetic.yolo_masks(count, resolution))]
+
+    def predict(self, source=None, **kwargs):
+        return self._results
+
+
+def yolo_decode_cases(size: str, mask_counts=(8, 64)) -> List[Case]:
+    image = synthetic.pcb_image(size)
+    cases = []
+    for count in mask_counts:
+        extractor = YOLOExtractor(model_path="stub")
+        extractor.model = StubYOLOModel(count)
+        cases.append(Case("yolo_decode", "extract", size, run=lambda e=extractor: e.extract(image),
+                          params={"masks": count}))
+    return cases
+
+
+# ========== Polygon Extractor ==========
+
+def polygon_cases(size: str) -> List[Case]:
+    image = synthetic.pcb_image(size)
+    points = synthetic.polygon_points(size)
+    extractor = PolygonExtractor()
+    return [
+        Case("polygon", "extract", size, run=lambda: extractor.extract(image, points),
+             params={"points": len(points)}),
+        Case("polygon", "extract_with_bbox", size, run=lambda: extractor.extract_with_bbox(image, points),
+             params={"points": len(points)}),
+        Case("polygon", "validate", size, run=lambda: extractor.validate_polygon(points, image.shape),
+             params={"points": len(points)}),
+        Case("polygon", "simplify", size, run=lambda: extractor.simplify_polygon(points),
+             params={"points": len(points)}),
+    ]
+
+
+# ========== Thumbnail / Slicer ==========
+
+def _pil_image(size: str) -> Image.Image:
+    return Image.fromarray(cv2.cvtColor(synthetic.pcb_image(size), cv2.COLOR_BGR2RGB))
+
+
+def thumbnail_cases(size: str, workdir: str) -> List[Case]:
+    img = _pil_image(size)
+
+    # 슬라이스 썸네일 입력 (512px 타일 20장)
+    tile_dir = os.path.join(workdir, f"thumb_tiles_{size}")
+    os.makedirs(tile_dir, exist_ok=True)
+    tasks, _, _ = plan_slices(img.width, img.height, 512, 512)
+    tasks = tasks[:20]
+    slice_image(img, tile_dir, tasks, 512, 512, max_workers=1)
+    filenames = [task[3] for task in tasks]
+
+    return [
+        Case("thumbnail", "preview", size, run=lambda: encode_thumbnail(img.copy(), (300, 300)),
+             params={"max": 300}),
+        Case("thumbnail", "slice_thumbnails", size, run=lambda: make_thumbnails(tile_dir, filenames),
+             params={"count": len(filenames)}),
+    ]
+
+
+def slicer_cases(size: str, workdir: str, tile_sizes=(512, 1024), overlaps=(0, 25),
+                 file_format: str = "jpg") -> List[Case]:
+    img = _pil_image(size)
+    cases = []
+    for tile in tile_sizes:
+        for overlap in overlaps:
+            out_dir = os.path.join(workdir, f"slices_{size}_{tile}_{overlap}")
+
+            def setup(out_dir=out_dir):
+                shutil.rmtree(out_dir, ignore_errors=True)
+                os.makedirs(out_dir)
+                return out_dir
+
+            def run(out_dir, tile=tile, overlap=overlap):
+                tasks, _, _ = plan_slices(img.width, img.height, tile, tile, overlap, file_format=file_format)
+                slice_image(img, out_dir, tasks, tile, tile, file_format)
+
+            cases.append(Case(
+                "slicer", "slice", size, run=run, setup=setup,
+                teardown=lambda out_dir: shutil.rmtree(out_dir, ignore_errors=True),
+                params={"tile": tile, "overlap": overlap, "format": file_format},
+            ))
+    return cases
+
+
+GROUPS = ("box_auto", "mask_ops", "yolo_decode", "polygon", "thumbnail", "slicer")
+
+
+def build_cases(size: str, groups=GROUPS, workdir: Optional[str] = None, respect_limits: bool = True,
+                tile_sizes=(512, 1024), overlaps=(0, 25)) -> List[Case]:
+    """size 하나에 대한 선택된 그룹의 케이스 목록"""
+    workdir = workdir or tempfile.mkdtemp(prefix="pcb_bench_")
+    cases: List[Case] = []
+    if "box_auto" in groups:
+        cases += box_auto_cases(size, respect_limits)
+    if "mask_ops" in groups:
+        cases += mask_op_cases(size)
+    if "yolo_decode" in groups:
+        cases += yolo_decode_cases(size)
+    if "polygon" in groups:
+        cases += polygon_cases(size)
+    if "thumbnail" in groups:
+        cases += thumbnail_cases(size, workdir)
+    if "slicer" in groups:
+        cases += slicer_cases(size, workdir, tile_sizes, overlaps)
+    return cases
@@ -0,0 +1,134 @@
+"""
+벤치마크 결과 비교 (회귀 검출)
+
+사용법:
+    python -m benchmarks.compare baseline.json current.json
+    python -m benchmarks.compare baseline.json current.json --threshold 0.10 --group-threshold slicer=0.30
+
+median 기준으로 (current / baseline - 1) 이 threshold를 넘고, 절대 차이가
+--abs-tolerance-ms 이상이면 회귀로 판정합니다. 회귀가 있으면 exit code 1.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+
+DEFAULT_THRESHOLD = 0.10
+# 디스크 I/O가 섞인 그룹은 노이즈가 커서 기본 허용치를 높게 둠
+DEFAULT_GROUP_THRESHOLDS = {
+    "slicer": 0.25,
+    "thumbnail": 0.20,
+}
+DEFAULT_ABS_TOLERANCE_MS = 0.5
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(
+    baseline: dict,
+    current: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    group_thresholds: Optional[Dict[str, float]] = None,
+    abs_tolerance_ms: float = DEFAULT_ABS_TOLERANCE_MS,
+) -> List[dict]:
+    """
+    케이스별 비교 결과 목록
+
+    status: "regression" / "improvement" / "ok" / "new" / "missing"
+    """
+    thresholds = dict(DEFAULT_GROUP_THRESHOLDS)
+    thresholds.update(group_thresholds or {})
+
+    base_results = baseline["results"]
+    cur_results = current["results"]
+    rows = []
+    for key in sorted(set(base_results) | set(cur_results)):
+        base = base_results.get(key)
+        cur = cur_results.get(key)
+        if base is None or cur is None:
+            rows.append({"key": key, "status": "new" if base is None else "missing",
+                         "baseline_ms": base and base["median_ms"], "current_ms": cur and cur["median_ms"]})
+            continue
+
+        group = cur.get("group", key.split("/", 1)[0])
+        limit = thresholds.get(group, threshold)
+        base_ms, cur_ms = base["median_ms"], cur["median_ms"]
+        change = (cur_ms / base_ms - 1) if base_ms > 0 else 0.0
+
+        status = "ok"
+        if abs(cur_ms - base_ms) >= abs_tolerance_ms:
+            if change > limit:
+                status = "regression"
+            elif change < -limit:
+                status = "improvement"
+
+        rows.append({
+            "key": key,
+            "status": status,
+            "baseline_ms": base_ms,
+            "current_ms": cur_ms,
+            "change": round(change, 4),
+            "threshold": limit,
+        })
+    return rows
+
+
+def print_report(rows: List[dict], verbose: bool = False):
+    width = max((len(r["key"]) for r in rows), default=10)
+    for row in rows:
+        if not verbose and row["status"] == "ok":
+            continue
+        if row["status"] in ("new", "missing"):
+            print(f"{row['status'].upper():<12} {row['key']}")
+            continue
+        print(f"{row['status'].upper():<12} {row['key']:<{width}}  "
+              f"{row['baseline_ms']:>10.3f} ms → {row['current_ms']:>10.3f} ms  "
+              f"({row['change'] * 100:+.1f}%, limit {row['threshold'] * 100:.0f}%)")
+
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    print("Summary: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+
+
+def parse_group_thresholds(items: List[str]) -> Dict[str, float]:
+    """['slicer=0.3'] → {'slicer': 0.3}"""
+    result = {}
+    for item in items or []:
+        group, _, value = item.partition("=")
+        if not value:
+            raise argparse.ArgumentTypeError(f"Invalid --group-threshold '{item}' (expected group=ratio)")
+        result[group] = float(value)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="허용 증가율 (median 기준, 기본 0.10 = 10%%)")
+    parser.add_argument("--group-threshold", action="append", default=[],
+                        help="그룹별 허용 증가율 (예: slicer=0.30), 여러 번 지정 가능")
+    parser.add_argument("--abs-tolerance-ms", type=float, default=DEFAULT_ABS_TOLERANCE_MS,
+                        help="이 값보다 작은 절대 차이는 무시")
+    parser.add_argument("-v", "--verbose", action="store_true", help="변화 없는 케이스도 출력")
+    args = parser.parse_args(argv)
+
+    rows = compare_results(
+        load(args.baseline), load(args.current),
+        threshold=args.threshold,
+        group_thresholds=parse_group_thresholds(args.group_threshold),
+        abs_tolerance_ms=args.abs_tolerance_ms,
+    )
+    print_report(rows, verbose=args.verbose)
+    return 1 if any(r["status"] == "regression" for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+앱 import 시간 리포트 (시작 시간 회귀 검사)
+
+services/backend-core 에서 실행:
+    python -m benchmarks.import_time                          # 요약 출력
+    python -m benchmarks.import_time --output import.json     # JSON 저장
+    python -m benchmarks.import_time --baseline import.json   # 총 시간이 threshold 이상 늘면 exit 1
+
+`python -X importtime -c "import app.main"` 를 새 프로세스에서 실행해 측정하며,
+무거운 모듈(--forbid, 기본 torch/openai/pptx/pdfplumber/tkinter)이 시작 시 import되면 실패합니다.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+DEFAULT_TARGET = "app.main"
+DEFAULT_FORBID = ("torch", "openai", "pptx", "pdfplumber", "tkinter", "ultralytics")
+DEFAULT_THRESHOLD = 0.20
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(target: str = DEFAULT_TARGET) -> Tuple[float, List[Tuple[str, float, float, int]]]:
+    """
+    새 인터프리터에서 target import 시간 측정
+
+    Returns:
+        (전체 wall 초, [(module, self 초, cumulative 초, depth)])
+    """
+    code = f"import time; t = time.perf_counter(); import {target}; print(time.perf_counter() - t)"
+    env = dict(os.environ, PYTHONPATH=_BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=_BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-15:])
+        raise RuntimeError(f"import {target} failed:\n{tail}")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us) / 1e6, int(cumulative_us) / 1e6, len(indent) // 2))
+    return float(proc.stdout.strip().splitlines()[-1]), entries
+
+
+def build_report(target: str, repeat: int, forbid) -> dict:
+    runs = [measure(target) for _ in range(repeat)]
+    # 가장 빠른 실행 기준 (디스크 캐시 등 노이즈 제거)
+    total, entries = min(runs, key=lambda r: r[0])
+
+    # 최상위 패키지별 self 시간 합계 (중첩 import 중복 집계 없음)
+    by_package: Dict[str, float] = {}
+    for module, self_seconds, _, _ in entries:
+        package = module.split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + self_seconds
+
+    loaded = {module for module, *_ in entries}
+    forbidden_loaded = sorted(
+        name for name in forbid if any(m == name or m.startswith(name + ".") for m in loaded)
+    )
+
+    return {
+        "target": target,
+        "python": sys.version.split()[0],
+        "total_seconds": round(total, 4),
+        "runs": [round(r[0], 4) for r in runs],
+        "module_count": len(entries),
+        "by_package": {k: round(v, 4) for k, v in sorted(by_package.items(), key=lambda kv: -kv[1])},
+        "slowest_modules": [
+            {"module": m, "self_seconds": round(s, 4), "cumulative_seconds": round(c, 4)}
+            for m, s, c, _ in sorted(entries, key=lambda e: -e[1])[:25]
+        ],
+        "forbidden_loaded": forbidden_loaded,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Application import-time report")
+    parser.add_argument("--target", default=DEFAULT_TARGET)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="출력할 패키지 수")
+    parser.add_argument("--forbid", default=",".join(DEFAULT_FORBID),
+                        help="시작 시 import되면 안 되는 모듈 (쉼표 구분, 빈 문자열이면 검사 안 함)")
+    parser.add_argument("--output", default="")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="baseline 대비 허용 증가율 (기본 0.20)")
+    args = parser.parse_args(argv)
+
+    forbid = [m.strip() for m in args.forbid.split(",") if m.strip()]
+    report = build_report(args.target, args.repeat, forbid)
+
+    print(f"import {report['target']}: {report['total_seconds']:.3f}s "
+          f"(runs: {', '.join(f'{r:.3f}' for r in report['runs'])}, {report['module_count']} modules)")
+    for package, seconds in list(report["by_package"].items())[:args.top]:
+        print(f"  {package:<30} {seconds:8.3f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    failed = False
+    if report["forbidden_loaded"]:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(report['forbidden_loaded'])}")
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        change = report["total_seconds"] / baseline["total_seconds"] - 1
+        status = "REGRESSION" if change > args.threshold else "OK"
+        print(f"{status}: {baseline['total_seconds']:.3f}s → {report['total_seconds']:.3f}s "
+              f"({change * 100:+.1f}%, limit {args.threshold * 100:.0f}%)")
+        failed = failed or change > args.threshold
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
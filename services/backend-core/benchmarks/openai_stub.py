@@ -0,0 +1,117 @@
+"""
+OpenAI Chat Completions stub 서버 (RCA 동시성 / rate limit / 재시도 테스트용)
+
+services/backend-core 에서 실행:
+    python -m benchmarks.openai_stub --port 8089 --latency 1.5 --rpm 30 --error-rate 0.1
+
+백엔드 설정:
+    OPENAI_API_KEY=stub
+    OPENAI_BASE_URL=http://localhost:8089/v1
+
+- --latency / --jitter: 응답 지연 (초)
+- --rpm: 서버 측 분당 요청 제한 (초과 시 429 + retry-after)
+- --error-rate: 무작위 500 응답 비율
+- GET /stats: 요청 수 / 429 / 500 / 최대 동시 요청 수
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import deque
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+STUB_ANALYSIS = {
+    "defect_detected": True,
+    "defect_type": "쇼트 (Short)",
+    "severity": "medium",
+    "confidence": 0.87,
+    "location": "이미지 중앙 배선 사이",
+    "analysis": "stub 응답입니다.",
+    "causes": ["도금 과다"],
+    "solutions": ["도금 조건 점검"],
+    "process_checks": [{"process": "도금", "check": "전류 밀도 확인"}],
+}
+
+
+def create_app(latency: float = 1.0, jitter: float = 0.5, rpm: int = 0, error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="OpenAI stub")
+    window = deque()
+    stats = {"requests": 0, "rate_limited": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        now = time.monotonic()
+        while window and now - window[0] >= 60:
+            window.popleft()
+        if rpm and len(window) >= rpm:
+            stats["rate_limited"] += 1
+            retry_after = max(0.1, window[0] + 60 - now)
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429, headers={"retry-after": f"{retry_after:.2f}"},
+            )
+        window.append(now)
+
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+        finally:
+            stats["in_flight"] -= 1
+
+        if random.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "stub server error", "type": "server_error"}}, status_code=500)
+
+        prompt_tokens = len(json.dumps(body)) // 4 // 100 + 1000
+        content = json.dumps(STUB_ANALYSIS, ensure_ascii=False)
+        completion_tokens = len(content) // 2
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"```json\n{content}\n```"},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI chat completions stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--rpm", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run(create_app(args.latency, args.jitter, args.rpm, args.error_rate), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
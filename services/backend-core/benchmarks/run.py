@@ -0,0 +1,162 @@
+"""
+벤치마크 실행
+
+services/backend-core 에서 실행:
+    python -m benchmarks.run                                  # 1k, 4k / 전체 그룹
+    python -m benchmarks.run --sizes 1k,4k,8k,20k --output results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.run --groups mask_ops,slicer --tile-sizes 256,512,1024 --overlaps 0,25,50
+    python -m benchmarks.run --baseline results/main.json     # 실행 후 바로 회귀 비교 (회귀 시 exit 1)
+
+결과 JSON은 케이스 키(group/name[params]@size)별 min / median / mean / stdev (ms)와
+실행 환경 정보(commit, CPU, 라이브러리 버전, OpenCV 스레드 수)를 담습니다.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+import PIL
+
+from . import synthetic
+from .cases import GROUPS, build_cases
+from .compare import DEFAULT_THRESHOLD, compare_results, load, parse_group_thresholds, print_report
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.check_output(["git", *args], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment_info(args) -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "opencv_threads": cv2.getNumThreads(),
+        "pillow": PIL.__version__,
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "sizes": args.sizes,
+    }
+
+
+def time_case(case, repeat: int, warmup: int) -> dict:
+    """warmup 후 repeat회 측정 (setup/teardown은 측정에서 제외)"""
+    timings = []
+    for i in range(warmup + repeat):
+        state = case.setup() if case.setup else None
+        gc.collect()
+        start = time.perf_counter()
+        if case.setup:
+            case.run(state)
+        else:
+            case.run()
+        elapsed = time.perf_counter() - start
+        if case.teardown:
+            case.teardown(state)
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+
+    return {
+        "group": case.group,
+        "name": case.name,
+        "size": case.size,
+        "params": case.params,
+        "n": len(timings),
+        "min_ms": round(min(timings), 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "stdev_ms": round(statistics.stdev(timings), 4) if len(timings) > 1 else 0.0,
+        "max_ms": round(max(timings), 4),
+    }
+
+
+def _int_list(value: str):
+    return tuple(int(v) for v in value.split(",") if v.strip())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="PCB extractor / mask / slicer benchmarks")
+    parser.add_argument("--sizes", default="1k,4k", help=f"이미지 크기 목록 ({','.join(synthetic.SIZES)})")
+    parser.add_argument("--groups", default=",".join(GROUPS), help=f"실행할 그룹 ({','.join(GROUPS)})")
+    parser.add_argument("--filter", default="", help="케이스 키에 이 문자열이 포함된 것만 실행")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--tile-sizes", type=_int_list, default=(512, 1024))
+    parser.add_argument("--overlaps", type=_int_list, default=(0, 25))
+    parser.add_argument("--threads", type=int, default=None, help="cv2.setNumThreads 값 (재현성 확보용)")
+    parser.add_argument("--no-size-limits", action="store_true",
+                        help="큰 이미지에서 매우 느린 케이스(grabcut > 1k)도 실행")
+    parser.add_argument("--output", default="", help="결과 JSON 경로 (기본: benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", default="", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--group-threshold", action="append", default=[])
+    args = parser.parse_args(argv)
+
+    sizes = synthetic.parse_sizes(args.sizes)
+    groups = [g.strip() for g in args.groups.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"Unknown group(s): {sorted(unknown)}")
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="pcb_bench_")
+    try:
+        for size in sizes:
+            print(f"== size {size} ({synthetic.SIZES[size]}px) ==", flush=True)
+            cases = build_cases(size, groups, workdir, respect_limits=not args.no_size_limits,
+                                tile_sizes=args.tile_sizes, overlaps=args.overlaps)
+            for case in cases:
+                if args.filter and args.filter not in case.key:
+                    continue
+                result = time_case(case, args.repeat, args.warmup)
+                results[case.key] = result
+                print(f"  {case.key:<60} median {result['median_ms']:>10.3f} ms  "
+                      f"(min {result['min_ms']:.3f}, stdev {result['stdev_ms']:.3f})", flush=True)
+            # 큰 이미지 캐시 해제
+            synthetic.pcb_image.cache_clear()
+            synthetic.defect_mask.cache_clear()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"meta": environment_info(args), "results": results}
+    output = args.output
+    if not output:
+        commit = (report["meta"]["git_commit"] or "local")[:10]
+        output = os.path.join(os.path.dirname(__file__), "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        rows = compare_results(load(args.baseline), report, threshold=args.threshold,
+                               group_thresholds=parse_group_thresholds(args.group_threshold))
+        print_report(rows)
+        return 1 if any(r["status"] == "regression" for r in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+합성 PCB 이미지 생성
+고정 seed로 항상 같은 이미지를 만들어 커밋 간 결과 비교가 가능하도록 함
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+
+# 이름 → 긴 변 픽셀 수
+SIZES: Dict[str, int] = {
+    "1k": 1024,
+    "4k": 4096,
+    "8k": 8192,
+    "20k": 20480,
+}
+
+SEED = 20240601
+
+# BGR
+_SUBSTRATE = (40, 90, 30)
+_COPPER = (60, 150, 200)
+_PAD = (170, 190, 200)
+_DRILL = (20, 20, 20)
+
+
+def parse_sizes(spec: str) -> List[str]:
+    """'1k,4k' → ['1k', '4k']"""
+    names = [s.strip().lower() for s in spec.split(",") if s.strip()]
+    unknown = [n for n in names if n not in SIZES]
+    if unknown:
+        raise ValueError(f"Unknown size(s): {unknown} (available: {list(SIZES)})")
+    return names
+
+
+@lru_cache(maxsize=2)
+def pcb_image(size: str) -> np.ndarray:
+    """
+    PCB 유사 BGR 이미지 (기판 + 배선 + 패드 + via + 불량 blob/노이즈)
+
+    크기에 비례해 배선/패드 수를 늘려 feature 밀도를 일정하게 유지합니다.
+    """
+    side = SIZES[size]
+    rng = np.random.default_rng(SEED)
+    image = np.empty((side, side, 3), np.uint8)
+    image[:] = _SUBSTRATE
+
+    scale = side / 1024
+    density = max(1, int(scale * scale))
+    trace_width = max(2, int(6 * scale ** 0.5))
+
+    # 배선 (수평/수직 직교 경로)
+    for _ in range(60 * density):
+        x, y = rng.integers(0, side, 2)
+        for _ in range(rng.integers(2, 5)):
+            if rng.random() < 0.5:
+                nx, ny = int(np.clip(x + rng.integers(-200, 200) * scale, 0, side - 1)), y
+            else:
+                nx, ny = x, int(np.clip(y + rng.integers(-200, 200) * scale, 0, side - 1))
+            cv2.line(image, (int(x), int(y)), (int(nx), int(ny)), _COPPER, trace_width)
+            x, y = nx, ny
+
+    # 패드 / via
+    for _ in range(120 * density):
+        cx, cy = (int(v) for v in rng.integers(0, side, 2))
+        r = int(rng.integers(4, 14) * scale ** 0.5)
+        if rng.random() < 0.5:
+            cv2.rectangle(image, (cx - r, cy - r), (cx + r, cy + r), _PAD, -1)
+        else:
+            cv2.circle(image, (cx, cy), r, _PAD, -1)
+            cv2.circle(image, (cx, cy), max(1, r // 3), _DRILL, -1)
+
+    # 불량 (short blob / scratch)
+    for cx, cy, r in defect_regions(size):
+        cv2.circle(image, (cx, cy), r, _COPPER, -1)
+        cv2.line(image, (cx - 2 * r, cy - r), (cx + 2 * r, cy + r), _DRILL, max(1, r // 6))
+
+    # 센서 노이즈 (20K 이미지에서 int16 전체 복사를 피하기 위해 행 블록 단위)
+    for y in range(0, side, 1024):
+        block = image[y:y + 1024]
+        noise = rng.integers(-8, 9, block.shape[:2] + (1,), dtype=np.int16)
+        block[:] = np.clip(block.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    return image
+
+
+def defect_regions(size: str, count: int = 8) -> List[Tuple[int, int, int]]:
+    """불량 위치 목록 [(cx, cy, r)] — 첫 번째는 항상 이미지 중앙"""
+    side = SIZES[size]
+    rng = np.random.default_rng(SEED + 1)
+    r = max(8, side // 80)
+    regions = [(side // 2, side // 2, r)]
+    for _ in range(count - 1):
+        cx, cy = (int(v) for v in rng.integers(4 * r, side - 4 * r, 2))
+        regions.append((cx, cy, int(r * rng.uniform(0.5, 1.5))))
+    return regions
+
+
+def defect_box(size: str, box: int = 256) -> Tuple[int, int, int, int]:
+    """중앙 불량을 감싸는 (x, y, w, h) 박스 — BoxAutoExtractor 입력용"""
+    side = SIZES[size]
+    box = min(box, side)
+    return side // 2 - box // 2, side // 2 - box // 2, box, box
+
+
+@lru_cache(maxsize=2)
+def defect_mask(size: str) -> np.ndarray:
+    """불량 영역 이진 마스크 (uint8, 0/255) + 작은 노이즈 점 / 구멍"""
+    side = SIZES[size]
+    rng = np.random.default_rng(SEED + 2)
+    mask = np.zeros((side, side), np.uint8)
+    for cx, cy, r in defect_regions(size, count=32):
+        cv2.ellipse(mask, (cx, cy), (r, int(r * 0.6)), int(rng.integers(0, 180)), 0, 360, 255, -1)
+        cv2.circle(mask, (cx, cy), max(1, r // 5), 0, -1)
+    ys, xs = rng.integers(0, side, (2, 200 * max(1, side // 1024)))
+    mask[ys, xs] = 255
+    return mask
+
+
+def polygon_points(size: str, n_points: int = 2000) -> List[Tuple[int, int]]:
+    """중앙 불량을 감싸는 불규칙 폴리곤 (수동 드로잉 흉내)"""
+    side = SIZES[size]
+    rng = np.random.default_rng(SEED + 3)
+    radius = side / 6
+    angles = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
+    radii = radius * (1 + 0.15 * np.sin(angles * 7) + rng.uniform(-0.03, 0.03, n_points))
+    xs = np.clip(side / 2 + radii * np.cos(angles), 0, side - 1).astype(int)
+    ys = np.clip(side / 2 + radii * np.sin(angles), 0, side - 1).astype(int)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def yolo_masks(count: int = 32, resolution: int = 640) -> np.ndarray:
+    """YOLO segmentation 출력과 같은 형태의 (N, H, W) float32 마스크"""
+    rng = np.random.default_rng(SEED + 4)
+    masks = np.zeros((count, resolution, resolution), np.float32)
+    for i in range(count):
+        cx, cy = (int(v) for v in rng.integers(40, resolution - 40, 2))
+        axes = (int(rng.integers(5, 40)), int(rng.integers(5, 40)))
+        cv2.ellipse(masks[i], (cx, cy), axes, int(rng.integers(0, 180)), 0, 360, 1.0, -1)
+    return masks
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# services/backend-core를 import 경로에 추가 (어느 디렉터리에서 pytest를 실행해도 app 패키지 사용)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,52 @@
+"""ImageSimilarityIndex 증분 갱신 — 늦게 commit된 낮은 id / 주기적 전체 재적재"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.schema import Base, RCAImageSignature
+from app.services.rca_search import ImageSimilarityIndex
+
+
+def _session_factory():
+    engine = create_engine("sqlite://").execution_options(schema_translate_map={"ai_spec_v2": None})
+    Base.metadata.create_all(engine, tables=[RCAImageSignature.__table__])
+    return sessionmaker(bind=engine)
+
+
+def _add(db, row_id, analysis_id, phash):
+    db.add(RCAImageSignature(id=row_id, analysis_id=analysis_id, phash=phash))
+    db.commit()
+
+
+def test_refresh_picks_up_lower_id_committed_later():
+    Session = _session_factory()
+    index = ImageSimilarityIndex()
+    with Session() as db:
+        _add(db, 1, "A-1", 0)
+        _add(db, 3, "A-3", 0b111)  # id 2는 아직 commit 전인 트랜잭션이 가진 상태
+        index.refresh(db)
+        assert len(index) == 2
+
+        _add(db, 2, "A-2", 0b1)
+        index.refresh(db)
+        assert len(index) == 3
+        assert [hit[0] for hit in index.search(0b1, limit=1)] == ["A-2"]
+
+        index.refresh(db)
+        assert len(index) == 3  # 이미 반영된 gap은 다시 추가되지 않음
+
+
+def test_expired_gap_is_dropped_and_full_reload_resyncs():
+    Session = _session_factory()
+    index = ImageSimilarityIndex(gap_ttl=0.0, full_reload_seconds=3600.0)
+    with Session() as db:
+        _add(db, 1, "A-1", 0)
+        _add(db, 3, "A-3", 0)
+        index.refresh(db)
+        _add(db, 2, "A-2", 0)
+        index.refresh(db)
+        assert len(index) == 2  # gap_ttl 경과 → rollback으로 간주
+
+        index.full_reload_seconds = 0.0
+        index.refresh(db)
+        assert len(index) == 3
@@ -0,0 +1,95 @@
+"""ImageLoader — 읽기 전에 evict된 캐시 파일 처리 / 이미지 주소 허용 목록"""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.image_store import (
+    LOAD_ERROR_MESSAGE, DiskLRUCache, FileSystemBackend, ImageAddressError, ImageLoader, describe_load_error
+)
+
+
+def _loader(tmp_path, max_bytes):
+    image = np.full((8, 8, 3), 200, dtype=np.uint8)
+    (tmp_path / "objects" / "bucket").mkdir(parents=True)
+    cv2.imwrite(str(tmp_path / "objects" / "bucket" / "a.png"), image)
+    backend = FileSystemBackend(str(tmp_path / "objects"))
+    return ImageLoader(lambda: backend, DiskLRUCache(str(tmp_path / "cache"), max_bytes), "bucket", threads=2)
+
+
+def test_refetches_when_cache_file_is_evicted_before_read(tmp_path, monkeypatch):
+    loader = _loader(tmp_path, max_bytes=1 << 20)
+    cached_path = loader._cached_path
+    evicted = []
+
+    def evict_once(ref):
+        # 다른 스레드가 _cached_path()와 _read_file() 사이에 evict한 상황
+        path = cached_path(ref)
+        if not evicted:
+            evicted.append(path)
+            loader.cache.clear()
+        return path
+
+    monkeypatch.setattr(loader, "_cached_path", evict_once)
+    image = loader.load("s3://bucket/a.png")
+    assert image.shape == (8, 8, 3)
+    assert loader.stats()["misses"] == 2
+    loader.close()
+
+
+def test_object_larger_than_cache_is_read_without_cache(tmp_path):
+    # 저장 직후 자기 자신이 evict되는 크기
+    loader = _loader(tmp_path, max_bytes=1)
+    assert loader.load("s3://bucket/a.png").shape == (8, 8, 3)
+    assert loader.cache.stats()["entries"] == 0
+    loader.close()
+
+
+def test_missing_object_is_not_retried(tmp_path, monkeypatch):
+    loader = _loader(tmp_path, max_bytes=1 << 20)
+    calls = []
+    fetch = loader.backend.fetch
+    monkeypatch.setattr(loader.backend, "fetch", lambda *a, **k: calls.append(a) or fetch(*a, **k))
+    try:
+        loader.load("s3://bucket/missing.png")
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("missing object must raise")
+    assert len(calls) == 1
+    loader.close()
+
+
+
+def test_only_configured_buckets_are_allowed_by_default(tmp_path):
+    loader = _loader(tmp_path, max_bytes=1 << 20)
+    secret = tmp_path / "secret.png"
+    secret.write_bytes((tmp_path / "objects" / "bucket" / "a.png").read_bytes())
+    for url in (str(secret), f"file://{secret}", "http://127.0.0.1:8080/a.png", "s3://other/a.png", ""):
+        with pytest.raises(ImageAddressError):
+            loader.load(url)
+    assert loader.load("a.png").shape == (8, 8, 3)
+    assert loader.prefetch([str(secret), "s3://other/a.png"]) == []
+    loader.close()
+
+
+def test_local_roots_and_http_hosts_are_opt_in(tmp_path):
+    backend = FileSystemBackend(str(tmp_path))
+    loader = ImageLoader(lambda: backend, DiskLRUCache(str(tmp_path / "cache"), 0), "bucket",
+                         local_roots=[str(tmp_path / "images")], http_hosts=["images.example.com"])
+    allowed = tmp_path / "images" / "a.png"
+    allowed.parent.mkdir()
+    cv2.imwrite(str(allowed), np.zeros((4, 4, 3), dtype=np.uint8))
+    assert loader.load(str(allowed)).shape == (4, 4, 3)
+    with pytest.raises(ImageAddressError):
+        loader.resolve(str(tmp_path / "images" / ".." / "secret.png"))  # root 밖으로 나가는 경로
+    assert loader.resolve("https://images.example.com/a.png") == "https://images.example.com/a.png"
+    with pytest.raises(ImageAddressError):
+        loader.resolve("https://images.example.com.evil.test/a.png")
+    loader.close()
+
+
+def test_load_errors_are_reported_without_details():
+    assert describe_load_error(FileNotFoundError("/etc/shadow")) == LOAD_ERROR_MESSAGE
+    assert describe_load_error(ConnectionRefusedError("10.0.0.5:6379")) == LOAD_ERROR_MESSAGE
+    assert describe_load_error(ImageAddressError("허용되지 않은 bucket입니다: other")) == "허용되지 않은 bucket입니다: other"
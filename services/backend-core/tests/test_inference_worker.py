@@ -0,0 +1,168 @@
+"""추론 워커 — 이미지 로드 오류 분류 / SQLite queue 전체 경로 / micro-batching / 모델 backend"""
+
+import socket
+import threading
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.database.schema import InferenceDetection, InferenceJob, InferenceJobItem, InferenceLotSummary, InferenceResult
+from app.services import inference_batcher
+from app.services.image_store import DiskLRUCache, FileSystemBackend, ImageLoader, is_transient_error
+from app.services.inference_batcher import MicroBatcher
+from app.services.inference_jobs import (
+    ClaimedItem, InferenceJobStore, InferenceWorker, create_local_session_factory
+)
+from app.services.inference_model import ContourInferenceModel, create_model
+from app.services.model_registry import ModelRegistry
+from app.services.spec_judgment import SpecJudge
+
+
+class _FailingLoader:
+    def __init__(self, errors):
+        self.errors = errors
+
+    def load_many(self, urls):
+        return [self.errors[url] for url in urls]
+
+
+def test_transient_load_errors_are_retried():
+    errors = {
+        "timeout": socket.timeout("timed out"),
+        "reset": ConnectionResetError("reset"),
+        "http-503": urllib.error.HTTPError("http://x", 503, "unavailable", {}, None),
+        "decode": ValueError("이미지를 디코딩할 수 없습니다"),
+        "missing": FileNotFoundError("missing.png"),
+        "http-404": urllib.error.HTTPError("http://x", 404, "not found", {}, None),
+    }
+    items = [ClaimedItem(id=i, job_pk=1, job_id="J", seq=i, image_url=url, attempts=1)
+             for i, url in enumerate(errors)]
+    worker = InferenceWorker(store=None, models=object(), loader=_FailingLoader(errors))
+
+    outcomes, model_key = worker.process(items)
+
+    assert model_key is None
+    assert {outcome.item.image_url: outcome.status for outcome in outcomes} == {
+        "timeout": "retry", "reset": "retry", "http-503": "retry",
+        "decode": "failed", "missing": "failed", "http-404": "failed",
+    }
+
+
+def test_unknown_errors_are_retried():
+    assert is_transient_error(RuntimeError("boom"))
+    assert not is_transient_error(ValueError("잘못된 object 주소입니다: s3://"))
+
+
+# ========== SQLite queue + filesystem backend 전체 경로 ==========
+
+def _write_image(path, squares):
+    image = np.full((64, 64, 3), 230, dtype=np.uint8)
+    for x, y in squares:
+        cv2.rectangle(image, (x, y), (x + 9, y + 9), (20, 20, 20), -1)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cv2.imwrite(str(path), image)
+
+
+def test_run_once_stores_results_detections_and_lot_summary(tmp_path):
+    session_factory = create_local_session_factory(str(tmp_path / "queue.db"))
+    store = InferenceJobStore(session_factory, lease_seconds=60, max_attempts=3)
+    _write_image(tmp_path / "objects" / "bucket" / "L1" / "0.png", [(5, 5), (40, 40)])
+    _write_image(tmp_path / "objects" / "bucket" / "L1" / "1.png", [(20, 20)])
+    backend = FileSystemBackend(str(tmp_path / "objects"))
+    loader = ImageLoader(lambda: backend, DiskLRUCache(str(tmp_path / "cache"), 1 << 20), "bucket", threads=2)
+    models = ModelRegistry(session_factory, factory=lambda spec: ContourInferenceModel(version="cv"))
+    worker = InferenceWorker(store, models, batch_size=8, loader=loader, judge=SpecJudge(session_factory))
+
+    store.create_job("J1", "batch", ["L1/0.png", "L1/1.png", "L1/missing.png"], lot_id="L1", bundle_id="B1")
+    try:
+        assert worker.run_once() == 3
+        assert worker.run_once() == 0
+    finally:
+        models.close()
+        loader.close()
+        inference_batcher.close_all()
+
+    with session_factory() as db:
+        items = {item.seq: item for item in db.execute(select(InferenceJobItem)).scalars()}
+        assert [items[seq].status for seq in range(3)] == ["done", "done", "failed"]
+        assert items[2].error == "이미지를 불러올 수 없습니다"  # 경로 / 원래 오류 문구는 결과에 남기지 않음
+        results = db.execute(select(InferenceResult).order_by(InferenceResult.seq)).scalars().all()
+        assert [(r.seq, r.defect_count, r.lot_id, r.bundle_id) for r in results] == [(0, 2, "L1", "B1"), (1, 1, "L1", "B1")]
+        assert db.execute(select(func.count()).select_from(InferenceDetection)).scalar() == 3
+        job = db.execute(select(InferenceJob)).scalar_one()
+        assert (job.status, job.done_items, job.failed_items) == ("partial", 2, 1)
+        summaries = {row.scope: row for row in db.execute(select(InferenceLotSummary)).scalars()}
+        assert set(summaries) == {"lot", "bundle"}
+        assert all((row.images, row.defects) == (2, 3) for row in summaries.values())
+
+
+def test_micro_batcher_merges_concurrent_requests():
+    batch_sizes = []
+    batcher = MicroBatcher(lambda images: batch_sizes.append(len(images)) or [[len(images)]] * len(images),
+                           name="test", max_batch_size=8, max_wait_ms=200)
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    start = threading.Barrier(4)
+
+    def request(count):
+        start.wait()
+        return batcher.predict([image] * count, timeout=5)
+
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(request, [1, 2, 1, 3]))
+    finally:
+        batcher.close()
+
+    assert batch_sizes == [7]
+    assert [len(result) for result in results] == [1, 2, 1, 3]
+    assert batcher.stats()["batches"] == 1
+
+
+# ========== 모델 backend ==========
+
+def test_missing_weights_fail_instead_of_falling_back_to_contour(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_PATH", str(tmp_path / "models"))
+    for backend in ("auto", "yolo"):
+        with pytest.raises(FileNotFoundError):
+            create_model("pcb_detector_v1", backend, "v3")
+    # 이전 기본값 auto도 yolo로 처리
+    monkeypatch.setattr(settings, "INFERENCE_MODEL_BACKEND", "auto")
+    with pytest.raises(FileNotFoundError):
+        create_model("pcb_detector_v1", "auto")
+
+    monkeypatch.setattr(settings, "INFERENCE_MODEL_BACKEND", "contour")
+    assert isinstance(create_model("pcb_detector_v1", "auto"), ContourInferenceModel)
+    assert isinstance(create_model("pcb_detector_v1", "contour"), ContourInferenceModel)
+
+
+def test_items_fail_visibly_when_model_weights_are_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_PATH", str(tmp_path / "models"))
+    monkeypatch.setattr(settings, "INFERENCE_MODEL_BACKEND", "yolo")
+    session_factory = create_local_session_factory(str(tmp_path / "queue.db"))
+    store = InferenceJobStore(session_factory, lease_seconds=60, max_attempts=2)
+    _write_image(tmp_path / "objects" / "bucket" / "L1" / "0.png", [(5, 5)])
+    backend = FileSystemBackend(str(tmp_path / "objects"))
+    loader = ImageLoader(lambda: backend, DiskLRUCache(str(tmp_path / "cache"), 0), "bucket", threads=1)
+    models = ModelRegistry(session_factory)
+    worker = InferenceWorker(store, models, loader=loader, judge=SpecJudge(session_factory))
+
+    store.create_job("J1", "single", ["L1/0.png"], lot_id="L1", bundle_id="B1", model_key="pcb_detector_v1:v3")
+    try:
+        assert worker.run_once() == 1  # 재시도 (queued)
+        assert worker.run_once() == 1  # 시도 횟수 초과 → failed
+        assert worker.run_once() == 0
+    finally:
+        models.close()
+        loader.close()
+
+    with session_factory() as db:
+        item = db.execute(select(InferenceJobItem)).scalar_one()
+        assert (item.status, item.attempts) == ("failed", 2)
+        assert db.execute(select(func.count()).select_from(InferenceResult)).scalar() == 0
+        assert db.execute(select(func.count()).select_from(InferenceLotSummary)).scalar() == 0
+        assert db.execute(select(InferenceJob.status)).scalar_one() == "failed"
@@ -0,0 +1,52 @@
+"""lot / bundle 집계 — lot마다 다시 쓰이는 bundle id"""
+
+from datetime import datetime
+
+from app.services.inference_jobs import ClaimedItem, InferenceJobStore, create_local_session_factory
+from app.services.inference_results import write_results
+from app.services.lot_summary import LotSummaryService
+
+
+def _store_results(session_factory, entries):
+    with session_factory() as db:
+        write_results(db, entries, datetime.now())
+        db.commit()
+
+
+def _entry(item_id, lot_id, bundle_id, judgment, detections):
+    item = ClaimedItem(id=item_id, job_pk=item_id, job_id=f"J{item_id}", seq=0, image_url=f"{item_id}.png",
+                       attempts=1, lot_id=lot_id, bundle_id=bundle_id)
+    summary = {"judgment": judgment, "imageSize": [64, 64], "model": "contour:cv",
+               "ngCount": sum(d.get("judgment") == "NG" for d in detections)}
+    return item, summary, detections
+
+
+def _detection(class_name, judgment="OK"):
+    return {"class_id": 0, "class_name": class_name, "score": 0.5, "bbox": [0, 0, 1, 1], "area": 1.0,
+            "judgment": judgment}
+
+
+def test_same_bundle_id_in_two_lots_is_kept_apart(tmp_path):
+    session_factory = create_local_session_factory(str(tmp_path / "queue.db"))
+    store = InferenceJobStore(session_factory)
+    store.create_job("J1", "single", ["1.png"], lot_id="L1", bundle_id="B1")
+    store.create_job("J2", "single", ["2.png"], lot_id="L2", bundle_id="B1")
+    _store_results(session_factory, [
+        _entry(1, "L1", "B1", "NG", [_detection("scratch", "NG")]),
+        _entry(2, "L2", "B1", "OK", [_detection("dust"), _detection("dust")]),
+    ])
+    service = LotSummaryService(session_factory)
+
+    first = service.get_summary("bundle", "B1", lot_id="L1")
+    second = service.get_summary("bundle", "B1", lot_id="L2")
+    assert (first["lotId"], first["images"], first["ngImages"], first["defects"]) == ("L1", 1, 1, 1)
+    assert (second["lotId"], second["images"], second["ngImages"], second["defects"]) == ("L2", 1, 0, 2)
+    assert [d["className"] for d in first["defectsByType"]] == ["scratch"]
+    assert first["progress"]["jobs"] == 1 and second["progress"]["jobs"] == 1
+    assert [b["id"] for b in service.list_bundles("L1")] == ["B1"]
+
+    # L1 재계산은 L2의 같은 bundle id 집계를 건드리지 않음
+    rebuilt = service.rebuild_lot("L1")
+    assert rebuilt["images"] == 1
+    assert service.get_summary("bundle", "B1", lot_id="L1")["defects"] == 1
+    assert service.get_summary("bundle", "B1", lot_id="L2")["defects"] == 2
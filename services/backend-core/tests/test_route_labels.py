@@ -0,0 +1,75 @@
+"""
+라우트 라벨 (Prometheus metrics / profiler 느린 요청 기록)
+
+include_router로 등록된 라우트는 router 기준 상대 경로가 아니라 전체 경로 템플릿으로 기록되어야 함
+"""
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.profiler import ProfilerMiddleware, RecentRequests
+
+
+def _build_app():
+    spec = APIRouter()
+    rca = APIRouter()
+
+    @spec.get("/stats")
+    def spec_stats():
+        return {"router": "spec"}
+
+    @spec.get("/spec/{spec_id}")
+    def spec_detail(spec_id: int):
+        return {"id": spec_id}
+
+    @rca.get("/stats")
+    def rca_stats():
+        return {"router": "rca"}
+
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(spec, prefix="/api/v1/test-spec")
+    app.include_router(rca, prefix="/api/v1/test-rca")
+    return app
+
+
+def _observed_routes():
+    routes = {}
+    for family in metrics.HTTP_REQUEST_DURATION.collect():
+        for sample in family.samples:
+            if sample.name.endswith("_count"):
+                route = sample.labels["route"]
+                routes[route] = routes.get(route, 0) + sample.value
+    return routes
+
+
+def test_metrics_label_uses_full_template_for_each_router():
+    client = TestClient(_build_app())
+    assert client.get("/api/v1/test-spec/stats").json() == {"router": "spec"}
+    assert client.get("/api/v1/test-rca/stats").json() == {"router": "rca"}
+    client.get("/api/v1/test-rca/stats")
+    client.get("/api/v1/test-spec/spec/1")
+    client.get("/api/v1/test-spec/spec/2")
+
+    routes = _observed_routes()
+    assert routes["/api/v1/test-spec/stats"] == 1
+    assert routes["/api/v1/test-rca/stats"] == 2
+    assert routes["/api/v1/test-spec/spec/{spec_id}"] == 2
+    assert "/stats" not in routes
+    assert "/spec/{spec_id}" not in routes
+
+
+def test_profiler_route_filter_matches_full_template():
+    recent = RecentRequests(size=10)
+    profiled = ProfilerMiddleware(_build_app(), sample_rate=0.0)
+    profiled.recent = recent
+    client = TestClient(profiled)
+
+    client.get("/api/v1/test-spec/stats")
+    client.get("/api/v1/test-rca/stats")
+    client.get("/api/v1/test-spec/spec/7")
+
+    assert [r["path"] for r in recent.slowest(route="/api/v1/test-rca/stats")] == ["/api/v1/test-rca/stats"]
+    assert [r["path"] for r in recent.slowest(route="/api/v1/test-spec/spec/{spec_id}")] == ["/api/v1/test-spec/spec/7"]
+    assert recent.slowest(route="/stats") == []
@@ -0,0 +1,39 @@
+"""TAS 이관 zip 펼치기 — 항목 수 / 압축 해제 크기 제한 (zip bomb)"""
+
+import zipfile
+
+from app.api.v1.tas.migration import expand_archives
+from app.core.config import settings
+
+
+def _zip(path, members):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+def test_expands_supported_members(tmp_path):
+    archive = _zip(tmp_path / "a.zip", {"b.pdf": b"%PDF", "a.pptx": b"PK", "notes.txt": b"x", "~$a.pptx": b"x"})
+    expanded, errors = expand_archives([("a.zip", archive)], tmp_path)
+    assert errors == []
+    assert [name for name, _ in expanded] == ["a.zip/a.pptx", "a.zip/b.pdf"]
+
+
+def test_rejects_archive_with_too_many_members(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TAS_MIGRATION_MAX_ARCHIVE_MEMBERS", 2)
+    archive = _zip(tmp_path / "a.zip", {f"{i}.pdf": b"%PDF" for i in range(3)})
+    expanded, errors = expand_archives([("a.zip", archive)], tmp_path)
+    assert expanded == []
+    assert len(errors) == 1 and "항목이 너무 많습니다" in errors[0]
+
+
+def test_stops_at_uncompressed_size_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TAS_MIGRATION_MAX_UNCOMPRESSED_MB", 1)
+    # 600KB씩 → 두 번째 항목에서 요청 전체 1MB 초과 (압축 후에는 수 KB)
+    members = {"a.pdf": b"\0" * 600 * 1024, "b.pdf": b"\0" * 600 * 1024}
+    first = _zip(tmp_path / "first.zip", members)
+    second = _zip(tmp_path / "second.zip", {"c.pdf": b"%PDF"})
+    expanded, errors = expand_archives([("first.zip", first), ("second.zip", second)], tmp_path)
+    assert [name for name, _ in expanded] == ["first.zip/a.pdf", "second.zip/c.pdf"]
+    assert len(errors) == 1 and "b.pdf" in errors[0]
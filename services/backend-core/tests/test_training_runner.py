@@ -0,0 +1,175 @@
+"""
+학습 runner — SQLite 작업 저장소 + tiny 모드로 완료 / 중단 / SSE / CLI 전체 경로
+
+학습 프로세스는 spawn으로 시작하므로 부모의 __main__ 모듈을 다시 import합니다.
+pytest 안에서는 안전하고, CLI(python -m app.services.training_jobs)는 __main__ guard가 있어야
+자식 프로세스가 runner를 다시 시작하지 않습니다 (test_cli_runner_with_sqlite).
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import training
+from app.core.config import settings
+from app.services import training_jobs as training_jobs_module
+from app.services.training_jobs import TrainingJobStore, TrainingRunner, create_local_session_factory
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TINY_CONFIG = {"samples": 256, "features": 8}
+
+
+def _wait(predicate, timeout: float = 60.0, interval: float = 0.05):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(interval)
+    raise AssertionError("timed out")
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    # 학습 프로세스는 환경 변수에서 settings를 다시 읽음
+    path = tmp_path / "runs"
+    monkeypatch.setenv("TRAINING_OUTPUT_DIR", str(path))
+    monkeypatch.setattr(settings, "TRAINING_OUTPUT_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TrainingJobStore(create_local_session_factory(str(tmp_path / "training.db")))
+
+
+@pytest.fixture
+def runner(store, output_dir):
+    runner = TrainingRunner(store, poll_interval=0.05, cancel_grace_seconds=30)
+    runner.start()
+    yield runner
+    runner.stop()
+
+
+def _status(store, job_id, *statuses):
+    job = store.get(job_id)
+    return job if job["status"] in statuses else None
+
+
+def test_job_runs_to_completion(store, runner, output_dir):
+    store.create("T1", "tiny-model", "ds-1", "tiny", TINY_CONFIG, 3)
+    runner.wake()
+
+    job = _wait(lambda: _status(store, "T1", "completed", "failed"))
+    assert job["status"] == "completed", job["error"]
+    assert (job["currentEpoch"], job["progress"]) == (3, 1.0)
+    assert [epoch["epoch"] for epoch in store.epochs("T1")] == [1, 2, 3]
+    assert Path(job["result"]["weights"]) == (output_dir / "T1" / "tiny.npz").resolve()
+    assert Path(job["result"]["weights"]).exists()
+
+
+def test_running_job_is_cancelled_at_epoch_boundary(store, runner):
+    store.create("T2", "tiny-model", "ds-1", "tiny", {**TINY_CONFIG, "epochSleep": 0.2}, 100)
+    runner.wake()
+    _wait(lambda: store.get("T2")["currentEpoch"] >= 1)
+
+    assert store.request_cancel("T2")["status"] == "stopping"
+    runner.wake()
+    job = _wait(lambda: _status(store, "T2", "cancelled", "completed", "failed"))
+    assert job["status"] == "cancelled"
+    assert 1 <= job["currentEpoch"] < 100
+    assert job["result"]["bestEpoch"] >= 1
+    assert store.request_cancel("T2")["status"] == "cancelled"  # 이미 종료된 작업은 그대로
+
+
+def test_sse_streams_progress_until_end(store, runner, monkeypatch):
+    monkeypatch.setattr(training, "training_jobs", store)
+    monkeypatch.setattr(training, "training_runner", runner)
+    monkeypatch.setattr(settings, "TRAINING_POLL_INTERVAL", 0.05)
+    app = FastAPI()
+    app.include_router(training.router)
+
+    with TestClient(app) as client:
+        response = client.post("/training/start", json={
+            "jobId": "T3", "modelName": "tiny-model", "datasetId": "ds-1", "mode": "tiny",
+            "config": {**TINY_CONFIG, "epochs": 3},
+        })
+        assert response.status_code == 200 and response.json()["status"] == "queued"
+
+        events = []
+        with client.stream("GET", "/training/T3/events") as stream:
+            assert stream.headers["content-type"].startswith("text/event-stream")
+            event = {}
+            for line in stream.iter_lines():
+                if line.startswith(("id", "event", "data")):
+                    key, _, value = line.partition(": ")
+                    event[key] = value
+                elif not line and event:
+                    events.append(event)
+                    event = {}
+
+        progress = [e for e in events if e["event"] == "progress"]
+        assert [e["id"] for e in progress] == ["1", "2", "3"]
+        assert json.loads(progress[-1]["data"])["totalEpochs"] == 3
+        assert events[-1]["event"] == "end" and json.loads(events[-1]["data"])["status"] == "completed"
+
+        # Last-Event-ID 이후만 다시 전송
+        with client.stream("GET", "/training/T3/events", headers={"Last-Event-ID": "2"}) as stream:
+            ids = [line for line in stream.iter_lines() if line.startswith("id: ")]
+        assert ids == ["id: 3"]
+
+
+def test_cli_runner_with_sqlite(tmp_path, output_dir):
+    database = str(tmp_path / "training.db")
+    store = TrainingJobStore(create_local_session_factory(database))
+    store.create("T4", "tiny-model", "ds-1", "tiny", TINY_CONFIG, 2)
+
+    env = {**os.environ, "TRAINING_POLL_INTERVAL": "0.1"}
+    process = subprocess.Popen([sys.executable, "-m", "app.services.training_jobs", "--sqlite", database],
+                               cwd=BACKEND_DIR, env=env)
+    try:
+        job = _wait(lambda: _status(store, "T4", "completed", "failed"))
+    finally:
+        process.send_signal(signal.SIGINT)
+        process.wait(30)
+    assert job["status"] == "completed", job["error"]
+    assert job["runnerId"].endswith(f":{process.pid}")
+
+
+class _Messages:
+    """학습 프로세스 → runner 메시지 (마지막 epoch 기록 시 중단 요청을 흉내)"""
+
+    def __init__(self, cancel_event, cancel_at_epoch):
+        self.cancel_event, self.cancel_at_epoch, self.items = cancel_event, cancel_at_epoch, []
+
+    def put(self, message):
+        self.items.append(message)
+        if message[0] == "epoch" and message[2]["epoch"] == self.cancel_at_epoch:
+            self.cancel_event.set()
+
+
+@pytest.mark.parametrize("cancel_at_epoch, status", [(3, "completed"), (1, "cancelled")])
+def test_final_status_follows_whether_training_stopped_early(output_dir, monkeypatch, cancel_at_epoch, status):
+    # 리소스 제한(nice / 환경 변수)은 테스트 프로세스에 적용하지 않음
+    monkeypatch.setattr(training_jobs_module, "_apply_limits", lambda limits: "cpu")
+    cancel_event = threading.Event()
+    messages = _Messages(cancel_event, cancel_at_epoch)
+    job = {"job_id": f"T5-{status}", "model_name": "tiny-model", "dataset_id": "ds-1", "mode": "tiny",
+           "config": TINY_CONFIG, "total_epochs": 3}
+
+    training_jobs_module._train_process(job, messages, cancel_event, {})
+
+    kind, _, payload = messages.items[-1]
+    assert cancel_event.is_set()
+    assert kind == status
+    assert payload["result"]["stoppedEarly"] is (status == "cancelled")
+    assert len([m for m in messages.items if m[0] == "epoch"]) == (3 if status == "completed" else 1)